@@ -33,6 +33,9 @@ import os.path
 import logging
 import time
 import string
+import re
+import copy
+import functools
 
 import yaml
 try:
@@ -266,6 +269,160 @@ def check_conformer_energy(Vlist,path):
         logging.warning('the species corresponding to ' + str(os.path.basename(path)) + ' is different in energy from the lowest energy conformer by ' + "%0.2f" % Vdiff + ' kJ/mol. This can cause significant errors in your computed rate constants. ')
 
 
+################################################################################
+
+
+class LogFileIndex(object):
+    """
+    A byte-offset index of the lines in a quantum chemistry log file that
+    contain any of a given set of marker strings. The file is streamed once,
+    in large chunks, when the index is built; the log parsers then seek
+    straight to the lines they need instead of rescanning the whole file for
+    every quantity they load. Parsed results may be stored in `results` so
+    that repeated loads of the same file do not touch the disk at all.
+
+    =========================== ================================================
+    Attribute                   Description
+    =========================== ================================================
+    `path`                      The path of the indexed log file
+    `size`                      The size of the file in bytes when it was indexed
+    `mtime`                     The modification time of the file when it was indexed
+    `offsets`                   A dict of the sorted byte offsets of the lines containing each marker
+    `results`                   A dict of parsed results cached for this file
+    =========================== ================================================
+
+    Markers in `caseInsensitiveMarkers` are matched regardless of case.
+    """
+
+    chunkSize = 16 * 1024 * 1024
+
+    def __init__(self, path, markers, caseInsensitiveMarkers=()):
+        self.path = path
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.offsets = {}
+        self.results = {}
+        self.build(markers, caseInsensitiveMarkers)
+
+    def build(self, markers, caseInsensitiveMarkers=()):
+        """
+        Stream through the log file once, recording the byte offset of every
+        line that contains each of the given `markers`.
+        """
+        offsets = {}
+        groups = []
+        if markers:
+            pattern = re.compile('|'.join([re.escape(marker) for marker in markers]))
+            groups.append((pattern, [(marker, marker) for marker in markers], False))
+        if caseInsensitiveMarkers:
+            pattern = re.compile('|'.join([re.escape(marker) for marker in caseInsensitiveMarkers]), re.IGNORECASE)
+            groups.append((pattern, [(marker, marker.lower()) for marker in caseInsensitiveMarkers], True))
+        for pattern, group, ignoreCase in groups:
+            for marker, _ in group:
+                offsets[marker] = set()
+
+        with open(self.path, 'r') as f:
+            # `position` is the byte offset of the start of `chunk`, which
+            # always begins at the start of a line
+            position = 0
+            remainder = ''
+            while True:
+                data = f.read(self.chunkSize)
+                chunk = remainder + data
+                # Only search complete lines; the trailing partial line is
+                # carried over to the next chunk
+                end = len(chunk) if data == '' else chunk.rfind('\n') + 1
+                for pattern, group, ignoreCase in groups:
+                    lineEnd = 0
+                    for match in pattern.finditer(chunk, 0, end):
+                        if match.start() < lineEnd:
+                            # Another marker on a line we have already checked
+                            continue
+                        lineStart = chunk.rfind('\n', 0, match.start()) + 1
+                        lineEnd = chunk.find('\n', match.end(), end) + 1 or end
+                        line = chunk[lineStart:lineEnd]
+                        if ignoreCase:
+                            line = line.lower()
+                        for marker, text in group:
+                            if text in line:
+                                offsets[marker].add(position + lineStart)
+                if data == '':
+                    break
+                position += end
+                remainder = chunk[end:]
+
+        self.offsets = dict([(marker, sorted(lines)) for marker, lines in offsets.iteritems()])
+
+    def iterLines(self, markers):
+        """
+        Open the log file and yield ``(f, line)`` for each line containing
+        any of the given `markers`, in the order they appear in the file.
+        The open file `f` is positioned just after the yielded line, so the
+        caller may read on from it exactly as it would while scanning the
+        file line by line; lines consumed this way are not yielded again.
+        """
+        offsets = set()
+        for marker in markers:
+            offsets.update(self.offsets[marker])
+        with open(self.path, 'r') as f:
+            for offset in sorted(offsets):
+                if offset < f.tell():
+                    continue
+                f.seek(offset)
+                yield f, f.readline()
+
+    def openAt(self, offset):
+        """
+        Open the log file and return it positioned at byte `offset`.
+        """
+        f = open(self.path, 'r')
+        f.seek(offset)
+        return f
+
+
+# The indices of all log files parsed so far, keyed by absolute path and markers
+_logFileIndices = {}
+
+
+def getLogFileIndex(path, markers, caseInsensitiveMarkers=()):
+    """
+    Return the :class:`LogFileIndex` of the log file at `path` for the given
+    markers, building it on first access or whenever the file has changed on
+    disk since it was last indexed.
+    """
+    key = (os.path.abspath(path), tuple(markers), tuple(caseInsensitiveMarkers))
+    stat = os.stat(path)
+    index = _logFileIndices.get(key)
+    if index is None or index.size != stat.st_size or index.mtime != stat.st_mtime:
+        index = LogFileIndex(path, markers, caseInsensitiveMarkers)
+        _logFileIndices[key] = index
+    return index
+
+
+def cachedLogResult(method):
+    """
+    Decorate a ``load*()`` method of a log class so that its result is
+    cached in the :class:`LogFileIndex` of the log file, keyed by the method
+    name and arguments. A deep copy of the cached result is returned, so
+    callers are free to modify it.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        results = self.getIndex().results
+        if key not in results:
+            results[key] = method(self, *args, **kwargs)
+        return copy.deepcopy(results[key])
+    return wrapper
+
+################################################################################
+
+
 def get_element_mass(input_element, isotope=None):
     """
     Returns the mass and z number of the requested isotop for a given element.
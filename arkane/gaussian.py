@@ -37,7 +37,7 @@ import rmgpy.constants as constants
 from rmgpy.statmech import IdealGasTranslation, NonlinearRotor, LinearRotor, HarmonicOscillator, Conformer
 from rmgpy.exceptions import InputError
 
-from arkane.common import check_conformer_energy, get_element_mass
+from arkane.common import check_conformer_energy, get_element_mass, getLogFileIndex, cachedLogResult
 
 ################################################################################
 
@@ -48,11 +48,27 @@ class GaussianLog:
     location on disk of the Gaussian log file of interest. Methods are provided
     to extract a variety of information into Arkane classes and/or NumPy
     arrays.
+
+    The log file is scanned only once, to build a :class:`LogFileIndex` of
+    the lines containing any of the `markers` below; the ``load*()`` methods
+    then seek straight to the sections they need, and their results are
+    cached per file.
     """
 
+    markers = ('Input orientation:', 'Force constants in Cartesian coordinates:', 'Multiplicity =',
+               '- Thermochemistry -', 'SCF Done:', 'CBS-QB3 (0 K)', 'G3(0 K)', 'E(ZPE)', '\\ZeroPoint=',
+               'Zero-point correction=', ' freq ', '# scan', 'Optimization completed', 'Frequencies --')
+
     def __init__(self, path):
         self.path = path
 
+    def getIndex(self):
+        """
+        Return the :class:`LogFileIndex` of the Gaussian log file.
+        """
+        return getLogFileIndex(self.path, self.markers)
+
+    @cachedLogResult
     def getNumberOfAtoms(self):
         """
         Return the number of atoms in the molecular configuration used in
@@ -60,22 +76,18 @@ class GaussianLog:
         """
 
         Natoms = 0
-        # Open Gaussian log file for parsing
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '' and Natoms == 0:
+        for f, line in self.getIndex().iterLines(['Input orientation:']):
             # Automatically determine the number of atoms
-            if 'Input orientation:' in line and Natoms == 0:
-                for i in range(5): line = f.readline()
-                while '---------------------------------------------------------------------' not in line:
-                    Natoms += 1
-                    line = f.readline()
-            line = f.readline()
-        # Close file when finished
-        f.close()
+            for i in range(5): line = f.readline()
+            while '---------------------------------------------------------------------' not in line:
+                Natoms += 1
+                line = f.readline()
+            if Natoms != 0:
+                break
         # Return the result
         return Natoms
 
+    @cachedLogResult
     def loadForceConstantMatrix(self):
         """
         Return the force constant matrix from the Gaussian log file. The job
@@ -92,29 +104,31 @@ class GaussianLog:
         Natoms = self.getNumberOfAtoms()
         Nrows = Natoms * 3
 
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
-            # Read force constant matrix
-            if 'Force constants in Cartesian coordinates:' in line:
-                F = numpy.zeros((Nrows,Nrows), numpy.float64)
-                for i in range(int(math.ceil(Nrows / 5.0))):
-                    # Header row
-                    line = f.readline()
-                    # Matrix element rows
-                    for j in range(i*5, Nrows):
-                        data = f.readline().split()
-                        for k in range(len(data)-1):
-                            F[j,i*5+k] = float(data[k+1].replace('D', 'E'))
-                            F[i*5+k,j] = F[j,i*5+k]
-                # Convert from atomic units (Hartree/Bohr_radius^2) to J/m^2
-                F *= 4.35974417e-18 / 5.291772108e-11**2
+        # Only the last force constant matrix is needed, so seek straight to it
+        index = self.getIndex()
+        offsets = index.offsets['Force constants in Cartesian coordinates:']
+        if offsets:
+            f = index.openAt(offsets[-1])
             line = f.readline()
-        # Close file when finished
-        f.close()
+            # Read force constant matrix
+            F = numpy.zeros((Nrows,Nrows), numpy.float64)
+            for i in range(int(math.ceil(Nrows / 5.0))):
+                # Header row
+                line = f.readline()
+                # Matrix element rows
+                for j in range(i*5, Nrows):
+                    data = f.readline().split()
+                    for k in range(len(data)-1):
+                        F[j,i*5+k] = float(data[k+1].replace('D', 'E'))
+                        F[i*5+k,j] = F[j,i*5+k]
+            # Convert from atomic units (Hartree/Bohr_radius^2) to J/m^2
+            F *= 4.35974417e-18 / 5.291772108e-11**2
+            # Close file when finished
+            f.close()
 
         return F
 
+    @cachedLogResult
     def loadGeometry(self):
         """
         Return the optimum geometry of the molecular configuration from the
@@ -124,21 +138,20 @@ class GaussianLog:
 
         number, coord, mass = [], [], []
 
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
-            # Automatically determine the number of atoms
-            if 'Input orientation:' in line:
-                number, coord = [], []
-                for i in range(5): line = f.readline()
-                while '---------------------------------------------------------------------' not in line:
-                    data = line.split()
-                    number.append(int(data[1]))
-                    coord.append([float(data[3]), float(data[4]), float(data[5])])
-                    line = f.readline()
+        # Only the last geometry is needed, so seek straight to it
+        index = self.getIndex()
+        offsets = index.offsets['Input orientation:']
+        if offsets:
+            f = index.openAt(offsets[-1])
             line = f.readline()
-        # Close file when finished
-        f.close()
+            for i in range(5): line = f.readline()
+            while '---------------------------------------------------------------------' not in line:
+                data = line.split()
+                number.append(int(data[1]))
+                coord.append([float(data[3]), float(data[4]), float(data[5])])
+                line = f.readline()
+            # Close file when finished
+            f.close()
 
         # Assign appropriate mass to each atom in the molecule
         mass = []
@@ -153,6 +166,7 @@ class GaussianLog:
         
         return coord, number, mass
 
+    @cachedLogResult
     def loadConformer(self, symmetry=None, spinMultiplicity=0, opticalIsomers=1, symfromlog=None, label=''):
         """
         Load the molecular degree of freedom data from a log file created as
@@ -168,9 +182,7 @@ class GaussianLog:
         unscaled_frequencies = []
         E0 = 0.0
 
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        for f, line in self.getIndex().iterLines(['Multiplicity =', '- Thermochemistry -']):
 
             # Read the spin multiplicity if not explicitly given
             if spinMultiplicity == 0 and 'Multiplicity =' in line:
@@ -243,15 +255,10 @@ class GaussianLog:
                     # Read the next line in the file
                     line = f.readline()
 
-            # Read the next line in the file
-            line = f.readline()
-
-        # Close file when finished
-        f.close()
-
         return Conformer(E0=(E0*0.001,"kJ/mol"), modes=modes, spinMultiplicity=spinMultiplicity,
                          opticalIsomers=opticalIsomers), unscaled_frequencies
 
+    @cachedLogResult
     def loadEnergy(self,frequencyScaleFactor=1.):
         """
         Load the energy in J/mol from a Gaussian log file. The file is checked 
@@ -263,9 +270,8 @@ class GaussianLog:
 
         E0 = None; E0_cbs = None; scaledZPE = None
 
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        markers = ['SCF Done:', 'CBS-QB3 (0 K)', 'G3(0 K)', 'E(ZPE)', '\\ZeroPoint=']
+        for f, line in self.getIndex().iterLines(markers):
 
             if 'SCF Done:' in line:
                 E0 = float(line.split()[4]) * constants.E_h * constants.Na
@@ -287,12 +293,7 @@ class GaussianLog:
                 start = line.find('\\ZeroPoint=') + 11
                 end = line.find('\\', start)
                 scaledZPE = float(line[start:end]) * constants.E_h * constants.Na * frequencyScaleFactor
-            # Read the next line in the file
-            line = f.readline()
 
-        # Close file when finished
-        f.close()
-        
         if E0_cbs is not None:
             if scaledZPE is None:
                 raise Exception('Unable to find zero-point energy in Gaussian log file.')
@@ -301,6 +302,7 @@ class GaussianLog:
             return E0
         else: raise Exception('Unable to find energy in Gaussian log file.')
     
+    @cachedLogResult
     def loadZeroPointEnergy(self):
         """
         Load the unscaled zero-point energy in J/mol from a Gaussian log file.
@@ -308,9 +310,7 @@ class GaussianLog:
 
         ZPE = None
 
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        for f, line in self.getIndex().iterLines(['Zero-point correction=', '\\ZeroPoint=']):
 
             # Do NOT read the ZPE from the "E(ZPE)=" line, as this is the scaled version!
             # We will read in the unscaled ZPE and later multiply the scaling factor
@@ -322,17 +322,13 @@ class GaussianLog:
                 start = line.find('\\ZeroPoint=') + 11
                 end = line.find('\\', start)
                 ZPE = float(line[start:end]) * constants.E_h * constants.Na
-            # Read the next line in the file
-            line = f.readline()
 
-        # Close file when finished
-        f.close()
-        
         if ZPE is not None:
             return ZPE
         else:
             raise Exception('Unable to find zero-point energy in Gaussian log file.')
 
+    @cachedLogResult
     def loadScanEnergies(self):
         """
         Extract the optimized energies in J/mol from a log file, e.g. the 
@@ -347,9 +343,8 @@ class GaussianLog:
 
         # Parse the Gaussian log file, extracting the energies of each
         # optimized conformer in the scan
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        markers = [' freq ', '# scan', 'SCF Done:', 'Optimization completed']
+        for f, line in self.getIndex().iterLines(markers):
             # If the job contains a "freq" then we want to ignore the last energy
             if ' freq ' in line:
                 optfreq = True
@@ -369,10 +364,7 @@ class GaussianLog:
             # to the optimized geometry
             if 'Optimization completed' in line:
                 Vlist.append(E)
-            line = f.readline()
-        # Close file when finished
-        f.close()
-        
+
         #give warning in case this assumption is not true
         if rigidScan==True:
             print '   Assuming', os.path.basename(self.path), 'is the output from a rigid scan...'
@@ -395,6 +387,7 @@ class GaussianLog:
 
         return Vlist, angle
 
+    @cachedLogResult
     def loadNegativeFrequency(self):
         """
         Return the negative frequency from a transition state frequency
@@ -402,16 +395,10 @@ class GaussianLog:
         """
         frequency = None
         frequencies = []
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        for f, line in self.getIndex().iterLines(['Frequencies --']):
             # Read vibrational frequencies
-            if 'Frequencies --' in line:
-                frequencies.extend(line.split()[2:])
-            line = f.readline()
-        # Close file when finished
-        f.close()
-        
+            frequencies.extend(line.split()[2:])
+
         frequencies = [float(freq) for freq in frequencies]
         frequencies.sort()
         frequency = [freq for freq in frequencies if freq < 0][0]
@@ -130,5 +130,28 @@ class GaussianTest(unittest.TestCase):
         self.assertEqual(conformer.spinMultiplicity, 1)
         self.assertEqual(conformer.opticalIsomers, 1)
 
+    def testLogFileIndex(self):
+        """
+        Test that a Gaussian log file is indexed in a single pass, that each
+        indexed offset points at a line containing its marker, and that
+        repeated loads return independent copies of the cached result.
+        """
+        log = GaussianLog(os.path.join(os.path.dirname(__file__),'data','oxygen.log'))
+        index = log.getIndex()
+        self.assertIs(log.getIndex(), index)
+        self.assertIs(GaussianLog(log.path).getIndex(), index)
+        self.assertTrue(len(index.offsets['Input orientation:']) > 0)
+        for marker in log.markers:
+            for f, line in index.iterLines([marker]):
+                self.assertIn(marker, line)
+
+        conformer1, unscaled_frequencies1 = log.loadConformer(symfromlog=True)
+        conformer2, unscaled_frequencies2 = log.loadConformer(symfromlog=True)
+        self.assertIsNot(conformer1, conformer2)
+        self.assertEqual(len(conformer1.modes), len(conformer2.modes))
+        self.assertEqual(unscaled_frequencies1, unscaled_frequencies2)
+        conformer1.modes.append(conformer1.modes[0])
+        self.assertNotEqual(len(log.loadConformer(symfromlog=True)[0].modes), len(conformer1.modes))
+
 if __name__ == '__main__':
     unittest.main( testRunner = unittest.TextTestRunner(verbosity=2) )
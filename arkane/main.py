@@ -37,6 +37,7 @@ import os.path
 import sys
 import logging
 import argparse
+import multiprocessing
 import time
 import csv
 try:
@@ -50,6 +51,7 @@ from rmgpy.data.thermo import ThermoLibrary
 from rmgpy.data.base import Entry
 from rmgpy.data.kinetics.library import KineticsLibrary
 from rmgpy.exceptions import InputError
+from rmgpy.util import getWorkerException, raiseWorkerException
 
 from arkane.input import loadInputFile
 from arkane.kinetics import KineticsJob
@@ -59,6 +61,24 @@ from arkane.pdep import PressureDependenceJob
 from arkane.explorer import ExplorerJob
 from arkane.common import is_pdep
 
+# The list of jobs being loaded by forked workers
+_jobList = None
+
+def _loadStatMechJob(args):
+    """
+    Load the statistical mechanics job at `index` in the job list inherited
+    from the parent process, and return its loaded parameters. Exceptions are
+    returned as given by :func:`rmgpy.util.getWorkerException`.
+    """
+    index, pdep = args
+    job = _jobList[index]
+    try:
+        job.load(pdep)
+        return job.getLoadedParameters(), None
+    except Exception, e:
+        logging.exception('Error while loading statistical mechanics parameters for {0}:'.format(job.species.label))
+        return None, getWorkerException(e)
+
 ################################################################################
 
 
@@ -74,6 +94,7 @@ class Arkane:
     `inputFile`         The path of the input file defining the jobs to execute
     `outputDirectory`   The directory in which to write the output files
     `verbose`           The level of detail in the generated logging messages
+    `processes`         The number of worker processes to run jobs with
     =================== ========================================================
     
     The output directory defaults to the same directory as the input file if
@@ -91,6 +112,7 @@ class Arkane:
         self.inputFile = inputFile
         self.outputDirectory = outputDirectory
         self.verbose = verbose
+        self.processes = 1
     
     def parseCommandLineArguments(self):
         """
@@ -123,6 +145,10 @@ class Arkane:
         # Add options for controlling generation of plots
         parser.add_argument('-p', '--plot', action='store_true', default=True, help='generate plots of results')
 
+        # Add options for running jobs in parallel
+        parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N', dest='processes',
+            help='run up to N jobs in parallel')
+
         args = parser.parse_args()
         
         # Extract the input file
@@ -133,6 +159,9 @@ class Arkane:
         
         # Extract the plot settings
         self.plot = args.plot
+
+        # Extract the number of worker processes
+        self.processes = max(args.processes, 1)
         
         # Determine the output directory
         # By default the directory containing the input file is used, unless an
@@ -259,13 +288,16 @@ class Arkane:
             f.write('THERM ALL\n')
             f.write('    300.000  1000.000  5000.000\n\n')
 
+        # load the statmech jobs, which do not depend on each other, in parallel
+        loaded = self.loadStatMechJobs(pdep=is_pdep(self.jobList))
+
         # run thermo and statmech jobs (also writes thermo blocks to Chemkin file)
         supporting_info = []
         for job in self.jobList:
             if isinstance(job, ThermoJob):
                 job.execute(outputFile=outputFile, plot=self.plot)
             if isinstance(job, StatMechJob):
-                job.execute(outputFile=outputFile, plot=self.plot, pdep=is_pdep(self.jobList))
+                job.execute(outputFile=outputFile, plot=self.plot, pdep=is_pdep(self.jobList), load=job not in loaded)
                 supporting_info.append(job.supporting_info)
 
         with open(chemkinFile, 'a') as f:
@@ -294,6 +326,13 @@ class Arkane:
                 writer.writerow([label, rot, freq])
 
         # run kinetics and pdep jobs (also writes reaction blocks to Chemkin file)
+        # the k(T,P) values of each network are computed in parallel instead
+        if self.processes > 1:
+            for job in self.jobList:
+                if isinstance(job, PressureDependenceJob):
+                    job.processes = self.processes
+                elif isinstance(job, ExplorerJob):
+                    job.pdepjob.processes = self.processes
         for job in self.jobList:
             if isinstance(job,KineticsJob):
                 job.execute(outputFile=outputFile, plot=self.plot)
@@ -311,6 +350,42 @@ class Arkane:
         # Print some information to the end of the log
         self.logFooter()
     
+    def loadStatMechJobs(self, pdep=False):
+        """
+        Load the parameters of the statistical mechanics jobs in `jobList`
+        using up to `processes` forked worker processes, which inherit the
+        loaded input file. Parsing the quantum chemistry logs is usually the
+        most expensive part of a job, and each job only depends on its own
+        files. Only the loading is done in parallel: the jobs are saved, and
+        all other jobs, which depend on the loaded species and transition
+        states, are run afterwards in the order of the input file, so the
+        output files are the same as for a serial run. Returns the set of
+        jobs that were loaded.
+        """
+        global _jobList
+        indices = [index for index, job in enumerate(self.jobList) if isinstance(job, StatMechJob)]
+        processes = min(self.processes, len(indices))
+        if processes < 2 or not hasattr(os, 'fork'):
+            return set()
+
+        logging.info('Loading {0:d} statistical mechanics jobs with {1:d} processes...'.format(len(indices), processes))
+        _jobList = self.jobList
+        pool = multiprocessing.Pool(processes=processes)
+        try:
+            results = pool.map(_loadStatMechJob, [(index, pdep) for index in indices], chunksize=1)
+        finally:
+            pool.terminate()
+            _jobList = None
+
+        loaded = set()
+        for index, (parameters, error) in zip(indices, results):
+            if error is not None:
+                raiseWorkerException(error)
+            job = self.jobList[index]
+            job.setLoadedParameters(parameters)
+            loaded.add(job)
+        return loaded
+
     def getLibraries(self):
 
         name = 'kineticsjobs'
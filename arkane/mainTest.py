@@ -35,10 +35,12 @@ This script contains unit tests of the :mod:`arkane.main` module.
 import unittest
 import os
 import shutil
+import tempfile
 from nose.plugins.attrib import attr
 
 import rmgpy
 from arkane import Arkane
+from arkane.statmech import StatMechJob
 
 ################################################################################
 
@@ -99,5 +101,71 @@ class TestArkaneExamples(unittest.TestCase):
                         shutil.rmtree(item_path)
 
 
+
+@attr('functional')
+class TestArkaneParallel(unittest.TestCase):
+    """
+    Contains functional tests of running Arkane jobs with several processes
+    """
+
+    def setUp(self):
+        """A function that is run before each unit test in this class."""
+        self.example_path = os.path.join(os.path.dirname(os.path.dirname(rmgpy.__file__)),
+                                         'examples', 'arkane', 'reactions', 'H+C2H4=C2H5')
+        self.directory = tempfile.mkdtemp()
+
+    def test_parallel_output(self):
+        """
+        Test that the output files of a run with several processes are the same as those of a serial run
+        """
+        outputs = []
+        for processes in [1, 2]:
+            path = os.path.join(self.directory, str(processes))
+            shutil.copytree(self.example_path, path)
+            arkane = Arkane(inputFile=os.path.join(path, 'input.py'), outputDirectory=path)
+            arkane.plot = False
+            arkane.processes = processes
+            arkane.execute()
+            output = []
+            for name in ['output.py', 'chem.inp']:
+                with open(os.path.join(path, name), 'r') as f:
+                    output.append(f.read())
+            outputs.append(output)
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_parallel_output_without_structure(self):
+        """
+        Test that the element counts of species without a structure are kept when they are loaded in parallel
+        """
+        species_path = os.path.join(os.path.dirname(os.path.dirname(rmgpy.__file__)),
+                                    'examples', 'arkane', 'species', 'C2H4')
+        outputs = []
+        for processes in [1, 2]:
+            path = os.path.join(self.directory, 'species' + str(processes))
+            shutil.copytree(species_path, path)
+            with open(os.path.join(path, 'input.py'), 'w') as f:
+                f.write('modelChemistry = "CBS-QB3"\n'
+                        'useHinderedRotors = True\n'
+                        'useBondCorrections = False\n'
+                        'species("C2H4", "ethene.py")\n'
+                        'species("C2H4b", "ethene.py")\n'
+                        'thermo("C2H4", "NASA")\n'
+                        'thermo("C2H4b", "NASA")\n')
+            arkane = Arkane(inputFile=os.path.join(path, 'input.py'), outputDirectory=path)
+            arkane.plot = False
+            arkane.processes = processes
+            arkane.execute()
+            for job in arkane.jobList:
+                if isinstance(job, StatMechJob):
+                    self.assertEqual(job.species.props['elementCounts'], {'C': 2, 'H': 4})
+            with open(os.path.join(path, 'chem.inp'), 'r') as f:
+                outputs.append(f.read())
+        self.assertEqual(outputs[0], outputs[1])
+
+    def tearDown(self):
+        """A function that is run after each unit test in this class."""
+        shutil.rmtree(self.directory)
+
+
 if __name__ == '__main__':
     unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -36,7 +36,7 @@ import rmgpy.constants as constants
 from rmgpy.exceptions import InputError
 from rmgpy.statmech import IdealGasTranslation, NonlinearRotor, LinearRotor, HarmonicOscillator, Conformer
 
-from arkane.common import get_element_mass
+from arkane.common import get_element_mass, getLogFileIndex, cachedLogResult
 
 ################################################################################
 
@@ -47,11 +47,30 @@ class MolproLog:
     location on disk of the Molpro log file of interest. Methods are provided
     to extract a variety of information into Arkane classes and/or NumPy
     arrays. 
+
+    The log file is scanned only once, to build a :class:`LogFileIndex` of
+    the lines containing any of the `markers` (or, ignoring case, any of the
+    `caseInsensitiveMarkers`) below; the ``load*()`` methods then seek
+    straight to the sections they need, and their results are cached per
+    file.
     """
+
+    markers = ('ATOMIC COORDINATES', 'Force Constants (Second Derivatives of the Energy) in [a.u.]',
+               'Current geometry', 'spin', 'SPIN SYMMETRY', 'THERMODYNAMICAL', 'CCSD(T)-F12a', 'CCSD(T)-F12b',
+               'Electronic Energy at 0', 'Electronic Energy at 0 [K]:', '(Davidson, relaxed reference)', 'HF-SCF',
+               'Normal Modes of imaginary frequencies')
+    caseInsensitiveMarkers = ('atomic coordinates', 'basis', 'mrci', 'point group')
     
     def __init__(self, path):
         self.path = path
 
+    def getIndex(self):
+        """
+        Return the :class:`LogFileIndex` of the Molpro log file.
+        """
+        return getLogFileIndex(self.path, self.markers, self.caseInsensitiveMarkers)
+
+    @cachedLogResult
     def getNumberOfAtoms(self):
         """
         Return the number of atoms in the molecular configuration used in
@@ -59,23 +78,19 @@ class MolproLog:
         """
 
         Natoms = 0
-        # Open Molpro log file for parsing
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '' and Natoms == 0:
+        for f, line in self.getIndex().iterLines(['ATOMIC COORDINATES']):
             # Automatically determine the number of atoms
-            if 'ATOMIC COORDINATES' in line and Natoms == 0:
-                for i in range(4): line = f.readline()
-                while 'Bond lengths' not in line and 'nuclear charge' not in line.lower():
-                    Natoms += 1
-                    line = f.readline()
-            line = f.readline()
-        # Close file when finished
-        f.close()
+            for i in range(4): line = f.readline()
+            while 'Bond lengths' not in line and 'nuclear charge' not in line.lower():
+                Natoms += 1
+                line = f.readline()
+            if Natoms != 0:
+                break
         # Return the result
 
         return Natoms - 1
 
+    @cachedLogResult
     def loadForceConstantMatrix(self):
         """
         Print the force constant matrix by including the print, hessian command in the input file
@@ -86,29 +101,31 @@ class MolproLog:
         Natoms = self.getNumberOfAtoms()
         Nrows = Natoms * 3
 
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
-            # Read force constant matrix
-            if 'Force Constants (Second Derivatives of the Energy) in [a.u.]' in line:
-                F = numpy.zeros((Nrows,Nrows), numpy.float64)
-                for i in range(int(math.ceil(Nrows / 5.0))):
-                    # Header row
-                    line = f.readline()
-                    # Matrix element rows
-                    for j in range(i*5, Nrows):
-                        data = f.readline().split()
-                        for k in range(len(data)-1):
-                            F[j,i*5+k] = float(data[k+1].replace('D', 'E'))
-                            F[i*5+k,j] = F[j,i*5+k]
-                # Convert from atomic units (Hartree/Bohr_radius^2) to J/m^2
-                F *= 4.35974417e-18 / 5.291772108e-11**2
+        # Only the last force constant matrix is needed, so seek straight to it
+        index = self.getIndex()
+        offsets = index.offsets['Force Constants (Second Derivatives of the Energy) in [a.u.]']
+        if offsets:
+            f = index.openAt(offsets[-1])
             line = f.readline()
-        # Close file when finished
-        f.close()
+            # Read force constant matrix
+            F = numpy.zeros((Nrows,Nrows), numpy.float64)
+            for i in range(int(math.ceil(Nrows / 5.0))):
+                # Header row
+                line = f.readline()
+                # Matrix element rows
+                for j in range(i*5, Nrows):
+                    data = f.readline().split()
+                    for k in range(len(data)-1):
+                        F[j,i*5+k] = float(data[k+1].replace('D', 'E'))
+                        F[i*5+k,j] = F[j,i*5+k]
+            # Convert from atomic units (Hartree/Bohr_radius^2) to J/m^2
+            F *= 4.35974417e-18 / 5.291772108e-11**2
+            # Close file when finished
+            f.close()
 
         return F
 
+    @cachedLogResult
     def loadGeometry(self):
         """
         Return the optimum geometry of the molecular configuration from the
@@ -118,41 +135,32 @@ class MolproLog:
 
         symbol, coord, mass, number = [], [], [], []
 
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        index = self.getIndex()
+        for f, line in index.iterLines(['Current geometry']):
             # Automatically determine the number of atoms
-            if 'Current geometry' in line:
-                symbol, coord = [], []
-                while 'ENERGY' not in line:
-                    line = f.readline()
+            symbol, coord = [], []
+            while 'ENERGY' not in line:
                 line = f.readline()
-                while line != '\n':
-                    data = line.split()
-                    symbol.append(str(data[0]))
-                    coord.append([float(data[1]), float(data[2]), float(data[3])])
-                    line = f.readline()
+            line = f.readline()
+            while line != '\n':
+                data = line.split()
+                symbol.append(str(data[0]))
+                coord.append([float(data[1]), float(data[2]), float(data[3])])
                 line = f.readline()
             line = f.readline()
-        # Close file when finished
-        f.close()
 
         # If no optimized coordinates were found, uses the input geometry
         # (for example if reading the geometry from a frequency file)
         if coord == []:
-            f = open(self.path, 'r')
-            line = f.readline()
-            while line != '':
-                if 'atomic coordinates' in line.lower():
-                    symbol = []; coord = []
-                    for i in range(4):
-                        line = f.readline()
-                    while line != '\n':
-                        data = line.split()
-                        symbol.append(str(data[1]))
-                        coord.append([float(data[3]), float(data[4]), float(data[5])])
-                        line = f.readline()
-                line = f.readline()
+            for f, line in index.iterLines(['atomic coordinates']):
+                symbol = []; coord = []
+                for i in range(4):
+                    line = f.readline()
+                while line != '\n':
+                    data = line.split()
+                    symbol.append(str(data[1]))
+                    coord.append([float(data[3]), float(data[4]), float(data[5])])
+                    line = f.readline()
 
         # Assign appropriate mass to each atom in the molecule
         for atom1 in symbol:
@@ -167,6 +175,7 @@ class MolproLog:
 
         return coord, number, mass
 
+    @cachedLogResult
     def loadConformer(self, symmetry=None, spinMultiplicity=0, opticalIsomers=1, symfromlog=None, label=''):
         """
         Load the molecular degree of freedom data from a log file created as
@@ -177,9 +186,7 @@ class MolproLog:
         unscaled_frequencies = []
         E0 = 0.0
 
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        for f, line in self.getIndex().iterLines(['spin', 'SPIN SYMMETRY', 'THERMODYNAMICAL']):
 
             # Read the spin multiplicity if not explicitly given
             if spinMultiplicity == 0 and 'spin' in line:
@@ -261,14 +268,10 @@ class MolproLog:
                     # Read the next line in the file
                     line = f.readline()
 
-            # Read the next line in the file
-            line = f.readline()
-
-        # Close file when finished
-        f.close()
         return Conformer(E0=(E0*0.001,"kJ/mol"), modes=modes, spinMultiplicity=spinMultiplicity,
                          opticalIsomers=opticalIsomers), unscaled_frequencies
 
+    @cachedLogResult
     def loadEnergy(self, frequencyScaleFactor=1.):
         """
         Return either the f12 or MRCI energy in J/mol from a Molpro Logfile.
@@ -278,61 +281,58 @@ class MolproLog:
         a better approximation, but for higher basis sets f12b is a better approximation.
         """
         E0 = None
-        with open(self.path, 'r') as f:
-            lines = f.readlines()
-            # Determine whether this is f12a or f12b according to the basis set, or whether this is MRCI.
-            f12a, f12b, mrci = False, False, False
-            for line in lines:
-                if 'basis' in line.lower():
-                    if 'vtz' in line.lower() or 'vdz' in line.lower():
-                        f12a = True  # MRCI could also have a vdz/vtz basis, so don't break yet
-                    elif any(high_basis in line.lower() for high_basis in ['vqz', 'v5z', 'v6z', 'v7z', 'v8z']):
-                        f12b = True  # MRCI could also have a v(4+)z basis, so don't break yet
-                elif 'mrci' in line.lower():
-                    mrci = True
-                    f12a, f12b = False, False
+        index = self.getIndex()
+        # Determine whether this is f12a or f12b according to the basis set, or whether this is MRCI.
+        f12a, f12b, mrci = False, False, False
+        for f, line in index.iterLines(['basis', 'mrci', 'point group']):
+            if 'basis' in line.lower():
+                if 'vtz' in line.lower() or 'vdz' in line.lower():
+                    f12a = True  # MRCI could also have a vdz/vtz basis, so don't break yet
+                elif any(high_basis in line.lower() for high_basis in ['vqz', 'v5z', 'v6z', 'v7z', 'v8z']):
+                    f12b = True  # MRCI could also have a v(4+)z basis, so don't break yet
+            elif 'mrci' in line.lower():
+                mrci = True
+                f12a, f12b = False, False
+                break
+            elif 'point group' in line.lower():
+                # We should know the method by this point, so break if possible, but don't throw an error yet
+                if any([mrci, f12a, f12b]):
+                    break
+        else:
+            raise ValueError('Could not determine type of calculation. Currently, CCSD(T)-F12a, CCSD(T)-F12b,'
+                             ' MRCI, MRCI+Davidson are supported')
+        # Search for E0
+        if f12a:
+            for f, line in index.iterLines(['CCSD(T)-F12a', 'Electronic Energy at 0']):
+                if 'CCSD(T)-F12a' in line and 'energy' in line:
+                    E0 = float(line.split()[-1])
+                    break
+                if 'Electronic Energy at 0' in line:
+                    E0 = float(line.split()[-2])
+                    break
+        elif f12b:
+            for f, line in index.iterLines(['CCSD(T)-F12b', 'Electronic Energy at 0']):
+                if 'CCSD(T)-F12b' in line and 'energy' in line:
+                    E0 = float(line.split()[-1])
+                    break
+                if 'Electronic Energy at 0' in line:
+                    E0 = float(line.split()[-2])
+                    break
+        elif mrci:
+            # First search for MRCI+Davidson energy
+            for f, line in index.iterLines(['(Davidson, relaxed reference)']):
+                E0 = float(line.split()[3])
+                logging.debug('Found MRCI+Davidson energy in molpro log file {0}, using this value'.format(
+                    self.path))
+                break
+        if E0 is None and mrci:
+            # No Davidson correction is given, search for MRCI energy
+            for f, line in index.iterLines(['HF-SCF']):
+                if all(w in line for w in ('MRCI', 'MULTI', 'HF-SCF')):
+                    E0 = float(f.readline().split()[0])
+                    logging.debug('Found MRCI energy in molpro log file {0}, using this value'
+                                  ' (did NOT find MRCI+Davidson)'.format(self.path))
                     break
-                elif 'point group' in line.lower():
-                    # We should know the method by this point, so break if possible, but don't throw an error yet
-                    if any([mrci, f12a, f12b]):
-                        break
-            else:
-                raise ValueError('Could not determine type of calculation. Currently, CCSD(T)-F12a, CCSD(T)-F12b,'
-                                 ' MRCI, MRCI+Davidson are supported')
-            # Search for E0
-            for line in lines:
-                if f12a:
-                    if 'CCSD(T)-F12a' in line and 'energy' in line:
-                        E0 = float(line.split()[-1])
-                        break
-                    if 'Electronic Energy at 0' in line:
-                        E0 = float(line.split()[-2])
-                        break
-                elif f12b:
-                    if 'CCSD(T)-F12b' in line and 'energy' in line:
-                        E0 = float(line.split()[-1])
-                        break
-                    if 'Electronic Energy at 0' in line:
-                        E0 = float(line.split()[-2])
-                        break
-                elif mrci:
-                    # First search for MRCI+Davidson energy
-                    if '(Davidson, relaxed reference)' in line:
-                        E0 = float(line.split()[3])
-                        logging.debug('Found MRCI+Davidson energy in molpro log file {0}, using this value'.format(
-                            self.path))
-                        break
-            if E0 is None and mrci:
-                # No Davidson correction is given, search for MRCI energy
-                read_e0 = False
-                for line in lines:
-                    if read_e0:
-                        E0 = float(line.split()[0])
-                        logging.debug('Found MRCI energy in molpro log file {0}, using this value'
-                                      ' (did NOT find MRCI+Davidson)'.format(self.path))
-                        break
-                    if all(w in line for w in ('MRCI', 'MULTI', 'HF-SCF')):
-                        read_e0 = True
         logging.debug('Molpro energy found is {0} Hartree'.format(E0))
         # multiply E0 by correct constants
         if E0 is not None:
@@ -342,6 +342,7 @@ class MolproLog:
         else:
             raise Exception('Unable to find energy in Molpro log file {0}.'.format(self.path))
 
+    @cachedLogResult
     def loadZeroPointEnergy(self):
         """
         Load the unscaled zero-point energy in J/mol from a MolPro log file.
@@ -349,21 +350,14 @@ class MolproLog:
 
         ZPE = None
 
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        for f, line in self.getIndex().iterLines(['Electronic Energy at 0 [K]:']):
             # Do NOT read the ZPE from the "E(ZPE)=" line, as this is the scaled version!
             # We will read in the unscaled ZPE and later multiply the scaling factor
             # from the input file
-            if 'Electronic Energy at 0 [K]:' in line:
-                electronic_energy = float(line.split()[5])
-                line = f.readline()
-                EEplusZPE = float(line.split()[5])
-                ZPE = (EEplusZPE-electronic_energy) * constants.E_h * constants.Na
+            electronic_energy = float(line.split()[5])
             line = f.readline()
-
-        # Close file when finished
-        f.close()
+            EEplusZPE = float(line.split()[5])
+            ZPE = (EEplusZPE-electronic_energy) * constants.E_h * constants.Na
 
         if ZPE is not None:
             return ZPE
@@ -371,21 +365,17 @@ class MolproLog:
             raise Exception('Unable to find zero-point energy in Molpro log file. Make sure that the'
                             ' keyword {frequencies, thermo, print,thermo} is included in the input file')
 
+    @cachedLogResult
     def loadNegativeFrequency(self):
         """
         Return the negative frequency from a transition state frequency calculation in cm^-1.
         """
         frequency = None
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        for f, line in self.getIndex().iterLines(['Normal Modes of imaginary frequencies']):
             # Read vibrational frequencies
-            if 'Normal Modes of imaginary frequencies' in line:
-                for i in range(3):
-                    line = f.readline()
-                frequency = line.split()[2]
-            line = f.readline()
-        f.close()
+            for i in range(3):
+                line = f.readline()
+            frequency = line.split()[2]
         if frequency is None:
             raise Exception('Unable to find imaginary frequency in Molpro output file {0}'.format(self.path))
         negativefrequency = -float(frequency)
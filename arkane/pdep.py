@@ -76,6 +76,7 @@ class PressureDependenceJob(object):
     `activeKRotor`          A flag indicating whether to treat the K-rotor as active or adiabatic
     `activeJRotor`          A flag indicating whether to treat the J-rotor as active or adiabatic
     `rmgmode`               A flag that toggles "RMG mode", described below
+    `processes`             The number of worker processes used to compute :math:`k(T,P)` values
     ----------------------- ----------------------------------------------------
     `network`               The unimolecular reaction network
     `Tlist`                 An array of temperatures at which to compute :math:`k(T,P)` values
@@ -106,7 +107,8 @@ class PressureDependenceJob(object):
         Pmin=None, Pmax=None, Pcount=0, Plist=None,
         maximumGrainSize=None, minimumGrainCount=0,
         method=None, interpolationModel=None, maximumAtoms=None,
-        activeKRotor=True, activeJRotor=True, rmgmode=False, sensitivity_conditions=None):
+        activeKRotor=True, activeJRotor=True, rmgmode=False, sensitivity_conditions=None,
+        processes=1):
         self.network = network
         
         self.Tmin = Tmin
@@ -144,6 +146,7 @@ class PressureDependenceJob(object):
         self.activeKRotor = activeKRotor
         self.activeJRotor = activeJRotor
         self.rmgmode = rmgmode
+        self.processes = processes
 
         if sensitivity_conditions is not None:
             if not isinstance(sensitivity_conditions[0], list):
@@ -235,6 +238,7 @@ class PressureDependenceJob(object):
             activeKRotor = self.activeKRotor, 
             activeJRotor = self.activeJRotor,
             rmgmode = self.rmgmode,
+            processes = self.processes,
         )
 
     def execute(self, outputFile, plot, format='pdf', print_summary=True):
@@ -259,7 +263,8 @@ class PressureDependenceJob(object):
         
         self.initialize()
         
-        self.K = self.network.calculateRateCoefficients(self.Tlist.value_si, self.Plist.value_si, self.method)
+        self.K = self.network.calculateRateCoefficients(self.Tlist.value_si, self.Plist.value_si, self.method,
+                                                        processes=self.processes)
 
         self.fitInterpolationModels()
 
@@ -37,7 +37,7 @@ import rmgpy.constants as constants
 from rmgpy.exceptions import InputError
 from rmgpy.statmech import IdealGasTranslation, NonlinearRotor, LinearRotor, HarmonicOscillator, Conformer
 
-from arkane.common import check_conformer_energy, get_element_mass
+from arkane.common import check_conformer_energy, get_element_mass, getLogFileIndex, cachedLogResult
 
 ################################################################################
 
@@ -48,11 +48,27 @@ class QChemLog:
     location on disk of the QChem output file of interest. Methods are provided
     to extract a variety of information into Arkane classes and/or NumPy
     arrays.
+
+    The output file is scanned only once, to build a :class:`LogFileIndex`
+    of the lines containing any of the `markers` below; the ``load*()``
+    methods then seek straight to the sections they need, and their results
+    are cached per file.
     """
 
+    markers = ('Standard Nuclear Orientation', 'Final Hessian.', 'Hessian of the SCF Energy', 'Total job time:',
+               '$molecule', 'VIBRATIONAL ANALYSIS', 'Final energy is', 'Zero point vibrational energy',
+               'Summary of potential scan:', 'SCF failed to converge', ' Frequency:')
+
     def __init__(self, path):
         self.path = path
 
+    def getIndex(self):
+        """
+        Return the :class:`LogFileIndex` of the QChem output file.
+        """
+        return getLogFileIndex(self.path, self.markers)
+
+    @cachedLogResult
     def getNumberOfAtoms(self):
         """
         Return the number of atoms in the molecular configuration used in
@@ -60,22 +76,18 @@ class QChemLog:
         """
 
         Natoms = 0
-        # Open QChem log file for parsing
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '' and Natoms == 0:
+        for f, line in self.getIndex().iterLines(['Standard Nuclear Orientation']):
             # Automatically determine the number of atoms
-            if 'Standard Nuclear Orientation' in line and Natoms == 0:
-                for i in range(3): line = f.readline()
-                while '----------------------------------------------------' not in line:
-                    Natoms += 1
-                    line = f.readline()
-            line = f.readline()
-        # Close file when finished
-        f.close()
+            for i in range(3): line = f.readline()
+            while '----------------------------------------------------' not in line:
+                Natoms += 1
+                line = f.readline()
+            if Natoms != 0:
+                break
         # Return the result
         return Natoms
 
+    @cachedLogResult
     def loadForceConstantMatrix(self):
         """
         Return the force constant matrix (in Cartesian coordinates) from the
@@ -89,29 +101,24 @@ class QChemLog:
 
         Natoms = self.getNumberOfAtoms()
         Nrows = Natoms * 3
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        for f, line in self.getIndex().iterLines(['Final Hessian.', 'Hessian of the SCF Energy']):
             # Read force constant matrix
-            if 'Final Hessian.' in line or 'Hessian of the SCF Energy' in line:
-                F = numpy.zeros((Nrows,Nrows), numpy.float64)
-                for i in range(int(math.ceil(Nrows / 6.0))):
-                    # Header row
-                    line = f.readline()
-                    # Matrix element rows
-                    for j in range(Nrows): #for j in range(i*6, Nrows):
-                        data = f.readline().split()
-                        for k in range(len(data)-1):
-                            F[j,i*6+k] = float(data[k+1])
-                            #F[i*5+k,j] = F[j,i*5+k]
-                # Convert from atomic units (Hartree/Bohr_radius^2) to J/m^2
-                F *= 4.35974417e-18 / 5.291772108e-11**2
-            line = f.readline()
-        # Close file when finished
-        f.close()
+            F = numpy.zeros((Nrows,Nrows), numpy.float64)
+            for i in range(int(math.ceil(Nrows / 6.0))):
+                # Header row
+                line = f.readline()
+                # Matrix element rows
+                for j in range(Nrows): #for j in range(i*6, Nrows):
+                    data = f.readline().split()
+                    for k in range(len(data)-1):
+                        F[j,i*6+k] = float(data[k+1])
+                        #F[i*5+k,j] = F[j,i*5+k]
+            # Convert from atomic units (Hartree/Bohr_radius^2) to J/m^2
+            F *= 4.35974417e-18 / 5.291772108e-11**2
 
         return F
 
+    @cachedLogResult
     def loadGeometry(self):
 
         """
@@ -121,17 +128,14 @@ class QChemLog:
         """
         atom, coord, number, mass = [], [], [], []
 
-        with open(self.path) as f:
-            log = f.read().splitlines()
+        index = self.getIndex()
 
         # First check that the QChem job file (not necessarily a geometry optimization)
         # has successfully completed, if not an error is thrown
         completed_job = False
-        for line in reversed(log):
-            if 'Total job time:' in line:
-                logging.debug('Found a sucessfully completed QChem Job')
-                completed_job = True
-                break
+        if index.offsets['Total job time:']:
+            logging.debug('Found a sucessfully completed QChem Job')
+            completed_job = True
 
         if not completed_job:
             raise InputError('Could not find a successfully completed QChem job in QChem output file {0}'.format(self.path))
@@ -139,19 +143,18 @@ class QChemLog:
         # Now look for the geometry.
         # Will return the final geometry in the file under Standard Nuclear Orientation.
         geometry_flag = False
-        for i in reversed(xrange(len(log))):
-            line = log[i]
-            if 'Standard Nuclear Orientation' in line:
-                for line in log[(i+3):]:
-                    if '------------' not in line:
-                        data = line.split()
-                        atom.append(data[1])
-                        coord.append([float(c) for c in data [2:]])
-                        geometry_flag = True
-                    else:
-                        break
-                if geometry_flag:
-                    break
+        for offset in reversed(index.offsets['Standard Nuclear Orientation']):
+            f = index.openAt(offset)
+            for i in range(3): line = f.readline()
+            while line != '' and '------------' not in line:
+                data = line.split()
+                atom.append(data[1])
+                coord.append([float(c) for c in data [2:]])
+                geometry_flag = True
+                line = f.readline()
+            f.close()
+            if geometry_flag:
+                break
 
         # Assign appropriate mass to each atom in the molecule
         for atom1 in atom:
@@ -166,6 +169,7 @@ class QChemLog:
 
         return coord, number, mass
 
+    @cachedLogResult
     def loadConformer(self, symmetry=None, spinMultiplicity=0, opticalIsomers=1, symfromlog=None, label=''):
         """
         Load the molecular degree of freedom data from an output file created as the result of a
@@ -176,9 +180,7 @@ class QChemLog:
         modes = []; freq = []; mmass = []; rot = []; inertia = []
         unscaled_frequencies = []
         E0 = 0.0
-        f = open(self.path, 'r')
-        line = f.readline()
-        while line != '':
+        for f, line in self.getIndex().iterLines(['$molecule', 'VIBRATIONAL ANALYSIS']):
             # Read spin multiplicity if not explicitly given
             if '$molecule' in line and spinMultiplicity == 0:
                 line = f.readline()
@@ -235,9 +237,6 @@ class QChemLog:
                     # Read the next line in the file
                     line = f.readline()
 
-            # Read the next line in the file
-            line = f.readline()
-
             if len(inertia):
                 if symmetry is None:
                     symmetry = 1
@@ -259,12 +258,11 @@ class QChemLog:
 
                 inertia = []
 
-        # Close file when finished
-        f.close()
         modes = mmass + rot + freq
         return Conformer(E0=(E0*0.001,"kJ/mol"), modes=modes, spinMultiplicity=spinMultiplicity,
                          opticalIsomers=opticalIsomers), unscaled_frequencies
 
+    @cachedLogResult
     def loadEnergy(self, frequencyScaleFactor=1.):
         """
         Load the energy in J/mol from a QChem log file. Only the last energy
@@ -272,36 +270,29 @@ class QChemLog:
         the returned value.
         """
         E0 = None
-        with open(self.path, 'r') as f:
-            for line in f:
-                if 'Final energy is' in line:
-                    E0 = float(line.split()[3]) * constants.E_h * constants.Na
-                    logging.debug('energy is {}'.format(str(E0)))
-            if E0 is None:
-                for line in f:
-                    if 'Total energy in the final basis set' in line:
-                        E0 = float(line.split()[8]) * constants.E_h * constants.Na
-                        logging.debug('energy is {}'.format(str(E0)))
+        for f, line in self.getIndex().iterLines(['Final energy is']):
+            E0 = float(line.split()[3]) * constants.E_h * constants.Na
+            logging.debug('energy is {}'.format(str(E0)))
         if E0 is None:
             raise InputError('Unable to find energy in QChem output file.')
         return E0
         
+    @cachedLogResult
     def loadZeroPointEnergy(self,frequencyScaleFactor=1.):
         """
         Load the unscaled zero-point energy in J/mol from a QChem output file.
         """
         ZPE = None
-        with open(self.path, 'r') as f:
-            for line in f:
-                if 'Zero point vibrational energy' in line:
-                    ZPE = float(line.split()[4]) * 4184  # QChem's ZPE is in kcal/mol
-                    # scaledZPE = ZPE * frequencyScaleFactor
-                    logging.debug('ZPE is {}'.format(str(ZPE)))
+        for f, line in self.getIndex().iterLines(['Zero point vibrational energy']):
+            ZPE = float(line.split()[4]) * 4184  # QChem's ZPE is in kcal/mol
+            # scaledZPE = ZPE * frequencyScaleFactor
+            logging.debug('ZPE is {}'.format(str(ZPE)))
         if ZPE is not None:
             return ZPE
         else:
             raise InputError('Unable to find zero-point energy in QChem output file.')
               
+    @cachedLogResult
     def loadScanEnergies(self):
         """
         Extract the optimized energies in J/mol from a QChem log file, e.g. the
@@ -310,8 +301,9 @@ class QChemLog:
         Vlist = []
         angle = []
         read = False
-        with open(self.path, 'r') as f:
-            for line in f:
+        for f, line in self.getIndex().iterLines(['Summary of potential scan:', 'SCF failed to converge']):
+            # Read on from each marker for as long as we are inside a scan summary
+            while line != '':
                 if '-----------------' in line:
                     read = False
                 if read:
@@ -323,6 +315,9 @@ class QChemLog:
                     read = True
                 elif 'SCF failed to converge' in line:
                     raise InputError('QChem Job did not sucessfully complete: SCF failed to converge')
+                if not read:
+                    break
+                line = f.readline()
         logging.info('   Assuming {0} is the output from a QChem PES scan...'.format(os.path.basename(self.path)))
 
         Vlist = numpy.array(Vlist, numpy.float64)
@@ -336,18 +331,17 @@ class QChemLog:
         angle = numpy.arange(0.0, 2*math.pi+0.00001, 2*math.pi/(len(Vlist)-1), numpy.float64)
         return Vlist, angle
         
+    @cachedLogResult
     def loadNegativeFrequency(self):
         """
         Return the imaginary frequency from a transition state frequency
         calculation in cm^-1.
         """
         frequency = 0
-        with open(self.path, 'r') as f:
-            for line in f:
-                # Read imaginary frequency
-                if ' Frequency:' in line:
-                    frequency = float((line.split()[1]))
-                    break
+        for f, line in self.getIndex().iterLines([' Frequency:']):
+            # Read imaginary frequency
+            frequency = float((line.split()[1]))
+            break
         # Make sure the frequency is imaginary:
         if frequency < 0:
             return frequency
@@ -181,12 +181,15 @@ class StatMechJob(object):
             # Currently we do not dump and load transition states in YAML form
             self.arkane_species = ArkaneSpecies(species=species)
 
-    def execute(self, outputFile=None, plot=False, pdep=False):
+    def execute(self, outputFile=None, plot=False, pdep=False, load=True):
         """
         Execute the statistical mechanics job, saving the results to the
-        given `outputFile` on disk.
+        given `outputFile` on disk. Set `load` to ``False`` if the parameters
+        have already been loaded, e.g. by another process (see
+        :meth:`getLoadedParameters`).
         """
-        self.load(pdep)
+        if load:
+            self.load(pdep)
         if outputFile is not None:
             self.save(outputFile)
         logging.debug('Finished statmech job for species {0}.'.format(self.species))
@@ -548,6 +551,46 @@ class StatMechJob(object):
 
         self.species.conformer = conformer
 
+    def getLoadedParameters(self):
+        """
+        Return a dictionary of the attributes of the job and of its species
+        that are set by :meth:`load`, so that a job loaded in a worker process
+        can be passed back to the parent process and applied to its copy of the
+        job with :meth:`setLoadedParameters`.
+        """
+        parameters = {
+            'conformer': self.species.conformer,
+            'supporting_info': self.supporting_info,
+            'bonds': self.bonds,
+        }
+        if isinstance(self.species, TransitionState):
+            parameters['frequency'] = self.species.frequency
+        else:
+            parameters['transportData'] = self.species.transportData
+            parameters['energyTransferModel'] = self.species.energyTransferModel
+            parameters['arkane_species'] = self.arkane_species
+            if isinstance(self.species, Species):
+                # Includes the element counts inferred from the geometry
+                parameters['props'] = self.species.props
+        return parameters
+
+    def setLoadedParameters(self, parameters):
+        """
+        Apply the `parameters` returned by :meth:`getLoadedParameters` for
+        another copy of this job, in place of calling :meth:`load`.
+        """
+        self.species.conformer = parameters['conformer']
+        self.supporting_info = parameters['supporting_info']
+        self.bonds = parameters['bonds']
+        if isinstance(self.species, TransitionState):
+            self.species.frequency = parameters['frequency']
+        else:
+            self.species.transportData = parameters['transportData']
+            self.species.energyTransferModel = parameters['energyTransferModel']
+            self.arkane_species = parameters['arkane_species']
+            if 'props' in parameters:
+                self.species.props.update(parameters['props'])
+
     def save(self, outputFile):
         """
         Save the results of the statistical mechanics job to the file located
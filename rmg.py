@@ -87,6 +87,10 @@ def parse_command_line_arguments(command_line_args=None):
                         help='output a folder, kinetics_database, that contains a .txt file for each reaction family '
                              'listing the source(s) for each entry')
 
+    # Add option to generate reactions in parallel
+    parser.add_argument('-n', '--maxproc', type=int, default=1, metavar='N',
+                        help='number of processes used to load kinetics families and generate reactions (default: 1)')
+
     args = parser.parse_args(command_line_args)
 
     # Process args to set correct default values and format
@@ -136,7 +140,8 @@ def main():
     kwargs = {
         'restart': args.restart,
         'walltime': args.walltime,
-        'kineticsdatastore': args.kineticsdatastore
+        'kineticsdatastore': args.kineticsdatastore,
+        'maxproc': args.maxproc
     }
 
     if args.profile:
@@ -937,16 +937,26 @@ cpdef _process_duplicate_reactions(list reactionList):
     """
     cdef list duplicateReactionsToRemove = []
     cdef list duplicateReactionsToAdd = []
+    cdef set removedReactionIDs = set()
+    cdef dict buckets = {}
+    cdef list keys
     cdef int index1, index2
     cdef Reaction reaction, reaction1, reaction2
     cdef KineticsModel kinetics
 
+    # Only reactions with the same key can be duplicates of one another
+    keys = [_get_duplicate_key(reaction) for reaction in reactionList]
+    for index1 in xrange(len(reactionList)):
+        buckets.setdefault(keys[index1], []).append(index1)
+
     for index1 in xrange(len(reactionList)):
         reaction1 = reactionList[index1]
-        if reaction1 in duplicateReactionsToRemove:
+        if id(reaction1) in removedReactionIDs:
             continue
 
-        for index2 in xrange(index1 + 1, len(reactionList)):
+        for index2 in buckets[keys[index1]]:
+            if index2 <= index1:
+                continue
             reaction2 = reactionList[index2]
             if (reaction1.reactants == reaction2.reactants
                     and reaction1.products == reaction2.products
@@ -957,7 +967,7 @@ cpdef _process_duplicate_reactions(list reactionList):
                         if reaction1.library != reaction2.library:
                             raise ChemkinError("Identical reactions {0} and {1} taken from different libraries: {2}, "
                                                "{3}".format(reaction1, reaction2, reaction1.library, reaction2.library))
-                        if reaction1 not in duplicateReactionsToRemove:
+                        if id(reaction1) not in removedReactionIDs:
                             # already created duplicate reaction, move on to appending any additional duplicate kinetics
                             if isinstance(reaction1.kinetics,
                                           _kinetics.PDepArrhenius):
@@ -983,6 +993,7 @@ cpdef _process_duplicate_reactions(list reactionList):
                             duplicateReactionsToAdd.append(reaction)
                             kinetics.arrhenius = [reaction1.kinetics]
                             duplicateReactionsToRemove.append(reaction1)
+                            removedReactionIDs.add(id(reaction1))
 
                     else:
                         # Do not use as duplicate reactions if it's not a library reaction
@@ -1003,16 +1014,29 @@ cpdef _process_duplicate_reactions(list reactionList):
                         raise ChemkinError('Mixed kinetics for duplicate reaction {0}.'.format(reaction))
 
                     duplicateReactionsToRemove.append(reaction2)
+                    removedReactionIDs.add(id(reaction2))
                 elif reaction1.kinetics.isPressureDependent() == reaction2.kinetics.isPressureDependent():
                     # If both reactions are pressure-independent or both are pressure-dependent, then they need
                     # duplicate tags. Chemkin treates pdep and non-pdep reactions as different, so those are okay
                     raise ChemkinError('Encountered unmarked duplicate reaction {0}.'.format(reaction1))
 
-    for reaction in duplicateReactionsToRemove:
-        reactionList.remove(reaction)
+    if duplicateReactionsToRemove:
+        reactionList[:] = [reaction for reaction in reactionList if id(reaction) not in removedReactionIDs]
     reactionList.extend(duplicateReactionsToAdd)
 
 
+def _get_duplicate_key(reaction):
+    """
+    Return a key for `reaction` which does not depend on the order of the
+    reactants or products or on the direction of the reaction. Two reactions
+    that Chemkin could consider duplicates always have the same key, so
+    reactions only need to be compared to others with the same key.
+    """
+    reactants = tuple(sorted(hash(spec) for spec in reaction.reactants))
+    products = tuple(sorted(hash(spec) for spec in reaction.products))
+    return min(reactants, products), max(reactants, products), hash(reaction.specificCollider)
+
+
 def readSpeciesBlock(f, speciesDict, speciesAliases, speciesList):
     """
     Read a Species block from a chemkin file.
@@ -1807,13 +1831,16 @@ def markDuplicateReactions(reactions):
     For a given list of `reactions`, mark all of the duplicate reactions as
     understood by Chemkin.
     
-    This is pretty slow (quadratic in size of reactions list) so only call it if you're really worried
-    you may have undetected duplicate reactions.
+    Reactions are first grouped by a key of their reactants, products and
+    specific collider, so each reaction is only compared to the other
+    reactions in its group.
     """
-    for index1 in range(len(reactions)):
-        reaction1 = reactions[index1]
-        remainingList = reactions[index1+1:]
-        markDuplicateReaction(reaction1, remainingList)
+    buckets = {}
+    for reaction in reactions:
+        buckets.setdefault(_get_duplicate_key(reaction), []).append(reaction)
+    for bucket in buckets.itervalues():
+        for index1 in range(len(bucket) - 1):
+            markDuplicateReaction(bucket[index1], bucket[index1+1:])
  
 
 def saveSpeciesDictionary(path, species, oldStyle=False):
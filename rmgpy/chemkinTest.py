@@ -32,7 +32,7 @@ import unittest
 import mock
 import os
 from chemkin import *
-from chemkin import _removeLineBreaks, _process_duplicate_reactions
+from chemkin import _removeLineBreaks, _process_duplicate_reactions, _get_duplicate_key
 import rmgpy
 from rmgpy.species import Species
 from rmgpy.reaction import Reaction
@@ -427,6 +427,19 @@ multiplicity 2
         self.assertEqual(duplicate_flags, expected_flags)
 
 
+    def test_get_duplicate_key(self):
+        """Test that the duplicate key ignores species order and reaction direction."""
+        s1 = Species().fromSMILES('CC')
+        s2 = Species().fromSMILES('[CH3]')
+        s3 = Species().fromSMILES('[OH]')
+        s4 = Species().fromSMILES('O')
+
+        key = _get_duplicate_key(Reaction(reactants=[s1, s3], products=[s2, s4]))
+        self.assertEqual(key, _get_duplicate_key(Reaction(reactants=[s3, s1], products=[s4, s2])))
+        self.assertEqual(key, _get_duplicate_key(Reaction(reactants=[s2, s4], products=[s1, s3])))
+        self.assertNotEqual(key, _get_duplicate_key(Reaction(reactants=[s1, s3], products=[s2, s4], specificCollider=s1)))
+        self.assertNotEqual(key, _get_duplicate_key(Reaction(reactants=[s1, s3], products=[s2, s2])))
+
 class TestReadReactionComments(unittest.TestCase):
     @classmethod
     def setUpClass(self):
@@ -43,7 +43,7 @@ try:
 except ImportError:
     logging.warning("Upgrade to Python 2.7 or later to ensure your database entries are read and written in the same order each time!")
     OrderedDict = dict
-from rmgpy.molecule import Molecule, Group
+from rmgpy.molecule import Molecule, Group, Bond
 
 from reference import Reference, Article, Book, Thesis
 from rmgpy.exceptions import DatabaseError, ForbiddenStructureException, InvalidAdjacencyListError
@@ -163,6 +163,9 @@ class Database:
     local_context['Book'] = Book
     local_context['Thesis'] = Thesis
 
+    # The DescendTreeCache used by descendTree(), if enabled
+    descendCache = None
+
     def __init__(self,
                  entries=None,
                  top=None,
@@ -200,6 +203,8 @@ class Database:
         # Clear any previously-loaded data
         self.entries = OrderedDict()
         self.top = []
+        if self.descendCache is not None:
+            self.enableDescendCache(self.descendCache.maxSize)
 
         # Set up global and local context
         if global_context is None: global_context = {}
@@ -986,6 +991,21 @@ class Database:
                 
             return result
 
+    def enableDescendCache(self, maxSize=10000):
+        """
+        Memoize the results of :meth:`descendTree` for molecules in a
+        :class:`DescendTreeCache` holding up to `maxSize` local environments.
+        The tree must not be modified while the cache is enabled, except
+        through :meth:`load` and :meth:`removeGroup`, which reset it.
+        """
+        self.descendCache = DescendTreeCache(self, maxSize)
+
+    def disableDescendCache(self):
+        """
+        Stop memoizing the results of :meth:`descendTree`.
+        """
+        self.descendCache = None
+
     def descendTree(self, structure, atoms, root=None, strict=False):
         """
         Descend the tree in search of the functional group node that best
@@ -998,6 +1018,18 @@ class Database:
         Set strict to ``True`` if all labels in final matched node must match that of the
         structure.  This is used in kinetics groups to find the correct reaction template, but
         not generally used in other GAVs due to species generally not being prelabeled.
+
+        If the descent cache is enabled (see :meth:`enableDescendCache`), the
+        result is looked up by the local environment of `atoms` first.
+        """
+        if self.descendCache is not None:
+            return self.descendCache.descendTree(self, structure, atoms, root, strict)
+        return self.descendTreeUncached(structure, atoms, root, strict)
+
+    def descendTreeUncached(self, structure, atoms, root=None, strict=False):
+        """
+        Descend the tree as in :meth:`descendTree`, without using the descent
+        cache.
         """
 
         if root is None:
@@ -1015,7 +1047,7 @@ class Database:
                 next.append(child)
 
         if len(next) == 1:
-            return self.descendTree(structure, atoms, next[0], strict)
+            return self.descendTreeUncached(structure, atoms, next[0], strict)
         elif len(next) == 0:
             if len(root.children) > 0 and root.children[-1].label.startswith('Others-'):
                 return root.children[-1]
@@ -1023,7 +1055,7 @@ class Database:
                 return root
         else:
             #logging.warning('For {0}, a node {1} with overlapping children {2} was encountered in tree with top level nodes {3}. Assuming the first match is the better one.'.format(structure, root, next, self.top))
-            return self.descendTree(structure, atoms, next[0], strict)
+            return self.descendTreeUncached(structure, atoms, next[0], strict)
 
     def areSiblings(self, node, nodeOther):
         """
@@ -1040,6 +1072,8 @@ class Database:
 
         Returns the removed group
         """
+        if self.descendCache is not None:
+            self.enableDescendCache(self.descendCache.maxSize)
         #Don't remove top nodes or LogicOrs as this will cause lots of problems
         if groupToRemove in self.top:
             raise Exception("Cannot remove top node: {0} from {1} because it is a top node".format(groupToRemove, self))
@@ -1068,6 +1102,210 @@ class Database:
 
         return groupToRemove
 
+################################################################################
+
+class DescendTreeCache(object):
+    """
+    A memo of the results of :meth:`Database.descendTree` for molecules.
+
+    The node found by descending a tree only depends on the atoms within a
+    certain number of bonds of the labeled atoms, namely the largest
+    distance between an atom and the labeled atoms of any group in the tree,
+    and on a few global properties of the molecule that groups can place
+    limits on (multiplicity, radical count and element counts). Results are
+    therefore stored by a hash of this local environment, and a lookup is
+    only accepted after checking that the stored environment is isomorphic
+    to the new one, so that the cache never changes the result of a descent.
+    The least recently used environments are evicted once there are more
+    than `maxSize` of them. The attributes are:
+
+    =================== ========================================================
+    Attribute           Description
+    =================== ========================================================
+    `maxSize`           The maximum number of local environments to store
+    `radius`            The number of bonds from the labeled atoms that the groups in the tree extend to, or ``None`` if the descent cannot be memoized
+    `labels`            The set of atom labels used by the groups in the tree
+    `useMultiplicity`   ``True`` if any group constrains the multiplicity
+    `maxRadicalCount`   The largest radical count required by any group
+    `maxElementCount`   A dictionary of the largest count of each element required by any group
+    `entries`           An ordered dictionary of the stored environments and results, keyed by hash
+    `hits`              The number of descents answered from the cache
+    `misses`            The number of descents that had to be done
+    `skipped`           The number of descents that could not use the cache
+    =================== ========================================================
+    """
+
+    def __init__(self, database, maxSize=10000):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.analyzeTree(database)
+
+    def analyzeTree(self, database):
+        """
+        Determine the radius and the global constraints of the groups in the
+        tree of `database`. If a group has an atom that cannot be reached from
+        its labeled atoms, it can match anywhere in a molecule, and the radius
+        is set to ``None`` to turn off the cache.
+        """
+        self.radius = 0
+        self.labels = set()
+        self.useMultiplicity = False
+        self.maxRadicalCount = 0
+        self.maxElementCount = {}
+        for entry in database.entries.itervalues():
+            group = entry.item
+            if not isinstance(group, Group):
+                continue
+            centers = [atom for atom in group.atoms if atom.label]
+            self.labels.update([atom.label for atom in centers])
+            distances = dict([(atom, 0) for atom in centers])
+            queue = list(centers)
+            while queue:
+                atom = queue.pop(0)
+                for neighbor in atom.edges:
+                    if neighbor not in distances:
+                        distances[neighbor] = distances[atom] + 1
+                        queue.append(neighbor)
+            if len(distances) < len(group.atoms):
+                self.radius = None
+                return
+            self.radius = max([self.radius] + distances.values())
+            if group.multiplicity:
+                self.useMultiplicity = True
+            radicalCount = sum([atom.radicalElectrons[0] for atom in group.atoms if atom.radicalElectrons])
+            self.maxRadicalCount = max(self.maxRadicalCount, radicalCount, group.radicalCount)
+            for elementCount in [group.get_element_count(), group.elementCount]:
+                for element, count in elementCount.iteritems():
+                    self.maxElementCount[element] = max(self.maxElementCount.get(element, 0), count)
+
+    @property
+    def hitRate(self):
+        """
+        The fraction of the memoizable descents that were answered from the cache.
+        """
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def descendTree(self, database, structure, atoms, root=None, strict=False):
+        """
+        Return the result of :meth:`Database.descendTree` for the given
+        arguments, from the cache if the local environment of `atoms` in
+        `structure` has been seen before.
+        """
+        environment = self.getLocalEnvironment(structure, atoms, strict)
+        if environment is None:
+            self.skipped += 1
+            return database.descendTreeUncached(structure, atoms, root, strict)
+        distances, roles = environment
+
+        key = self.getEnvironmentHash(structure, distances, roles, root, strict)
+        molecule, labeledAtoms = self.makeEnvironmentMolecule(distances, roles)
+        # Move the bucket to the end to mark it as the most recently used
+        bucket = self.entries.pop(key, [])
+        self.entries[key] = bucket
+        for other, otherLabeledAtoms, result in bucket:
+            if set(labeledAtoms) != set(otherLabeledAtoms):
+                continue
+            initialMap = dict([(labeledAtoms[role], otherLabeledAtoms[role]) for role in labeledAtoms])
+            if molecule.isIsomorphic(other, initialMap):
+                self.hits += 1
+                return result
+
+        self.misses += 1
+        result = database.descendTreeUncached(structure, atoms, root, strict)
+        bucket.append((molecule, labeledAtoms, result))
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+        return result
+
+    def getLocalEnvironment(self, structure, atoms, strict):
+        """
+        Return a dictionary of the atoms of `structure` within the radius of
+        the tree of the labeled `atoms` and their distances from them, and a
+        dictionary of the role of each labeled atom, given by its label in
+        `atoms` and its own label. Returns ``None`` if the descent cannot be
+        memoized.
+        """
+        if self.radius is None or not isinstance(structure, Molecule):
+            return None
+        # Without strict matching, groups with labels that are not in `atoms`
+        # may match anywhere in the structure
+        if not strict and not self.labels.issubset(atoms):
+            return None
+
+        roles = {}
+        for label, atom in atoms.iteritems():
+            if atom is None or isinstance(atom, list):
+                return None
+            roles[atom] = roles.get(atom, ()) + (label,)
+        distances = dict([(atom, 0) for atom in roles])
+        queue = list(roles)
+        while queue:
+            atom = queue.pop(0)
+            if distances[atom] == self.radius:
+                continue
+            for neighbor in atom.edges:
+                if neighbor not in distances:
+                    distances[neighbor] = distances[atom] + 1
+                    queue.append(neighbor)
+
+        # Labeled atoms that are not group centers are ignored by the matching,
+        # so their labels are part of the environment too
+        for atom in distances:
+            if atom.label:
+                roles[atom] = roles.get(atom, ()) + ('@' + atom.label,)
+        roles = dict([(atom, ' '.join(sorted(role))) for atom, role in roles.iteritems()])
+        if len(set(roles.values())) < len(roles):
+            return None
+        return distances, roles
+
+    def getEnvironmentHash(self, structure, distances, roles, root, strict):
+        """
+        Return a hash of the local environment with atom `distances` and
+        labeled atom `roles` in `structure`, together with the global
+        properties of `structure` that the groups in the tree depend on. The
+        atoms are classified by a few rounds of neighbor refinement, so that
+        isomorphic environments have the same hash.
+        """
+        classes = {}
+        for atom in distances:
+            classes[atom] = hash((atom.element.symbol, atom.element.isotope,
+                                  atom.atomType.label if atom.atomType is not None else '',
+                                  atom.radicalElectrons, atom.lonePairs, atom.charge,
+                                  roles.get(atom, ''), distances[atom]))
+        for i in xrange(self.radius):
+            classes = dict([(atom, hash((classes[atom], tuple(sorted([(bond.order, classes[neighbor])
+                                for neighbor, bond in atom.edges.iteritems() if neighbor in distances])))))
+                            for atom in distances])
+
+        elementCount = structure.get_element_count()
+        globalKey = (structure.multiplicity if self.useMultiplicity else None,
+                     min(structure.getRadicalCount(), self.maxRadicalCount),
+                     tuple([min(elementCount.get(element, 0), count)
+                            for element, count in sorted(self.maxElementCount.iteritems())]))
+        rootLabel = root.label if root is not None and not isinstance(root, str) else root
+        return hash((tuple(sorted(classes.values())), globalKey, rootLabel, strict))
+
+    def makeEnvironmentMolecule(self, distances, roles):
+        """
+        Return a copy of the atoms in `distances` and the bonds between them
+        as a :class:`Molecule`, together with a dictionary of its labeled
+        atoms by role.
+        """
+        copies = dict([(atom, atom.copy()) for atom in distances])
+        molecule = Molecule(atoms=copies.values())
+        for atom in distances:
+            for neighbor, bond in atom.edges.iteritems():
+                if neighbor in copies and id(atom) < id(neighbor):
+                    molecule.addBond(Bond(copies[atom], copies[neighbor], order=bond.order))
+        labeledAtoms = dict([(role, copies[atom]) for atom, role in roles.iteritems()])
+        return molecule, labeledAtoms
+
+################################################################################
+
 class LogicNode:
     """
     A base class for AND and OR logic nodes.
@@ -116,6 +116,45 @@ class TestBaseDatabase(unittest.TestCase):
         self.assertTrue(self.database.matchNodeToNode(entry1,entry1))
         self.assertFalse(self.database.matchNodeToNode(entry1,entry2))
 
+    def testDescendCache(self):
+        """
+        Test that the descent cache gives the same nodes as descending the tree.
+        """
+        adjlists = [
+            ('R', None, '1 * R u0'),
+            ('C', 'R', '1 * C u0'),
+            ('O', 'R', '1 * O u0'),
+            ('C-O', 'C', '1 * C u0 {2,S}\n2 O u0 {1,S}'),
+            ('C-C-O', 'C', '1 * C u0 {2,S}\n2 C u0 {1,S} {3,S}\n3 O u0 {2,S}'),
+        ]
+        for label, parent, adjlist in adjlists:
+            entry = Entry(label=label, item=Group().fromAdjacencyList(adjlist))
+            if parent is None:
+                self.database.top.append(entry)
+            else:
+                entry.parent = self.database.entries[parent]
+                entry.parent.children.append(entry)
+            self.database.entries[label] = entry
+
+        self.database.enableDescendCache()
+        cache = self.database.descendCache
+        self.assertEqual(cache.radius, 2)
+
+        for smiles in ['CCCO', 'CCCCO', 'OCCO', 'CC(C)O', 'CCOC']:
+            molecule = Molecule().fromSMILES(smiles)
+            for atom in molecule.atoms:
+                if atom.isHydrogen():
+                    continue
+                atoms = {'*': atom}
+                self.assertIs(self.database.descendTree(molecule, atoms),
+                              self.database.descendTreeUncached(molecule, atoms))
+        self.assertGreater(cache.hits, 0)
+        self.assertGreater(cache.misses, 0)
+        self.assertEqual(cache.skipped, 0)
+
+        # Unlabeled structures can not be memoized
+        self.assertIsNone(self.database.descendTree(Molecule().fromSMILES('C'), {}))
+        self.assertEqual(cache.skipped, 1)
 
 class TestForbiddenStructures(unittest.TestCase):
 
@@ -172,6 +172,43 @@ def ensure_species(input_list, resonance=False, keep_isomorphic=False):
         input_list[index] = new_item
 
 
+def get_structure_key(molecule):
+    """
+    Return a hashable key describing `molecule` in its current atom order.
+    Two molecules with equal keys have the same atom types, electrons, charges
+    and labels on every atom index and the same bonds between every pair of
+    atom indices, so that template matches found for one of them can be
+    transferred to the other by atom index.
+    """
+    atoms = molecule.atoms
+    indices = dict([(atom, i) for i, atom in enumerate(atoms)])
+    key = [molecule.multiplicity]
+    for atom in atoms:
+        key.append((atom.element.symbol, atom.element.isotope,
+                    atom.atomType.label if atom.atomType is not None else None,
+                    atom.radicalElectrons, atom.lonePairs, atom.charge, atom.label,
+                    tuple(sorted([(indices[atom2], bond.order) for atom2, bond in atom.bonds.iteritems()]))))
+    return tuple(key)
+
+
+def get_template_match_keys(input_species):
+    """
+    Given a list of :class:`Species` objects, return a dictionary mapping the
+    ``id`` of each of their molecules to a tuple of the key under which the
+    template matches of that molecule are cached in each
+    :class:`KineticsFamily` and the list of its atoms in the order used by the
+    key. Only species with a valid index (i.e. species of the reaction model)
+    are cached.
+    """
+    match_keys = {}
+    for species in input_species:
+        if species.index == -1:
+            continue
+        for molecule in species.molecule:
+            match_keys[id(molecule)] = ((species.index, get_structure_key(molecule)), molecule.atoms[:])
+    return match_keys
+
+
 def generate_molecule_combos(input_species):
     """
     Generate combinations of molecules from the given species objects.
@@ -29,8 +29,10 @@
 ###############################################################################
 
 
+import os
 import os.path
 import logging
+import multiprocessing
 from copy import deepcopy
 import numpy
 
@@ -46,8 +48,26 @@ from rmgpy.data.base import LogicNode
 from .family import  KineticsFamily
 from .library import LibraryReaction, KineticsLibrary
 from .common import ensure_species, generate_molecule_combos, \
-                    find_degenerate_reactions, ensure_independent_atom_ids
+                    find_degenerate_reactions, ensure_independent_atom_ids, get_template_match_keys
 from rmgpy.exceptions import DatabaseError
+from rmgpy.timing import phase, count
+from rmgpy.util import getWorkerException, raiseWorkerException
+
+# The kinetics database and the arguments of loadFamilies() used by forked workers
+_database = None
+_loadFamiliesArgs = None
+
+def _loadFamily(label):
+    """
+    Load the kinetics family `label` with the database and arguments inherited
+    from the parent process, and return it (or ``None`` if it was skipped).
+    Exceptions are returned as given by :func:`rmgpy.util.getWorkerException`.
+    """
+    path, depositories, elements = _loadFamiliesArgs
+    try:
+        return _database.loadFamily(path, label, depositories, elements), None
+    except Exception, e:
+        return None, getWorkerException(e)
 
 ################################################################################
 
@@ -96,14 +116,25 @@ class KineticsDatabase(object):
         self.libraries = d['libraries']
         self.libraryOrder = d['libraryOrder']
 
-    def load(self, path, families=None, libraries=None, depositories=None):
+    def load(self, path, families=None, libraries=None, depositories=None, elements=None, processes=1):
         """
         Load the kinetics database from the given `path` on disk, where `path`
         points to the top-level folder of the families database.
+
+        If a list of element symbols `elements` is given, families that cannot
+        react with species made of these elements and of the elements of the
+        species in the loaded libraries are skipped (see :meth:`loadFamilies`).
+        The families are loaded using up to `processes` worker processes.
         """
         self.loadRecommendedFamiliesList(os.path.join(path, 'families', 'recommended.py')),
-        self.loadFamilies(os.path.join(path, 'families'), families, depositories)
         self.loadLibraries(os.path.join(path, 'libraries'), libraries)
+        if elements is not None:
+            elements = set(elements)
+            for library in self.libraries.itervalues():
+                for entry in library.entries.itervalues():
+                    for spc in entry.item.reactants + entry.item.products:
+                        elements.update(atom.element.symbol for atom in spc.molecule[0].atoms)
+        self.loadFamilies(os.path.join(path, 'families'), families, depositories, elements, processes)
 
     def loadRecommendedFamiliesList(self, filepath):
         """
@@ -138,7 +169,7 @@ class KineticsDatabase(object):
                                         for name, value in rec.__dict__.iteritems()
                                         if not name.startswith('_')}
 
-    def loadFamilies(self, path, families=None, depositories=None):
+    def loadFamilies(self, path, families=None, depositories=None, elements=None, processes=1):
         """
         Load the kinetics families from the given `path` on disk, where `path`
         points to the top-level folder of the kinetics families.
@@ -151,6 +182,15 @@ class KineticsDatabase(object):
 
         If all items begin with a `!` (e.g. ['!H_Abstraction']), then the
         selection will be inverted to families NOT in the list.
+
+        If a list of element symbols `elements` is given, only the groups of
+        each family are loaded at first, and the rules and depositories of the
+        families whose reactant templates require another element are never
+        loaded; these families are left out, since they cannot react with any
+        species made of these `elements`.
+
+        With more than one of `processes`, the families are loaded in forked
+        worker processes and sent back to this process.
         """
         for (root, dirs, files) in os.walk(os.path.join(path)):
             if root == path:
@@ -204,15 +244,55 @@ class KineticsDatabase(object):
 
         # Now we know what families to load, so let's load them
         self.families = {}
-        for label in selected_families:
-            familyPath = os.path.join(path, label)
-            family = KineticsFamily(label=label)
+        processes = min(processes, len(selected_families))
+        if processes > 1 and hasattr(os, 'fork') and not multiprocessing.current_process().daemon:
+            global _database, _loadFamiliesArgs
+            logging.info('Loading {0:d} kinetics families with {1:d} processes...'.format(len(selected_families),
+                                                                                       processes))
+            _database = self
+            _loadFamiliesArgs = (path, depositories, elements)
+            pool = multiprocessing.Pool(processes=processes)
             try:
-                family.load(familyPath, self.local_context, self.global_context, depositoryLabels=depositories)
-            except:
-                logging.error("Error when loading reaction family {!r}".format(familyPath))
-                raise
-            self.families[label] = family
+                results = pool.map(_loadFamily, selected_families, chunksize=1)
+            finally:
+                pool.terminate()
+                _database = None
+                _loadFamiliesArgs = None
+            for label, (family, error) in zip(selected_families, results):
+                if error is not None:
+                    logging.error("Error when loading reaction family {!r}".format(os.path.join(path, label)))
+                    raiseWorkerException(error)
+                if family is not None:
+                    self.families[label] = family
+        else:
+            for label in selected_families:
+                family = self.loadFamily(path, label, depositories, elements)
+                if family is not None:
+                    self.families[label] = family
+
+        skipped = [label for label in selected_families if label not in self.families]
+        if skipped:
+            logging.info('Skipped kinetics families that cannot react with species containing only {0}: {1}'.format(
+                ', '.join(sorted(elements)), ', '.join(skipped)))
+
+    def loadFamily(self, path, label, depositories=None, elements=None):
+        """
+        Load and return the kinetics family `label` from the folder of the
+        kinetics families at `path` on disk. If a list of element symbols
+        `elements` is given and the family cannot react with species made of
+        these elements, only its groups are loaded and ``None`` is returned.
+        """
+        familyPath = os.path.join(path, label)
+        family = KineticsFamily(label=label)
+        try:
+            family.loadGroups(familyPath, self.local_context, self.global_context)
+            if elements is not None and not family.canReactWithElements(elements):
+                return None
+            family.loadRules(familyPath, self.local_context, self.global_context, depositoryLabels=depositories)
+        except:
+            logging.error("Error when loading reaction family {!r}".format(familyPath))
+            raise
+        return family
 
     def loadLibraries(self, path, libraries=None):
         """
@@ -511,11 +591,16 @@ and immediately used in input files without any additional changes.
             reactants = list(reactants)
         ensure_independent_atom_ids(reactants, resonance=resonance)
 
+        # Template matches of model species are cached by each family, since
+        # the same species is reacted with many different partners
+        match_keys = get_template_match_keys(reactants)
+
         combos = generate_molecule_combos(reactants)
 
         reaction_list = []
         for combo in combos:
-            reaction_list.extend(self.react_molecules(combo, products=products, only_families=only_families, prod_resonance=resonance))
+            reaction_list.extend(self.react_molecules(combo, products=products, only_families=only_families,
+                                                      prod_resonance=resonance, match_keys=match_keys))
 
         # Calculate reaction degeneracy
         reaction_list = find_degenerate_reactions(reaction_list, same_reactants, kinetics_database=self)
@@ -533,15 +618,23 @@ and immediately used in input files without any additional changes.
 
         return reaction_list
 
-    def react_molecules(self, molecules, products=None, only_families=None, prod_resonance=True):
+    def react_molecules(self, molecules, products=None, only_families=None, prod_resonance=True, match_keys=None):
         """
         Generate reactions from all families for the input molecules.
+        The optional `match_keys` dictionary, as generated by
+        :func:`get_template_match_keys`, enables the template match cache of
+        each family for the given molecules.
         """
         reaction_list = []
         for label, family in self.families.iteritems():
             if only_families is None or label in only_families:
                 try:
-                    reaction_list.extend(family.generateReactions(molecules, products=products, prod_resonance=prod_resonance))
+                    with phase(label):
+                        reactions = family.generateReactions(molecules, products=products,
+                                                             prod_resonance=prod_resonance,
+                                                             match_keys=match_keys)
+                    count('reactions/' + label, len(reactions))
+                    reaction_list.extend(reactions)
                 except:
                     logging.error("Problem family: {}".format(label))
                     logging.error("Problem reactants: {}".format(molecules))
@@ -552,6 +645,15 @@ and immediately used in input files without any additional changes.
 
         return reaction_list
 
+    def clear_match_cache(self, species=None):
+        """
+        Clear the cached template matches of `species` in every family, e.g.
+        when the species is removed from the reaction model. If `species` is
+        not given, the caches are cleared completely.
+        """
+        for family in self.families.itervalues():
+            family.clearMatchCache(species)
+
     def getForwardReactionForFamilyEntry(self, entry, family, thermoDatabase):
         """
         For a given `entry` for a reaction of the given reaction `family` (the
@@ -48,6 +48,8 @@ from rmgpy import settings
 from rmgpy.reaction import Reaction
 from rmgpy.kinetics import Arrhenius
 from rmgpy.molecule import Bond, GroupBond, Group, Molecule
+from rmgpy.molecule.atomtype import atomTypes
+from rmgpy.molecule.element import elementList
 from rmgpy.molecule.resonance import generate_optimal_aromatic_resonance_structures
 from rmgpy.species import Species
 
@@ -369,6 +371,49 @@ class ReactionRecipe:
 
 ################################################################################
 
+# The elements that each atom type can represent, keyed by atom type label
+_atomTypeElements = {}
+
+def getAtomTypeElements(atomType):
+    """
+    Return the set of symbols of the elements that an atom of the given
+    `atomType` can be, e.g. ``{'C', 'Si'}`` for ``Val4``.
+    """
+    try:
+        return _atomTypeElements[atomType.label]
+    except KeyError:
+        pass
+    elements = set()
+    for symbol in set(element.symbol for element in elementList):
+        elementType = atomTypes.get(symbol)
+        if elementType is not None and (elementType.isSpecificCaseOf(atomType) or
+                                        atomType.isSpecificCaseOf(elementType)):
+            elements.add(symbol)
+    _atomTypeElements[atomType.label] = elements
+    return elements
+
+def canMatchElements(node, entries, elements):
+    """
+    Return ``False`` if the group or logic `node` can only match molecules
+    that contain an element not in the set of element symbols `elements`,
+    and ``True`` otherwise. Components of logic nodes are looked up by label
+    in the dictionary of group `entries`. Inverted logic nodes are assumed to
+    match anything.
+    """
+    if isinstance(node, basestring):
+        node = entries[node].item
+    if isinstance(node, Group):
+        return all(any(getAtomTypeElements(atomType) & elements for atomType in atom.atomType)
+                   for atom in node.atoms)
+    elif isinstance(node, LogicNode):
+        if node.invert:
+            return True
+        matches = [canMatchElements(component, entries, elements) for component in node.components]
+        return any(matches) if isinstance(node, LogicOr) else all(matches)
+    return True
+
+################################################################################
+
 class KineticsFamily(Database):
     """
     A class for working with an RMG kinetics family: a set of reactions with 
@@ -388,6 +433,7 @@ class KineticsFamily(Database):
     `ownReverse`        `Boolean`                       It's its own reverse?
     'boundaryAtoms'     list                            Labels which define the boundaries of end groups in backbone/end families
     `treeDistances`     dict                            The default distance from parent along each tree, if not set default is 1 for every tree
+    `matchCache`        ``dict``                        The cached template matches of model species, indexed by species index and structure key
     ------------------- ------------------------------- ------------------------
     `groups`            :class:`KineticsGroups`         The set of kinetics group additivity values
     `rules`             :class:`KineticsRules`          The set of kinetics rate rules from RMG-Java
@@ -427,6 +473,7 @@ class KineticsFamily(Database):
         self.ownReverse = forwardTemplate is not None and reverseTemplate is None
         self.boundaryAtoms = boundaryAtoms
         self.treeDistances = treeDistances
+        self.matchCache = {}
         
         # Kinetics depositories of training and test data
         self.groups = None
@@ -628,6 +675,15 @@ class KineticsFamily(Database):
         If depositoryLabels is None then load 'training' first then everything else.
         If depositoryLabels is not None then load in the order specified in depositoryLabels.
         """
+        self.loadGroups(path, local_context, global_context)
+        self.loadRules(path, local_context, global_context, depositoryLabels)
+
+    def loadGroups(self, path, local_context=None, global_context=None):
+        """
+        Load the groups, reaction template and recipe of the kinetics family
+        located at `path` on disk. This is the first part of :meth:`load`, and
+        is all that is needed to match the reaction template.
+        """
         local_context['recipe'] = self.loadRecipe
         local_context['template'] = self.loadTemplate
         local_context['forbidden'] = self.loadForbidden
@@ -661,7 +717,14 @@ class KineticsFamily(Database):
                     self.reverse = '{0}_reverse'.format(self.label)
         
         self.groups.numReactants = len(self.forwardTemplate.reactants)
-            
+
+    def loadRules(self, path, local_context=None, global_context=None, depositoryLabels=None):
+        """
+        Load the rate rules and the depositories of the kinetics family
+        located at `path` on disk, after its groups have been loaded by
+        :meth:`loadGroups`. This is the second part of :meth:`load`, and
+        usually the most expensive one.
+        """
         self.rules = KineticsRules(label='{0}/rules'.format(self.label))
         logging.debug("Loading kinetics family rules from {0}".format(os.path.join(path, 'rules.py')))
         self.rules.load(os.path.join(path, 'rules.py'), local_context, global_context)
@@ -1169,6 +1232,19 @@ class KineticsFamily(Database):
             return self.forwardTemplate.reactants
         else:
             return self.groups.top
+
+    def canReactWithElements(self, elements):
+        """
+        Return ``False`` if the reactant template of this family can only be
+        matched by molecules containing an element that is not in the list
+        of element symbols `elements`, and ``True`` otherwise. Reactions
+        conserve the elements, so the same holds for the product template,
+        and a family that cannot react with the elements of any species in a
+        job will never generate a reaction in it.
+        """
+        elements = set(elements)
+        return all(canMatchElements(entry.item, self.groups.entries, elements)
+                   for entry in self.forwardTemplate.reactants)
     
     def fillKineticsRulesByAveragingUp(self, verbose=False):
         """
@@ -1555,26 +1631,58 @@ class KineticsFamily(Database):
         
         return reaction
 
-    def __matchReactantToTemplate(self, reactant, templateReactant):
+    def __matchReactantToTemplate(self, reactant, templateReactant, match_keys=None):
         """
         Return a complete list of the mappings if the provided reactant 
         matches the provided template reactant, or an empty list if not.
+
+        If `reactant` has an entry in `match_keys`, the mappings are taken from
+        (or stored in) the template match cache of this family, with the atoms
+        of the mappings stored by their index.
         """
 
         if isinstance(templateReactant, list): templateReactant = templateReactant[0]
         struct = templateReactant.item
-        
+
+        try:
+            (speciesIndex, structureKey), atoms = match_keys[id(reactant)]
+        except (TypeError, KeyError):
+            cache = None
+        else:
+            cache = self.matchCache.setdefault(speciesIndex, {}).setdefault(structureKey, {})
+            try:
+                cachedMappings = cache[templateReactant]
+            except KeyError:
+                pass
+            else:
+                return [dict([(atoms[index], groupAtom) for index, groupAtom in mapping]) for mapping in cachedMappings]
+
         if isinstance(struct, LogicNode):
             mappings = []
             for child_structure in struct.getPossibleStructures(self.groups.entries):
                 mappings.extend(reactant.findSubgraphIsomorphisms(child_structure))
-            return mappings
         elif isinstance(struct, Group):
-            return reactant.findSubgraphIsomorphisms(struct)
+            mappings = reactant.findSubgraphIsomorphisms(struct)
         else:
             raise NotImplementedError("Not expecting template of type {}".format(type(struct)))
 
-    def generateReactions(self, reactants, products=None, prod_resonance=True):
+        if cache is not None:
+            indices = dict([(atom, index) for index, atom in enumerate(atoms)])
+            cache[templateReactant] = [[(indices[atom], groupAtom) for atom, groupAtom in mapping.iteritems()]
+                                             for mapping in mappings]
+        return mappings
+
+    def clearMatchCache(self, species=None):
+        """
+        Remove the cached template matches of `species` (or of all species if
+        `species` is ``None``) from the template match cache.
+        """
+        if species is None:
+            self.matchCache = {}
+        else:
+            self.matchCache.pop(species.index, None)
+
+    def generateReactions(self, reactants, products=None, prod_resonance=True, match_keys=None):
         """
         Generate all reactions between the provided list of one, two, or three
         `reactants`, which should be either single :class:`Molecule` objects
@@ -1589,6 +1697,8 @@ class KineticsFamily(Database):
             products (list, optional):       List of Molecules or Species of desired product structures.
             prod_resonance (bool, optional): Flag to generate resonance structures for product checking.
                 Defaults to True, resonance structures are compared.
+            match_keys (dict, optional):     Template match cache keys of the reactants, see
+                :func:`rmgpy.data.kinetics.common.get_template_match_keys`.
 
         Returns:
             List of all reactions containing Molecule objects with the
@@ -1599,12 +1709,14 @@ class KineticsFamily(Database):
 
         # Forward direction (the direction in which kinetics is defined)
         reactionList.extend(
-            self.__generateReactions(reactants, products=products, forward=True, prod_resonance=prod_resonance))
+            self.__generateReactions(reactants, products=products, forward=True, prod_resonance=prod_resonance,
+                                     match_keys=match_keys))
 
         if not self.ownReverse and self.reversible:
             # Reverse direction (the direction in which kinetics is not defined)
             reactionList.extend(
-                self.__generateReactions(reactants, products=products, forward=False, prod_resonance=prod_resonance))
+                self.__generateReactions(reactants, products=products, forward=False, prod_resonance=prod_resonance,
+                                         match_keys=match_keys))
 
         return reactionList
 
@@ -1752,7 +1864,7 @@ class KineticsFamily(Database):
         return reactions[0].degeneracy
         
     def __generateReactions(self, reactants, products=None, forward=True, prod_resonance=True,
-                            react_non_reactive=False):
+                            react_non_reactive=False, match_keys=None):
         """
         Generate a list of all the possible reactions of this family between
         the list of `reactants`. The number of reactants provided must match
@@ -1773,6 +1885,8 @@ class KineticsFamily(Database):
                                 Default is True, resonance structures are compared
             react_non_reactive: Flag to generate reactions between unreactive molecules (optional)
                                 Default is False, reactions involving unreactive molecules are not generated
+            match_keys:         Dictionary of template match cache keys of the reactants (optional)
+                                Default is None, the template match cache is not used
 
         Returns:
             List of all reactions containing Molecule objects with the
@@ -1802,7 +1916,7 @@ class KineticsFamily(Database):
             for molecule in reactants[0]:
                 if molecule.reactive or react_non_reactive:  # don't react non representative resonance isomers unless
                     # explicitly desired (e.g., when called from calculateDegeneracy)
-                    mappings = self.__matchReactantToTemplate(molecule, template.reactants[0])
+                    mappings = self.__matchReactantToTemplate(molecule, template.reactants[0], match_keys)
                     for map in mappings:
                         reactantStructures = [molecule]
                         try:
@@ -1826,8 +1940,8 @@ class KineticsFamily(Database):
                     if (moleculeA.reactive and moleculeB.reactive) or react_non_reactive:
 
                         # Reactants stored as A + B
-                        mappingsA = self.__matchReactantToTemplate(moleculeA, template.reactants[0])
-                        mappingsB = self.__matchReactantToTemplate(moleculeB, template.reactants[1])
+                        mappingsA = self.__matchReactantToTemplate(moleculeA, template.reactants[0], match_keys)
+                        mappingsB = self.__matchReactantToTemplate(moleculeB, template.reactants[1], match_keys)
 
                         # Iterate over each pair of matches (A, B)
                         for mapA in mappingsA:
@@ -1848,8 +1962,8 @@ class KineticsFamily(Database):
                         if reactants[0] is not reactants[1]:
 
                             # Reactants stored as B + A
-                            mappingsA = self.__matchReactantToTemplate(moleculeA, template.reactants[1])
-                            mappingsB = self.__matchReactantToTemplate(moleculeB, template.reactants[0])
+                            mappingsA = self.__matchReactantToTemplate(moleculeA, template.reactants[1], match_keys)
+                            mappingsB = self.__matchReactantToTemplate(moleculeB, template.reactants[0], match_keys)
 
                             # Iterate over each pair of matches (A, B)
                             for mapA in mappingsA:
@@ -1880,9 +1994,12 @@ class KineticsFamily(Database):
                             """
                             order = (0, 1, 2) corresponds to reactants stored as A + B + C, etc.
                             """
-                            _mappingsA = self.__matchReactantToTemplate(moleculeA, template.reactants[order[0]])
-                            _mappingsB = self.__matchReactantToTemplate(moleculeB, template.reactants[order[1]])
-                            _mappingsC = self.__matchReactantToTemplate(moleculeC, template.reactants[order[2]])
+                            _mappingsA = self.__matchReactantToTemplate(moleculeA, template.reactants[order[0]],
+                                                                          match_keys)
+                            _mappingsB = self.__matchReactantToTemplate(moleculeB, template.reactants[order[1]],
+                                                                          match_keys)
+                            _mappingsC = self.__matchReactantToTemplate(moleculeC, template.reactants[order[2]],
+                                                                          match_keys)
 
                             # Iterate over each pair of matches (A, B, C)
                             for _mapA in _mappingsA:
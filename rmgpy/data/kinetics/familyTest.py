@@ -638,6 +638,29 @@ multiplicity 2
         finally:
             shutil.rmtree(os.path.join(settings['test_data.directory'], 'testing_database/kinetics/families/intra_H_copy'))
 
+    def testCanReactWithElements(self):
+        """
+        Test that families are only compatible with the elements their reactant templates can match.
+        """
+        self.assertTrue(self.database.families['H_Abstraction'].canReactWithElements(['C', 'H', 'O']))
+        self.assertFalse(self.database.families['H_Abstraction'].canReactWithElements(['Ar']))
+        self.assertTrue(self.database.families['intra_substitutionS_isomerization'].canReactWithElements(['C', 'H', 'S']))
+        self.assertFalse(self.database.families['intra_substitutionS_isomerization'].canReactWithElements(['C', 'H', 'O']))
+
+    def testLoadFamiliesForElements(self):
+        """
+        Test that families which cannot react with the given elements are skipped, also when loading in parallel.
+        """
+        path = os.path.join(settings['test_data.directory'], 'testing_database/kinetics/families')
+        families = ['H_Abstraction', 'intra_H_migration', 'intra_substitutionS_isomerization']
+        for processes in [1, 2]:
+            database = KineticsDatabase()
+            database.loadFamilies(path=path, families=families, elements=['C', 'H', 'O'], processes=processes)
+            self.assertEqual(sorted(database.families), ['H_Abstraction', 'intra_H_migration'])
+            family = database.families['H_Abstraction']
+            self.assertEqual(len(family.rules.entries), len(self.database.families['H_Abstraction'].rules.entries))
+            self.assertIs(family.forwardTemplate.reactants[0], family.groups.entries['X_H_or_Xrad_H_Xbirad_H_Xtrirad_H'])
+
 
 class TestTreeGeneration(unittest.TestCase):
 
@@ -877,6 +900,33 @@ multiplicity 2
         reactionList = self.database.kinetics.families['Singlet_Val6_to_triplet'].generateReactions(reactant)
         self.assertFalse(reactionList[0].reversible)
 
+    def test_template_match_cache(self):
+        """Test that cached template matches give the same reactions as fresh subgraph searches."""
+        family = self.database.kinetics.families['H_Abstraction']
+        family.clearMatchCache()
+
+        spc1 = Species(index=1).fromSMILES('CCC')
+        spc2 = Species(index=2).fromSMILES('[CH3]')
+        spc1.generate_resonance_structures()
+        spc2.generate_resonance_structures()
+
+        reactionList1 = self.database.kinetics.generate_reactions_from_families(
+            [spc1.copy(deep=True), spc2.copy(deep=True)], only_families=['H_Abstraction'])
+        self.assertTrue(1 in family.matchCache)
+        self.assertTrue(2 in family.matchCache)
+
+        reactionList2 = self.database.kinetics.generate_reactions_from_families(
+            [spc1.copy(deep=True), spc2.copy(deep=True)], only_families=['H_Abstraction'])
+        self.assertEqual(len(reactionList1), len(reactionList2))
+        for rxn1, rxn2 in zip(reactionList1, reactionList2):
+            self.assertTrue(rxn1.isIsomorphic(rxn2))
+            self.assertEqual(rxn1.degeneracy, rxn2.degeneracy)
+            self.assertEqual(rxn1.template, rxn2.template)
+
+        family.clearMatchCache(spc1)
+        self.assertFalse(1 in family.matchCache)
+        self.assertTrue(2 in family.matchCache)
+
     def test_net_charge_of_products(self):
         """Test that __generateProductStructures() does not generate charged products"""
 
@@ -33,8 +33,12 @@ This module contains the :class:`RMGDatabase` class, which is the primary class
 for working with the RMG database.
 """
 
+import os
 import os.path
 import logging
+import hashlib
+import tempfile
+import cPickle
 
 from base import ForbiddenStructures
 from thermo import ThermoDatabase
@@ -44,10 +48,22 @@ from statmech import StatmechDatabase
 from solvation import SolvationDatabase
 from rmgpy.exceptions import DatabaseError
 from rmgpy.scoop_framework.util import get, broadcast
+from rmgpy.util import getGitCommit
 
 # Module-level variable to store the (only) instance of RMGDatabase in use.
 database = None
 
+# The version of the format of the files written by saveDatabaseCache().
+# Increment this whenever a change to the database classes makes previously
+# pickled databases unusable.
+DATABASE_CACHE_VERSION = 1
+
+# The files and folders of the RMG database that are read by RMGDatabase.load()
+DATABASE_CACHE_SOURCES = ['thermo', 'transport', 'forbiddenStructures.py', 'kinetics', 'statmech', 'solvation']
+
+# The RMG-Py source files and folders of the code that builds the database
+DATABASE_CACHE_CODE_SOURCES = ['data', 'molecule/group.py', 'molecule/group.pyx', 'molecule/group.pxd']
+
 ################################################################################
 
 class RMGDatabase:
@@ -83,7 +99,9 @@ class RMGDatabase:
              statmechLibraries=None,
              depository=True,
              solvation=True,
-             testing = False):
+             testing = False,
+             elements=None,
+             processes=1):
         """
         Load the RMG database from the given `path` on disk, where `path`
         points to the top-level folder of the RMG database. If none of the
@@ -92,6 +110,11 @@ class RMGDatabase:
         components of the database be loaded.
 
         Argument testing will load a lighter version of the database used for unit-tests
+
+        If a list of element symbols `elements` is given, kinetics families that
+        cannot react with species made of these elements (or of those in the
+        reaction libraries) are not loaded. The kinetics families are loaded
+        using up to `processes` worker processes.
         """
         self.loadThermo(os.path.join(path, 'thermo'), thermoLibraries, depository)
         if not testing:
@@ -101,7 +124,9 @@ class RMGDatabase:
                           reactionLibraries,
                           seedMechanisms,
                           kineticsFamilies,
-                          kineticsDepositories
+                          kineticsDepositories,
+                          elements,
+                          processes
                           )
         if not testing:
             self.loadStatmech(os.path.join(path, 'statmech'), statmechLibraries, depository)
@@ -144,7 +169,9 @@ class RMGDatabase:
                      reactionLibraries=None,
                      seedMechanisms=None,
                      kineticsFamilies=None,
-                     kineticsDepositories=None
+                     kineticsDepositories=None,
+                     elements=None,
+                     processes=1
                      ):
         """
         Load the RMG kinetics database from the given `path` on disk, where
@@ -168,7 +195,9 @@ class RMGDatabase:
         self.kinetics.load(path,
                            families=kineticsFamilies,
                            libraries=kineticsLibraries,
-                           depositories=kineticsDepositories
+                           depositories=kineticsDepositories,
+                           elements=elements,
+                           processes=processes
                            )
 
         broadcast(self.kinetics, 'kinetics')
@@ -191,6 +220,53 @@ class RMGDatabase:
         self.statmech.load(path, statmechLibraries, depository)
         broadcast(self.statmech, 'statmech')
 
+    def broadcast(self):
+        """
+        Make this the module-level database, and broadcast each of its loaded
+        components, as is done when they are loaded from disk. This is needed
+        after a database is unpickled.
+        """
+        global database
+        database = self
+        for component, key in [(self.thermo, 'thermo'), (self.transport, 'transport'),
+                               (self.forbiddenStructures, 'forbidden'), (self.kinetics, 'kinetics'),
+                               (self.statmech, 'statmech'), (self.solvation, 'solvation')]:
+            if component is not None:
+                broadcast(component, key)
+
+    def getGroupDatabases(self):
+        """
+        Return a list of the loaded group databases, i.e. the databases whose
+        trees are searched with :meth:`Database.descendTree`.
+        """
+        databases = []
+        for database in [self.thermo, self.transport, self.statmech, self.solvation]:
+            if database is not None:
+                databases.extend([database.groups[label] for label in sorted(database.groups)])
+        if self.kinetics is not None:
+            for label in sorted(self.kinetics.families):
+                databases.append(self.kinetics.families[label].groups)
+        return databases
+
+    def enableDescendCaches(self, maxSize=10000):
+        """
+        Memoize the tree descents of all loaded group databases, storing up
+        to `maxSize` local environments per tree.
+        """
+        for database in self.getGroupDatabases():
+            database.enableDescendCache(maxSize)
+
+    def logDescendCacheStatistics(self):
+        """
+        Log the hit rate of the tree descent cache of each group database.
+        """
+        for database in self.getGroupDatabases():
+            cache = database.descendCache
+            if cache is None or cache.hits + cache.misses + cache.skipped == 0:
+                continue
+            logging.info('Descent cache for {0}: {1:d} hits, {2:d} misses, {3:d} not cached ({4:.1%} hit rate)'.format(
+                database.label, cache.hits, cache.misses, cache.skipped, cache.hitRate))
+
     def loadOld(self, path):
         """
         Load the old RMG database from the given `path` on disk, where `path`
@@ -234,6 +310,110 @@ class RMGDatabase:
         self.kinetics.saveOld(path)
         self.statmech.saveOld(path)
 
+################################################################################
+
+def getDatabaseCacheKey(path, **options):
+    """
+    Return a key identifying the database loaded from the RMG database at
+    `path` with the given keyword `options`, for use with
+    :func:`saveDatabaseCache` and :func:`loadDatabaseCache`. The key is a hash
+    of the names and contents of all of the database files, the options, the
+    RMG version, the RMG-Py git commit (if any), the sources of the code that
+    builds the database and :data:`DATABASE_CACHE_VERSION`, so it changes
+    whenever any of these change, including uncommitted changes to the code.
+    """
+    from rmgpy import __version__, getPath
+    sha = hashlib.sha1('{0} {1} {2}\n'.format(__version__, getGitCommit(getPath())[0], DATABASE_CACHE_VERSION))
+    for label in sorted(options):
+        sha.update('{0}={1!r}\n'.format(label, options[label]))
+    _updateHashWithFiles(sha, os.path.abspath(path), DATABASE_CACHE_SOURCES)
+    _updateHashWithFiles(sha, getPath(), DATABASE_CACHE_CODE_SOURCES, extensions=('.py', '.pyx', '.pxd'))
+    return sha.hexdigest()
+
+
+def _updateHashWithFiles(sha, path, sources, extensions=None):
+    """
+    Update the hash object `sha` with the names relative to `path` and the
+    contents of the files and folders `sources` in `path`. Only the files
+    ending in one of the `extensions` are read from folders, if given.
+    Sources that do not exist are skipped.
+    """
+    for source in sources:
+        sourcePath = os.path.join(path, source)
+        if os.path.isfile(sourcePath):
+            filePaths = [sourcePath]
+        else:
+            filePaths = []
+            for root, dirs, files in os.walk(sourcePath):
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+                filePaths.extend(os.path.join(root, f) for f in sorted(files)
+                                 if not f.startswith('.') and not f.endswith(('.pyc', '.pyo'))
+                                 and (extensions is None or f.endswith(extensions)))
+        for filePath in filePaths:
+            sha.update('file {0}\n'.format(os.path.relpath(filePath, path)))
+            with open(filePath, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), ''):
+                    sha.update(chunk)
+
+
+def getDatabaseCachePath(directory, key):
+    """
+    Return the path of the file in `directory` in which the database
+    identified by `key` is cached.
+    """
+    return os.path.join(directory, 'database_{0}.pkl'.format(key))
+
+
+def saveDatabaseCache(directory, key, rmgDatabase):
+    """
+    Save the :class:`RMGDatabase` `rmgDatabase` to the cache in `directory`
+    under `key`. The file is written under a temporary name and then renamed,
+    so that jobs sharing the cache never read a partially written file. A
+    database that cannot be saved is not an error; a warning is logged and
+    the database will simply be loaded from its source files next time.
+    """
+    path = getDatabaseCachePath(directory, key)
+    tempPath = None
+    try:
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        fd, tempPath = tempfile.mkstemp(prefix='.database_', suffix='.tmp', dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            cPickle.dump((DATABASE_CACHE_VERSION, key, rmgDatabase), f, cPickle.HIGHEST_PROTOCOL)
+        os.rename(tempPath, path)
+        tempPath = None
+    except (cPickle.PicklingError, TypeError, RuntimeError, IOError, OSError) as e:
+        logging.warning('Could not save the database cache file {0}: {1!s}'.format(path, e))
+        return None
+    finally:
+        if tempPath is not None and os.path.exists(tempPath):
+            os.remove(tempPath)
+    return path
+
+
+def loadDatabaseCache(directory, key):
+    """
+    Load the :class:`RMGDatabase` saved under `key` in the cache in
+    `directory`, make it the module-level database and return it. Returns
+    ``None`` if there is no usable cache file, in which case the database
+    must be loaded from its source files.
+    """
+    path = getDatabaseCachePath(directory, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            version, cachedKey, rmgDatabase = cPickle.load(f)
+    except Exception as e:
+        logging.warning('Could not load the database cache file {0}: {1!s}'.format(path, e))
+        return None
+    if version != DATABASE_CACHE_VERSION or cachedKey != key:
+        return None
+    rmgDatabase.broadcast()
+    return rmgDatabase
+
+################################################################################
+
 def getDB(name=''):
     """
     Returns the RMG database object that corresponds
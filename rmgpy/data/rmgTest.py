@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG - Reaction Mechanism Generator                                          #
+#                                                                             #
+# Copyright (c) 2002-2019 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import rmgpy.data.rmg
+from rmgpy.data.base import ForbiddenStructures
+from rmgpy.data.rmg import RMGDatabase, getDatabaseCacheKey, getDatabaseCachePath, loadDatabaseCache, saveDatabaseCache
+from rmgpy.molecule import Group
+
+################################################################################
+
+class TestDatabaseCache(unittest.TestCase):
+    """
+    Contains unit tests of the on-disk cache of prepared RMG databases.
+    """
+
+    def setUp(self):
+        """
+        A function run before each unit test in this class.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.databasePath = os.path.join(self.directory, 'input')
+        os.makedirs(os.path.join(self.databasePath, 'thermo', 'groups'))
+        with open(os.path.join(self.databasePath, 'thermo', 'groups', 'group.py'), 'w') as f:
+            f.write('name = "Group"\n')
+        with open(os.path.join(self.databasePath, 'forbiddenStructures.py'), 'w') as f:
+            f.write('name = "Forbidden"\n')
+        self.cachePath = os.path.join(self.directory, 'cache')
+
+    def tearDown(self):
+        """
+        A function run after each unit test in this class.
+        """
+        shutil.rmtree(self.directory)
+
+    def testCacheKey(self):
+        """
+        Test that the cache key changes with the database files and the options only.
+        """
+        key = getDatabaseCacheKey(self.databasePath, thermoLibraries=['primaryThermoLibrary'])
+        self.assertEqual(key, getDatabaseCacheKey(self.databasePath, thermoLibraries=['primaryThermoLibrary']))
+        self.assertNotEqual(key, getDatabaseCacheKey(self.databasePath, thermoLibraries=[]))
+
+        # Compiled files are not part of the database
+        with open(os.path.join(self.databasePath, 'thermo', 'groups', 'group.pyc'), 'w') as f:
+            f.write('compiled')
+        self.assertEqual(key, getDatabaseCacheKey(self.databasePath, thermoLibraries=['primaryThermoLibrary']))
+
+        with open(os.path.join(self.databasePath, 'thermo', 'groups', 'group.py'), 'a') as f:
+            f.write('shortDesc = u""\n')
+        self.assertNotEqual(key, getDatabaseCacheKey(self.databasePath, thermoLibraries=['primaryThermoLibrary']))
+
+    def testCacheKeyCode(self):
+        """
+        Test that the cache key changes with the sources of the code that builds the database.
+        """
+        codePath = os.path.join(self.directory, 'code')
+        os.makedirs(codePath)
+        with open(os.path.join(codePath, 'family.py'), 'w') as f:
+            f.write('x = 1\n')
+        codeSources = rmgpy.data.rmg.DATABASE_CACHE_CODE_SOURCES
+        rmgpy.data.rmg.DATABASE_CACHE_CODE_SOURCES = [codePath]
+        try:
+            key = getDatabaseCacheKey(self.databasePath)
+            with open(os.path.join(codePath, 'family.so'), 'w') as f:
+                f.write('compiled')
+            self.assertEqual(key, getDatabaseCacheKey(self.databasePath))
+            with open(os.path.join(codePath, 'family.py'), 'a') as f:
+                f.write('x = 2\n')
+            self.assertNotEqual(key, getDatabaseCacheKey(self.databasePath))
+        finally:
+            rmgpy.data.rmg.DATABASE_CACHE_CODE_SOURCES = codeSources
+
+    def testSaveAndLoad(self):
+        """
+        Test that a saved database is loaded back and made the module-level database.
+        """
+        key = getDatabaseCacheKey(self.databasePath)
+        self.assertIsNone(loadDatabaseCache(self.cachePath, key))
+
+        database = RMGDatabase()
+        database.forbiddenStructures = ForbiddenStructures()
+        database.forbiddenStructures.loadEntry(label='C_triplet', group="""
+1 C u2 p0
+""")
+        path = saveDatabaseCache(self.cachePath, key, database)
+        self.assertEqual(path, getDatabaseCachePath(self.cachePath, key))
+        self.assertEqual(os.listdir(self.cachePath), [os.path.basename(path)])
+
+        loaded = loadDatabaseCache(self.cachePath, key)
+        self.assertIsNot(loaded, database)
+        self.assertIs(rmgpy.data.rmg.database, loaded)
+        entry = loaded.forbiddenStructures.entries['C_triplet']
+        self.assertTrue(isinstance(entry.item, Group))
+        self.assertTrue(entry.item.isIsomorphic(database.forbiddenStructures.entries['C_triplet'].item))
+
+        self.assertIsNone(loadDatabaseCache(self.cachePath, getDatabaseCacheKey(self.databasePath, depository=False)))
+
+################################################################################
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
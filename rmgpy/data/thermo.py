@@ -583,10 +583,76 @@ class ThermoDepository(Database):
 class ThermoLibrary(Database):
     """
     A class for working with a RMG thermodynamics library.
+
+    The entries are indexed by the fingerprint of their molecule, so that only
+    entries with a matching fingerprint need to be checked for isomorphism
+    when searching the library for a species.
     """
 
     def __init__(self, label='', name='',solvent=None, shortDesc='', longDesc=''):
         Database.__init__(self, label=label, name=name, shortDesc=shortDesc, longDesc=longDesc)
+        self.fingerprintIndex = {}
+        self.indexedEntries = None
+        self.numIndexedEntries = 0
+
+    def __getstate__(self):
+        """
+        A helper function used when pickling a ThermoLibrary object. The
+        fingerprint index is left out, since the fingerprints are hashes that
+        may differ in the process that unpickles it.
+        """
+        d = self.__dict__.copy()
+        d['fingerprintIndex'] = {}
+        d['indexedEntries'] = None
+        d['numIndexedEntries'] = 0
+        return d
+
+    def __setstate__(self, d):
+        """
+        A helper function used when unpickling a ThermoLibrary object. The
+        fingerprint index is rebuilt when the library is first searched.
+        """
+        self.__dict__.update(d)
+
+    def indexEntries(self):
+        """
+        Build the fingerprint index of the library entries, a dictionary mapping
+        each fingerprint to a list of (position, entry) tuples in library order.
+        The index is only rebuilt if the entries have been replaced, resized or
+        invalidated with :meth:`invalidateIndex` since it was last built.
+        """
+        if self.indexedEntries is self.entries and self.numIndexedEntries == len(self.entries):
+            return
+        self.fingerprintIndex = {}
+        for position, entry in enumerate(self.entries.itervalues()):
+            self.fingerprintIndex.setdefault(entry.item.fingerprint, []).append((position, entry))
+        self.indexedEntries = self.entries
+        self.numIndexedEntries = len(self.entries)
+
+    def invalidateIndex(self):
+        """
+        Mark the fingerprint index as out of date, so that it is rebuilt when
+        the library is next searched. This must be called after changing the
+        entries other than with :meth:`loadEntry`, e.g. after removing,
+        reordering or replacing entries or changing their molecules.
+        """
+        self.indexedEntries = None
+
+    def getEntriesForMolecules(self, molecules):
+        """
+        Return the list of library entries, in library order, whose molecule
+        has the same fingerprint as any of the given `molecules`. These are the
+        only entries that can be isomorphic to one of `molecules`.
+        """
+        self.indexEntries()
+        fingerprints = set([molecule.fingerprint for molecule in molecules])
+        if len(fingerprints) == 1:
+            return [entry for position, entry in self.fingerprintIndex.get(fingerprints.pop(), [])]
+        matches = []
+        for fingerprint in fingerprints:
+            matches.extend(self.fingerprintIndex.get(fingerprint, []))
+        matches.sort(key=lambda match: match[0])
+        return [entry for position, entry in matches]
 
     def loadEntry(self,
                   index,
@@ -606,12 +672,12 @@ class ThermoLibrary(Database):
         if label in self.entries.keys():
             raise DatabaseError('Found a duplicate molecule with label {0} in the thermo library {1}.  Please correct your library.'.format(label, self.name))
         
-        for entry in self.entries.values():
+        for entry in self.getEntriesForMolecules([molecule]):
             if molecule.isIsomorphic(entry.item):
                 if molecule.multiplicity == entry.item.multiplicity:
                     raise DatabaseError('Adjacency list and multiplicity of {0} matches that of existing molecule {1} in thermo library {2}.  Please correct your library.'.format(label, entry.label, self.name))
         
-        self.entries[label] = Entry(
+        entry = self.entries[label] = Entry(
             index = index,
             label = label,
             item = molecule,
@@ -622,6 +688,9 @@ class ThermoLibrary(Database):
             longDesc = longDesc.strip(),
             rank = rank,
         )
+        # Add the new entry to the (up-to-date) index instead of rebuilding it
+        self.fingerprintIndex.setdefault(molecule.fingerprint, []).append((self.numIndexedEntries, entry))
+        self.numIndexedEntries += 1
 
     def saveEntry(self, f, entry):
         """
@@ -1010,6 +1079,7 @@ class ThermoDatabase(object):
             for label in toDelete:
                 logging.info(" {0}".format(label))
                 library.entries.pop(label)
+            library.invalidateIndex()
 
     def saveOld(self, path):
         """
@@ -1372,7 +1442,7 @@ class ThermoDatabase(object):
         Returns a tuple: (ThermoData, library, entry)  or None.
         """
         match = None
-        for entry in library.entries.itervalues():
+        for entry in library.getEntriesForMolecules(species.molecule):
             for molecule in species.molecule:
                 if molecule.isIsomorphic(entry.item) and entry.data is not None:
                     thermoData = deepcopy(entry.data)
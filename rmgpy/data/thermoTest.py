@@ -112,6 +112,11 @@ class TestThermoDatabase(unittest.TestCase):
             library = self.database.libraries[key]
             self.assertTrue(type(library0), type(library))
             self.assertEqual(sorted(library0.entries.keys()), sorted(library.entries.keys()))
+            # The fingerprint index is rebuilt instead of being unpickled
+            self.assertIsNone(library0.indexedEntries)
+            self.assertEqual(library0.fingerprintIndex, {})
+            entry = library0.entries.values()[0]
+            self.assertIn(entry, library0.getEntriesForMolecules([entry.item]))
 
         for key, group0 in thermodb0.groups.iteritems():
             group = self.database.groups[key]
@@ -469,6 +474,41 @@ multiplicity 2
         self.assertTrue(thermo_gav2.getEnthalpy(298) > thermo_gav1.getEnthalpy(298),
                         msg="Did not select the reactive molecule for thermo")
 
+    def testThermoLibraryFingerprintIndex(self):
+        """Test that the fingerprint index of a thermo library finds the same first match as a linear search"""
+        library = self.database.libraries['primaryThermoLibrary']
+        for smiles in ['[H][H]', 'C', '[CH3]', 'O=C=O', 'CCCCCCCC']:
+            spec = Species().fromSMILES(smiles)
+            spec.generate_resonance_structures()
+            expected = None
+            for entry in library.entries.itervalues():
+                if any([molecule.isIsomorphic(entry.item) for molecule in spec.molecule]):
+                    expected = entry
+                    break
+            candidates = library.getEntriesForMolecules(spec.molecule)
+            self.assertTrue(all([candidate.item.fingerprint == spec.molecule[0].fingerprint for candidate in candidates]))
+            match = self.database.getThermoDataFromLibrary(spec, library)
+            if expected is None:
+                self.assertIsNone(match)
+            else:
+                self.assertIs(match[2], expected)
+
+        # The index is rebuilt when the entries change
+        library = ThermoLibrary()
+        library.entries = self.database.libraries['primaryThermoLibrary'].entries.copy()
+        label = library.entries.keys()[0]
+        entry = library.entries.pop(label)
+        self.assertFalse(entry in library.getEntriesForMolecules([entry.item]))
+        library.entries[label] = entry
+        self.assertTrue(entry in library.getEntriesForMolecules([entry.item]))
+
+        # Changes that keep the number of entries need the index to be invalidated
+        label0, label1 = library.entries.keys()[:2]
+        entry = Entry(label=label0, item=library.entries[label1].item, data=library.entries[label0].data)
+        library.entries[label0] = entry
+        library.invalidateIndex()
+        self.assertTrue(entry in library.getEntriesForMolecules([entry.item]))
+
 class TestThermoAccuracy(unittest.TestCase):
     """
     Contains tests for accuracy of thermo estimates and symmetry calculations.
@@ -285,6 +285,14 @@ class ResonanceError(Exception):
     """
     pass
 
+class WorkerError(Exception):
+    """
+    An exception raised in the parent process for an exception in a worker
+    process that could not be passed back to it. The message contains the
+    traceback from the worker.
+    """
+    pass
+
 ################## move classes that extend off previous exceptions here
 
 class InvalidMicrocanonicalRateError(NetworkError):
@@ -296,6 +304,12 @@ class InvalidMicrocanonicalRateError(NetworkError):
         self.message = message
         self.k_ratio = k_ratio
         self.Keq_ratio = Keq_ratio
+    def __reduce__(self):
+        """
+        A helper function used when pickling the object, e.g. to pass it back
+        from a worker process.
+        """
+        return (InvalidMicrocanonicalRateError, (self.message, self.k_ratio, self.Keq_ratio))
     def badness(self):
         """
         How bad is the error?
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG - Reaction Mechanism Generator                                          #
+#                                                                             #
+# Copyright (c) 2002-2019 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This module contains the :class:`BatchKineticsEvaluator` class, which evaluates
+the rate coefficients and equilibrium constants of many reactions at once
+using numpy arrays.
+"""
+
+import numpy
+import scipy.sparse
+
+import rmgpy.constants as constants
+from rmgpy.kinetics.arrhenius import Arrhenius, MultiArrhenius, PDepArrhenius
+from rmgpy.kinetics.chebyshev import Chebyshev
+from rmgpy.kinetics.diffusionLimited import diffusionLimiter
+from rmgpy.kinetics.falloff import ThirdBody, Lindemann, Troe
+from rmgpy.exceptions import ReactionError
+from rmgpy.thermo.batch import BatchThermoEvaluator
+
+################################################################################
+
+def _packArrhenius(arrheniusList):
+    """
+    Return the preexponential factors, temperature exponents, activation
+    energies and reference temperatures of the :class:`Arrhenius` objects in
+    `arrheniusList` as four arrays in SI units.
+    """
+    params = numpy.zeros((4, len(arrheniusList)), numpy.float64)
+    for i, arrh in enumerate(arrheniusList):
+        params[:, i] = [arrh.A.value_si, arrh.n.value_si, arrh.Ea.value_si, arrh.T0.value_si]
+    return params
+
+
+def _evaluateArrhenius(params, T):
+    """
+    Return the rate coefficients of Arrhenius expressions packed by
+    :func:`_packArrhenius` at temperature `T` in K.
+    """
+    A, n, Ea, T0 = params
+    return A * (T / T0)**n * numpy.exp(-Ea / (constants.R * T))
+
+
+class BatchKineticsEvaluator(object):
+    """
+    Evaluates the forward rate coefficients and equilibrium constants of a
+    list of reactions in a single vectorized pass. The kinetics parameters are
+    packed into contiguous arrays when the evaluator is created, with separate
+    blocks for :class:`Arrhenius` and :class:`MultiArrhenius` kinetics, the
+    falloff forms (:class:`ThirdBody`, :class:`Lindemann` and :class:`Troe`),
+    :class:`PDepArrhenius` kinetics, and :class:`Chebyshev` kinetics grouped
+    by their number of coefficients. All other reactions are evaluated using
+    :meth:`Reaction.getRateCoefficient`. The attributes are:
+
+    =================== ========================================================
+    Attribute           Description
+    =================== ========================================================
+    `reactions`         The list of reactions to evaluate
+    `kinetics`          The kinetics object of each reaction when the evaluator was created
+    `thermo`            The :class:`BatchThermoEvaluator` for the reactants and products
+    `stoichiometry`     A sparse matrix of the stoichiometric coefficients of each reaction
+    `deltaN`            An array of the change in the number of molecules for each reaction
+    `arrhenius`         The reaction indices and packed parameters of the Arrhenius block
+    `falloff`           The reaction indices and packed parameters of the falloff block
+    `pdepArrhenius`     The reaction indices and packed parameters of the PDepArrhenius block
+    `chebyshev`         A list of the reaction indices and packed parameters of the Chebyshev blocks
+    `otherIndices`      The indices of the reactions that are evaluated one at a time
+    =================== ========================================================
+
+    The evaluator does not notice changes made to the parameters of a kinetics
+    or thermo object in place, so a new evaluator should be created if these
+    are modified. Replacing the kinetics or thermo objects is detected by
+    :meth:`isValid`.
+    """
+
+    def __init__(self, reactions):
+        self.reactions = list(reactions)
+        self.kinetics = [rxn.kinetics for rxn in self.reactions]
+
+        # Species and stoichiometry for the equilibrium constants
+        speciesIndex = {}
+        rows, cols, vals = [], [], []
+        self.deltaN = numpy.zeros(len(self.reactions), numpy.float64)
+        for j, rxn in enumerate(self.reactions):
+            for spec, coeff in [(spec, -1) for spec in rxn.reactants] + [(spec, 1) for spec in rxn.products]:
+                if spec not in speciesIndex:
+                    speciesIndex[spec] = len(speciesIndex)
+                rows.append(j)
+                cols.append(speciesIndex[spec])
+                vals.append(coeff)
+            self.deltaN[j] = len(rxn.products) - len(rxn.reactants)
+        speciesList = sorted(speciesIndex, key=speciesIndex.get)
+        self.thermo = BatchThermoEvaluator(speciesList)
+        self.stoichiometry = scipy.sparse.coo_matrix((vals, (rows, cols)),
+            shape=(len(self.reactions), len(speciesList))).tocsr()
+
+        # Sort the reactions into kinetics blocks
+        arrheniusIndices, arrheniusList = [], []
+        falloffIndices, falloffList = [], []
+        pdepIndices, pdepList = [], []
+        chebyshevBlocks = {}
+        otherIndices = []
+        for j, kinetics in enumerate(self.kinetics):
+            if type(kinetics) is Arrhenius:
+                arrheniusIndices.append(j)
+                arrheniusList.append(kinetics)
+            elif type(kinetics) is MultiArrhenius and all([type(arrh) is Arrhenius for arrh in kinetics.arrhenius]):
+                arrheniusIndices.extend([j] * len(kinetics.arrhenius))
+                arrheniusList.extend(kinetics.arrhenius)
+            elif type(kinetics) in (ThirdBody, Lindemann, Troe) and type(kinetics.arrheniusLow) is Arrhenius \
+                    and (type(kinetics) is ThirdBody or type(kinetics.arrheniusHigh) is Arrhenius):
+                falloffIndices.append(j)
+                falloffList.append(kinetics)
+            elif type(kinetics) is PDepArrhenius and all([type(arrh) is Arrhenius for arrh in kinetics.arrhenius]):
+                pdepIndices.append(j)
+                pdepList.append(kinetics)
+            elif type(kinetics) is Chebyshev:
+                chebyshevBlocks.setdefault((kinetics.degreeT, kinetics.degreeP), []).append(j)
+            else:
+                otherIndices.append(j)
+
+        self.arrhenius = (numpy.array(arrheniusIndices, numpy.int), _packArrhenius(arrheniusList))
+        self.falloff = self._packFalloff(falloffIndices, falloffList)
+        self.pdepArrhenius = self._packPDepArrhenius(pdepIndices, pdepList)
+        self.chebyshev = [self._packChebyshev(indices) for indices in chebyshevBlocks.itervalues()]
+        self.otherIndices = otherIndices
+
+    def _packFalloff(self, indices, kineticsList):
+        """
+        Pack the low- and high-pressure limit Arrhenius parameters and the Troe
+        parameters of the falloff kinetics in `kineticsList`. Third-body
+        kinetics have no high-pressure limit, and Lindemann kinetics use
+        ``T1 = T3 = 0``, which gives a broadening factor of one.
+        """
+        count = len(kineticsList)
+        thirdBody = numpy.zeros(count, numpy.bool)
+        troe = numpy.zeros((4, count), numpy.float64)
+        high = []
+        for i, kinetics in enumerate(kineticsList):
+            if isinstance(kinetics, ThirdBody):
+                thirdBody[i] = True
+                high.append(kinetics.arrheniusLow)
+            else:
+                high.append(kinetics.arrheniusHigh)
+            if isinstance(kinetics, Troe):
+                troe[:, i] = [kinetics.alpha,
+                              kinetics.T1.value_si if kinetics.T1 is not None else 0.0,
+                              kinetics.T2.value_si if kinetics.T2 is not None else 0.0,
+                              kinetics.T3.value_si if kinetics.T3 is not None else 0.0]
+        return (numpy.array(indices, numpy.int), _packArrhenius([kinetics.arrheniusLow for kinetics in kineticsList]),
+                _packArrhenius(high), thirdBody, troe)
+
+    def _packPDepArrhenius(self, indices, kineticsList):
+        """
+        Pack the pressures and Arrhenius parameters of the PDepArrhenius
+        kinetics in `kineticsList` into arrays padded to the largest number of
+        pressures. Padded entries have NaN pressures.
+        """
+        width = max([len(kinetics.arrhenius) for kinetics in kineticsList] or [0])
+        pressures = numpy.nan * numpy.ones((len(kineticsList), width), numpy.float64)
+        params = numpy.ones((4, len(kineticsList), width), numpy.float64)
+        numPressures = numpy.zeros(len(kineticsList), numpy.int)
+        for i, kinetics in enumerate(kineticsList):
+            count = len(kinetics.arrhenius)
+            numPressures[i] = count
+            pressures[i, :count] = kinetics.pressures.value_si
+            params[:, i, :count] = _packArrhenius(kinetics.arrhenius)
+        return numpy.array(indices, numpy.int), pressures, params, numPressures
+
+    def _packChebyshev(self, indices):
+        """
+        Pack the coefficients and temperature and pressure ranges of the
+        Chebyshev kinetics of the reactions at `indices`, which must all have
+        the same number of coefficients.
+        """
+        kineticsList = [self.kinetics[j] for j in indices]
+        coeffs = numpy.array([kinetics.coeffs.value_si for kinetics in kineticsList], numpy.float64)
+        limits = numpy.array([[kinetics.Tmin.value_si, kinetics.Tmax.value_si,
+                               kinetics.Pmin.value_si, kinetics.Pmax.value_si] for kinetics in kineticsList],
+                             numpy.float64).T
+        return numpy.array(indices, numpy.int), coeffs, limits
+
+    def isValid(self, reactions):
+        """
+        Return ``True`` if the evaluator can be used for the list of
+        `reactions`, i.e. if the reactions and their kinetics and thermo
+        objects are the same as when the evaluator was created.
+        """
+        if len(reactions) != len(self.reactions):
+            return False
+        for rxn, rxn0, kinetics in zip(reactions, self.reactions, self.kinetics):
+            if rxn is not rxn0 or rxn.kinetics is not kinetics:
+                return False
+        return self.thermo.isValid()
+
+    def getRateCoefficients(self, T, P):
+        """
+        Return an array of the forward rate coefficients in SI units of all
+        reactions at temperature `T` in K and pressure `P` in Pa. The pressure
+        can also be given as an array with an (effective) pressure for each
+        reaction.
+        """
+        P = P * numpy.ones(len(self.reactions), numpy.float64)
+
+        if diffusionLimiter.enabled:
+            # The diffusion limit depends on the reaction, not only on its kinetics
+            return numpy.array([rxn.getRateCoefficient(T, P[j]) for j, rxn in enumerate(self.reactions)], numpy.float64)
+
+        # Arrhenius block: the terms of MultiArrhenius kinetics are summed
+        indices, params = self.arrhenius
+        k = numpy.bincount(indices, weights=_evaluateArrhenius(params, T), minlength=len(self.reactions))
+
+        # Falloff block
+        indices, low, high, thirdBody, troe = self.falloff
+        if indices.shape[0] > 0:
+            C = P[indices] / constants.R / T     # bath gas concentration in mol/m^3
+            k0 = _evaluateArrhenius(low, T)
+            kinf = _evaluateArrhenius(high, T)
+            Pr = k0 * C / kinf
+            alpha, T1, T2, T3 = troe
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                Fcent = (1 - alpha) * numpy.exp(-T / T3) + alpha * numpy.exp(-T / T1)
+                # A missing T2 is packed as zero, and Troe.getRateCoefficient also skips a zero T2
+                Fcent += numpy.where(T2 != 0.0, numpy.exp(-T2 / T), 0.0)
+                d = 0.14
+                n = 0.75 - 1.27 * numpy.log10(Fcent)
+                c = -0.4 - 0.67 * numpy.log10(Fcent)
+                F = 10.0**(numpy.log10(Fcent)/(1 + ((numpy.log10(Pr) + c)/(n - d * (numpy.log10(Pr))))**2))
+            F = numpy.where((T1 == 0) & (T3 == 0), 1.0, F)
+            k[indices] = numpy.where(thirdBody, k0 * C, kinf * (Pr / (1 + Pr)) * F)
+
+        # PDepArrhenius block: interpolate between the adjacent pressures
+        indices, pressures, params, numPressures = self.pdepArrhenius
+        if indices.shape[0] > 0:
+            Pj = P[indices]
+            if numpy.any(Pj == 0):
+                raise ValueError('No pressure specified to pressure-dependent PDepArrhenius.getRateCoefficient().')
+            rows = numpy.arange(indices.shape[0])
+            width = pressures.shape[1]
+            with numpy.errstate(invalid='ignore'):
+                below = pressures <= Pj[:, numpy.newaxis]
+                above = pressures >= Pj[:, numpy.newaxis]
+            ilow = numpy.where(below.any(axis=1), width - 1 - numpy.argmax(below[:, ::-1], axis=1), 0)
+            ihigh = numpy.where(above.any(axis=1), numpy.argmax(above, axis=1), numPressures - 1)
+            kAll = _evaluateArrhenius(params, T)
+            Plow, Phigh = pressures[rows, ilow], pressures[rows, ihigh]
+            klow, khigh = kAll[rows, ilow], kAll[rows, ihigh]
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                kInterp = klow * 10**(numpy.log10(Pj/Plow)/numpy.log10(Phigh/Plow)*numpy.log10(khigh/klow))
+            kInterp = numpy.where((klow == 0.0) & (khigh == 0.0), 0.0, kInterp)
+            k[indices] = numpy.where(Plow == Phigh, klow, kInterp)
+
+        # Chebyshev blocks
+        for indices, coeffs, limits in self.chebyshev:
+            Pj = P[indices]
+            if numpy.any(Pj == 0):
+                raise ValueError('No pressure specified to pressure-dependent Chebyshev.getRateCoefficient().')
+            Tmin, Tmax, Pmin, Pmax = limits
+            Tred = (2.0/T - 1.0/Tmin - 1.0/Tmax) / (1.0/Tmax - 1.0/Tmin)
+            Pred = (2.0*numpy.log10(Pj) - numpy.log10(Pmin) - numpy.log10(Pmax)) / (numpy.log10(Pmax) - numpy.log10(Pmin))
+            chebT = numpy.polynomial.chebyshev.chebvander(Tred, coeffs.shape[1] - 1)
+            chebP = numpy.polynomial.chebyshev.chebvander(Pred, coeffs.shape[2] - 1)
+            k[indices] = 10.0**numpy.einsum('itp,it,ip->i', coeffs, chebT, chebP)
+
+        for j in self.otherIndices:
+            k[j] = self.reactions[j].getRateCoefficient(T, P[j])
+
+        return k
+
+    def getEquilibriumConstants(self, T, indices=None):
+        """
+        Return an array of the equilibrium constants :math:`K_c` of the
+        reactions at `indices` (all reactions by default) at temperature `T`
+        in K, as computed by :meth:`Reaction.getEquilibriumConstant`.
+        """
+        G = self.thermo.getFreeEnergies(T)
+        dGrxn = self.stoichiometry.dot(G)
+        deltaN = self.deltaN
+        if indices is not None:
+            dGrxn = dGrxn[indices]
+            deltaN = deltaN[indices]
+        # Convert from Ka to Kc; C0 is the reference concentration
+        C0 = 1e5 / constants.R / T
+        K = numpy.exp(-dGrxn / constants.R / T) * C0 ** deltaN
+        if numpy.any(numpy.isnan(K)):
+            # Let the reaction raise the appropriate error for the missing thermo
+            for j, value in enumerate(K):
+                if numpy.isnan(value):
+                    rxn = self.reactions[j if indices is None else indices[j]]
+                    K[j] = rxn.getEquilibriumConstant(T)
+        if numpy.any(K == 0):
+            raise ReactionError('Got equilibrium constant of 0')
+        return K
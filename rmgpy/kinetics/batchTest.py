@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG - Reaction Mechanism Generator                                          #
+#                                                                             #
+# Copyright (c) 2002-2019 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This script contains unit tests of the :mod:`rmgpy.kinetics.batch` module.
+"""
+
+import unittest
+import numpy
+
+from rmgpy.species import Species
+from rmgpy.molecule import Molecule
+from rmgpy.reaction import Reaction
+from rmgpy.thermo import NASA, NASAPolynomial, ThermoData
+from rmgpy.kinetics import Arrhenius, MultiArrhenius, PDepArrhenius, MultiPDepArrhenius, \
+                           Chebyshev, ThirdBody, Lindemann, Troe
+from rmgpy.kinetics.batch import BatchKineticsEvaluator
+
+################################################################################
+
+class TestBatchKineticsEvaluator(unittest.TestCase):
+    """
+    Contains unit tests of the BatchKineticsEvaluator class.
+    """
+
+    def setUp(self):
+        """
+        A function run before each unit test in this class.
+        """
+        octyl_pri = Species(label="octyl_pri", thermo=NASA(polynomials=[
+            NASAPolynomial(coeffs=[-0.772759,0.093255,-5.84447e-05,1.8557e-08,-2.37127e-12,-3926.9,37.6131], Tmin=(298,'K'), Tmax=(1390,'K')),
+            NASAPolynomial(coeffs=[25.051,0.036948,-1.25765e-05,1.94628e-09,-1.12669e-13,-13330.1,-102.557], Tmin=(1390,'K'), Tmax=(5000,'K'))
+            ],
+            Tmin=(298,'K'), Tmax=(5000,'K')), molecule=[Molecule(SMILES="[CH2]CCCCCCC")])
+        octyl_sec = Species(label="octyl_sec", thermo=NASA(polynomials=[
+            NASAPolynomial(coeffs=[-0.304233,0.0880077,-4.90743e-05,1.21858e-08,-8.87773e-13,-5237.93,36.6583], Tmin=(298,'K'), Tmax=(1383,'K')),
+            NASAPolynomial(coeffs=[24.9044,0.0366394,-1.2385e-05,1.90835e-09,-1.10161e-13,-14713.5,-101.345], Tmin=(1383,'K'), Tmax=(5000,'K'))
+            ],
+            Tmin=(298,'K'), Tmax=(5000,'K')), molecule=[Molecule(SMILES="CC[CH]CCCCC")])
+        ethene = Species(label="ethene", thermo=ThermoData(
+            Tdata=([300,400,500,600,800,1000,1500],'K'), Cpdata=([10.294,12.643,14.933,16.932,20.033,22.438,26.281],'cal/(mol*K)'),
+            H298=(12.549,'kcal/mol'), S298=(52.379,'cal/(mol*K)'), Cp0=(33.2579,'J/(mol*K)'), CpInf=(133.032,'J/(mol*K)')),
+            molecule=[Molecule(SMILES="C=C")])
+        decyl = Species(label="decyl", thermo=NASA(polynomials=[
+            NASAPolynomial(coeffs=[-1.31358,0.117973,-7.51843e-05,2.43331e-08,-3.17523e-12,-9689.68,43.501], Tmin=(298,'K'), Tmax=(1390,'K')),
+            NASAPolynomial(coeffs=[31.5697,0.0455818,-1.54995e-05,2.39711e-09,-1.3871e-13,-21573.8,-134.709], Tmin=(1390,'K'), Tmax=(5000,'K'))
+            ],
+            Tmin=(298,'K'), Tmax=(5000,'K')), molecule=[Molecule(SMILES="[CH2]CCCCCCCCC")])
+
+        arrhenius = Arrhenius(A=(1.0e6,'cm^3/(mol*s)'), n=1.5, Ea=(10.0,'kJ/mol'), T0=(1,'K'))
+        arrheniusLow = Arrhenius(A=(2.62e33,'cm^6/(mol^2*s)'), n=-4.76, Ea=(10.21,'kJ/mol'), T0=(1,'K'))
+        arrheniusHigh = Arrhenius(A=(1.39e16,'cm^3/(mol*s)'), n=-0.534, Ea=(2.243,'kJ/mol'), T0=(1,'K'))
+        kineticsList = [
+            Arrhenius(A=(2.0e10,'1/s'), n=0.5, Ea=(120.0,'kJ/mol'), T0=(300,'K')),
+            MultiArrhenius(arrhenius=[
+                Arrhenius(A=(9.3e-14,'cm^3/(molecule*s)'), n=0, Ea=(4740*0.008314472,'kJ/mol'), T0=(1,'K')),
+                Arrhenius(A=(1.4e-9,'cm^3/(molecule*s)'), n=0, Ea=(11200*0.008314472,'kJ/mol'), T0=(1,'K')),
+            ]),
+            ThirdBody(arrheniusLow=arrheniusLow),
+            Lindemann(arrheniusHigh=arrheniusHigh, arrheniusLow=arrheniusLow),
+            Troe(arrheniusHigh=arrheniusHigh, arrheniusLow=arrheniusLow, alpha=0.783, T3=(74,'K'), T1=(2941,'K'), T2=(6964,'K')),
+            PDepArrhenius(pressures=([0.1, 10.0],'atm'), arrhenius=[
+                Arrhenius(A=(1.4e-9,'cm^3/(molecule*s)'), n=0.0, Ea=(11200*0.008314472,'kJ/mol'), T0=(1,'K')),
+                Arrhenius(A=(1.4e-10,'cm^3/(molecule*s)'), n=1.0, Ea=(9200*0.008314472,'kJ/mol'), T0=(1,'K')),
+            ]),
+            Chebyshev(coeffs=[[11.67723,0.729281,-0.11984,0.00882175],[-1.02669,0.853639,-0.0323485,-0.027367],
+                              [-0.447011,0.244144,0.0559122,-0.0101723],[-0.128261,0.0111596,0.0281176,0.00604353],
+                              [-0.0117034,-0.0235646,0.00061009,0.00401309],[0.0155433,-0.0136846,-0.00463048,-0.000261353]],
+                      kunits='cm^3/(mol*s)', Tmin=(300,'K'), Tmax=(2000,'K'), Pmin=(0.01,'bar'), Pmax=(100,'bar')),
+            MultiPDepArrhenius(arrhenius=[
+                PDepArrhenius(pressures=([0.1, 10.0],'atm'), arrhenius=[arrhenius, arrhenius]),
+            ]),
+        ]
+        reactantsList = [[octyl_pri], [octyl_pri, ethene], [octyl_pri, ethene], [octyl_pri, ethene],
+                         [octyl_pri, ethene], [octyl_pri, ethene], [octyl_sec, ethene], [octyl_sec, ethene]]
+        productsList = [[octyl_sec], [decyl], [decyl], [decyl], [decyl], [decyl], [decyl], [decyl]]
+        self.reactions = [Reaction(reactants=reactants, products=products, kinetics=kinetics)
+                          for reactants, products, kinetics in zip(reactantsList, productsList, kineticsList)]
+        self.evaluator = BatchKineticsEvaluator(self.reactions)
+
+    def testGetRateCoefficients(self):
+        """
+        Test that the batch rate coefficients match those of the individual reactions.
+        """
+        for T in [300, 800, 1500]:
+            for P in [1e3, 1e5, 1e7]:
+                kbatch = self.evaluator.getRateCoefficients(T, P)
+                for rxn, k in zip(self.reactions, kbatch):
+                    self.assertAlmostEqual(k / rxn.getRateCoefficient(T, P), 1.0, 6)
+
+    def testGetRateCoefficientsTroe(self):
+        """
+        Test that the batch rate coefficients of Troe kinetics match those of
+        the individual reactions with and without a T2 of zero.
+        """
+        kinetics = self.reactions[4].kinetics
+        reactions = [Reaction(reactants=self.reactions[4].reactants, products=self.reactions[4].products,
+                              kinetics=Troe(arrheniusHigh=kinetics.arrheniusHigh, arrheniusLow=kinetics.arrheniusLow,
+                                            alpha=0.783, T3=(74,'K'), T1=(2941,'K'), T2=T2))
+                     for T2 in [None, (0,'K'), (6964,'K')]]
+        evaluator = BatchKineticsEvaluator(reactions)
+        for T in [300, 800, 1500]:
+            for P in [1e3, 1e5, 1e7]:
+                kbatch = evaluator.getRateCoefficients(T, P)
+                for rxn, k in zip(reactions, kbatch):
+                    self.assertAlmostEqual(k / rxn.getRateCoefficient(T, P), 1.0, 6)
+
+    def testGetRateCoefficientsEffectivePressure(self):
+        """
+        Test that a separate pressure can be given for each reaction.
+        """
+        Peff = numpy.linspace(1e4, 1e6, len(self.reactions))
+        kbatch = self.evaluator.getRateCoefficients(1000, Peff)
+        for rxn, P, k in zip(self.reactions, Peff, kbatch):
+            self.assertAlmostEqual(k / rxn.getRateCoefficient(1000, P), 1.0, 6)
+
+    def testGetEquilibriumConstants(self):
+        """
+        Test that the batch equilibrium constants match those of the individual reactions.
+        """
+        for T in [300, 800, 1500]:
+            Kbatch = self.evaluator.getEquilibriumConstants(T)
+            for rxn, K in zip(self.reactions, Kbatch):
+                self.assertAlmostEqual(K / rxn.getEquilibriumConstant(T), 1.0, 6)
+        Kbatch = self.evaluator.getEquilibriumConstants(1000, numpy.array([1, 6]))
+        self.assertEqual(len(Kbatch), 2)
+        self.assertAlmostEqual(Kbatch[1] / self.reactions[6].getEquilibriumConstant(1000), 1.0, 6)
+
+    def testIsValid(self):
+        """
+        Test that the evaluator is invalidated by replacing a kinetics or thermo object.
+        """
+        self.assertTrue(self.evaluator.isValid(self.reactions))
+        self.assertFalse(self.evaluator.isValid(self.reactions[:-1]))
+        self.reactions[0].kinetics = Arrhenius(A=(1.0,'1/s'), n=0, Ea=(0,'kJ/mol'), T0=(1,'K'))
+        self.assertFalse(self.evaluator.isValid(self.reactions))
+        evaluator = BatchKineticsEvaluator(self.reactions)
+        self.assertTrue(evaluator.isValid(self.reactions))
+        self.reactions[0].reactants[0].thermo = self.reactions[0].products[0].thermo
+        self.assertFalse(evaluator.isValid(self.reactions))
+
+################################################################################
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
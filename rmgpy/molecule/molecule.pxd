@@ -138,6 +138,8 @@ cdef class Molecule(Graph):
     cdef public object rdMol
     cdef public int rdMolConfId
     cdef str _fingerprint
+    cdef dict _elementCount
+    cdef list _degreeSequence
     cdef public str InChI
     cdef public dict props
     
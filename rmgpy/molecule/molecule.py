@@ -768,7 +768,7 @@ class Molecule(Graph):
     `props`                 ``dict``    A list of properties describing the state of the molecule.
     `InChI`                 ``str``     A string representation of the molecule in InChI
     `atoms`                 ``list``    A list of Atom objects in the molecule
-    `fingerprint`           ``str``     A representation for fast comparison, set as molecular formula
+    `fingerprint`           ``str``     A representation for fast comparison: the molecular formula and a hash of the atom connectivity
     ======================= =========== ========================================
 
     A new molecule object can be easily instantiated by passing the `SMILES` or
@@ -781,6 +781,8 @@ class Molecule(Graph):
         self.multiplicity = multiplicity
         self.reactive = reactive
         self._fingerprint = None
+        self._elementCount = None
+        self._degreeSequence = None
         self.InChI = ''
         if SMILES != '': self.fromSMILES(SMILES)
         self.props = props or {}
@@ -848,11 +850,92 @@ class Molecule(Graph):
         sufficient) condition for the associated molecules to be isomorphic.
         """
         if self._fingerprint is None:
-            self.fingerprint = self.getFormula()
+            self.updateFingerprint()
         return self._fingerprint
     def __setFingerprint(self, fingerprint): self._fingerprint = fingerprint
     fingerprint = property(__getFingerprint, __setFingerprint)
 
+    def updateFingerprint(self):
+        """
+        Update the fingerprint of the molecule, together with the cached
+        element counts and sorted atom degrees used to screen subgraph
+        isomorphism checks.
+
+        The fingerprint is the molecular formula followed by a
+        Weisfeiler-Lehman hash of the molecular graph. Each atom starts with a
+        label made of its element, its number of bonds and whether it lies in
+        the 2-core of the graph (in a ring or on a chain joining rings). The
+        labels are then repeatedly replaced by a hash of each atom's label and
+        the sorted labels of its neighbors, until the number of distinct labels
+        stops increasing. Bond orders, radicals, lone pairs and charges are left
+        out on purpose, so that all resonance structures of a species share
+        one fingerprint, which the thermo library index relies on. This also
+        means that moving electrons in place never makes a cached fingerprint
+        stale.
+        """
+        cython.declare(atom=Atom, neighbor=Atom, degree=dict, leaves=list, core=set, labels=dict, newLabels=dict)
+        cython.declare(count=cython.int, newCount=cython.int)
+
+        # Find the 2-core by repeatedly stripping atoms with at most one neighbor left
+        degree = {}
+        for atom in self.vertices:
+            degree[atom] = len(atom.edges)
+        leaves = [atom for atom in self.vertices if degree[atom] <= 1]
+        core = set(self.vertices)
+        while leaves:
+            atom = leaves.pop()
+            if atom not in core: continue
+            core.discard(atom)
+            for neighbor in atom.edges:
+                if neighbor in core:
+                    degree[neighbor] -= 1
+                    if degree[neighbor] == 1:
+                        leaves.append(neighbor)
+
+        # Refine the atom labels until the partition of atoms stops changing
+        labels = {}
+        for atom in self.vertices:
+            labels[atom] = hash((atom.element.symbol, len(atom.edges), atom in core))
+        count = len(set(labels.values()))
+        for iteration in range(len(self.vertices)):
+            newLabels = {}
+            for atom in self.vertices:
+                newLabels[atom] = hash((labels[atom], tuple(sorted([labels[neighbor] for neighbor in atom.edges]))))
+            newCount = len(set(newLabels.values()))
+            if newCount <= count:
+                break
+            labels = newLabels
+            count = newCount
+
+        self._fingerprint = '{0}#{1:x}'.format(self.getFormula(),
+                                               hash(tuple(sorted(labels.values()))) & 0xffffffffffffffff)
+        self._elementCount = self.get_element_count()
+        self._degreeSequence = sorted([len(atom.edges) for atom in self.vertices], reverse=True)
+
+    def _getElementCount(self):
+        """
+        Return the cached element counts of the molecule. The returned dict
+        must not be modified.
+        """
+        if self._fingerprint is None or self._elementCount is None:
+            self.updateFingerprint()
+        return self._elementCount
+
+    def _hasCompatibleDegrees(self, group):
+        """
+        Return ``False`` if `group` cannot be a subgraph of this molecule
+        because its atoms cannot all be mapped onto distinct atoms with at
+        least as many bonds, or ``True`` otherwise.
+        """
+        cython.declare(degrees=list, groupDegree=cython.int, degree=cython.int)
+        if self._fingerprint is None or self._degreeSequence is None:
+            self.updateFingerprint()
+        degrees = sorted([len(atom.edges) for atom in group.vertices], reverse=True)
+        for groupDegree, degree in zip(degrees, self._degreeSequence):
+            if groupDegree > degree:
+                return False
+        return True
+
     def addAtom(self, atom):
         """
         Add an `atom` to the graph. The atom is initialized with no bonds.
@@ -955,6 +1038,7 @@ class Molecule(Graph):
         self.updateMultiplicity()
         self.sortAtoms()
         self.identifyRingMembership()
+        self.updateFingerprint()
 
     def getFormula(self):
         """
@@ -1314,12 +1398,16 @@ class Molecule(Graph):
             return False
         
         # Compare element counts
-        element_count = self.get_element_count()
+        element_count = self._getElementCount()
         for element, count in group.elementCount.iteritems():
             if element not in element_count:
                 return False
             elif element_count[element] < count:
                 return False
+
+        # Compare atom degrees
+        if not self._hasCompatibleDegrees(group):
+            return False
         
         if generateInitialMap:
             initialMap = dict()
@@ -1363,13 +1451,17 @@ class Molecule(Graph):
             return []
 
         # Compare element counts
-        element_count = self.get_element_count()
+        element_count = self._getElementCount()
         for element, count in group.elementCount.iteritems():
             if element not in element_count:
                 return []
             elif element_count[element] < count:
                 return []
 
+        # Compare atom degrees
+        if not self._hasCompatibleDegrees(group):
+            return []
+
         # Do the isomorphism comparison
         result = Graph.findSubgraphIsomorphisms(self, other, initialMap, saveOrder=saveOrder)
         return result
@@ -2193,12 +2193,54 @@ multiplicity 2
     def testFingerprintProperty(self):
         """Test that the Molecule.fingerprint property works"""
         # Test getting fingerprint
-        self.assertEqual(self.molecule[0].fingerprint, 'CH2NO2')
+        self.assertTrue(self.molecule[0].fingerprint.startswith('CH2NO2#'))
 
         # Test setting fingerprint
         self.molecule[0].fingerprint = 'nitronate'
         self.assertEqual(self.molecule[0].fingerprint, 'nitronate')
 
+    def testFingerprintInvariants(self):
+        """Test that the fingerprint separates isomers but not resonance structures"""
+        # Isomers of C10H22 with the same formula should mostly be told apart
+        isomers = [Molecule(SMILES=smiles) for smiles in ['CCCCCCCCCC', 'CC(C)CCCCCCC', 'CCC(C)CCCCCC',
+                                                           'CC(C)(C)CCCCCC', 'CC(C)C(C)CCCCC', 'CCC(CC)CCCCC']]
+        fingerprints = [molecule.fingerprint for molecule in isomers]
+        self.assertEqual(len(set(fingerprints)), len(isomers))
+        self.assertFalse(isomers[0].isIsomorphic(isomers[1]))
+
+        # Isomorphic molecules share a fingerprint regardless of atom order
+        copy = isomers[3].copy(deep=True)
+        copy.atoms.reverse()
+        copy.fingerprint = None
+        self.assertEqual(copy.fingerprint, isomers[3].fingerprint)
+
+        # Resonance structures share a fingerprint
+        resonance = Molecule(SMILES='C=C[CH2]').generate_resonance_structures()
+        self.assertEqual(len(set([molecule.fingerprint for molecule in resonance])), 1)
+
+        # Rings are distinguished from chains with the same formula
+        self.assertNotEqual(Molecule(SMILES='C1CCCCC1').fingerprint, Molecule(SMILES='C=CCCCC').fingerprint)
+
+    def testSubgraphDegreePrefilter(self):
+        """Test that subgraph isomorphism is screened by the atom degrees"""
+        molecule = Molecule(SMILES='CCCC')
+        branched = Group().fromAdjacencyList("""
+1 C u0 {2,S} {3,S} {4,S}
+2 C u0 {1,S}
+3 C u0 {1,S}
+4 C u0 {1,S}
+""")
+        chain = Group().fromAdjacencyList("""
+1 C u0 {2,S}
+2 C u0 {1,S} {3,S}
+3 C u0 {2,S}
+""")
+        self.assertFalse(molecule._hasCompatibleDegrees(branched))
+        self.assertTrue(molecule._hasCompatibleDegrees(chain))
+        self.assertTrue(Molecule(SMILES='CC(C)C')._hasCompatibleDegrees(branched))
+        self.assertFalse(molecule.isSubgraphIsomorphic(branched))
+        self.assertTrue(molecule.isSubgraphIsomorphic(chain))
+
     def testSaturateUnfilledValence(self):
         """
         Test the saturateUnfilledValence for an aromatic and nonaromatic case
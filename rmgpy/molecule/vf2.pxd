@@ -27,19 +27,56 @@
 
 from graph cimport Vertex, Edge, Graph
 
-cdef class VF2:
+ctypedef struct VF2Graph:
+    int nVertices
+    int nEdges
+    int *adjacencyStart
+    int *adjacencyVertex
+    int *adjacencyEdge
+    short *connectivity
+    char *ignore
+    int *mapping
+    char *terminal
 
-    cdef Graph graph1, graph2
+cdef class VF2State:
 
-    cpdef Graph graphA, graphB
+    cdef VF2Graph graph1, graph2
+    
+    cdef list vertices1, vertices2
+    cdef list edges1, edges2
+    cdef dict index1, index2
+    
+    cdef signed char *vertexMatches
+    cdef signed char *edgeMatches
     
-    cdef dict initialMapping
     cdef bint subgraph
     cdef bint findAll
     
     cdef bint isMatch
     cdef list mappingList
     
+    cdef int initialize(self, Graph graph1, Graph graph2, bint subgraph, bint findAll) except -1
+    
+    cdef int match(self, int callDepth) nogil except -1
+    
+    cdef int feasible(self, int index1, int index2) nogil except -1
+    
+    cdef int vertexSemanticMatch(self, int index1, int index2) except -1
+    
+    cdef int edgeSemanticMatch(self, int edge1, int edge2) except -1
+    
+    cdef void addToMapping(self, int index1, int index2) nogil
+    
+    cdef void removeFromMapping(self, int index1, int index2) nogil
+    
+    cdef int saveMapping(self) except -1
+
+cdef class VF2:
+
+    cdef Graph graph1, graph2
+
+    cpdef Graph graphA, graphB
+    
     cpdef bint isIsomorphic(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=?) except -2
         
     cpdef list findIsomorphism(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=?)
@@ -48,12 +85,6 @@ cdef class VF2:
 
     cpdef list findSubgraphIsomorphisms(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=?)
     
-    cdef isomorphism(self, Graph graph1, Graph graph2, dict initialMapping, bint subgraph, bint findAll, bint saveOrder=?)
-
-    cdef bint match(self, int callDepth) except -2
+    cdef VF2State isomorphism(self, Graph graph1, Graph graph2, dict initialMapping, bint subgraph, bint findAll, bint saveOrder=?)
         
     cpdef bint feasible(self, Vertex vertex1, Vertex vertex2) except -2
-    
-    cdef addToMapping(self, Vertex vertex1, Vertex vertex2)
-        
-    cdef removeFromMapping(self, Vertex vertex1, Vertex vertex2)
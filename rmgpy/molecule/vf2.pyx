@@ -28,390 +28,605 @@
 """
 This module contains graph ismorphism functions that implement the VF2
 algorithm of Vento and Foggia.  http://dx.doi.org/10.1109/TPAMI.2004.75
+
+The state of each isomorphism search (the current mapping and the set of
+terminal vertices) is kept in a :class:`VF2State` object created for that
+call, in C arrays indexed by the position of each vertex in its graph,
+rather than on the vertices themselves. The search is therefore reentrant,
+and the structural part of it runs without the GIL, which is only
+reacquired to evaluate (and cache) the semantic comparison of a pair of
+vertices or edges the first time it is needed.
 """
 
 cimport cython
+from libc.stdlib cimport malloc, free
+
 from rmgpy.molecule.graph import Graph
 from rmgpy.exceptions import VF2Error
 
 ################################################################################
 
-cdef class VF2:
+# The number of isomorphism evaluations made in this process, and the number
+# of those that were not decided by the graph sizes alone and needed a search
+cdef unsigned long long _isomorphismCalls = 0
+cdef unsigned long long _isomorphismSearches = 0
+
+def getIsomorphismCounts():
     """
-    An implementation of the second version of the Vento-Foggia (VF2) algorithm
-    for graph and subgraph isomorphism.
+    Return a tuple of the number of (subgraph) isomorphism evaluations made by
+    VF2 in this process and the number of those that needed a VF2 search.
     """
-    def __init__(self, graphA = None, graphB = None):
-        self.graph1 = graphA
-        self.graph2 = graphB
+    return _isomorphismCalls, _isomorphismSearches
 
-    @property
-    def graphA(self):
-        return self.graph1
+def addIsomorphismCounts(unsigned long long calls, unsigned long long searches):
+    """
+    Add the numbers of isomorphism evaluations `calls` and VF2 searches
+    `searches` made in another process, e.g. a worker process, to the counts
+    of this process.
+    """
+    global _isomorphismCalls, _isomorphismSearches
+    _isomorphismCalls += calls
+    _isomorphismSearches += searches
 
-    @graphA.setter
-    def graphA(self, value):
-        self.graph1 = value
-        self.graph1.sortVertices()
+################################################################################
 
-    @property
-    def graphB(self):
-        return self.graph2
+cdef void *_allocate(size_t size) except NULL:
+    """
+    Allocate `size` bytes of memory, raising :class:`MemoryError` on failure.
+    """
+    cdef void *pointer = malloc(size if size > 0 else 1)
+    if pointer == NULL:
+        raise MemoryError('Unable to allocate memory for VF2 isomorphism state.')
+    return pointer
 
-    @graphB.setter
-    def graphB(self, value):
-        self.graph2 = value
-        self.graph2.sortVertices()
+cdef int _initializeGraph(VF2Graph *graph, list vertices, dict index, list edges) except -1:
+    """
+    Fill in the arrays of `graph` from the given list of `vertices`: the
+    neighbors of each vertex (and the edge joining them) as lists of indices,
+    the connectivity values and ignore flags of each vertex, and an empty
+    mapping. The position of each vertex is stored in `index`, and the edges
+    of the graph, numbered as in the neighbor lists, in `edges`.
+    """
+    cdef Vertex vertex, neighbor
+    cdef int i, j, k, n, count
+    cdef dict edgeIndices = {}
 
-    cpdef bint isIsomorphic(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=False) except -2:
-        """
-        Return ``True`` if graph `graph1` is isomorphic to graph `graph2` with
-        the optional initial mapping `initialMapping`, or ``False`` otherwise.
-        """
-        self.isomorphism(graph1, graph2, initialMapping, False, False, saveOrder)
-        return self.isMatch
-        
-    cpdef list findIsomorphism(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=False):
-        """
-        Return a list of dicts of all valid isomorphism mappings from graph
-        `graph1` to graph `graph2` with the optional initial mapping 
-        `initialMapping`. If no valid isomorphisms are found, an empty list is
-        returned.
-        """
-        self.isomorphism(graph1, graph2, initialMapping, False, True, saveOrder)
-        return self.mappingList
+    n = len(vertices)
+    count = 0
+    for i in range(n):
+        vertex = vertices[i]
+        index[vertex] = i
+        count += len(vertex.edges)
 
-    cpdef bint isSubgraphIsomorphic(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=False) except -2:
-        """
-        Return ``True`` if graph `graph1` is subgraph isomorphic to subgraph
-        `graph2` with the optional initial mapping `initialMapping`, or
-        ``False`` otherwise.
-        """
-        self.isomorphism(graph1, graph2, initialMapping, True, False, saveOrder)
-        return self.isMatch
+    graph.nVertices = n
+    graph.adjacencyStart = <int *>_allocate((n + 1) * sizeof(int))
+    graph.adjacencyVertex = <int *>_allocate(count * sizeof(int))
+    graph.adjacencyEdge = <int *>_allocate(count * sizeof(int))
+    graph.connectivity = <short *>_allocate(3 * n * sizeof(short))
+    graph.ignore = <char *>_allocate(n * sizeof(char))
+    graph.mapping = <int *>_allocate(n * sizeof(int))
+    graph.terminal = <char *>_allocate(n * sizeof(char))
 
-    cpdef list findSubgraphIsomorphisms(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=False):
-        """
-        Return a list of dicts of all valid subgraph isomorphism mappings from
-        graph `graph1` to subgraph `graph2` with the optional initial mapping 
-        `initialMapping`. If no valid subgraph isomorphisms are found, an empty
-        list is returned.
-        """
-        self.isomorphism(graph1, graph2, initialMapping, True, True, saveOrder)
-        return self.mappingList
-        
-    cdef isomorphism(self, Graph graph1, Graph graph2, dict initialMapping, bint subgraph, bint findAll, bint saveOrder=False):
+    k = 0
+    for i in range(n):
+        vertex = vertices[i]
+        graph.adjacencyStart[i] = k
+        for neighbor, edge in vertex.edges.iteritems():
+            j = index.get(neighbor, -1)
+            if j < 0:
+                # Only edges within the graph take part in the search
+                continue
+            key = i * n + j if i < j else j * n + i
+            if key not in edgeIndices:
+                edgeIndices[key] = len(edges)
+                edges.append(edge)
+            graph.adjacencyVertex[k] = j
+            graph.adjacencyEdge[k] = edgeIndices[key]
+            k += 1
+        graph.connectivity[3*i] = vertex.connectivity1
+        graph.connectivity[3*i+1] = vertex.connectivity2
+        graph.connectivity[3*i+2] = vertex.connectivity3
+        graph.ignore[i] = vertex.ignore
+        graph.mapping[i] = -1
+        graph.terminal[i] = False
+    graph.adjacencyStart[n] = k
+    graph.nEdges = len(edges)
+    return 0
+
+cdef void _freeGraph(VF2Graph *graph) nogil:
+    """
+    Release the arrays of `graph`.
+    """
+    free(graph.adjacencyStart)
+    free(graph.adjacencyVertex)
+    free(graph.adjacencyEdge)
+    free(graph.connectivity)
+    free(graph.ignore)
+    free(graph.mapping)
+    free(graph.terminal)
+
+cdef inline int _getEdgeIndex(VF2Graph *graph, int index1, int index2) nogil:
+    """
+    Return the index of the edge joining vertices `index1` and `index2` of
+    `graph`, or -1 if they are not joined.
+    """
+    cdef int k
+    for k in range(graph.adjacencyStart[index1], graph.adjacencyStart[index1+1]):
+        if graph.adjacencyVertex[k] == index2:
+            return graph.adjacencyEdge[k]
+    return -1
+
+cdef inline bint _hasMappedNeighbor(VF2Graph *graph, int index) nogil:
+    """
+    Return ``True`` if any neighbor of vertex `index` of `graph` is mapped.
+    """
+    cdef int k
+    for k in range(graph.adjacencyStart[index], graph.adjacencyStart[index+1]):
+        if graph.mapping[graph.adjacencyVertex[k]] >= 0:
+            return True
+    return False
+
+################################################################################
+
+cdef class VF2State:
+    """
+    The state of a single VF2 isomorphism search between two graphs. Each
+    vertex is referred to by its position in the `vertices` list of its
+    graph; the neighbors of each vertex, the current mapping and the set of
+    terminal vertices are stored in C arrays indexed by that position. The
+    results of the semantic comparisons of pairs of vertices and of pairs of
+    edges are cached, so that each is evaluated at most once per search.
+    """
+
+    def __cinit__(self):
+        self.graph1.adjacencyStart = NULL
+        self.graph1.adjacencyVertex = NULL
+        self.graph1.adjacencyEdge = NULL
+        self.graph1.connectivity = NULL
+        self.graph1.ignore = NULL
+        self.graph1.mapping = NULL
+        self.graph1.terminal = NULL
+        self.graph2.adjacencyStart = NULL
+        self.graph2.adjacencyVertex = NULL
+        self.graph2.adjacencyEdge = NULL
+        self.graph2.connectivity = NULL
+        self.graph2.ignore = NULL
+        self.graph2.mapping = NULL
+        self.graph2.terminal = NULL
+        self.vertexMatches = NULL
+        self.edgeMatches = NULL
+        self.isMatch = False
+        self.mappingList = []
+
+    def __dealloc__(self):
+        _freeGraph(&self.graph1)
+        _freeGraph(&self.graph2)
+        free(self.vertexMatches)
+        free(self.edgeMatches)
+
+    cdef int initialize(self, Graph graph1, Graph graph2, bint subgraph, bint findAll) except -1:
         """
-        Evaluate the isomorphism relationship between graphs `graph1` and
-        `graph2` with optional initial mapping `initialMapping`. If `subgraph`
-        is ``True``, `graph2` is treated as a possible subgraph of `graph1`.
-        If `findAll` is ``True``, all isomorphisms are found; otherwise only
-        the first is found.
+        Prepare to search for isomorphisms between graphs `graph1` and
+        `graph2`. If `subgraph` is ``True``, `graph2` is treated as a possible
+        subgraph of `graph1`. If `findAll` is ``True``, all isomorphisms are
+        found; otherwise only the first is found.
         """
-        cdef int callDepth, index1, index2
-        
-        if self.graph1 is not graph1:
-            self.graph1 = graph1
-            graph1.sortVertices(saveOrder)
-            
-        if self.graph2 is not graph2:
-            self.graph2 = graph2
-            graph2.sortVertices(saveOrder)
-        
-        self.initialMapping = initialMapping
+        cdef int i, size
+
         self.subgraph = subgraph
         self.findAll = findAll
-    
-        # Clear previous result
-        self.isMatch = False
-        self.mappingList = []
-        
-        # Some quick isomorphism checks based on graph sizes
-        if not self.subgraph and len(graph2.vertices) != len(graph1.vertices):
-            # The two graphs don't have the same number of vertices, so they
-            # cannot be isomorphic
-            return
-        elif not self.subgraph and len(graph2.vertices) == len(graph1.vertices) == 0:
-            # The two graphs don't have any vertices; this means they are
-            # trivially isomorphic
-            self.isMatch = True
-            return
-        elif self.subgraph and len(graph2.vertices) > len(graph1.vertices):
-            # The second graph has more vertices than the first, so it cannot be
-            # a subgraph of the first
-            return
-
-        # Initialize callDepth with the size of the smallest graph
-        # Each recursive call to match() will decrease it by one;
-        # when the whole graph has been explored, it should reach 0
-        # It should never go below zero!
-        callDepth = len(graph2.vertices)
-
-        # Initialize mapping by clearing any previous mapping information
-        for vertex1 in graph1.vertices:
-            vertex1.mapping = None
-            vertex1.terminal = False
-        for vertex2 in graph2.vertices:
-            vertex2.mapping = None
-            vertex2.terminal = False
-        # Set the initial mapping if provided
-        if self.initialMapping is not None:
-            for vertex1, vertex2 in self.initialMapping.items():
-                self.addToMapping(vertex1, vertex2)
-            callDepth -= len(self.initialMapping)
-            
-        self.match(callDepth)
-        
-        if saveOrder:
-            graph1.restore_vertex_order()
-            graph2.restore_vertex_order()
-
-        # We're done, so clear the mappings to prevent downstream effects
-        for vertex1 in graph1.vertices:
-            vertex1.mapping = None
-            vertex1.terminal = False
-        for vertex2 in graph2.vertices:
-            vertex2.mapping = None
-            vertex2.terminal = False
-
-    cdef bint match(self, int callDepth) except -2:
+        self.vertices1 = list(graph1.vertices)
+        self.vertices2 = list(graph2.vertices)
+        self.index1 = {}
+        self.index2 = {}
+        self.edges1 = []
+        self.edges2 = []
+        _initializeGraph(&self.graph1, self.vertices1, self.index1, self.edges1)
+        _initializeGraph(&self.graph2, self.vertices2, self.index2, self.edges2)
+
+        # -1 marks a semantic comparison that has not been evaluated yet
+        size = self.graph1.nVertices * self.graph2.nVertices
+        self.vertexMatches = <signed char *>_allocate(size * sizeof(signed char))
+        for i in range(size):
+            self.vertexMatches[i] = -1
+        size = self.graph1.nEdges * self.graph2.nEdges
+        self.edgeMatches = <signed char *>_allocate(size * sizeof(signed char))
+        for i in range(size):
+            self.edgeMatches[i] = -1
+        return 0
+
+    cdef int match(self, int callDepth) nogil except -1:
         """
         Recursively search for pairs of vertices to match, until all vertices
         are matched or the viable set of matches is exhausted. The `callDepth`
-        parameter helps ensure we never enter an infinite loop.
+        parameter helps ensure we never enter an infinite loop. Returns 1 if
+        a match was found and 0 otherwise.
         """
-        cdef Vertex vertex1, vertex2
-        cdef dict mapping
+        cdef int index1, index2, result
         cdef bint hasTerminals
-        
+
         # The call depth should never be negative!
         if callDepth < 0:
-            raise VF2Error('Negative call depth encountered in VF2_match().')
+            with gil:
+                raise VF2Error('Negative call depth encountered in VF2_match().')
 
         # Done if we have mapped to all vertices in graph
         if callDepth == 0:
             if self.findAll:
-                mapping = {}
-                for vertex2 in self.graph2.vertices:
-                    if vertex2.ignore:
-                        continue
-                    assert vertex2.mapping is not None
-                    assert vertex2.mapping.mapping is vertex2
-                    mapping[vertex2.mapping] = vertex2
-                self.mappingList.append(mapping)
+                with gil:
+                    self.saveMapping()
             self.isMatch = True
-            return True
+            return 1
 
         # Create list of pairs of candidates for inclusion in mapping
-        """
-        10.1109/TPAMI.2004.75 says:
-        "The set P(s) will be made of all the node pairs (n,m),
-        with n belonging to T1out(s) and m to T2out(s),
-        unless one of these two sets is empty. In this case,
-        the set P(s) is likewise obtained by considering
-        T1in(s) and T2in(s), respectively."
-
-        But: for us, bonds are not directional, so ignore Tin(s)
-        and just use Tout(s) which is what we call "terminals".
-        """
+        #
+        # 10.1109/TPAMI.2004.75 says:
+        # "The set P(s) will be made of all the node pairs (n,m),
+        # with n belonging to T1out(s) and m to T2out(s),
+        # unless one of these two sets is empty. In this case,
+        # the set P(s) is likewise obtained by considering
+        # T1in(s) and T2in(s), respectively."
+        #
+        # But: for us, bonds are not directional, so ignore Tin(s)
+        # and just use Tout(s) which is what we call "terminals".
         hasTerminals = False
-        for vertex2 in self.graph2.vertices:
-            if vertex2.ignore:
+        index2 = -1
+        for index1 in range(self.graph2.nVertices):
+            if self.graph2.ignore[index1]:
                 continue
-            if vertex2.terminal:
+            if self.graph2.terminal[index1]:
                 # graph2 has terminals, so graph1 also must have terminals
                 hasTerminals = True
+                index2 = index1
                 break
-        else:
-            """
-            "In presence of not connected graphs, for some state s,
-            all of the above sets may be empty. In this case,
-            the set of candidate pairs making up P(s) will be
-            the set Pd(s) of all the pairs of nodes not contained
-            neither in G1(s) nor in G2(s)."
-
-            So: use nodes not yet mapped.
-            """
+        if not hasTerminals:
+            # "In presence of not connected graphs, for some state s,
+            # all of the above sets may be empty. In this case,
+            # the set of candidate pairs making up P(s) will be
+            # the set Pd(s) of all the pairs of nodes not contained
+            # neither in G1(s) nor in G2(s)."
+            #
+            # So: use nodes not yet mapped.
             # Take first unmapped vertex
-            for vertex2 in self.graph2.vertices:
-                if vertex2.mapping is None:
+            for index1 in range(self.graph2.nVertices):
+                if self.graph2.mapping[index1] < 0:
+                    index2 = index1
                     break
             else:
-                raise VF2Error("Still seeking candidate pairs but all nodes in graph2 are already mapped.")
+                with gil:
+                    raise VF2Error("Still seeking candidate pairs but all nodes in graph2 are already mapped.")
 
-        for vertex1 in self.graph1.vertices:
-            if vertex1.ignore:
+        for index1 in range(self.graph1.nVertices):
+            if self.graph1.ignore[index1]:
                 continue
             # If terminals are available, then skip vertices in the first
             # graph that are not terminals
-            if hasTerminals and not vertex1.terminal:
+            if hasTerminals and not self.graph1.terminal[index1]:
                 continue
             # Otherwise take any node that is not already matched
-            if vertex1.mapping is not None:
+            if self.graph1.mapping[index1] >= 0:
                 continue
             # Propose a pairing
-            if self.feasible(vertex1, vertex2):
+            if self.feasible(index1, index2):
                 # Add proposed match to mapping
-                self.addToMapping(vertex1, vertex2)
+                self.addToMapping(index1, index2)
                 # Recurse
-                isMatch = self.match(callDepth-1)
-                if isMatch and not self.findAll:
-                    return True
+                result = self.match(callDepth-1)
+                if result and not self.findAll:
+                    return 1
                 # Undo proposed match
-                self.removeFromMapping(vertex1, vertex2)
+                self.removeFromMapping(index1, index2)
 
-        # None of the proposed matches led to a complete isomorphism, so return False
-        return False     
-        
-    cpdef bint feasible(self, Vertex vertex1, Vertex vertex2) except -2:
+        # None of the proposed matches led to a complete isomorphism, so return 0
+        return 0
+
+    cdef int feasible(self, int index1, int index2) nogil except -1:
         """
-        Return ``True`` if vertex `vertex1` from the first graph is a feasible
-        match for vertex `vertex2` from the second graph, or ``False`` if not.
-        The semantic and structural relationship of the vertices is evaluated,
-        including several structural "look-aheads" that cheaply eliminate many
-        otherwise feasible pairs.
+        Return 1 if vertex `index1` from the first graph is a feasible match
+        for vertex `index2` from the second graph, or 0 if not. The semantic
+        and structural relationship of the vertices is evaluated, including
+        several structural "look-aheads" that cheaply eliminate many otherwise
+        feasible pairs.
         """
-        cdef Vertex vert1, vert2
-        cdef Edge edge1, edge2
+        cdef VF2Graph *graph1 = &self.graph1
+        cdef VF2Graph *graph2 = &self.graph2
+        cdef int k, vert1, vert2, edge1, edge2, pair
         cdef int term1Count, term2Count, neither1Count, neither2Count
-        
+
         if not self.subgraph:
             # To be feasible the connectivity values must be an exact match
-            if vertex1.connectivity1 != vertex2.connectivity1: return False
-            if vertex1.connectivity2 != vertex2.connectivity2: return False
-            if vertex1.connectivity3 != vertex2.connectivity3: return False
-        
+            for k in range(3):
+                if graph1.connectivity[3*index1+k] != graph2.connectivity[3*index2+k]: return 0
+
         # Semantic check #1: vertex1 and vertex2 must be equivalent
-        if self.subgraph:
-            if not vertex1.isSpecificCaseOf(vertex2): return False
-        else:
-            if not vertex1.equivalent(vertex2): return False
-        
+        pair = index1 * graph2.nVertices + index2
+        if self.vertexMatches[pair] < 0:
+            with gil:
+                self.vertexMatches[pair] = self.vertexSemanticMatch(index1, index2)
+        if not self.vertexMatches[pair]: return 0
+
         # Semantic check #2: adjacent vertices to vertex1 and vertex2 that are
         # already mapped should be connected by equivalent edges
-        for vert2 in vertex2.edges:
-            if vert2.mapping is not None:
-                vert1 = vert2.mapping
-                if vert1 not in vertex1.edges:
+        for k in range(graph2.adjacencyStart[index2], graph2.adjacencyStart[index2+1]):
+            vert1 = graph2.mapping[graph2.adjacencyVertex[k]]
+            if vert1 >= 0:
+                edge1 = _getEdgeIndex(graph1, index1, vert1)
+                if edge1 < 0:
                     # The vertices are joined in graph2, but not in graph1
-                    return False
-                edge1 = vertex1.edges[vert1]
-                edge2 = vertex2.edges[vert2]
-                if self.subgraph:
-                    if not edge1.isSpecificCaseOf(edge2): return False
-                else:
-                    if not edge1.equivalent(edge2): return False
+                    return 0
+                edge2 = graph2.adjacencyEdge[k]
+                pair = edge1 * graph2.nEdges + edge2
+                if self.edgeMatches[pair] < 0:
+                    with gil:
+                        self.edgeMatches[pair] = self.edgeSemanticMatch(edge1, edge2)
+                if not self.edgeMatches[pair]: return 0
 
         # There could still be edges in graph1 that aren't in graph2; this is okay
         # for subgraph matching, but not for exact matching
         if not self.subgraph:
-            for vert1 in vertex1.edges:
-                if vert1.mapping is not None:
-                    if vert1.mapping not in vertex2.edges: 
-                        # The vertices are joined in graph1, but not in graph2
-                        return False
+            for k in range(graph1.adjacencyStart[index1], graph1.adjacencyStart[index1+1]):
+                vert2 = graph1.mapping[graph1.adjacencyVertex[k]]
+                if vert2 >= 0 and _getEdgeIndex(graph2, index2, vert2) < 0:
+                    # The vertices are joined in graph1, but not in graph2
+                    return 0
 
         # Count number of terminals adjacent to vertex1 and vertex2
         term1Count = 0; term2Count = 0; neither1Count = 0; neither2Count = 0
-        for vert1 in vertex1.edges:
-            if vert1.terminal: term1Count += 1
-            elif vert1.mapping is not None: neither1Count += 1
-        for vert2 in vertex2.edges:
-            if vert2.terminal: term2Count += 1
-            elif vert2.mapping is not None: neither2Count += 1
+        for k in range(graph1.adjacencyStart[index1], graph1.adjacencyStart[index1+1]):
+            vert1 = graph1.adjacencyVertex[k]
+            if graph1.terminal[vert1]: term1Count += 1
+            elif graph1.mapping[vert1] >= 0: neither1Count += 1
+        for k in range(graph2.adjacencyStart[index2], graph2.adjacencyStart[index2+1]):
+            vert2 = graph2.adjacencyVertex[k]
+            if graph2.terminal[vert2]: term2Count += 1
+            elif graph2.mapping[vert2] >= 0: neither2Count += 1
 
         # Level 2 look-ahead: the number of adjacent vertices of vertex1 and
         # vertex2 that are non-terminals must be equal
         if self.subgraph:
-            if neither1Count < neither2Count: return False
+            if neither1Count < neither2Count: return 0
         else:
-            if neither1Count != neither2Count: return False
+            if neither1Count != neither2Count: return 0
 
         # Level 1 look-ahead: the number of adjacent vertices of vertex1 and
         # vertex2 that are terminals must be equal
         if self.subgraph:
-            if term1Count < term2Count: return False
+            if term1Count < term2Count: return 0
         else:
-            if term1Count != term2Count: return False
-
-        # Level 0 look-ahead: all adjacent vertices of vertex2 already in the
-        # mapping must map to adjacent vertices of vertex1
-        for vert2 in vertex2.edges:
-            if vert2.mapping is not None:
-                if vert2.mapping not in vertex1.edges: return False
-        # Also, all adjacent vertices of vertex1 already in the mapping must map to
-        # adjacent vertices of vertex2, unless we are subgraph matching
-        if not self.subgraph:
-            for vert1 in vertex1.edges:
-                if vert1.mapping is not None:
-                    if vert1.mapping not in vertex2.edges: return False
+            if term1Count != term2Count: return 0
+
+        # Level 0 look-ahead (all adjacent vertices of vertex2 already in the
+        # mapping must map to adjacent vertices of vertex1, and vice versa
+        # unless we are subgraph matching) is implied by the checks above
 
         # All of our tests have been passed, so the two vertices are a feasible pair
-        return True
-    
-    cdef addToMapping(self, Vertex vertex1, Vertex vertex2):
+        return 1
+
+    cdef int vertexSemanticMatch(self, int index1, int index2) except -1:
         """
-        Add as valid a mapping of vertex `vertex1` from the first graph to
-        vertex `vertex2` from the second graph, and update the terminals
-        status accordingly.        
+        Return 1 if vertex `index1` from the first graph is semantically
+        equivalent to (or, for subgraph matching, a specific case of) vertex
+        `index2` from the second graph, or 0 if not.
         """
-        cdef Vertex v
-        
+        cdef Vertex vertex1 = self.vertices1[index1]
+        cdef Vertex vertex2 = self.vertices2[index2]
+        if self.subgraph:
+            return 1 if vertex1.isSpecificCaseOf(vertex2) else 0
+        else:
+            return 1 if vertex1.equivalent(vertex2) else 0
+
+    cdef int edgeSemanticMatch(self, int edge1, int edge2) except -1:
+        """
+        Return 1 if edge `edge1` from the first graph is semantically
+        equivalent to (or, for subgraph matching, a specific case of) edge
+        `edge2` from the second graph, or 0 if not.
+        """
+        cdef Edge e1 = self.edges1[edge1]
+        cdef Edge e2 = self.edges2[edge2]
+        if self.subgraph:
+            return 1 if e1.isSpecificCaseOf(e2) else 0
+        else:
+            return 1 if e1.equivalent(e2) else 0
+
+    cdef void addToMapping(self, int index1, int index2) nogil:
+        """
+        Add as valid a mapping of vertex `index1` from the first graph to
+        vertex `index2` from the second graph, and update the terminals
+        status accordingly.
+        """
+        cdef int k, v
+
         # Map the vertices to one another
-        vertex1.mapping = vertex2
-        vertex2.mapping = vertex1
-        
+        self.graph1.mapping[index1] = index2
+        self.graph2.mapping[index2] = index1
+
         # Remove these vertices from the set of terminals
-        vertex1.terminal = False
-        vertex2.terminal = False
-        
+        self.graph1.terminal[index1] = False
+        self.graph2.terminal[index2] = False
+
         # Add any neighboring vertices not already in mapping to terminals
-        for v in vertex1.edges:
-            v.terminal = v.mapping is None
-        for v in vertex2.edges:
-            v.terminal = v.mapping is None        
-    
-    cdef removeFromMapping(self, Vertex vertex1, Vertex vertex2):
+        for k in range(self.graph1.adjacencyStart[index1], self.graph1.adjacencyStart[index1+1]):
+            v = self.graph1.adjacencyVertex[k]
+            self.graph1.terminal[v] = self.graph1.mapping[v] < 0
+        for k in range(self.graph2.adjacencyStart[index2], self.graph2.adjacencyStart[index2+1]):
+            v = self.graph2.adjacencyVertex[k]
+            self.graph2.terminal[v] = self.graph2.mapping[v] < 0
+
+    cdef void removeFromMapping(self, int index1, int index2) nogil:
         """
-        Remove as valid a mapping of vertex `vertex1` from the first graph to
-        vertex `vertex2` from the second graph, and update the terminals
-        status accordingly.        
+        Remove as valid a mapping of vertex `index1` from the first graph to
+        vertex `index2` from the second graph, and update the terminals
+        status accordingly.
         """
-        cdef Vertex v, v2
-        
+        cdef int k, v
+
         # Unmap the vertices from one another
-        vertex1.mapping = None
-        vertex2.mapping = None
-        
+        self.graph1.mapping[index1] = -1
+        self.graph2.mapping[index2] = -1
+
         # Restore these vertices to the set of terminals
-        for v in vertex1.edges:
-            if v.mapping is not None:
-                vertex1.terminal = True
-                break
-            else:
-                vertex1.terminal = False
-        for v in vertex2.edges:
-            if v.mapping is not None:
-                vertex2.terminal = True
-                break
-            else:
-                vertex2.terminal = False
-        
+        self.graph1.terminal[index1] = _hasMappedNeighbor(&self.graph1, index1)
+        self.graph2.terminal[index2] = _hasMappedNeighbor(&self.graph2, index2)
+
         # Recompute the terminal status of any neighboring atoms
-        for v in vertex1.edges:
-            if v.mapping is not None: continue
-            for v2 in v.edges:
-                if v2.mapping is not None:
-                    v.terminal = True
-                    break
-            else:
-                v.terminal = False
-        for v in vertex2.edges:
-            if v.mapping is not None: continue
-            for v2 in v.edges:
-                if v2.mapping is not None:
-                    v.terminal = True
-                    break
-            else:
-                v.terminal = False
-            
+        for k in range(self.graph1.adjacencyStart[index1], self.graph1.adjacencyStart[index1+1]):
+            v = self.graph1.adjacencyVertex[k]
+            if self.graph1.mapping[v] < 0:
+                self.graph1.terminal[v] = _hasMappedNeighbor(&self.graph1, v)
+        for k in range(self.graph2.adjacencyStart[index2], self.graph2.adjacencyStart[index2+1]):
+            v = self.graph2.adjacencyVertex[k]
+            if self.graph2.mapping[v] < 0:
+                self.graph2.terminal[v] = _hasMappedNeighbor(&self.graph2, v)
+
+    cdef int saveMapping(self) except -1:
+        """
+        Append the current (complete) mapping to the list of mappings found,
+        as a dict mapping vertices of the first graph to vertices of the
+        second graph.
+        """
+        cdef dict mapping = {}
+        cdef int index2
+        for index2 in range(self.graph2.nVertices):
+            if self.graph2.ignore[index2]:
+                continue
+            assert self.graph2.mapping[index2] >= 0
+            mapping[self.vertices1[self.graph2.mapping[index2]]] = self.vertices2[index2]
+        self.mappingList.append(mapping)
+        return 0
+
+################################################################################
+
+cdef class VF2:
+    """
+    An implementation of the second version of the Vento-Foggia (VF2) algorithm
+    for graph and subgraph isomorphism. The object holds no search state, so
+    a single instance may be shared between (and called from) several threads.
+    """
+    def __init__(self, graphA = None, graphB = None):
+        self.graph1 = graphA
+        self.graph2 = graphB
+
+    @property
+    def graphA(self):
+        return self.graph1
+
+    @graphA.setter
+    def graphA(self, value):
+        self.graph1 = value
+        self.graph1.sortVertices()
+
+    @property
+    def graphB(self):
+        return self.graph2
+
+    @graphB.setter
+    def graphB(self, value):
+        self.graph2 = value
+        self.graph2.sortVertices()
+
+    cpdef bint isIsomorphic(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=False) except -2:
+        """
+        Return ``True`` if graph `graph1` is isomorphic to graph `graph2` with
+        the optional initial mapping `initialMapping`, or ``False`` otherwise.
+        """
+        return self.isomorphism(graph1, graph2, initialMapping, False, False, saveOrder).isMatch
+        
+    cpdef list findIsomorphism(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=False):
+        """
+        Return a list of dicts of all valid isomorphism mappings from graph
+        `graph1` to graph `graph2` with the optional initial mapping 
+        `initialMapping`. If no valid isomorphisms are found, an empty list is
+        returned.
+        """
+        return self.isomorphism(graph1, graph2, initialMapping, False, True, saveOrder).mappingList
+
+    cpdef bint isSubgraphIsomorphic(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=False) except -2:
+        """
+        Return ``True`` if graph `graph1` is subgraph isomorphic to subgraph
+        `graph2` with the optional initial mapping `initialMapping`, or
+        ``False`` otherwise.
+        """
+        return self.isomorphism(graph1, graph2, initialMapping, True, False, saveOrder).isMatch
+
+    cpdef list findSubgraphIsomorphisms(self, Graph graph1, Graph graph2, dict initialMapping, bint saveOrder=False):
+        """
+        Return a list of dicts of all valid subgraph isomorphism mappings from
+        graph `graph1` to subgraph `graph2` with the optional initial mapping 
+        `initialMapping`. If no valid subgraph isomorphisms are found, an empty
+        list is returned.
+        """
+        return self.isomorphism(graph1, graph2, initialMapping, True, True, saveOrder).mappingList
+        
+    cdef VF2State isomorphism(self, Graph graph1, Graph graph2, dict initialMapping, bint subgraph, bint findAll, bint saveOrder=False):
+        """
+        Evaluate the isomorphism relationship between graphs `graph1` and
+        `graph2` with optional initial mapping `initialMapping`. If `subgraph`
+        is ``True``, `graph2` is treated as a possible subgraph of `graph1`.
+        If `findAll` is ``True``, all isomorphisms are found; otherwise only
+        the first is found. The returned :class:`VF2State` holds the result.
+        """
+        global _isomorphismCalls, _isomorphismSearches
+        cdef VF2State state = VF2State()
+        cdef int callDepth
+        cdef Vertex vertex1, vertex2
+
+        _isomorphismCalls += 1
+
+        # Some quick isomorphism checks based on graph sizes
+        if not subgraph and len(graph2.vertices) != len(graph1.vertices):
+            # The two graphs don't have the same number of vertices, so they
+            # cannot be isomorphic
+            return state
+        elif not subgraph and len(graph2.vertices) == len(graph1.vertices) == 0:
+            # The two graphs don't have any vertices; this means they are
+            # trivially isomorphic
+            state.isMatch = True
+            return state
+        elif subgraph and len(graph2.vertices) > len(graph1.vertices):
+            # The second graph has more vertices than the first, so it cannot be
+            # a subgraph of the first
+            return state
+
+        _isomorphismSearches += 1
+
+        # Sorting is only done if the graphs have been modified since they
+        # were last sorted, in which case it also updates their connectivity
+        # values; otherwise this is a cheap check
+        graph1.sortVertices(saveOrder)
+        if graph2 is not graph1:
+            graph2.sortVertices(saveOrder)
+
+        try:
+            state.initialize(graph1, graph2, subgraph, findAll)
+
+            # Initialize callDepth with the size of the smallest graph
+            # Each recursive call to match() will decrease it by one;
+            # when the whole graph has been explored, it should reach 0
+            # It should never go below zero!
+            callDepth = len(graph2.vertices)
+
+            # Set the initial mapping if provided
+            if initialMapping is not None:
+                for vertex1, vertex2 in initialMapping.iteritems():
+                    state.addToMapping(state.index1[vertex1], state.index2[vertex2])
+                callDepth -= len(initialMapping)
+
+            with nogil:
+                state.match(callDepth)
+        finally:
+            if saveOrder:
+                graph1.restore_vertex_order()
+                if graph2 is not graph1:
+                    graph2.restore_vertex_order()
+
+        return state
+
+    cpdef bint feasible(self, Vertex vertex1, Vertex vertex2) except -2:
+        """
+        Return ``True`` if vertex `vertex1` from `graphA` is a feasible match
+        for vertex `vertex2` from `graphB` for exact isomorphism, given an
+        empty mapping, or ``False`` if not.
+        """
+        cdef VF2State state = VF2State()
+        state.initialize(self.graph1, self.graph2, False, False)
+        return state.feasible(state.index1[vertex1], state.index2[vertex2]) == 1
@@ -28,6 +28,7 @@
 #                                                                             #
 ###############################################################################
 
+import threading
 import unittest
 from numpy import testing
 
@@ -90,6 +91,37 @@ class TestVF2(unittest.TestCase):
             self.assertIsNone(atom.mapping)
             self.assertFalse(atom.terminal)
 
+    def test_find_all_isomorphisms(self):
+        """Test that all isomorphisms of ethane with itself are found."""
+        ethane1 = Molecule().fromSMILES("CC")
+        ethane2 = ethane1.copy(deep=True)
+        mappings = self.vf2.findIsomorphism(ethane1, ethane2, None)
+        # Swap the carbons and permute the hydrogens on each carbon: 2 * 3! * 3!
+        self.assertEqual(len(mappings), 72)
+        for mapping in mappings:
+            self.assertTrue(ethane1.isMappingValid(ethane2, mapping))
+
+    def test_threaded_isomorphism(self):
+        """Test that isomorphism checks give the same results when run concurrently on threads."""
+        smiles = ["CC(=O)C[CH2]", "CCC(=O)[CH2]", "C=CC=C", "C1CCCCC1", "CC(C)(C)O", "OC(C)(C)C"]
+        molecules = [Molecule().fromSMILES(s) for s in smiles]
+        copies = [molecule.copy(deep=True) for molecule in molecules]
+        expected = [[self.vf2.isIsomorphic(molecule, other, None) for other in copies] for molecule in molecules]
+
+        results = {}
+        def check(index):
+            results[index] = [self.vf2.isIsomorphic(molecules[index], other, None) for other in copies]
+
+        threads = [threading.Thread(target=check, args=(index,)) for index in range(len(molecules))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([results[index] for index in range(len(molecules))], expected)
+        self.assertTrue(expected[4][5])
+        self.assertFalse(expected[0][1])
+
 ################################################################################
 
 if __name__ == '__main__':
@@ -36,7 +36,7 @@ cimport cython
 
 cimport rmgpy.constants as constants
 import rmgpy.quantity as quantity
-from libc.math cimport exp, sqrt
+from libc.math cimport exp, sqrt, fabs
 from rmgpy.exceptions import CollisionError
 
 ################################################################################
@@ -224,6 +224,93 @@ cdef class SingleExponentialDown(RMGObject):
             
         return P
 
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def generateSparseCollisionMatrix(self,
+        double T,
+        numpy.ndarray[numpy.float64_t,ndim=2] densStates,
+        numpy.ndarray[numpy.float64_t,ndim=1] Elist,
+        numpy.ndarray[numpy.int_t,ndim=1] Jlist=None,
+        double tol=1e-12):
+        """
+        Return the collision matrix from :meth:`generateCollisionMatrix` in
+        coordinate format, as arrays of the row indices, column indices and
+        values of its entries, where the grain at energy index `r` and angular
+        momentum index `s` is numbered ``r * NJ + s``. Pairs of transposed
+        entries that are both smaller than `tol` times the diagonal entry of
+        their row are left out. The matrix is never stored in dense form, so
+        the memory used grows with the number of entries kept instead of the
+        square of the number of grains.
+        """
+
+        cdef double alpha, beta
+        cdef double C, left, right, P0xy, P0yx, Pab, Pba, diag0, diag1
+        cdef int Ngrains, NJ, start, r, s, x, y, u, v
+        cdef numpy.ndarray[numpy.float64_t,ndim=1] rho, norm
+        cdef numpy.ndarray[numpy.float64_t,ndim=2] phi
+        cdef list rows, cols, vals
+
+        Ngrains = Elist.shape[0]
+        NJ = Jlist.shape[0] if Jlist is not None else 1
+
+        alpha = 1.0 / self.getAlpha(T)
+        beta = 1.0 / (constants.R * T)
+
+        if NJ > 1:
+            rho = numpy.zeros(Ngrains)
+            for r in range(Ngrains):
+                rho[r] = numpy.sum((2*Jlist+1) * densStates[r,:])
+        else:
+            rho = densStates[:,0]
+
+        for start in range(Ngrains):
+            if rho[start] > 0:
+                break
+
+        # Determine the normalization coefficient of each column in the same
+        # way as generateCollisionMatrix, without storing the matrix
+        norm = numpy.zeros(Ngrains)
+        for r in range(start, Ngrains):
+            left = 0.0; right = 1.0
+            for s in range(start, r): left += exp(-(Elist[r] - Elist[s]) * alpha) * norm[s]
+            for s in range(r+1, Ngrains): right += exp(-(Elist[s] - Elist[r]) * alpha) * rho[s] / rho[r] * exp(-(Elist[s] - Elist[r]) * beta)
+            C = (1 - left) / right
+            # Check for normalization consistency (i.e. all numbers are positive)
+            if C < 0: raise CollisionError('Encountered negative normalization coefficient while normalizing collisional transfer probabilities matrix.')
+            norm[r] = C
+
+        # Distribution of J after a collision (see generateCollisionMatrix)
+        phi = numpy.ones((Ngrains,NJ), numpy.float64)
+        if NJ > 1:
+            for r in range(start, Ngrains):
+                for s in range(NJ):
+                    phi[r,s] = (2*Jlist[s]+1) * densStates[r,s] / rho[r]
+
+        rows = []; cols = []; vals = []
+        for x in range(start, Ngrains):
+            for s in range(NJ):
+                rows.append(x * NJ + s); cols.append(x * NJ + s); vals.append((norm[x] - 1) * phi[x,s])
+        for x in range(start, Ngrains):
+            for y in range(x, Ngrains):
+                if y == x:
+                    P0xy = P0yx = norm[x] - 1
+                else:
+                    P0xy = exp(-(Elist[y] - Elist[x]) * alpha) * norm[x]
+                    P0yx = exp(-(Elist[y] - Elist[x]) * alpha) * rho[y] / rho[x] * exp(-(Elist[y] - Elist[x]) * beta) * norm[x]
+                for s in range(NJ):
+                    diag0 = fabs((norm[x] - 1) * phi[x,s])
+                    for v in range(NJ):
+                        if y == x and v <= s:
+                            continue
+                        diag1 = fabs((norm[y] - 1) * phi[y,v])
+                        Pab = P0xy * phi[x,s]
+                        Pba = P0yx * phi[y,v]
+                        if fabs(Pab) > tol * diag0 or fabs(Pba) > tol * diag1:
+                            rows.append(x * NJ + s); cols.append(y * NJ + v); vals.append(Pab)
+                            rows.append(y * NJ + v); cols.append(x * NJ + s); vals.append(Pba)
+
+        return numpy.array(rows, numpy.int), numpy.array(cols, numpy.int), numpy.array(vals, numpy.float64)
+
     def calculateCollisionEfficiency(self,
         double T,
         numpy.ndarray[numpy.float64_t,ndim=1] Elist,
@@ -82,6 +82,35 @@ class TestSingleExponentialDown(unittest.TestCase):
             dEdown = self.singleExponentialDown.getAlpha(T)
             self.assertAlmostEqual(dEdown0, dEdown, 6)
 
+    def test_generateSparseCollisionMatrix(self):
+        """
+        Test that the sparse collision matrix has the same entries as the
+        dense one, and that truncating it only leaves out small entries.
+        """
+        Elist = numpy.arange(0, 100000, 1000, numpy.float64)
+        for Jlist in [None, numpy.arange(0, 4, 1, numpy.int)]:
+            NJ = 1 if Jlist is None else len(Jlist)
+            densStates = numpy.zeros((len(Elist),NJ), numpy.float64)
+            for s in range(NJ):
+                densStates[2:,s] = (Elist[2:] / 1000.) ** 2 / (s + 1)
+            P = self.singleExponentialDown.generateCollisionMatrix(1000, densStates, Elist, Jlist)
+            P = P.reshape((len(Elist)*NJ, len(Elist)*NJ))
+
+            rows, cols, vals = self.singleExponentialDown.generateSparseCollisionMatrix(1000, densStates, Elist, Jlist, tol=0.0)
+            P0 = numpy.zeros_like(P)
+            P0[rows,cols] = vals
+            self.assertEqual(len(rows), numpy.count_nonzero(P))
+            self.assertTrue(numpy.array_equal(P0, P))
+
+            rows, cols, vals = self.singleExponentialDown.generateSparseCollisionMatrix(1000, densStates, Elist, Jlist, tol=1e-12)
+            self.assertTrue(len(rows) < numpy.count_nonzero(P))
+            P0 = numpy.zeros_like(P)
+            P0[rows,cols] = vals
+            diag = numpy.abs(numpy.diag(P))
+            for r, c in zip(*numpy.nonzero(P0 != P)):
+                self.assertEqual(P0[r,c], 0)
+                self.assertTrue(abs(P[r,c]) <= 1e-12 * diag[r])
+
     def test_pickle(self):
         """
         Test that a SingleExponentialDown object can be successfully pickled
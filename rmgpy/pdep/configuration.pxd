@@ -61,5 +61,7 @@ cdef class Configuration:
     cpdef double calculateCollisionFrequency(self, double T, double P, dict bathGas) except -1
         
     cpdef numpy.ndarray generateCollisionMatrix(self, double T, numpy.ndarray densStates, numpy.ndarray Elist, numpy.ndarray Jlist=?)
+
+    cpdef tuple generateSparseCollisionMatrix(self, double T, numpy.ndarray densStates, numpy.ndarray Elist, numpy.ndarray Jlist=?, double tol=?)
     
     cpdef calculateDensityOfStates(self, numpy.ndarray Elist, bint activeJRotor=?, bint activeKRotor=?, bint rmgmode=?)
@@ -212,6 +212,17 @@ cdef class Configuration:
         assert self.isUnimolecular()
         assert self.species[0].energyTransferModel is not None
         return self.species[0].energyTransferModel.generateCollisionMatrix(T, densStates, Elist, Jlist)
+
+    cpdef tuple generateSparseCollisionMatrix(self, double T, numpy.ndarray densStates, numpy.ndarray Elist, numpy.ndarray Jlist=None, double tol=1e-12):
+        """
+        Return the collisional energy transfer probabilities matrix for the
+        configuration, as :meth:`generateCollisionMatrix` does, in coordinate
+        format as arrays of row indices, column indices and values. Entries
+        smaller than `tol` times the diagonal entries are left out.
+        """
+        assert self.isUnimolecular()
+        assert self.species[0].energyTransferModel is not None
+        return self.species[0].energyTransferModel.generateSparseCollisionMatrix(T, densStates, Elist, Jlist, tol)
     
     cpdef calculateDensityOfStates(self, numpy.ndarray Elist, bint activeJRotor=True, bint activeKRotor=True, bint rmgmode=False):
         """
@@ -35,22 +35,37 @@ import numpy
 cimport numpy
 import logging
 import scipy.linalg
+import scipy.sparse
+import scipy.sparse.linalg
 
 from libc.math cimport exp, log, sqrt
 
 import rmgpy.constants as constants
 
-from rmgpy.pdep.me import generateFullMEMatrix
+from rmgpy.pdep.me import generateFullMEMatrix, generateSparseMEMatrix
 from rmgpy.exceptions import ChemicallySignificantEigenvaluesError
 
+# The number of rows of the master equation matrix above which it is stored as
+# a sparse matrix, and only the slowest eigenmodes are computed
+SPARSE_THRESHOLD = 2000
+
 ################################################################################
 
-def applyChemicallySignificantEigenvaluesMethod(network, list lumpingOrder=None):
+def applyChemicallySignificantEigenvaluesMethod(network, list lumpingOrder=None, sparse=None):
+    """
+    Compute the phenomenological rate coefficients of the network at its
+    current conditions from the chemically-significant eigenvalues of the full
+    master equation matrix. If `sparse` is ``True``, the matrix is assembled in
+    sparse form and only the slowest eigenmodes are computed with a
+    shift-invert Lanczos method, so that the memory used grows linearly with
+    the number of grains; if ``None``, this is done for matrices with more than
+    :data:`SPARSE_THRESHOLD` rows.
+    """
 
     cdef numpy.ndarray[numpy.int_t,ndim=1] Jlist
     cdef numpy.ndarray[numpy.int_t,ndim=3] indices
     cdef numpy.ndarray[numpy.float64_t,ndim=1] Elist, S, Sinv, W0, W, eqRatios
-    cdef numpy.ndarray[numpy.float64_t,ndim=2] M, K, V0, V, Z, Zinv, Y, X
+    cdef numpy.ndarray[numpy.float64_t,ndim=2] K, V0, V, Z, Zinv, Y, X
     cdef numpy.ndarray[numpy.float64_t,ndim=3] densStates
     cdef numpy.ndarray[numpy.float64_t,ndim=4] Kij, Gnj, Fim, pa
     cdef list lumping, unlumping
@@ -81,9 +96,16 @@ def applyChemicallySignificantEigenvaluesMethod(network, list lumpingOrder=None)
     ymB = 1.0e-6 * P / constants.R / T
     
     # Generate the full master equation matrix
-    M, indices = generateFullMEMatrix(network, products=False)
+    if sparse is None:
+        Nrows = Nreac
+        for i in range(Nisom):
+            Nrows += numpy.count_nonzero(densStates[i,:,:] > 0)
+        sparse = Nrows > SPARSE_THRESHOLD and Nrows > Nchem + 2
+    if sparse:
+        M, indices = generateSparseMEMatrix(network, products=False)
+    else:
+        M, indices = generateFullMEMatrix(network, products=False)
     Nrows = M.shape[0]
-    M[:,Nrows-Nreac:] *= ymB
     
     # Generate symmetrization matrix and its inverse
     S = numpy.zeros(Nrows, numpy.float64)
@@ -100,31 +122,10 @@ def applyChemicallySignificantEigenvaluesMethod(network, list lumpingOrder=None)
         S[index] = sqrt(eqRatios[n+Nisom] / ymB)
         Sinv[index] = 1.0 / S[index]
 
-    # Symmetrize master equation matrix: M = S * Msymm * Sinv
-    # Since S and Sinv are diagonal we can do this very efficiently
-    for r in range(Nrows):
-        for s in range(Nrows):
-            M[r,s] = Sinv[r] * M[r,s] * S[s]
-
-    # DEBUG: Check that the matrix has been properly symmetrized
-    properlySymmetrized = True
-    for r in range(Nrows):
-        for s in range(r):
-            if M[r,s] != 0:
-                if abs(M[r,s] - M[s,r]) > 0.01 * M[r,s]:
-                    if M[r,s] > 1e-200 or M[s,r] > 1e-200:
-                        print r, s, M[r,s], M[s,r]
-                        properlySymmetrized = False
-    if not properlySymmetrized:
-        raise ChemicallySignificantEigenvaluesError('Master equation matrix not properly symmetrized.')
-
-    # Get eigenvalues and eigenvectors
-    # We only need the slowest Nchem + 1 eigenmodes, so only compute those
-    try:
-        #W0, V0 = scipy.linalg.eigh(M, eigvals=(Nrows-Nchem-1,Nrows-1), overwrite_a=True, overwrite_b=True)
-        W0, V0 = scipy.linalg.eigh(M, overwrite_a=True, overwrite_b=True)
-    except numpy.linalg.LinAlgError:
-        raise ChemicallySignificantEigenvaluesError('Eigenvalue calculation failed to converge.')
+    if sparse:
+        W0, V0 = getSparseEigenmodes(M, S, Sinv, Nrows - Nreac, ymB, Nchem + 1)
+    else:
+        W0, V0 = getDenseEigenmodes(M, S, Sinv, Nrows - Nreac, ymB)
     
     # We can't assume that eigh returns them in sorted order
     ind = W0.argsort()
@@ -222,3 +223,79 @@ def applyChemicallySignificantEigenvaluesMethod(network, list lumpingOrder=None)
 
     # Return the matrix of k(T,P) values and the pseudo-steady population distributions
     return K, pa
+
+def getDenseEigenmodes(numpy.ndarray[numpy.float64_t,ndim=2] M, numpy.ndarray[numpy.float64_t,ndim=1] S,
+                       numpy.ndarray[numpy.float64_t,ndim=1] Sinv, int Nstart, double ymB):
+    """
+    Return all of the eigenvalues and eigenvectors of the dense master
+    equation matrix `M` after scaling the columns from `Nstart` on (those of
+    the reactant channels) by `ymB` and symmetrizing it using the diagonal
+    matrix `S` and its inverse `Sinv`. `M` is overwritten.
+    """
+    cdef int Nrows, r, s
+    
+    Nrows = M.shape[0]
+    M[:,Nstart:] *= ymB
+    
+    # Symmetrize master equation matrix: M = S * Msymm * Sinv
+    # Since S and Sinv are diagonal we can do this very efficiently
+    for r in range(Nrows):
+        for s in range(Nrows):
+            M[r,s] = Sinv[r] * M[r,s] * S[s]
+
+    # DEBUG: Check that the matrix has been properly symmetrized
+    properlySymmetrized = True
+    for r in range(Nrows):
+        for s in range(r):
+            if M[r,s] != 0:
+                if abs(M[r,s] - M[s,r]) > 0.01 * M[r,s]:
+                    if M[r,s] > 1e-200 or M[s,r] > 1e-200:
+                        print r, s, M[r,s], M[s,r]
+                        properlySymmetrized = False
+    if not properlySymmetrized:
+        raise ChemicallySignificantEigenvaluesError('Master equation matrix not properly symmetrized.')
+
+    # Get eigenvalues and eigenvectors
+    try:
+        #W0, V0 = scipy.linalg.eigh(M, eigvals=(Nrows-Nchem-1,Nrows-1), overwrite_a=True, overwrite_b=True)
+        W0, V0 = scipy.linalg.eigh(M, overwrite_a=True, overwrite_b=True)
+    except numpy.linalg.LinAlgError:
+        raise ChemicallySignificantEigenvaluesError('Eigenvalue calculation failed to converge.')
+    
+    return W0, V0
+
+def getSparseEigenmodes(M, numpy.ndarray[numpy.float64_t,ndim=1] S, numpy.ndarray[numpy.float64_t,ndim=1] Sinv,
+                        int Nstart, double ymB, int Nmodes):
+    """
+    Return the `Nmodes` slowest eigenmodes of the sparse master equation
+    matrix `M` after scaling the columns from `Nstart` on (those of the
+    reactant channels) by `ymB` and symmetrizing it using the diagonal matrix
+    `S` and its inverse `Sinv`. The eigenvalues of the master equation are
+    all zero or negative, so the slowest modes are those nearest to a small
+    positive shift, which are found by the shift-invert Lanczos method using
+    a sparse LU factorization of the shifted matrix.
+    """
+    cdef numpy.ndarray[numpy.float64_t,ndim=1] scale
+    cdef double sigma
+    
+    scale = numpy.ones(M.shape[0], numpy.float64)
+    scale[Nstart:] = ymB
+    M = scipy.sparse.diags(Sinv).dot(M).dot(scipy.sparse.diags(scale * S)).tocsr()
+
+    # Check that the matrix has been properly symmetrized
+    lower = scipy.sparse.tril(M, k=-1).tocoo()
+    values = lower.data
+    transposed = numpy.asarray(M[lower.col, lower.row]).ravel()
+    bad = (values != 0) & (numpy.abs(values - transposed) > 0.01 * values) & ((values > 1e-200) | (transposed > 1e-200))
+    if bad.any():
+        for r, s, val0, val1 in zip(lower.row[bad], lower.col[bad], values[bad], transposed[bad]):
+            print r, s, val0, val1
+        raise ChemicallySignificantEigenvaluesError('Master equation matrix not properly symmetrized.')
+
+    sigma = 1e-8 * numpy.max(numpy.abs(M.diagonal()))
+    try:
+        W0, V0 = scipy.sparse.linalg.eigsh(M, k=Nmodes, sigma=sigma, which='LM')
+    except (scipy.sparse.linalg.ArpackNoConvergence, scipy.sparse.linalg.ArpackError, RuntimeError):
+        raise ChemicallySignificantEigenvaluesError('Eigenvalue calculation failed to converge.')
+    
+    return W0, V0
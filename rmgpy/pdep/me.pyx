@@ -32,6 +32,7 @@ pressure-dependent reaction network.
 
 import numpy
 cimport numpy
+import scipy.sparse
 
 from libc.math cimport exp
 
@@ -60,7 +61,7 @@ cpdef generateFullMEMatrix(network, bint products=True):
     Elist = network.Elist
     Jlist = network.Jlist
     densStates = network.densStates
-    Mcoll = network.Mcoll
+    Mcoll = network.getCollisionMatrix()
     Kij = network.Kij
     Fim = network.Fim
     Gnj = network.Gnj
@@ -132,3 +133,105 @@ cpdef generateFullMEMatrix(network, bint products=True):
                                 M[v,v] -= val
 
     return M, indices
+
+cpdef generateSparseMEMatrix(network, bint products=True, double tol=1e-12):
+    """
+    Generate the full master equation matrix for the network as a sparse
+    matrix in compressed sparse row format. The matrix is the same as the
+    one from :func:`generateFullMEMatrix`, except that collisional transfer
+    terms smaller than `tol` times the collisional loss from both grains
+    involved are left out. The collision terms are generated in sparse form
+    for each isomer instead of being taken from the dense collision matrix of
+    the network. Since the collision kernel decays rapidly away from the
+    diagonal, the number of stored terms grows linearly with the number of
+    grains instead of quadratically.
+    """
+    
+    cdef numpy.ndarray[numpy.int_t,ndim=1] Jlist, collRows, collCols
+    cdef numpy.ndarray[numpy.int_t,ndim=3] indices
+    cdef numpy.ndarray[numpy.float64_t,ndim=1] Elist, collFreq, collVals
+    cdef numpy.ndarray[numpy.float64_t,ndim=3] densStates
+    cdef numpy.ndarray[numpy.float64_t,ndim=4] Kij, Gnj, Fim
+    cdef list rows, cols, vals
+    cdef double T, beta, val
+    cdef int Nisom, Nreac, Nprod, Ngrains, NJ, Nrows
+    cdef int i, j, k, n, r, s, u, v, a, b
+
+    T = network.T
+    Elist = network.Elist
+    Jlist = network.Jlist
+    densStates = network.densStates
+    collFreq = network.collFreq
+    Kij = network.Kij
+    Fim = network.Fim
+    Gnj = network.Gnj
+    Nisom = network.Nisom
+    Nreac = network.Nreac
+    Nprod = network.Nprod
+    Ngrains = network.Ngrains
+    NJ = network.NJ
+    
+    beta = 1. / (constants.R * T)
+    
+    # Construct accounting matrix
+    indices = -numpy.ones((Nisom,Ngrains,NJ), numpy.int)
+    Nrows = 0
+    for r in range(Ngrains):
+        for s in range(NJ):
+            for i in range(Nisom):
+                if densStates[i,r,s] > 0:
+                    indices[i,r,s] = Nrows
+                    Nrows += 1
+    Nrows += Nreac
+    if products:
+        Nrows += Nprod
+    
+    # Collect the nonzero terms in coordinate format; terms that appear more
+    # than once are summed when the matrix is assembled
+    rows = []; cols = []; vals = []
+    
+    # Collision terms
+    for i in range(Nisom):
+        collRows, collCols, collVals = network.isomers[i].generateSparseCollisionMatrix(T, densStates[i,:,:], Elist, Jlist, tol)
+        for k in range(collVals.shape[0]):
+            a = indices[i,collRows[k] // NJ,collRows[k] % NJ]
+            b = indices[i,collCols[k] // NJ,collCols[k] % NJ]
+            if a > -1 and b > -1:
+                rows.append(a); cols.append(b); vals.append(collFreq[i] * collVals[k])
+    
+    # Isomerization terms
+    for i in range(Nisom):
+        for j in range(i):
+            if Kij[i,j,Ngrains-1,0] > 0 or Kij[j,i,Ngrains-1,0] > 0:
+                for r in range(Ngrains):
+                    for s in range(NJ):
+                        u = indices[i,r,s]; v = indices[j,r,s]
+                        if u > -1 and v > -1:
+                            rows.append(v); cols.append(u); vals.append(Kij[j,i,r,s])
+                            rows.append(u); cols.append(u); vals.append(-Kij[j,i,r,s])
+                            rows.append(u); cols.append(v); vals.append(Kij[i,j,r,s])
+                            rows.append(v); cols.append(v); vals.append(-Kij[i,j,r,s])
+    
+    # Association/dissociation terms
+    for i in range(Nisom):
+        for n in range(Nreac+Nprod):
+            if Gnj[n,i,Ngrains-1,0] > 0:
+                for r in range(Ngrains):
+                    for s in range(NJ):
+                        u = indices[i,r,s]
+                        if products: 
+                            v = Nrows - Nreac - Nprod + n
+                        else:
+                            v = Nrows - Nreac + n
+                        if u > -1:
+                            rows.append(u); cols.append(u); vals.append(-Gnj[n,i,r,s])
+                            if n < Nreac or products:
+                                rows.append(v); cols.append(u); vals.append(Gnj[n,i,r,s])
+                            if n < Nreac:
+                                val = Fim[i,n,r,s] * densStates[n+Nisom,r,s] * (2*Jlist[s]+1) * exp(-Elist[r] * beta)
+                                rows.append(u); cols.append(v); vals.append(val)
+                                rows.append(v); cols.append(v); vals.append(-val)
+
+    M = scipy.sparse.coo_matrix((vals, (rows, cols)), shape=(Nrows,Nrows)).tocsr()
+
+    return M, indices
@@ -36,10 +36,220 @@ pressure-dependent unimolecular reaction network
 import math
 import numpy
 import logging
+import hashlib
+import multiprocessing
+import os
+import sys
+import cPickle
+from collections import OrderedDict
 
 import rmgpy.constants as constants
 from rmgpy.reaction import Reaction
 from rmgpy.exceptions import NetworkError, InvalidMicrocanonicalRateError
+from rmgpy.util import getWorkerException, raiseWorkerException
+
+# The network whose rate coefficients are being computed by forked workers
+_network = None
+
+def canForkWorkers():
+    """
+    Return ``True`` if worker processes can be forked from the current
+    process, i.e. the platform supports ``fork()`` and the current process is
+    not itself a daemonic worker (which may not have children).
+    """
+    return hasattr(os, 'fork') and not multiprocessing.current_process().daemon
+
+def _calculateRateCoefficientsAtTemperature(args):
+    """
+    Compute the rate coefficients of the forked copy of the network at one
+    temperature. The k(E) computed at that temperature are returned with the
+    rate coefficients, so that they can be added to the microcanonical cache
+    of the parent process. Exceptions are returned to be raised there.
+    """
+    T, Plist, method, errorCheck = args
+    cache = microcanonicalCache
+    if cache is not None:
+        cache.startRecording()
+    try:
+        K, error = _network.calculateRateCoefficientsAtTemperature(T, Plist, method, errorCheck), None
+    except Exception, e:
+        K, error = None, getWorkerException(e)
+    records = cache.stopRecording() if cache is not None else None
+    return K, records, error
+
+# The MicrocanonicalCache used by all networks, if enabled
+microcanonicalCache = None
+
+class MicrocanonicalCache(object):
+    """
+    A cache of the microcanonical quantities computed for pressure-dependent
+    networks, so that they are not computed again when the same configuration
+    or path reaction appears at the same energy grains, e.g. when a network is
+    updated after a new path reaction is added to it. Two kinds of entries are
+    stored, each evicting the least recently used entries once there are more
+    than `maxSize` of them:
+
+    * The densities and sums of states of each configuration, keyed by the
+      identity of the species and conformers of the configuration, the energy
+      grains and the treatment of the J- and K-rotors.
+
+    * The forward and reverse k(E) of each path reaction, keyed by the
+      transition state and high-pressure kinetics of the reaction, the
+      temperature, the energy and angular momentum grains, and a digest of the
+      mapped densities of states of its reactants and products.
+
+    The attributes are:
+
+    =================== ========================================================
+    Attribute           Description
+    =================== ========================================================
+    `maxSize`           The maximum number of entries of each kind to store
+    `densities`         An ordered dictionary of the stored densities and sums of states
+    `rates`             An ordered dictionary of the stored k(E) values
+    `densityHits`       The number of densities of states found in the cache
+    `densityMisses`     The number of densities of states that had to be computed
+    `rateHits`          The number of k(E) found in the cache
+    `rateMisses`        The number of k(E) that had to be computed
+    =================== ========================================================
+
+    The stored arrays are copied on the way in and out, since the network
+    rescales them in place.
+
+    The k(E) computed by forked worker processes are recorded with
+    :meth:`startRecording` and :meth:`stopRecording` and added to the cache
+    of the parent process with :meth:`merge`.
+    """
+
+    def __init__(self, maxSize=2000):
+        self.maxSize = maxSize
+        self.densities = OrderedDict()
+        self.rates = OrderedDict()
+        self.densityHits = 0
+        self.densityMisses = 0
+        self.rateHits = 0
+        self.rateMisses = 0
+        self.recorded = None
+        self.recordedHits = 0
+        self.recordedMisses = 0
+
+    def lookup(self, entries, key):
+        """
+        Return the value stored for `key` in `entries`, marking it as the most
+        recently used, or ``None`` if there is no such entry.
+        """
+        entry = entries.pop(key, None)
+        if entry is None:
+            return None
+        entries[key] = entry
+        return entry[1]
+
+    def store(self, entries, key, objects, value):
+        """
+        Store `value` for `key` in `entries`. The `objects` whose identities
+        appear in `key` are kept with the entry, so that their identities
+        cannot be reused by other objects while the entry exists.
+        """
+        entries[key] = (objects, value)
+        while len(entries) > self.maxSize:
+            entries.popitem(last=False)
+
+    def calculateDensityOfStates(self, configuration, Elist, activeJRotor=True, activeKRotor=True, rmgmode=False):
+        """
+        Set the density and sum of states of `configuration` at the energies
+        `Elist` in J/mol, as :meth:`Configuration.calculateDensityOfStates`
+        does, using the stored values if available.
+        """
+        objects = []
+        for spec in configuration.species:
+            objects.extend([spec, spec.conformer, spec.conformer.modes])
+        key = (tuple([id(obj) for obj in objects]),
+               tuple([(spec.conformer.spinMultiplicity, spec.conformer.opticalIsomers)
+                      for spec in configuration.species]),
+               hashlib.sha1(Elist.tostring()).hexdigest(), activeJRotor, activeKRotor, rmgmode)
+        states = self.lookup(self.densities, key)
+        if states is None:
+            self.densityMisses += 1
+            configuration.calculateDensityOfStates(Elist, activeJRotor=activeJRotor, activeKRotor=activeKRotor,
+                                                   rmgmode=rmgmode)
+            densStates, sumStates = configuration.densStates, configuration.sumStates
+            self.store(self.densities, key, objects, (
+                densStates.copy() if densStates is not None else None,
+                sumStates.copy() if sumStates is not None else None,
+            ))
+        else:
+            self.densityHits += 1
+            densStates, sumStates = states
+            configuration.Elist = Elist
+            configuration.activeJRotor = activeJRotor
+            configuration.activeKRotor = activeKRotor
+            configuration.densStates = densStates.copy() if densStates is not None else None
+            configuration.sumStates = sumStates.copy() if sumStates is not None else None
+
+    def calculateMicrocanonicalRateCoefficient(self, reaction, Elist, Jlist, reacDensStates, prodDensStates, T):
+        """
+        Return the forward and reverse k(E) of the path `reaction`, as
+        :meth:`Reaction.calculateMicrocanonicalRateCoefficient` does, using
+        the stored values if available. Reactions that would need the reverse
+        high-pressure kinetics, which depend on the thermo of the species, are
+        always computed.
+        """
+        if not reaction.canTST() and not reacDensStates.any():
+            return reaction.calculateMicrocanonicalRateCoefficient(Elist, Jlist, reacDensStates, prodDensStates, T)
+        digest = hashlib.sha1()
+        for array in [Elist, Jlist, reacDensStates, prodDensStates]:
+            digest.update(array.tostring() if array is not None else 'None')
+        # The parameters are pickled since repr() rounds them
+        for obj in [reaction.transitionState, reaction.kinetics, reaction.network_kinetics]:
+            digest.update(cPickle.dumps(obj, cPickle.HIGHEST_PROTOCOL))
+        key = (len(reaction.reactants), len(reaction.products), T, digest.hexdigest())
+        rates = self.lookup(self.rates, key)
+        if rates is None:
+            self.rateMisses += 1
+            kf, kr = reaction.calculateMicrocanonicalRateCoefficient(Elist, Jlist, reacDensStates, prodDensStates, T)
+            self.store(self.rates, key, [], (kf.copy(), kr.copy()))
+            if self.recorded is not None:
+                self.recorded.append((key, (kf.copy(), kr.copy())))
+        else:
+            self.rateHits += 1
+            kf, kr = rates[0].copy(), rates[1].copy()
+        return kf, kr
+
+    def startRecording(self):
+        """
+        Start recording the k(E) computed from now on, along with the number
+        of cache hits and misses.
+        """
+        self.recorded = []
+        self.recordedHits = self.rateHits
+        self.recordedMisses = self.rateMisses
+
+    def stopRecording(self):
+        """
+        Stop recording and return the records since :meth:`startRecording`,
+        in a form that can be passed to :meth:`merge`.
+        """
+        records = (self.recorded, self.rateHits - self.recordedHits, self.rateMisses - self.recordedMisses)
+        self.recorded = None
+        return records
+
+    def merge(self, records):
+        """
+        Add the k(E) and the numbers of cache hits and misses in `records`,
+        as returned by :meth:`stopRecording` in a worker process, to the cache.
+        """
+        rates, hits, misses = records
+        for key, value in rates:
+            self.store(self.rates, key, [], value)
+        self.rateHits += hits
+        self.rateMisses += misses
+
+def setMicrocanonicalCache(cache):
+    """
+    Set the :class:`MicrocanonicalCache` used by all networks to `cache`, or
+    turn off caching if `cache` is ``None``.
+    """
+    global microcanonicalCache
+    microcanonicalCache = cache
 
 ################################################################################
 
@@ -121,6 +331,9 @@ class Network:
         self.grainCount = grainCount
         self.E0 = E0
 
+        self.collFreq = None
+        self.Mcoll = None
+
         self.valid = False
 
     def __repr__(self):
@@ -228,7 +441,23 @@ class Network:
         logging.debug('Finished initialization for network {0}.'.format(self.label))
         logging.debug('The network now has values of {0}'.format(repr(self)))
 
-    def calculateRateCoefficients(self, Tlist, Plist, method, errorCheck=True):
+    def calculateRateCoefficients(self, Tlist, Plist, method, errorCheck=True, processes=1):
+        """
+        Return an array of phenomenological rate coefficients :math:`k(T,P)`
+        for each temperature in `Tlist` in K and pressure in `Plist` in Pa
+        using the master equation reduction `method`.
+
+        If `processes` is greater than one, the temperatures are distributed
+        among that many forked worker processes. The workers inherit the
+        network as prepared by :meth:`initialize` (densities of states, energy
+        grains and path reactions) without copying, and each one runs the same
+        per-temperature calculation as the serial path, so the results are
+        identical. The rate coefficients at each pressure are evaluated in
+        the same worker, since the temperature-dependent part of
+        :meth:`setConditions` is shared between them. The last temperature
+        is evaluated in this process while the workers run, so that the
+        network is left at the last grid point, as it is by the serial path.
+        """
         
         Nisom = len(self.isomers)
         Nreac = len(self.reactants)
@@ -244,63 +473,105 @@ class Network:
         logging.info('Calculating phenomenological rate coefficients for {0}...'.format(rxn))
         K = numpy.zeros((len(Tlist),len(Plist),Nisom+Nreac+Nprod,Nisom+Nreac+Nprod), numpy.float64)
         
-        for t, T in enumerate(Tlist):
-            for p, P in enumerate(Plist):
-                self.setConditions(T, P)
-                
-                # Apply method
-                if method.lower() == 'modified strong collision':
-                    self.applyModifiedStrongCollisionMethod()
-                elif method.lower() == 'reservoir state':
-                    self.applyReservoirStateMethod()
-                elif method.lower() == 'chemically-significant eigenvalues':
-                    self.applyChemicallySignificantEigenvaluesMethod()
-                else:
-                    raise NetworkError('Unknown method "{0}". Valid options are "modified strong collision", "reservoir state", or "chemically-significant eigenvalues"'.format(method))
-
-                K[t,p,:,:] = self.K
-                
-                # Check that the k(T,P) values satisfy macroscopic equilibrium
-                eqRatios = self.eqRatios
-                for i in range(Nisom+Nreac):
-                    for j in range(i):
-                        Keq0 = K[t,p,j,i] / K[t,p,i,j]
-                        Keq = eqRatios[j] / eqRatios[i]
-                        if Keq0 / Keq < 0.5 or Keq0 / Keq > 2.0:
-                            if i < Nisom:
-                                reactants = self.isomers[i]
-                            elif i < Nisom+Nreac:
-                                reactants = self.reactants[i-Nisom]
-                            else:
-                                reactants = self.products[i-Nisom-Nreac]
-                            if j < Nisom:
-                                products = self.isomers[j]
-                            elif j < Nisom+Nreac:
-                                products = self.reactants[j-Nisom]
-                            else:
-                                products = self.products[j-Nisom-Nreac]
-                            reaction = Reaction(reactants=reactants.species[:], products=products.species[:])
-                            logging.error('For net reaction {0!s}:'.format(reaction))
-                            logging.error('Expected Keq({1:g} K, {2:g} bar) = {0:11.3e}'.format(Keq, T, P*1e-5))
-                            logging.error('  Actual Keq({1:g} K, {2:g} bar) = {0:11.3e}'.format(Keq0, T, P*1e-5))
-                            raise NetworkError('Computed k(T,P) values for reaction {0!s} do not satisfy macroscopic equilibrium.'.format(reaction))
-                            
-                # Reject if any rate coefficients are negative
-                if errorCheck:
-                    negativeRate = False
-                    for i in range(Nisom+Nreac+Nprod):
-                        for j in range(i):
-                            if (K[t,p,i,j] < 0 or K[t,p,j,i] < 0) and not negativeRate:
-                                negativeRate = True
-                                logging.error('Negative rate coefficient generated; rejecting result.')
-                                logging.info(K[t,p,0:Nisom+Nreac+Nprod,0:Nisom+Nreac])
-                                K[t,p,:,:] = 0 * K[t,p,:,:]
-                                self.K = 0 * self.K
+        processes = min(int(processes), len(Tlist))
+        if processes > 1 and canForkWorkers():
+            global _network
+            _network = self
+            pool = multiprocessing.Pool(processes=processes)
+            try:
+                asyncResult = pool.map_async(_calculateRateCoefficientsAtTemperature,
+                                             [(T, Plist, method, errorCheck) for T in Tlist[:-1]], chunksize=1)
+                try:
+                    K[-1,:,:,:] = self.calculateRateCoefficientsAtTemperature(Tlist[-1], Plist, method, errorCheck)
+                    lastError = None
+                except Exception:
+                    lastError = sys.exc_info()
+                results = asyncResult.get()
+            finally:
+                pool.terminate()
+                _network = None
+            # Raise the error at the lowest temperature first, as the serial path does
+            for t, (Kt, records, error) in enumerate(results):
+                if records is not None and microcanonicalCache is not None:
+                    microcanonicalCache.merge(records)
+                if error is not None:
+                    raiseWorkerException(error)
+                K[t,:,:,:] = Kt
+            if lastError is not None:
+                raise lastError[0], lastError[1], lastError[2]
+        else:
+            for t, T in enumerate(Tlist):
+                K[t,:,:,:] = self.calculateRateCoefficientsAtTemperature(T, Plist, method, errorCheck)
         logging.debug('Finished calculating rate coefficients for network {0}.'.format(self.label))
         logging.debug('The network now has values of {0}'.format(repr(self)))
         logging.debug('Master equation matrix found for network {0} is {1}'.format(self.label, K))
         return K
 
+    def calculateRateCoefficientsAtTemperature(self, T, Plist, method, errorCheck=True):
+        """
+        Return an array of phenomenological rate coefficients :math:`k(T,P)`
+        at the temperature `T` in K for each pressure in `Plist` in Pa.
+        """
+        
+        Nisom = len(self.isomers)
+        Nreac = len(self.reactants)
+        Nprod = len(self.products)
+
+        K = numpy.zeros((len(Plist),Nisom+Nreac+Nprod,Nisom+Nreac+Nprod), numpy.float64)
+        
+        for p, P in enumerate(Plist):
+            self.setConditions(T, P)
+            
+            # Apply method
+            if method.lower() == 'modified strong collision':
+                self.applyModifiedStrongCollisionMethod()
+            elif method.lower() == 'reservoir state':
+                self.applyReservoirStateMethod()
+            elif method.lower() == 'chemically-significant eigenvalues':
+                self.applyChemicallySignificantEigenvaluesMethod()
+            else:
+                raise NetworkError('Unknown method "{0}". Valid options are "modified strong collision", "reservoir state", or "chemically-significant eigenvalues"'.format(method))
+
+            K[p,:,:] = self.K
+            
+            # Check that the k(T,P) values satisfy macroscopic equilibrium
+            eqRatios = self.eqRatios
+            for i in range(Nisom+Nreac):
+                for j in range(i):
+                    Keq0 = K[p,j,i] / K[p,i,j]
+                    Keq = eqRatios[j] / eqRatios[i]
+                    if Keq0 / Keq < 0.5 or Keq0 / Keq > 2.0:
+                        if i < Nisom:
+                            reactants = self.isomers[i]
+                        elif i < Nisom+Nreac:
+                            reactants = self.reactants[i-Nisom]
+                        else:
+                            reactants = self.products[i-Nisom-Nreac]
+                        if j < Nisom:
+                            products = self.isomers[j]
+                        elif j < Nisom+Nreac:
+                            products = self.reactants[j-Nisom]
+                        else:
+                            products = self.products[j-Nisom-Nreac]
+                        reaction = Reaction(reactants=reactants.species[:], products=products.species[:])
+                        logging.error('For net reaction {0!s}:'.format(reaction))
+                        logging.error('Expected Keq({1:g} K, {2:g} bar) = {0:11.3e}'.format(Keq, T, P*1e-5))
+                        logging.error('  Actual Keq({1:g} K, {2:g} bar) = {0:11.3e}'.format(Keq0, T, P*1e-5))
+                        raise NetworkError('Computed k(T,P) values for reaction {0!s} do not satisfy macroscopic equilibrium.'.format(reaction))
+                        
+            # Reject if any rate coefficients are negative
+            if errorCheck:
+                negativeRate = False
+                for i in range(Nisom+Nreac+Nprod):
+                    for j in range(i):
+                        if (K[p,i,j] < 0 or K[p,j,i] < 0) and not negativeRate:
+                            negativeRate = True
+                            logging.error('Negative rate coefficient generated; rejecting result.')
+                            logging.info(K[p,0:Nisom+Nreac+Nprod,0:Nisom+Nreac])
+                            K[p,:,:] = 0 * K[p,:,:]
+                            self.K = 0 * self.K
+        return K
+
     def setConditions(self, T, P, ymB=None):
         """
         Set the current network conditions to the temperature `T` in K and
@@ -496,13 +767,13 @@ class Network:
         # Densities of states for isomers
         for i in range(Nisom):
             logging.debug('Calculating density of states for isomer "{0}"'.format(self.isomers[i]))
-            self.isomers[i].calculateDensityOfStates(Elist, activeKRotor=self.activeKRotor, activeJRotor=self.activeJRotor, rmgmode=self.rmgmode)
+            self.calculateConfigurationDensityOfStates(self.isomers[i], Elist)
         
         # Densities of states for reactant channels
         for n in range(Nreac):
             if self.reactants[n].hasStatMech():
                 logging.debug('Calculating density of states for reactant channel "{0}"'.format(self.reactants[n]))
-                self.reactants[n].calculateDensityOfStates(Elist, activeKRotor=self.activeKRotor, activeJRotor=self.activeJRotor, rmgmode=self.rmgmode)
+                self.calculateConfigurationDensityOfStates(self.reactants[n], Elist)
             else:
                 logging.warning('NOT calculating density of states for reactant channel "{0}". Missing Statmech.'.format(self.reactants[n]))
                 logging.warning('Reactants: {}'.format(repr(self.reactants[n])))
@@ -511,7 +782,7 @@ class Network:
             for n in range(Nprod):
                 if self.products[n].hasStatMech():
                     logging.debug('Calculating density of states for product channel "{0}"'.format(self.products[n]))
-                    self.products[n].calculateDensityOfStates(Elist, activeKRotor=self.activeKRotor, activeJRotor=self.activeJRotor, rmgmode=self.rmgmode)
+                    self.calculateConfigurationDensityOfStates(self.products[n], Elist)
                 else:
                     logging.warning('NOT calculating density of states for product channel "{0}" Missing Statmech.'.format(self.products[n]))
                     logging.warning('Products: {}'.format(repr(self.products[n])))
@@ -528,6 +799,16 @@ class Network:
 #                pylab.semilogy(Elist*0.001, self.products[n].densStates)
 #        pylab.show()
 
+    def calculateConfigurationDensityOfStates(self, configuration, Elist):
+        """
+        Calculate the density and sum of states of `configuration` at the
+        energies `Elist` in J/mol, using the microcanonical cache if enabled.
+        """
+        if microcanonicalCache is None:
+            configuration.calculateDensityOfStates(Elist, activeKRotor=self.activeKRotor, activeJRotor=self.activeJRotor, rmgmode=self.rmgmode)
+        else:
+            microcanonicalCache.calculateDensityOfStates(configuration, Elist, activeKRotor=self.activeKRotor, activeJRotor=self.activeJRotor, rmgmode=self.rmgmode)
+
     def mapDensitiesOfStates(self):
         """
         Map the overall densities of states to the current energy grains.
@@ -649,7 +930,10 @@ class Network:
             # Compute the microcanonical rate coefficient k(E)
             reacDensStates = densStates[reac,:,:]
             prodDensStates = densStates[prod,:,:]
-            kf, kr = rxn.calculateMicrocanonicalRateCoefficient(self.Elist, self.Jlist, reacDensStates, prodDensStates, T)
+            if microcanonicalCache is None:
+                kf, kr = rxn.calculateMicrocanonicalRateCoefficient(self.Elist, self.Jlist, reacDensStates, prodDensStates, T)
+            else:
+                kf, kr = microcanonicalCache.calculateMicrocanonicalRateCoefficient(rxn, self.Elist, self.Jlist, reacDensStates, prodDensStates, T)
 
             # Check for NaN (just to be safe)
             if numpy.isnan(kf).any() or numpy.isnan(kr).any():
@@ -799,29 +1083,48 @@ class Network:
 
     def calculateCollisionModel(self):
         """
-        Calculate the matrix of first-order rate coefficients for collisional
-        population transfer between grains for each isomer, including the
-        corresponding collision frequencies.
+        Calculate the collision frequency of each isomer. The matrix of
+        first-order rate coefficients for collisional population transfer
+        between grains is only generated when it is first needed, by
+        :meth:`getCollisionMatrix`, since it grows with the square of the
+        number of grains and the sparse master equation does not use it.
         """
         Nisom = len(self.isomers)
+        
+        collFreq = numpy.zeros(Nisom, numpy.float64)
+        for i, isomer in enumerate(self.isomers):
+            collFreq[i] = isomer.calculateCollisionFrequency(self.T, self.P, self.bathGas)
+                        
+        self.collFreq = collFreq
+        self.Mcoll = None
+        
+        return collFreq
+
+    def getCollisionMatrix(self):
+        """
+        Return the matrix of first-order rate coefficients for collisional
+        population transfer between grains for each isomer at the current
+        conditions, generating it if necessary.
+        """
+        if self.Mcoll is not None:
+            return self.Mcoll
+
+        Nisom = len(self.isomers)
         Ngrains = len(self.Elist)
         NJ = 1 if self.Jlist is None else len(self.Jlist)
         
         try:
-            collFreq = numpy.zeros(Nisom, numpy.float64)
             Mcoll = numpy.zeros((Nisom,Ngrains,NJ,Ngrains,NJ), numpy.float64)
         except MemoryError:
             logging.warning('Collision matrix too large to manage')
             newNgrains = int(Ngrains/2.0)
             logging.warning('Adjusting to use {0} grains instead of {1}'.format(newNgrains,Ngrains))
             self.Elist = self.selectEnergyGrains(self.T,grainCount = newNgrains)
-            return self.calculateCollisionModel()
+            return self.getCollisionMatrix()
         
         for i, isomer in enumerate(self.isomers):
-            collFreq[i] = isomer.calculateCollisionFrequency(self.T, self.P, self.bathGas)
-            Mcoll[i,:,:,:,:] = collFreq[i] * isomer.generateCollisionMatrix(self.T, self.densStates[i,:,:], self.Elist, self.Jlist)
-                        
-        self.collFreq = collFreq
+            Mcoll[i,:,:,:,:] = self.collFreq[i] * isomer.generateCollisionMatrix(self.T, self.densStates[i,:,:], self.Elist, self.Jlist)
+        
         self.Mcoll = Mcoll
         
         return Mcoll
@@ -33,10 +33,14 @@ This script contains unit tests of the :mod:`rmgpy.pdep.network` module.
 """
 
 import unittest
+import numpy
+import cPickle
 
-from rmgpy.pdep.network import Network
+from rmgpy.pdep.network import Network, MicrocanonicalCache, setMicrocanonicalCache
 from rmgpy.pdep.configuration import Configuration
 from rmgpy.transport import TransportData
+from rmgpy.exceptions import InvalidMicrocanonicalRateError
+from rmgpy.util import getWorkerException
 from rmgpy.statmech.translation import Translation, IdealGasTranslation
 from rmgpy.statmech.rotation import Rotation, LinearRotor, NonlinearRotor, KRotor, SphericalTopRotor
 from rmgpy.statmech.vibration import Vibration, HarmonicOscillator
@@ -45,6 +49,7 @@ from rmgpy.statmech.conformer import Conformer
 from rmgpy.species import Species, TransitionState
 from rmgpy.reaction import Reaction
 from rmgpy.pdep.collision import SingleExponentialDown
+from rmgpy.pdep.cse import applyChemicallySignificantEigenvaluesMethod
 
 ################################################################################
 
@@ -235,11 +240,112 @@ class TestNetwork(unittest.TestCase):
         niso = 100000000
         net.isomers = niso*[1]
         try:
-            net.calculateCollisionModel()
+            net.getCollisionMatrix()
         except MemoryError:
             raise AssertionError('Large collision matrix resulted in memory error, handling failed')
         except:
             pass
+
+    def test_microcanonicalCacheDensityOfStates(self):
+        """
+        Test that the microcanonical cache returns the densities of states it
+        would compute, and only reuses them for the same conformers and grains.
+        """
+        Elist = numpy.arange(0, 100000, 500, numpy.float64)
+        configuration = Configuration(self.nC4H10O)
+        configuration.calculateDensityOfStates(Elist)
+        densStates = configuration.densStates
+
+        cache = MicrocanonicalCache()
+        for i in range(2):
+            configuration = Configuration(self.nC4H10O)
+            cache.calculateDensityOfStates(configuration, Elist)
+            self.assertTrue(numpy.array_equal(configuration.densStates, densStates))
+        self.assertEqual(cache.densityMisses, 1)
+        self.assertEqual(cache.densityHits, 1)
+
+        cache.calculateDensityOfStates(configuration, Elist[:-1])
+        self.assertEqual(cache.densityMisses, 2)
+        self.assertEqual(len(configuration.densStates), len(Elist) - 1)
+
+        self.nC4H10O.conformer.modes = self.nC4H10O.conformer.modes[:]
+        cache.calculateDensityOfStates(configuration, Elist)
+        self.assertEqual(cache.densityMisses, 3)
+
+    def test_sparseChemicallySignificantEigenvalues(self):
+        """
+        Test that the CSE method gives the same k(T,P) values with a sparse
+        master equation matrix as with a dense one.
+        """
+        self.network.initialize(Tmin=300.0, Tmax=2000.0, Pmin=1e3, Pmax=1e7,
+                                maximumGrainSize=2000.0, minimumGrainCount=200)
+        self.network.setConditions(1000.0, 1e5)
+        K0, pa0 = applyChemicallySignificantEigenvaluesMethod(self.network, sparse=False)
+        K1, pa1 = applyChemicallySignificantEigenvaluesMethod(self.network, sparse=True)
+        self.assertEqual(K0.shape, K1.shape)
+        for i in range(K0.shape[0]):
+            for j in range(K0.shape[1]):
+                if K0[i,j] != 0:
+                    self.assertAlmostEqual(K1[i,j] / K0[i,j], 1.0, 4)
+
+    def test_parallelRateCoefficients(self):
+        """
+        Test that computing the rate coefficients in worker processes gives
+        the same values as the serial path, and leaves the network in the same
+        state at the last grid point.
+        """
+        Tlist = numpy.array([500.0, 1000.0, 1500.0])
+        Plist = numpy.array([1e4, 1e6])
+        self.network.initialize(Tmin=300.0, Tmax=2000.0, Pmin=1e3, Pmax=1e7,
+                                maximumGrainSize=2000.0, minimumGrainCount=200)
+        K1 = self.network.calculateRateCoefficients(Tlist, Plist, 'modified strong collision', processes=2)
+        state1 = (self.network.T, self.network.P, self.network.Elist.copy(), self.network.K.copy(), self.network.p0.copy())
+        self.network.initialize(Tmin=300.0, Tmax=2000.0, Pmin=1e3, Pmax=1e7,
+                                maximumGrainSize=2000.0, minimumGrainCount=200)
+        K0 = self.network.calculateRateCoefficients(Tlist, Plist, 'modified strong collision')
+        state0 = (self.network.T, self.network.P, self.network.Elist, self.network.K, self.network.p0)
+        self.assertTrue(numpy.array_equal(K0, K1))
+        self.assertEqual(state0[:2], state1[:2])
+        for array0, array1 in zip(state0[2:], state1[2:]):
+            self.assertTrue(numpy.array_equal(array0, array1))
+
+    def test_parallelMicrocanonicalCache(self):
+        """
+        Test that the k(E) computed in worker processes are added to the
+        microcanonical cache of the parent process.
+        """
+        Tlist = numpy.array([500.0, 1000.0, 1500.0])
+        Plist = numpy.array([1e5])
+        cache = MicrocanonicalCache()
+        setMicrocanonicalCache(cache)
+        try:
+            self.network.initialize(Tmin=300.0, Tmax=2000.0, Pmin=1e3, Pmax=1e7,
+                                    maximumGrainSize=2000.0, minimumGrainCount=200)
+            self.network.calculateRateCoefficients(Tlist, Plist, 'modified strong collision', processes=2)
+            misses = cache.rateMisses
+            self.assertEqual(len(cache.rates), misses)
+            self.assertEqual(misses, len(Tlist) * len(self.network.pathReactions))
+            self.network.calculateRateCoefficients(Tlist, Plist, 'modified strong collision')
+            self.assertEqual(cache.rateMisses, misses)
+            self.assertEqual(cache.rateHits, misses)
+        finally:
+            setMicrocanonicalCache(None)
+
+    def test_workerInvalidMicrocanonicalRateError(self):
+        """
+        Test that an InvalidMicrocanonicalRateError passed back from a worker
+        process keeps the ratios needed to judge its badness.
+        """
+        try:
+            raise InvalidMicrocanonicalRateError('Invalid k(E) values', 10.0, 0.01)
+        except InvalidMicrocanonicalRateError, e:
+            error, formatted = getWorkerException(e)
+        error = cPickle.loads(cPickle.dumps(error, cPickle.HIGHEST_PROTOCOL))
+        self.assertEqual(error.message, 'Invalid k(E) values')
+        self.assertEqual(error.k_ratio, 10.0)
+        self.assertEqual(error.Keq_ratio, 0.01)
+        self.assertEqual(error.badness(), 2.0)
+        self.assertIn('Invalid k(E) values', formatted)
         
 ################################################################################
 
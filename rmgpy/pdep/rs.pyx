@@ -62,7 +62,7 @@ cpdef applyReservoirStateMethod(network):
     Jlist = network.Jlist
     densStates = network.densStates
     collFreq = network.collFreq
-    Mcoll = network.Mcoll
+    Mcoll = network.getCollisionMatrix()
     Kij = network.Kij
     Fim = network.Fim
     Gnj = network.Gnj
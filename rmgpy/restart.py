@@ -34,6 +34,21 @@ import logging
 import cPickle
 import time
 import warnings
+
+import numpy
+
+import rmgpy.kinetics
+import rmgpy.thermo
+from rmgpy.data.kinetics.family import TemplateReaction
+from rmgpy.data.kinetics.library import LibraryReaction
+from rmgpy.kinetics import Arrhenius
+from rmgpy.molecule import Molecule
+from rmgpy.quantity import Quantity
+from rmgpy.reaction import Reaction
+from rmgpy.species import Species
+from rmgpy.thermo import NASA, NASAPolynomial
+from rmgpy.transport import TransportData
+
 def save(rmg):
     # Save the restart file if desired
     if rmg.saveRestartPeriod or rmg.done:
@@ -105,5 +120,573 @@ class RestartWriter(object):
     def update(self, rmg):
       	save(rmg)
 
-        
-    
+################################################################################
+
+class CheckpointWriter(object):
+    """
+    This class listens to a RMG subject and saves a checkpoint of the RMG
+    model to the directory `path` on disk. Unlike :func:`saveRestartFile`,
+    which pickles the entire job, a checkpoint is stored as a set of numpy
+    ``.npz`` files containing columnar arrays, so it is cheap enough to be
+    saved every iteration.
+
+    The checkpoint consists of a series of block files, each containing the
+    species and reactions that were added to the model since the previous
+    block, and a state file containing the current core and edge, the react
+    flags and the reaction thresholds. Saved species and reactions whose
+    thermo or kinetics object (or duplicate flag) has been replaced since they
+    were last saved are saved again in the next block, overriding their
+    earlier entries. Since kinetics can also be modified in place, the core
+    and pressure-dependent reactions are always saved again in the state
+    file. Species are stored as adjacency lists
+    with their NASA coefficients, and reactions as arrays of species indices
+    with their Arrhenius parameters. Objects that cannot be stored as arrays
+    (e.g. other kinetics types) are stored using their string representation.
+    The state file is replaced atomically after the blocks have been written,
+    so an interrupted save leaves the previous checkpoint intact.
+
+    The attributes are:
+
+    ======================= ====================================================
+    Attribute               Description
+    ======================= ====================================================
+    `path`                  The directory in which the checkpoint is saved
+    `speciesIDs`            A dictionary mapping saved species to their checkpoint indices
+    `reactionIDs`           A dictionary mapping saved reactions to their checkpoint indices
+    `savedThermo`           A dictionary mapping saved species to the thermo object that was saved
+    `savedKinetics`         A dictionary mapping saved reactions to the kinetics object and duplicate flag that were saved
+    `numBlocks`             The number of block files in the current checkpoint
+    ======================= ====================================================
+
+    A new instance of the class can be appended to a subject as follows:
+
+    rmg = ...
+    listener = CheckpointWriter(path)
+    rmg.attach(listener)
+
+    Whenever the subject calls the .notify() method, the
+    .update() method of the listener will be called.
+    """
+
+    def __init__(self, path):
+        super(CheckpointWriter, self).__init__()
+        self.path = path
+        self.speciesIDs = {}
+        self.reactionIDs = {}
+        self.savedThermo = {}
+        self.savedKinetics = {}
+        self.numBlocks = None
+
+    def update(self, rmg):
+        self.save(rmg)
+
+    def getBlockPath(self, blockIndex):
+        """
+        Return the path of the block file with index `blockIndex`.
+        """
+        return os.path.join(self.path, 'block{0:04d}.npz'.format(blockIndex))
+
+    def getStatePath(self):
+        """
+        Return the path of the state file of the checkpoint.
+        """
+        return os.path.join(self.path, 'state.npz')
+
+    def save(self, rmg):
+        """
+        Save a checkpoint of the model in `rmg`, writing only the species and
+        reactions that have not been saved before or whose thermo or kinetics
+        have been replaced since, except for the core and pressure-dependent
+        reactions, which are always written to the state file.
+        """
+        reactionModel = rmg.reactionModel
+
+        if self.numBlocks is None:
+            # Start a new checkpoint, discarding any from a previous job
+            if not os.path.exists(self.path):
+                os.makedirs(self.path)
+            for filename in os.listdir(self.path):
+                if filename.endswith('.npz'):
+                    os.remove(os.path.join(self.path, filename))
+            self.numBlocks = 0
+
+        newSpecies = []
+        for spec in reactionModel.core.species + reactionModel.edge.species:
+            if spec not in self.speciesIDs:
+                self.speciesIDs[spec] = len(self.speciesIDs)
+                newSpecies.append(spec)
+        newReactions = []
+        for rxn in reactionModel.core.reactions + reactionModel.edge.reactions:
+            if rxn not in self.reactionIDs:
+                for spec in rxn.reactants + rxn.products + [rxn.specificCollider]:
+                    if spec is not None and spec not in self.speciesIDs:
+                        self.speciesIDs[spec] = len(self.speciesIDs)
+                        newSpecies.append(spec)
+                self.reactionIDs[rxn] = len(self.reactionIDs)
+                newReactions.append(rxn)
+
+        # Reactions whose current kinetics are written to the state file
+        currentReactions = list(reactionModel.core.reactions)
+        currentReactions.extend([rxn for rxn in reactionModel.edge.reactions if getReactionKind(rxn) == 'pdep'])
+        currentReactionSet = set(currentReactions)
+
+        updatedSpecies = [spec for spec in reactionModel.core.species + reactionModel.edge.species
+                          if spec in self.savedThermo and spec.thermo is not self.savedThermo[spec]]
+        updatedReactions = [rxn for rxn in reactionModel.edge.reactions
+                            if rxn in self.savedKinetics and rxn not in currentReactionSet
+                            and (self.savedKinetics[rxn][0] is not rxn.kinetics
+                                 or self.savedKinetics[rxn][1] != rxn.duplicate)]
+
+        if newSpecies or newReactions or updatedSpecies or updatedReactions:
+            arrays = getSpeciesArrays(newSpecies)
+            arrays.update(getReactionArrays(newReactions, self.speciesIDs))
+            if updatedSpecies or updatedReactions:
+                arrays.update(_prefixArrays('updated_', getSpeciesArrays(updatedSpecies)))
+                arrays.update(_prefixArrays('updated_', getReactionArrays(updatedReactions, self.speciesIDs)))
+                arrays['updated_speciesIDs'] = numpy.array([self.speciesIDs[spec] for spec in updatedSpecies], numpy.int)
+                arrays['updated_reactionIDs'] = numpy.array([self.reactionIDs[rxn] for rxn in updatedReactions], numpy.int)
+            saveArrays(self.getBlockPath(self.numBlocks), arrays)
+            self.numBlocks += 1
+
+        for spec in newSpecies + updatedSpecies:
+            self.savedThermo[spec] = spec.thermo
+        for rxn in newReactions + updatedReactions + currentReactions:
+            self.savedKinetics[rxn] = (rxn.kinetics, rxn.duplicate)
+
+        arrays = {
+            'numBlocks': numpy.array(self.numBlocks),
+            'iterationNum': numpy.array(reactionModel.iterationNum),
+            'speciesCounter': numpy.array(reactionModel.speciesCounter),
+            'reactionCounter': numpy.array(reactionModel.reactionCounter),
+            'coreSpecies': numpy.array([self.speciesIDs[spec] for spec in reactionModel.core.species], numpy.int),
+            'edgeSpecies': numpy.array([self.speciesIDs[spec] for spec in reactionModel.edge.species], numpy.int),
+            'coreReactions': numpy.array([self.reactionIDs[rxn] for rxn in reactionModel.core.reactions], numpy.int),
+            'edgeReactions': numpy.array([self.reactionIDs[rxn] for rxn in reactionModel.edge.reactions], numpy.int),
+            'current_reactionIDs': numpy.array([self.reactionIDs[rxn] for rxn in currentReactions], numpy.int),
+        }
+        arrays.update(_prefixArrays('current_', getReactionArrays(currentReactions, self.speciesIDs)))
+        for attribute, order in [('unimolecularReact', 1), ('bimolecularReact', 2), ('trimolecularReact', 3),
+                                 ('unimolecularThreshold', 1), ('bimolecularThreshold', 2), ('trimolecularThreshold', 3)]:
+            value = getattr(rmg, attribute)
+            if isinstance(value, set):
+                # Sets of index tuples are saved as arrays of their coordinates
+                arrays[attribute] = numpy.array(sorted(value), numpy.int).reshape(-1, order)
+            elif value is not None:
+                arrays[attribute] = value
+        saveArrays(self.getStatePath(), arrays)
+        logging.info('Saved checkpoint with {0:d} new species and {1:d} new reactions '
+                     '({2:d} species and {3:d} reactions updated).'.format(
+            len(newSpecies), len(newReactions), len(updatedSpecies), len(updatedReactions)))
+
+    def load(self, rmg):
+        """
+        Load the checkpoint into the reaction model of `rmg`, which should
+        not contain any species or reactions yet. Subsequent calls to
+        :meth:`save` append to the loaded checkpoint.
+        """
+        reactionModel = rmg.reactionModel
+
+        logging.info('Loading checkpoint from {0}...'.format(self.path))
+        state = numpy.load(self.getStatePath())
+        self.numBlocks = int(state['numBlocks'])
+
+        speciesList = []
+        reactionList = []
+        for blockIndex in xrange(self.numBlocks):
+            block = numpy.load(self.getBlockPath(blockIndex))
+            speciesList.extend(loadSpeciesArrays(block))
+            reactionList.extend(loadReactionArrays(block, speciesList))
+            if 'updated_speciesIDs' in block.files:
+                # Override the earlier entries of species and reactions saved again
+                arrays = _unprefixArrays('updated_', block)
+                for index, spec in zip(block['updated_speciesIDs'], loadSpeciesArrays(arrays)):
+                    speciesList[index].thermo = spec.thermo
+                    speciesList[index].transportData = spec.transportData
+                for index, rxn in zip(block['updated_reactionIDs'], loadReactionArrays(arrays, speciesList)):
+                    reactionList[index] = rxn
+        if 'current_reactionIDs' in state.files:
+            for index, rxn in zip(state['current_reactionIDs'],
+                                  loadReactionArrays(_unprefixArrays('current_', state), speciesList)):
+                reactionList[index] = rxn
+
+        self.speciesIDs = dict((spec, index) for index, spec in enumerate(speciesList))
+        self.reactionIDs = dict((rxn, index) for index, rxn in enumerate(reactionList))
+        self.savedThermo = dict((spec, spec.thermo) for spec in speciesList)
+        self.savedKinetics = dict((rxn, (rxn.kinetics, rxn.duplicate)) for rxn in reactionList)
+
+        for spec in speciesList:
+            formula = spec.molecule[0].getFormula()
+            reactionModel.speciesDict.setdefault(formula, []).append(spec)
+            if spec.reactive:
+                reactionModel.indexSpeciesDict[spec.index] = spec
+        for formula in reactionModel.speciesDict:
+            reactionModel.getSpeciesKeyIndex(formula)
+
+        reactionModel.core.species = [speciesList[index] for index in state['coreSpecies']]
+        reactionModel.edge.species = [speciesList[index] for index in state['edgeSpecies']]
+        reactionModel.core.reactions = [reactionList[index] for index in state['coreReactions']]
+        reactionModel.edge.reactions = [reactionList[index] for index in state['edgeReactions']]
+        reactionModel.rebuildEdgeReactionIndex()
+        for rxn in reactionModel.core.reactions + reactionModel.edge.reactions:
+            if isinstance(rxn, (TemplateReaction, LibraryReaction)):
+                reactionModel.registerReaction(rxn)
+
+        reactionModel.iterationNum = int(state['iterationNum'])
+        reactionModel.speciesCounter = int(state['speciesCounter'])
+        reactionModel.reactionCounter = int(state['reactionCounter'])
+        for attribute in ['unimolecularReact', 'bimolecularReact', 'trimolecularReact',
+                          'unimolecularThreshold', 'bimolecularThreshold', 'trimolecularThreshold']:
+            if attribute in state.files:
+                value = state[attribute]
+                if value.dtype != numpy.bool and value.ndim == 2:
+                    value = set([tuple(indices) for indices in value.tolist()])
+                setattr(rmg, attribute, value)
+
+        if any(getReactionKind(rxn) == 'pdep' for rxn in reactionList):
+            logging.warning('Pressure-dependent networks are not saved in checkpoints. The loaded network '
+                            'reactions have the kinetics of the last save until the networks are updated.')
+        logging.info('Loaded {0:d} species and {1:d} reactions from checkpoint.'.format(
+            len(speciesList), len(reactionList)))
+
+
+def _prefixArrays(prefix, arrays):
+    """
+    Return a copy of the dictionary of numpy `arrays` with `prefix` added to
+    each key.
+    """
+    return dict((prefix + key, value) for key, value in arrays.iteritems())
+
+
+def _unprefixArrays(prefix, arrays):
+    """
+    Return a dictionary of the numpy arrays in `arrays` (a dictionary or a
+    loaded ``.npz`` file) whose keys start with `prefix`, with the prefix
+    removed from their keys.
+    """
+    keys = arrays.files if hasattr(arrays, 'files') else arrays.keys()
+    return dict((key[len(prefix):], arrays[key]) for key in keys if key.startswith(prefix))
+
+
+def saveArrays(path, arrays):
+    """
+    Save the dictionary of numpy `arrays` to the ``.npz`` file at `path`. The
+    file is first written to a temporary file and then renamed, so that the
+    file at `path` is always complete.
+    """
+    tempPath = path + '.tmp'
+    with open(tempPath, 'wb') as f:
+        numpy.savez(f, **arrays)
+    os.rename(tempPath, path)
+
+
+def _getEvalContext():
+    """
+    Return the context used to evaluate the string representations of
+    objects stored in a checkpoint.
+    """
+    context = {'__builtins__': None, 'True': True, 'False': False, 'None': None,
+               'Molecule': Molecule, 'TransportData': TransportData, 'array': numpy.array}
+    for module in [rmgpy.kinetics, rmgpy.thermo]:
+        for name in dir(module):
+            if not name.startswith('_'):
+                context[name] = getattr(module, name)
+    return context
+
+
+def _toFloat(quantity):
+    """
+    Return the SI value of `quantity`, or NaN if it is ``None``.
+    """
+    return numpy.nan if quantity is None else quantity.value_si
+
+
+def _toQuantity(value, units):
+    """
+    Return a (value, units) tuple for a stored SI value, or ``None`` if the
+    value is NaN.
+    """
+    return None if numpy.isnan(value) else (value, units)
+
+
+def _isPlainNASA(thermo):
+    """
+    Return ``True`` if `thermo` is a two-polynomial, seven-coefficient
+    :class:`NASA` object that can be stored as arrays without loss.
+    """
+    if type(thermo) is not NASA or thermo.E0 is not None or len(thermo.polynomials) != 2:
+        return False
+    for poly in thermo.polynomials:
+        if len(poly.coeffs) != 7 or poly.E0 is not None or poly.label or poly.comment:
+            return False
+    return True
+
+
+def _isPlainArrhenius(kinetics):
+    """
+    Return ``True`` if `kinetics` is an :class:`Arrhenius` object without
+    uncertainties or pressure limits that can be stored as arrays without loss.
+    """
+    if type(kinetics) is not Arrhenius or kinetics.Pmin is not None or kinetics.Pmax is not None:
+        return False
+    return kinetics.A.uncertainty == 0 and kinetics.n.uncertainty == 0 and kinetics.Ea.uncertainty == 0
+
+
+def getSpeciesArrays(speciesList):
+    """
+    Return a dictionary of numpy arrays containing the columns of the
+    species in `speciesList`.
+    """
+    numSpecies = len(speciesList)
+    index = numpy.zeros(numSpecies, numpy.int)
+    reactive = numpy.zeros(numSpecies, numpy.bool)
+    explicitlyAllowed = numpy.zeros(numSpecies, numpy.bool)
+    creationIteration = numpy.zeros(numSpecies, numpy.int)
+    symmetryNumber = numpy.zeros(numSpecies, numpy.float64)
+    thermoCoeffs = numpy.zeros((numSpecies, 2, 7), numpy.float64)
+    thermoTemps = numpy.zeros((numSpecies, 2, 2), numpy.float64)
+    thermoHeatCapacities = numpy.zeros((numSpecies, 2), numpy.float64)
+    labels, adjacencyLists, structureFlags = [], [], []
+    thermoLabels, thermoComments, thermoReprs, transportReprs = [], [], [], []
+
+    for i, spec in enumerate(speciesList):
+        index[i] = spec.index
+        reactive[i] = spec.reactive
+        explicitlyAllowed[i] = spec.explicitlyAllowed
+        creationIteration[i] = spec.creationIteration
+        symmetryNumber[i] = spec.symmetryNumber
+        labels.append(spec.label)
+        adjacencyLists.append('\n'.join([mol.toAdjacencyList() for mol in spec.molecule]))
+        structureFlags.append(''.join(['1' if mol.reactive else '0' for mol in spec.molecule]))
+
+        thermo = spec.getThermoData() if spec.thermo else None
+        if _isPlainNASA(thermo):
+            for j, poly in enumerate(thermo.polynomials):
+                thermoCoeffs[i, j, :] = poly.coeffs
+                thermoTemps[i, j, :] = [poly.Tmin.value_si, poly.Tmax.value_si]
+            thermoHeatCapacities[i, :] = [_toFloat(thermo.Cp0), _toFloat(thermo.CpInf)]
+            thermoLabels.append(thermo.label)
+            thermoComments.append(thermo.comment)
+            thermoReprs.append('')
+        else:
+            thermoLabels.append('')
+            thermoComments.append('')
+            thermoReprs.append(repr(thermo))
+        transportReprs.append(repr(spec.transportData))
+
+    return {
+        'species_index': index,
+        'species_label': numpy.array(labels, str),
+        'species_reactive': reactive,
+        'species_explicitlyAllowed': explicitlyAllowed,
+        'species_creationIteration': creationIteration,
+        'species_symmetryNumber': symmetryNumber,
+        'species_adjacencyList': numpy.array(adjacencyLists, str),
+        'species_structureFlags': numpy.array(structureFlags, str),
+        'species_thermoCoeffs': thermoCoeffs,
+        'species_thermoTemps': thermoTemps,
+        'species_thermoHeatCapacities': thermoHeatCapacities,
+        'species_thermoLabel': numpy.array(thermoLabels, str),
+        'species_thermoComment': numpy.array(thermoComments, str),
+        'species_thermoRepr': numpy.array(thermoReprs, str),
+        'species_transportRepr': numpy.array(transportReprs, str),
+    }
+
+
+def loadSpeciesArrays(arrays):
+    """
+    Return the list of species stored in the dictionary of numpy `arrays`
+    created by :func:`getSpeciesArrays`.
+    """
+    context = _getEvalContext()
+    speciesList = []
+    for i in xrange(len(arrays['species_index'])):
+        molecules = []
+        adjacencyLists = str(arrays['species_adjacencyList'][i]).strip().split('\n\n')
+        for adjlist, flag in zip(adjacencyLists, str(arrays['species_structureFlags'][i])):
+            mol = Molecule().fromAdjacencyList(adjlist)
+            mol.reactive = flag == '1'
+            molecules.append(mol)
+
+        thermoRepr = str(arrays['species_thermoRepr'][i])
+        if thermoRepr:
+            thermo = eval(thermoRepr, context)
+        else:
+            coeffs = arrays['species_thermoCoeffs'][i]
+            temps = arrays['species_thermoTemps'][i]
+            Cp0, CpInf = arrays['species_thermoHeatCapacities'][i]
+            thermo = NASA(
+                polynomials=[NASAPolynomial(coeffs=coeffs[j], Tmin=(temps[j, 0], 'K'), Tmax=(temps[j, 1], 'K'))
+                             for j in xrange(2)],
+                Tmin=(temps[0, 0], 'K'),
+                Tmax=(temps[1, 1], 'K'),
+                Cp0=_toQuantity(Cp0, 'J/(mol*K)'),
+                CpInf=_toQuantity(CpInf, 'J/(mol*K)'),
+                label=str(arrays['species_thermoLabel'][i]),
+                comment=str(arrays['species_thermoComment'][i]),
+            )
+
+        spec = Species(
+            index=int(arrays['species_index'][i]),
+            label=str(arrays['species_label'][i]),
+            molecule=molecules,
+            thermo=thermo,
+            transportData=eval(str(arrays['species_transportRepr'][i]), context),
+            reactive=bool(arrays['species_reactive'][i]),
+            symmetryNumber=float(arrays['species_symmetryNumber'][i]),
+            creationIteration=int(arrays['species_creationIteration'][i]),
+            explicitlyAllowed=bool(arrays['species_explicitlyAllowed'][i]),
+        )
+        spec.molecularWeight = Quantity(spec.molecule[0].getMolecularWeight()*1000., 'amu')
+        spec.generateEnergyTransferModel()
+        speciesList.append(spec)
+    return speciesList
+
+
+def getReactionKind(reaction):
+    """
+    Return a string identifying the class of `reaction` in a checkpoint.
+    """
+    from rmgpy.rmg.pdep import PDepReaction
+    if isinstance(reaction, TemplateReaction):
+        return 'template'
+    elif isinstance(reaction, LibraryReaction):
+        return 'library'
+    elif isinstance(reaction, PDepReaction):
+        return 'pdep'
+    return 'reaction'
+
+
+def getReactionArrays(reactionList, speciesIDs):
+    """
+    Return a dictionary of numpy arrays containing the columns of the
+    reactions in `reactionList`. The reactants, products and collider are
+    stored using their indices in `speciesIDs`.
+    """
+    numReactions = len(reactionList)
+    width = max([3] + [len(rxn.reactants) for rxn in reactionList] + [len(rxn.products) for rxn in reactionList])
+    index = numpy.zeros(numReactions, numpy.int)
+    reactants = -numpy.ones((numReactions, width), numpy.int)
+    products = -numpy.ones((numReactions, width), numpy.int)
+    collider = -numpy.ones(numReactions, numpy.int)
+    flags = numpy.zeros((numReactions, 6), numpy.bool)
+    degeneracy = numpy.zeros(numReactions, numpy.float64)
+    arrhenius = numpy.zeros((numReactions, 6), numpy.float64)
+    kinds, sources, templates, estimators, pairs = [], [], [], [], []
+    AUnits, EaUnits, kineticsComments, kineticsReprs = [], [], [], []
+
+    for i, rxn in enumerate(reactionList):
+        index[i] = rxn.index
+        reactants[i, :len(rxn.reactants)] = [speciesIDs[spec] for spec in rxn.reactants]
+        products[i, :len(rxn.products)] = [speciesIDs[spec] for spec in rxn.products]
+        if rxn.specificCollider is not None:
+            collider[i] = speciesIDs[rxn.specificCollider]
+        flags[i, :] = [rxn.reversible, rxn.duplicate, rxn.is_forward, rxn.allow_pdep_route,
+                       rxn.elementary_high_p, rxn.allow_max_rate_violation]
+        degeneracy[i] = rxn.degeneracy
+        pairs.append(';'.join(['{0:d},{1:d}'.format(speciesIDs[pair[0]], speciesIDs[pair[1]])
+                               for pair in rxn.pairs or []]))
+
+        kind = getReactionKind(rxn)
+        kinds.append(kind)
+        if kind == 'template':
+            sources.append(rxn.family)
+            templates.append(';'.join(rxn.template or []))
+            estimators.append(rxn.estimator or '')
+        else:
+            sources.append(rxn.library if kind == 'library' else '')
+            templates.append('')
+            estimators.append('')
+
+        kinetics = rxn.kinetics
+        if _isPlainArrhenius(kinetics):
+            arrhenius[i, :] = [kinetics.A.value, kinetics.n.value_si, kinetics.Ea.value, kinetics.T0.value_si,
+                               _toFloat(kinetics.Tmin), _toFloat(kinetics.Tmax)]
+            AUnits.append(kinetics.A.units)
+            EaUnits.append(kinetics.Ea.units)
+            kineticsComments.append(kinetics.comment)
+            kineticsReprs.append('')
+        else:
+            AUnits.append('')
+            EaUnits.append('')
+            kineticsComments.append('')
+            kineticsReprs.append(repr(kinetics))
+
+    return {
+        'reaction_index': index,
+        'reaction_kind': numpy.array(kinds, str),
+        'reaction_source': numpy.array(sources, str),
+        'reaction_reactants': reactants,
+        'reaction_products': products,
+        'reaction_collider': collider,
+        'reaction_flags': flags,
+        'reaction_degeneracy': degeneracy,
+        'reaction_pairs': numpy.array(pairs, str),
+        'reaction_template': numpy.array(templates, str),
+        'reaction_estimator': numpy.array(estimators, str),
+        'reaction_arrhenius': arrhenius,
+        'reaction_AUnits': numpy.array(AUnits, str),
+        'reaction_EaUnits': numpy.array(EaUnits, str),
+        'reaction_kineticsComment': numpy.array(kineticsComments, str),
+        'reaction_kineticsRepr': numpy.array(kineticsReprs, str),
+    }
+
+
+def loadReactionArrays(arrays, speciesList):
+    """
+    Return the list of reactions stored in the dictionary of numpy `arrays`
+    created by :func:`getReactionArrays`, where `speciesList` contains the
+    species in order of their checkpoint indices.
+    """
+    from rmgpy.rmg.pdep import PDepReaction
+    context = _getEvalContext()
+    reactionList = []
+    for i in xrange(len(arrays['reaction_index'])):
+        kineticsRepr = str(arrays['reaction_kineticsRepr'][i])
+        if kineticsRepr:
+            kinetics = eval(kineticsRepr, context)
+        else:
+            A, n, Ea, T0, Tmin, Tmax = arrays['reaction_arrhenius'][i]
+            kinetics = Arrhenius(
+                A=(A, str(arrays['reaction_AUnits'][i])),
+                n=n,
+                Ea=(Ea, str(arrays['reaction_EaUnits'][i])),
+                T0=(T0, 'K'),
+                Tmin=_toQuantity(Tmin, 'K'),
+                Tmax=_toQuantity(Tmax, 'K'),
+                comment=str(arrays['reaction_kineticsComment'][i]),
+            )
+
+        reversible, duplicate, isForward, allowPdepRoute, elementaryHighP, allowMaxRateViolation = arrays['reaction_flags'][i]
+        collider = int(arrays['reaction_collider'][i])
+        pairs = str(arrays['reaction_pairs'][i])
+        kwargs = dict(
+            index=int(arrays['reaction_index'][i]),
+            reactants=[speciesList[j] for j in arrays['reaction_reactants'][i] if j != -1],
+            products=[speciesList[j] for j in arrays['reaction_products'][i] if j != -1],
+            specificCollider=speciesList[collider] if collider != -1 else None,
+            kinetics=kinetics,
+            reversible=bool(reversible),
+            duplicate=bool(duplicate),
+            degeneracy=float(arrays['reaction_degeneracy'][i]),
+            pairs=[[speciesList[int(j)] for j in pair.split(',')] for pair in pairs.split(';')] if pairs else None,
+        )
+
+        kind = str(arrays['reaction_kind'][i])
+        if kind == 'template':
+            template = str(arrays['reaction_template'][i])
+            rxn = TemplateReaction(family=str(arrays['reaction_source'][i]),
+                                   template=template.split(';') if template else None,
+                                   estimator=str(arrays['reaction_estimator'][i]) or None,
+                                   **kwargs)
+        elif kind == 'library':
+            rxn = LibraryReaction(library=str(arrays['reaction_source'][i]), **kwargs)
+        elif kind == 'pdep':
+            rxn = PDepReaction(**kwargs)
+        else:
+            rxn = Reaction(**kwargs)
+        rxn.is_forward = bool(isForward)
+        rxn.allow_pdep_route = bool(allowPdepRoute)
+        rxn.elementary_high_p = bool(elementaryHighP)
+        rxn.allow_max_rate_violation = bool(allowMaxRateViolation)
+        reactionList.append(rxn)
+    return reactionList
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG - Reaction Mechanism Generator                                          #
+#                                                                             #
+# Copyright (c) 2002-2019 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+"""
+This script contains unit tests of the :mod:`rmgpy.restart` module.
+"""
+
+import unittest
+import os
+import os.path
+import shutil
+
+import numpy
+
+from rmgpy.data.kinetics.family import TemplateReaction
+from rmgpy.data.kinetics.library import LibraryReaction
+from rmgpy.kinetics import Arrhenius, ThirdBody
+from rmgpy.rmg.main import RMG, CoreEdgeReactionModel
+from rmgpy.species import Species
+from rmgpy.thermo import NASA, NASAPolynomial
+
+from rmgpy.restart import *
+
+################################################################################
+
+class TestCheckpointWriter(unittest.TestCase):
+    """
+    Contains unit tests of the CheckpointWriter.
+    """
+
+    def setUp(self):
+        """
+        Set up an RMG object with a small model.
+        """
+        folder = os.path.join(os.getcwd(), 'rmgpy/output')
+        if not os.path.isdir(folder):
+            os.mkdir(folder)
+
+        self.rmg = RMG(outputDirectory=folder)
+        self.rmg.reactionModel = CoreEdgeReactionModel()
+
+        thermo = NASA(
+            polynomials=[
+                NASAPolynomial(coeffs=[4.0, -0.001, 2e-5, -2e-8, 7e-12, -10000, 3.0], Tmin=(200, 'K'), Tmax=(1000, 'K')),
+                NASAPolynomial(coeffs=[3.0, 0.005, -2e-6, 4e-10, -3e-14, -11000, 5.0], Tmin=(1000, 'K'), Tmax=(6000, 'K')),
+            ],
+            Tmin=(200, 'K'), Tmax=(6000, 'K'), comment='test thermo',
+        )
+        self.species = []
+        for index, smiles in enumerate(['CC', '[CH3]', '[H][H]']):
+            spec = Species(index=index+1, label=smiles).fromSMILES(smiles)
+            spec.thermo = thermo
+            spec.generate_resonance_structures()
+            self.species.append(spec)
+        ethane, methyl, hydrogen = self.species
+
+        self.reactions = [
+            TemplateReaction(
+                index=1, reactants=[ethane], products=[methyl, methyl], family='R_Recombination',
+                template=['Y_rad', 'Y_rad'], degeneracy=2,
+                kinetics=Arrhenius(A=(1e13, 's^-1'), n=0.5, Ea=(80, 'kcal/mol'), T0=(1, 'K'), comment='estimated'),
+            ),
+            LibraryReaction(
+                index=2, reactants=[methyl, methyl], products=[ethane], library='test library', duplicate=True,
+                kinetics=ThirdBody(arrheniusLow=Arrhenius(A=(1e12, 'cm^6/(mol^2*s)'), n=0, Ea=(0, 'kJ/mol'), T0=(1, 'K')),
+                                   efficiencies={'[H][H]': 2.0}),
+            ),
+        ]
+
+        reactionModel = self.rmg.reactionModel
+        reactionModel.core.species = [ethane, methyl]
+        reactionModel.core.reactions = [self.reactions[0]]
+        reactionModel.edge.species = [hydrogen]
+        reactionModel.edge.reactions = [self.reactions[1]]
+        reactionModel.speciesCounter = 3
+        reactionModel.reactionCounter = 2
+        self.rmg.unimolecularReact = numpy.array([True, False])
+        self.rmg.bimolecularReact = set([(0, 0), (0, 1)])
+
+    def test_save_and_load(self):
+        """
+        Test that a model can be saved to a checkpoint and loaded again.
+        """
+        path = os.path.join(self.rmg.outputDirectory, 'checkpoint')
+        writer = CheckpointWriter(path)
+        writer.update(self.rmg)
+        self.assertEqual(writer.numBlocks, 1)
+
+        # Saving again without new objects only updates the state
+        self.rmg.bimolecularReact.discard((0, 1))
+        writer.update(self.rmg)
+        self.assertEqual(writer.numBlocks, 1)
+
+        rmg = RMG(outputDirectory=self.rmg.outputDirectory)
+        rmg.reactionModel = CoreEdgeReactionModel()
+        loader = CheckpointWriter(path)
+        loader.load(rmg)
+        reactionModel = rmg.reactionModel
+
+        self.assertEqual([spec.label for spec in reactionModel.core.species], ['CC', '[CH3]'])
+        self.assertEqual([spec.label for spec in reactionModel.edge.species], ['[H][H]'])
+        self.assertEqual(reactionModel.speciesCounter, 3)
+        self.assertEqual(reactionModel.reactionCounter, 2)
+        self.assertTrue(numpy.array_equal(rmg.unimolecularReact, self.rmg.unimolecularReact))
+        self.assertEqual(rmg.bimolecularReact, set([(0, 0)]))
+        self.assertIsNone(rmg.trimolecularReact)
+
+        for spec0, spec in zip(self.species, reactionModel.core.species + reactionModel.edge.species):
+            self.assertEqual(spec.index, spec0.index)
+            self.assertTrue(spec.isIsomorphic(spec0))
+            self.assertEqual(len(spec.molecule), len(spec0.molecule))
+            self.assertAlmostEqual(spec.getEnthalpy(1500), spec0.getEnthalpy(1500))
+            self.assertEqual(spec.thermo.comment, 'test thermo')
+            self.assertIs(reactionModel.indexSpeciesDict[spec.index], spec)
+
+        rxn = reactionModel.core.reactions[0]
+        self.assertIsInstance(rxn, TemplateReaction)
+        self.assertEqual(rxn.family, 'R_Recombination')
+        self.assertEqual(rxn.template, ['Y_rad', 'Y_rad'])
+        self.assertEqual(rxn.degeneracy, 2)
+        self.assertIs(rxn.reactants[0], reactionModel.core.species[0])
+        self.assertIs(rxn.products[0], rxn.products[1])
+        self.assertAlmostEqual(rxn.kinetics.getRateCoefficient(1000), self.reactions[0].kinetics.getRateCoefficient(1000))
+        self.assertEqual(rxn.kinetics.comment, 'estimated')
+
+        rxn = reactionModel.edge.reactions[0]
+        self.assertIsInstance(rxn, LibraryReaction)
+        self.assertEqual(rxn.library, 'test library')
+        self.assertTrue(rxn.duplicate)
+        self.assertIsInstance(rxn.kinetics, ThirdBody)
+        self.assertEqual(len(rxn.kinetics.efficiencies), 1)
+
+        # Saving with the loaded writer appends a new block
+        spec = Species(index=4, label='C').fromSMILES('C')
+        spec.thermo = self.species[0].thermo
+        reactionModel.edge.species.append(spec)
+        loader.update(rmg)
+        self.assertEqual(loader.numBlocks, 2)
+        self.assertEqual(loader.speciesIDs[spec], 3)
+
+    def test_save_updated_kinetics(self):
+        """
+        Test that kinetics changed after a reaction was first saved are saved again.
+        """
+        path = os.path.join(self.rmg.outputDirectory, 'checkpoint')
+        writer = CheckpointWriter(path)
+        writer.update(self.rmg)
+
+        # Modify a core reaction in place, and replace the kinetics of an edge reaction
+        coreReaction, edgeReaction = self.reactions
+        coreReaction.kinetics.changeRate(10.0)
+        coreReaction.duplicate = True
+        edgeReaction.kinetics = Arrhenius(A=(2e12, 'cm^3/(mol*s)'), n=0, Ea=(1, 'kJ/mol'), T0=(1, 'K'))
+        edgeReaction.duplicate = False
+        writer.update(self.rmg)
+        self.assertEqual(writer.numBlocks, 2)
+
+        # Saving again without changes does not write a new block
+        writer.update(self.rmg)
+        self.assertEqual(writer.numBlocks, 2)
+
+        rmg = RMG(outputDirectory=self.rmg.outputDirectory)
+        rmg.reactionModel = CoreEdgeReactionModel()
+        CheckpointWriter(path).load(rmg)
+        reactionModel = rmg.reactionModel
+
+        rxn = reactionModel.core.reactions[0]
+        self.assertTrue(rxn.duplicate)
+        self.assertAlmostEqual(rxn.kinetics.getRateCoefficient(1000) / coreReaction.kinetics.getRateCoefficient(1000), 1.0)
+        rxn = reactionModel.edge.reactions[0]
+        self.assertIsInstance(rxn, LibraryReaction)
+        self.assertFalse(rxn.duplicate)
+        self.assertIsInstance(rxn.kinetics, Arrhenius)
+        self.assertAlmostEqual(rxn.kinetics.getRateCoefficient(1000) / edgeReaction.kinetics.getRateCoefficient(1000), 1.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.rmg.outputDirectory)
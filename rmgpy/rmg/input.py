@@ -305,8 +305,8 @@ def liquidReactor(temperature,
     system = LiquidReactor(T, initialConcentrations, nSims, termination, sensitiveSpecies, sensitivityThreshold, sensConditions, constantSpecies)
     rmg.reactionSystems.append(system)
     
-def simulator(atol, rtol, sens_atol=1e-6, sens_rtol=1e-4):
-    rmg.simulatorSettingsList.append(SimulatorSettings(atol, rtol, sens_atol, sens_rtol))
+def simulator(atol, rtol, sens_atol=1e-6, sens_rtol=1e-4, sens_sparse=False):
+    rmg.simulatorSettingsList.append(SimulatorSettings(atol, rtol, sens_atol, sens_rtol, sens_sparse))
     
 def solvation(solvent):
     # If solvation module in input file, set the RMG solvent variable
@@ -478,12 +478,17 @@ def pressureDependence(
 
 def options(name='Seed', generateSeedEachIteration=False, saveSeedToDatabase=False, units='si', saveRestartPeriod=None, 
             generateOutputHTML=False, generatePlots=False, saveSimulationProfiles=False, verboseComments=False, 
-            saveEdgeSpecies=False, keepIrreversible=False, trimolecularProductReversible=True, wallTime='00:00:00:00'):
+            saveEdgeSpecies=False, keepIrreversible=False, trimolecularProductReversible=True, wallTime='00:00:00:00',
+            saveCheckpoint=False, thermoCache=None, databaseCache=None, parallelSimulations=False):
     rmg.name = name
     rmg.generateSeedEachIteration=generateSeedEachIteration
     rmg.saveSeedToDatabase=saveSeedToDatabase
     rmg.units = units
     rmg.saveRestartPeriod = Quantity(saveRestartPeriod) if saveRestartPeriod else None
+    rmg.saveCheckpoint = saveCheckpoint
+    rmg.thermoCache = thermoCache
+    rmg.databaseCache = databaseCache
+    rmg.parallelSimulations = parallelSimulations
     if generateOutputHTML:
         logging.warning('Generate Output HTML option was turned on. Note that this will slow down model generation.')
     rmg.generateOutputHTML = generateOutputHTML 
@@ -826,6 +831,13 @@ def saveInputFile(path, rmg):
         f.write('    saveRestartPeriod = ({0},"{1}"),\n'.format(rmg.saveRestartPeriod.getValue(), rmg.saveRestartPeriod.units))
     else:
         f.write('    saveRestartPeriod = None,\n')
+    f.write('    saveCheckpoint = {0},\n'.format(rmg.saveCheckpoint))
+    if rmg.thermoCache:
+        f.write('    thermoCache = {0!r},\n'.format(rmg.thermoCache))
+    if rmg.databaseCache:
+        f.write('    databaseCache = {0!r},\n'.format(rmg.databaseCache))
+    if rmg.parallelSimulations:
+        f.write('    parallelSimulations = {0},\n'.format(rmg.parallelSimulations))
     f.write('    generateOutputHTML = {0},\n'.format(rmg.generateOutputHTML))
     f.write('    generatePlots = {0},\n'.format(rmg.generatePlots))
     f.write('    saveSimulationProfiles = {0},\n'.format(rmg.saveSimulationProfiles))
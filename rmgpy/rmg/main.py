@@ -37,6 +37,7 @@ import sys
 import warnings
 import time
 import logging
+import multiprocessing
 import os
 import shutil
 
@@ -52,7 +53,7 @@ from rmgpy.constraints import failsSpeciesConstraints
 from rmgpy.molecule import Molecule
 from rmgpy.solver.base import TerminationTime, TerminationConversion
 from rmgpy.solver.simple import SimpleReactor
-from rmgpy.data.rmg import RMGDatabase
+from rmgpy.data.rmg import RMGDatabase, getDatabaseCacheKey, loadDatabaseCache, saveDatabaseCache
 from rmgpy.exceptions import ForbiddenStructureException, DatabaseError, CoreError
 from rmgpy.data.kinetics.library import KineticsLibrary, LibraryReaction
 from rmgpy.data.kinetics.family import KineticsFamily, TemplateReaction
@@ -67,20 +68,77 @@ from rmgpy.kinetics.diffusionLimited import diffusionLimiter
 from model import Species, CoreEdgeReactionModel
 from rmgpy.reaction import Reaction
 from pdep import PDepNetwork
+from rmgpy.rmg.react import setProcessCount, shutdownPool, getPairs, getTriples
 import rmgpy.util as util
 
 from rmgpy.chemkin import ChemkinWriter
 from rmgpy.rmg.output import OutputHTMLWriter
 from rmgpy.rmg.listener import SimulationProfileWriter, SimulationProfilePlotter
-from rmgpy.restart import RestartWriter
+from rmgpy.restart import RestartWriter, CheckpointWriter
 from rmgpy.qm.main import QMDatabaseWriter
 from rmgpy.stats import ExecutionStatsWriter
-from rmgpy.thermo.thermoengine import submit
+import rmgpy.timing as timing
+from rmgpy.timing import timed
+from rmgpy.thermo.thermoengine import submit, setThermoCache, ThermoCache, getDatabaseHash
+import rmgpy.thermo.thermoengine as thermoengine
+from rmgpy.pdep.network import setMicrocanonicalCache, MicrocanonicalCache, canForkWorkers
+import rmgpy.pdep.network as pdepnetwork
 from rmgpy.tools.simulate import plot_sensitivity
 ################################################################################
 
 solvent = None
 
+# The RMG job and the arguments used by forked workers to simulate its reaction systems
+_rmg = None
+_simulationArgs = None
+
+# The attributes of a reaction system that are set by a simulation and used afterwards
+_simulationState = ['T', 'P', 'maxEdgeSpeciesRateRatios', 'maxNetworkLeakRateRatios',
+                    'unimolecularThreshold', 'bimolecularThreshold', 'trimolecularThreshold']
+
+class _LogRecorder(logging.Handler):
+    """
+    A logging handler that keeps the level and text of each message, including
+    the traceback of any exception logged with it, so that messages logged by
+    a forked worker can be logged again by its parent.
+    """
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.levelno, self.format(record)))
+
+def _simulateReactionSystem(index):
+    """
+    Simulate the reaction system at `index` of the RMG job inherited from the
+    parent process. Returns the results of :meth:`RMG.simulateReactionSystem`
+    with the model objects replaced by their positions in the model (see
+    :meth:`RMG.getModelObjectPositions`), the attributes of the reaction system
+    set by the simulation, the messages logged during the simulation, and the
+    phase statistics and isomorphism counts recorded, as returned by
+    :func:`rmgpy.timing.stopWorkerRecording`. Exceptions are returned as given
+    by :func:`rmgpy.util.getWorkerException`.
+    """
+    start = timing.startWorkerRecording()
+    recorder = _LogRecorder()
+    logging.getLogger().handlers = [recorder]
+    modelSettings, simulatorSettings, prune = _simulationArgs
+    try:
+        terminated, resurrected, obj, surfaceSpecies, surfaceReactions, t, x = _rmg.simulateReactionSystem(
+            index, modelSettings, simulatorSettings, prune)
+        positions = _rmg.getModelObjectPositions()
+        reactionSystem = _rmg.reactionSystems[index]
+        state = dict((attr, getattr(reactionSystem, attr, None)) for attr in _simulationState)
+        result = (terminated, resurrected, [positions[id(o)] for o in obj],
+                  [positions[id(o)] for o in surfaceSpecies], [positions[id(o)] for o in surfaceReactions],
+                  t, x, state)
+        return result, None, recorder.records, timing.stopWorkerRecording(start)
+    except Exception, e:
+        logging.exception('Error while simulating reaction system {0:d}:'.format(index + 1))
+        return None, util.getWorkerException(e), recorder.records, timing.stopWorkerRecording(start)
+
 class RMG(util.Subject):
     """
     A representation of a Reaction Mechanism Generator (RMG) job. The 
@@ -109,11 +167,11 @@ class RMG(util.Subject):
     `simulatorSettingsList`             List of SimulatorSettings objects containing information on how to run simulations
     `trimolecular`                      ``True`` to consider reactions between three species (i.e., if trimolecular reaction families are present)
     `unimolecularThreshold`             Array of flags indicating whether a species is above the unimolecular reaction threshold
-    `bimolecularThreshold`              Array of flags indicating whether two species are above the bimolecular reaction threshold
-    `trimolecularThreshold`             Array of flags indicating whether three species are above the trimolecular reaction threshold
+    `bimolecularThreshold`              Set of the sorted index pairs of species that are above the bimolecular reaction threshold
+    `trimolecularThreshold`             Set of the sorted index triples of species that are above the trimolecular reaction threshold
     `unimolecularReact`                 Array of flags indicating whether a species should react unimolecularly in the enlarge step
-    `bimolecularReact`                  Array of flags indicating whether two species should react in the enlarge step
-    `trimolecularReact`                 Array of flags indicating whether three species should react in the enlarge step
+    `bimolecularReact`                  Set of the sorted index pairs of species that should react in the enlarge step
+    `trimolecularReact`                 Set of the sorted index triples of species that should react in the enlarge step
     `termination`                       A list of termination targets (i.e :class:`TerminationTime` and :class:`TerminationConversion` objects)
     `speciesConstraints`                Dictates the maximum number of atoms, carbons, electrons, etc. generated by RMG
     ----------------------------------- ------------------------------------------------
@@ -121,6 +179,9 @@ class RMG(util.Subject):
     `verbosity`                         The level of logging verbosity for console output
     `loadRestart`                       ``True`` if restarting a previous job, ``False`` otherwise
     `saveRestartPeriod`                 The time period to periodically save a restart file (:class:`Quantity`), or ``None`` for never.
+    `saveCheckpoint`                    ``True`` to save a checkpoint of the model after every iteration, ``False`` otherwise
+    `thermoCache`                       The path of a file in which estimated thermo is cached between jobs, or ``None``
+    `databaseCache`                     The path of a directory in which the prepared database is cached between jobs, or ``None``
     `units`                             The unit system to use to save output files (currently must be 'si')
     `generateOutputHTML`                ``True`` to draw pictures of the species and reactions, saving a visualized model in an output HTML file.  ``False`` otherwise
     `generatePlots`                     ``True`` to generate plots of the job execution statistics after each iteration, ``False`` otherwise
@@ -134,6 +195,8 @@ class RMG(util.Subject):
     `ml_settings`                       Settings for ML estimation
     `wallTime`                          The maximum amount of CPU time in the form DD:HH:MM:SS to expend on this job; used to stop gracefully so we can still get profiling information
     `kineticsdatastore`                 ``True`` if storing details of each kinetic database entry in text file, ``False`` otherwise
+    `maxProcesses`                      The number of worker processes used to generate reactions and k(T,P) values
+    `parallelSimulations`               ``True`` to simulate the reaction systems at the same time with up to `maxProcesses` processes, ``False`` otherwise
     ----------------------------------- ------------------------------------------------
     `initializationTime`                The time at which the job was initiated, in seconds since the epoch (i.e. from time.time())
     `done`                              Whether the job has completed (there is nothing new to add)
@@ -192,6 +255,11 @@ class RMG(util.Subject):
         self.verbosity = logging.INFO
         self.loadRestart = None
         self.saveRestartPeriod = None
+        self.saveCheckpoint = None
+        self.thermoCache = None
+        self.databaseCache = None
+        self.parallelSimulations = False
+        self.checkpointWriter = None
         self.units = 'si'
         self.generateOutputHTML = None
         self.generatePlots = None
@@ -208,6 +276,7 @@ class RMG(util.Subject):
         self.wallTime = '00:00:00:00'
         self.initializationTime = 0
         self.kineticsdatastore = None
+        self.maxProcesses = 1
         
         self.name = 'Seed'
         self.generateSeedEachIteration = True
@@ -323,11 +392,17 @@ class RMG(util.Subject):
         if path is None: path = self.outputFile
         saveInputFile(path, self)
         
+    @timed('loadDatabase')
     def loadDatabase(self):
-        
-        self.database = RMGDatabase()
-        self.database.load(
-            path = self.databaseDirectory,
+
+        # Elements are conserved, so families that cannot react with the elements of the reactive input
+        # species (or of the species in the reaction libraries) will never be used and are not loaded
+        elements = set()
+        for spec in self.initialSpecies:
+            if spec.reactive:
+                elements.update(atom.element.symbol for atom in spec.molecule[0].atoms)
+
+        loadOptions = dict(
             thermoLibraries = self.thermoLibraries,
             transportLibraries = self.transportLibraries,
             reactionLibraries = [library for library, option in self.reactionLibraries],
@@ -336,16 +411,37 @@ class RMG(util.Subject):
             kineticsDepositories = self.kineticsDepositories,
             #frequenciesLibraries = self.statmechLibraries,
             depository = False, # Don't bother loading the depository information, as we don't use it
+            elements = sorted(elements) if elements else None,
         )
 
-        # Turn off reversibility for families with three products if desired
-        if not self.trimolecularProductReversible:
-            for family in self.database.kinetics.families.itervalues():
-                if len(family.forwardTemplate.products) > 2:
-                    family.reversible = False
-                    family.reverseTemplate = None
-                    family.reverseRecipe = None
-                    family.reverse = None
+        # Reuse the database prepared by a previous job with the same database files and options if possible
+        # The sources of the kinetics entries can only be written while preparing the database
+        self.database = None
+        cacheKey = None
+        if self.databaseCache:
+            cacheKey = getDatabaseCacheKey(self.databaseDirectory,
+                                           kineticsEstimator=self.kineticsEstimator,
+                                           trimolecularProductReversible=self.trimolecularProductReversible,
+                                           verboseComments=self.verboseComments,
+                                           **loadOptions)
+            if not self.kineticsdatastore:
+                self.database = loadDatabaseCache(self.databaseCache, cacheKey)
+            if self.database is not None:
+                logging.info('Loaded prepared database from cache directory {0}'.format(self.databaseCache))
+
+        prepareDatabase = self.database is None
+        if prepareDatabase:
+            self.database = RMGDatabase()
+            self.database.load(path=self.databaseDirectory, processes=self.maxProcesses, **loadOptions)
+
+            # Turn off reversibility for families with three products if desired
+            if not self.trimolecularProductReversible:
+                for family in self.database.kinetics.families.itervalues():
+                    if len(family.forwardTemplate.products) > 2:
+                        family.reversible = False
+                        family.reverseTemplate = None
+                        family.reverseRecipe = None
+                        family.reverse = None
 
         # Determine if trimolecular families are present
         for family in self.database.kinetics.families.itervalues():
@@ -369,7 +465,7 @@ class RMG(util.Subject):
             global solvent
             solvent=self.solvent
         
-        if self.kineticsEstimator == 'rate rules':
+        if self.kineticsEstimator == 'rate rules' and prepareDatabase:
             if '!training' not in self.kineticsDepositories:
                 logging.info('Adding rate rules from training set in kinetics families...')
                 # Temporarily remove species constraints for the training reactions
@@ -396,6 +492,13 @@ class RMG(util.Subject):
             logging.info('Filling in rate rules in kinetics families by averaging...')
             for family in self.database.kinetics.families.values():
                 family.fillKineticsRulesByAveragingUp(verbose=self.verboseComments)
+
+        if prepareDatabase and self.databaseCache:
+            logging.info('Saving prepared database to cache directory {0}'.format(self.databaseCache))
+            saveDatabaseCache(self.databaseCache, cacheKey, self.database)
+
+        # Memoize group lookups now that the trees will not change anymore
+        self.database.enableDescendCaches()
     
     def initialize(self, **kwargs):
         """
@@ -417,9 +520,15 @@ class RMG(util.Subject):
         except KeyError:
             restart = False
 
+        checkpointPath = os.path.join(self.outputDirectory, 'checkpoint')
         if restart:
-            if not os.path.exists(os.path.join(self.outputDirectory,'restart.pkl')):
-                logging.error("Could not find restart file (restart.pkl). Please run without --restart option.")
+            if os.path.exists(os.path.join(checkpointPath, 'state.npz')):
+                restartPath = checkpointPath
+            elif os.path.exists(os.path.join(self.outputDirectory, 'restart.pkl')):
+                restartPath = os.path.join(self.outputDirectory, 'restart.pkl')
+            else:
+                logging.error("Could not find checkpoint (checkpoint/state.npz) or restart file (restart.pkl). "
+                              "Please run without --restart option.")
                 raise Exception("No restart file")
             
         # Read input file
@@ -450,9 +559,34 @@ class RMG(util.Subject):
         except KeyError:
             self.kineticsdatastore = False
 
+        # Number of processes used to generate reactions
+        try:
+            self.maxProcesses = kwargs['maxproc']
+        except KeyError:
+            self.maxProcesses = 1
+        setProcessCount(self.maxProcesses)
+        if self.pressureDependence:
+            self.pressureDependence.processes = self.maxProcesses
+
         # Load databases
         self.loadDatabase()
 
+        # Cache estimated thermo in memory, and on disk if requested
+        if self.thermoCache and (self.quantumMechanics or self.ml_estimator):
+            logging.warning('The thermo cache file is not used with quantum mechanics or machine learning thermo '
+                            'estimates.')
+            setThermoCache(ThermoCache())
+        elif self.thermoCache:
+            logging.info('Using thermo cache file {0}'.format(self.thermoCache))
+            setThermoCache(ThermoCache(self.thermoCache, getDatabaseHash(self.database.thermo,
+                self.database.solvation if self.solvent else None)))
+        else:
+            setThermoCache(ThermoCache())
+
+        # Reuse densities of states and k(E) between updates of pressure-dependent networks
+        if self.pressureDependence:
+            setMicrocanonicalCache(MicrocanonicalCache())
+
         # Set trimolecular reactant flags of reaction systems
         if self.trimolecular:
             for reactionSystem in self.reactionSystems:
@@ -480,7 +614,7 @@ class RMG(util.Subject):
 
         # Initialize reaction model
         if restart:
-            self.initializeRestartRun(os.path.join(self.outputDirectory,'restart.pkl'))
+            self.initializeRestartRun(restartPath)
         else:
     
             # Seed mechanisms: add species and reactions from seed mechanism
@@ -580,6 +714,11 @@ class RMG(util.Subject):
                           " removed in version 2.3.", DeprecationWarning)
             self.attach(RestartWriter()) 
 
+        if self.saveCheckpoint:
+            if self.checkpointWriter is None:
+                self.checkpointWriter = CheckpointWriter(os.path.join(self.outputDirectory, 'checkpoint'))
+            self.attach(self.checkpointWriter)
+
         if self.quantumMechanics:
             self.attach(QMDatabaseWriter()) 
 
@@ -599,7 +738,9 @@ class RMG(util.Subject):
         Execute an RMG job using the command-line arguments `args` as returned
         by the :mod:`argparse` package.
         """
-    
+        # Time the phases of this job only
+        timing.statistics.reset()
+
         self.initialize(**kwargs)
 
         # register listeners
@@ -708,52 +849,59 @@ class RMG(util.Subject):
                 prunableSpecies = self.reactionModel.edge.species[:]
                 prunableNetworks = self.reactionModel.networkList[:]
                 
-                for index, reactionSystem in enumerate(self.reactionSystems):
-                    
-                    reactionSystem.prunableSpecies = prunableSpecies   #these lines reset pruning for a new cycle
-                    reactionSystem.prunableNetworks = prunableNetworks
-                    reactionSystem.reset_max_edge_species_rate_ratios() 
-                    
-                    for p in xrange(reactionSystem.nSims):
+                # Each batch holds the indices of the reaction systems to simulate with the current model
+                # Batches of several reaction systems are simulated in parallel, and the model is then
+                # enlarged with the results of each in turn
+                if self.parallelSimulations:
+                    batches = [[index for index, reactionSystem in enumerate(self.reactionSystems) if reactionSystem.nSims > p]
+                               for p in xrange(max(reactionSystem.nSims for reactionSystem in self.reactionSystems))]
+                else:
+                    batches = [[index] for index, reactionSystem in enumerate(self.reactionSystems)
+                               for p in xrange(reactionSystem.nSims)]
+                started = set()
+
+                for batch in batches:
+
+                    for index in batch:
+                        if index not in started:
+                            reactionSystem = self.reactionSystems[index]
+                            reactionSystem.prunableSpecies = prunableSpecies   #these lines reset pruning for a new cycle
+                            reactionSystem.prunableNetworks = prunableNetworks
+                            reactionSystem.reset_max_edge_species_rate_ratios()
+                            started.add(index)
+
+                    prune = True
+
+                    self.reactionModel.adjustSurface()
+
+                    if numCoreSpecies < modelSettings.minCoreSizeForPrune:
+                        # Turn pruning off if we haven't reached minimum core size.
+                        prune = False
+
+                    try:
+                        results = self.simulateReactionSystems(batch, modelSettings, simulatorSettings, prune)
+                    except:
+                        logging.error("Model core reactions:")
+                        if len(self.reactionModel.core.reactions) > 5:
+                            logging.error("Too many to print in detail")
+                        else:
+                            from arkane.output import prettify
+                            logging.error(prettify(repr(self.reactionModel.core.reactions)))
+                        if self.generateSeedEachIteration:
+                            self.makeSeedMech()
+                        else:
+                            self.makeSeedMech(firstTime=True)
+                        raise
+
+                    # The networks enlarged with the results of the previous reaction systems of the batch
+                    enlargedNetworks = set() if len(batch) > 1 else None
+
+                    for index, (terminated, resurrected, obj, newSurfaceSpecies, newSurfaceReactions, t, x) in zip(batch, results):
+                        reactionSystem = self.reactionSystems[index]
                         reactorDone = True
                         objectsToEnlarge = []
                         self.reactionSystem = reactionSystem
-                        # Conduct simulation
-                        logging.info('Conducting simulation of reaction system %s...' % (index+1))
-                        prune = True
-                        
-                        self.reactionModel.adjustSurface()
-                        
-                        if numCoreSpecies < modelSettings.minCoreSizeForPrune:
-                            # Turn pruning off if we haven't reached minimum core size.
-                            prune = False
-                            
-                        try: terminated,resurrected,obj,newSurfaceSpecies,newSurfaceReactions,t,x = reactionSystem.simulate(
-                            coreSpecies = self.reactionModel.core.species,
-                            coreReactions = self.reactionModel.core.reactions,
-                            edgeSpecies = self.reactionModel.edge.species,
-                            edgeReactions = self.reactionModel.edge.reactions,
-                            surfaceSpecies = self.reactionModel.surface.species,
-                            surfaceReactions = self.reactionModel.surface.reactions,
-                            pdepNetworks = self.reactionModel.networkList,
-                            prune = prune,
-                            modelSettings=modelSettings,
-                            simulatorSettings = simulatorSettings,
-                            conditions = self.rmg_memories[index].get_cond()
-                        )
-                        except:
-                            logging.error("Model core reactions:")
-                            if len(self.reactionModel.core.reactions) > 5:
-                                logging.error("Too many to print in detail")
-                            else:
-                                from arkane.output import prettify
-                                logging.error(prettify(repr(self.reactionModel.core.reactions)))
-                            if self.generateSeedEachIteration:
-                                self.makeSeedMech()
-                            else:
-                                self.makeSeedMech(firstTime=True)
-                            raise
-                        
+
                         self.rmg_memories[index].add_t_conv_N(t,x,len(obj))
                         self.rmg_memories[index].generate_cond()
                         log_conditions(self.rmg_memories,index)
@@ -769,15 +917,13 @@ class RMG(util.Subject):
                         # If simulation is invalid, note which species should be added to
                         # the core
                         if obj != [] and not (obj is None):
-                            objectsToEnlarge = self.processToSpeciesNetworks(obj)
+                            objectsToEnlarge = self.getObjectsToEnlarge(obj, enlargedNetworks)
     
                             reactorDone = False
                         # Enlarge objects identified by the simulation for enlarging
                         # These should be Species or Network objects
                         logging.info('')
-    
-                        objectsToEnlarge = list(set(objectsToEnlarge))
-    
+
                         # Add objects to enlarge to the core first
                         for objectToEnlarge in objectsToEnlarge:
                             self.reactionModel.enlarge(objectToEnlarge)
@@ -850,14 +996,14 @@ class RMG(util.Subject):
 
                         self.saveEverything()
 
-                        if maxNumSpcsHit:  # breaks the nSims loop
+                        if maxNumSpcsHit:  # breaks the loop over the batch
                             # self.done is still True, which will break the while loop
                             break
 
                         if not reactorDone:
                             self.done = False
-                        
-                    if maxNumSpcsHit:  # breaks the reactionSystems loop
+
+                    if maxNumSpcsHit:  # breaks the loop over the batches
                         break
 
                 if not self.done: # There is something that needs exploring/enlarging
@@ -1159,6 +1305,130 @@ class RMG(util.Subject):
         return oldLabels
     
     ################################################################################
+    def simulateReactionSystem(self, index, modelSettings, simulatorSettings, prune):
+        """
+        Simulate the reaction system at `index` with the current core, edge and
+        surface of the model, and return the results of its
+        :meth:`simulate` method.
+        """
+        logging.info('Conducting simulation of reaction system %s...' % (index+1))
+        return self.reactionSystems[index].simulate(
+            coreSpecies = self.reactionModel.core.species,
+            coreReactions = self.reactionModel.core.reactions,
+            edgeSpecies = self.reactionModel.edge.species,
+            edgeReactions = self.reactionModel.edge.reactions,
+            surfaceSpecies = self.reactionModel.surface.species,
+            surfaceReactions = self.reactionModel.surface.reactions,
+            pdepNetworks = self.reactionModel.networkList,
+            prune = prune,
+            modelSettings = modelSettings,
+            simulatorSettings = simulatorSettings,
+            conditions = self.rmg_memories[index].get_cond()
+        )
+
+    @timed('simulate')
+    def simulateReactionSystems(self, indices, modelSettings, simulatorSettings, prune):
+        """
+        Simulate the reaction systems at `indices` with the current model, and
+        return a list of the results of :meth:`simulateReactionSystem` for
+        each. If `parallelSimulations` is on, the simulations are run at the
+        same time by up to `maxProcesses` forked worker processes, which share
+        the model with this process. Their results are mapped back onto the
+        objects of the model in this process, the attributes that the
+        simulations set on the reaction systems are copied, and the messages
+        they logged are logged in the order of `indices`, so the results only
+        depend on the order of the reaction systems. The phase timings and
+        isomorphism counts recorded by the workers are added to those of this
+        process.
+        """
+        processes = min(self.maxProcesses, len(indices))
+        if not self.parallelSimulations or processes < 2 or not canForkWorkers():
+            return [self.simulateReactionSystem(index, modelSettings, simulatorSettings, prune) for index in indices]
+
+        global _rmg, _simulationArgs
+        _rmg = self
+        _simulationArgs = (modelSettings, simulatorSettings, prune)
+        pool = multiprocessing.Pool(processes=processes)
+        try:
+            output = pool.map(_simulateReactionSystem, indices, chunksize=1)
+        finally:
+            pool.terminate()
+            _rmg = None
+            _simulationArgs = None
+
+        objects = self.getModelObjectLists()
+        results = []
+        for index, (result, error, records, statistics) in zip(indices, output):
+            for level, text in records:
+                logging.log(level, text)
+            timing.mergeWorkerRecords(statistics)
+            if error is not None:
+                util.raiseWorkerException(error)
+            terminated, resurrected, obj, surfaceSpecies, surfaceReactions, t, x, state = result
+            reactionSystem = self.reactionSystems[index]
+            for attr, value in state.iteritems():
+                if value is not None:
+                    setattr(reactionSystem, attr, value)
+            results.append((terminated, resurrected,
+                            [objects[name][i] for name, i in obj],
+                            [objects[name][i] for name, i in surfaceSpecies],
+                            [objects[name][i] for name, i in surfaceReactions],
+                            t, x))
+        return results
+
+    def getModelObjectLists(self):
+        """
+        Return a dictionary of the lists of core and edge species and reactions
+        and pressure-dependent networks of the model, keyed by name.
+        """
+        return {
+            'coreSpecies': self.reactionModel.core.species,
+            'coreReactions': self.reactionModel.core.reactions,
+            'edgeSpecies': self.reactionModel.edge.species,
+            'edgeReactions': self.reactionModel.edge.reactions,
+            'networks': self.reactionModel.networkList,
+        }
+
+    def getModelObjectPositions(self):
+        """
+        Return a dictionary mapping the ``id()`` of each of the objects in the
+        lists returned by :meth:`getModelObjectLists` to the name of its list
+        and its index in that list. This identifies the objects of the model
+        between processes that share the same model.
+        """
+        positions = {}
+        for name, objects in self.getModelObjectLists().iteritems():
+            for i, obj in enumerate(objects):
+                positions.setdefault(id(obj), (name, i))
+        return positions
+
+    def getObjectsToEnlarge(self, obj, enlargedNetworks=None):
+        """
+        Return the list of species and (network, species) tuples to enlarge
+        the model with for the objects `obj` returned by the simulation of the
+        current reaction system. When the results of several reaction systems
+        simulated together are merged, `enlargedNetworks` is the set of the
+        networks enlarged with the results of the previous ones. These
+        networks are skipped, since their maximum leak isomer has already been
+        explored, as are the species that are no longer in the edge, and the
+        networks to enlarge are added to the set.
+        """
+        if enlargedNetworks is not None:
+            if isinstance(obj, PDepNetwork):
+                obj = [] if obj in enlargedNetworks else obj
+            elif isinstance(obj, list):
+                obj = [o for o in obj if not (isinstance(o, PDepNetwork) and o in enlargedNetworks)]
+            if obj == []:
+                return []
+
+        objectsToEnlarge = list(set(self.processToSpeciesNetworks(obj)))
+
+        if enlargedNetworks is not None:
+            edgeSpecies = set(self.reactionModel.edge.species)
+            objectsToEnlarge = [o for o in objectsToEnlarge if not isinstance(o, Species) or o in edgeSpecies]
+            enlargedNetworks.update([o[0] for o in objectsToEnlarge if isinstance(o, tuple)])
+        return objectsToEnlarge
+
     def processToSpeciesNetworks(self,obj):
         """
         breaks down the objects returned by simulate into Species and PDepNetwork
@@ -1240,18 +1510,18 @@ class RMG(util.Subject):
         numCoreSpecies = len(self.reactionModel.core.species)
         if self.filterReactions:
             self.unimolecularReact = np.zeros((numCoreSpecies),bool)
-            self.bimolecularReact = np.zeros((numCoreSpecies, numCoreSpecies),bool)
+            self.bimolecularReact = set()
             self.unimolecularThreshold = np.zeros((numCoreSpecies),bool)
-            self.bimolecularThreshold = np.zeros((numCoreSpecies, numCoreSpecies),bool)
+            self.bimolecularThreshold = set()
             if self.trimolecular:
-                self.trimolecularReact = np.zeros((numCoreSpecies, numCoreSpecies, numCoreSpecies), bool)
-                self.trimolecularThreshold = np.zeros((numCoreSpecies, numCoreSpecies, numCoreSpecies), bool)
+                self.trimolecularReact = set()
+                self.trimolecularThreshold = set()
         else:
             # By default, react everything
             self.unimolecularReact = np.ones((numCoreSpecies),bool)
-            self.bimolecularReact = np.ones((numCoreSpecies, numCoreSpecies),bool)
+            self.bimolecularReact = getPairs(numCoreSpecies, xrange(numCoreSpecies))
             if self.trimolecular:
-                self.trimolecularReact = np.ones((numCoreSpecies, numCoreSpecies, numCoreSpecies),bool)
+                self.trimolecularReact = getTriples(numCoreSpecies, xrange(numCoreSpecies))
             # No need to initialize reaction threshold arrays in this case
     
     def updateReactionThresholdAndReactFlags(self,
@@ -1260,82 +1530,62 @@ class RMG(util.Subject):
                                              rxnSysTrimolecularThreshold=None,
                                              skipUpdate=False):
         """
-        updates the length and boolean value of the unimolecular and bimolecular react and threshold flags
+        updates the length and boolean value of the unimolecular react and threshold flags,
+        and the sets of bimolecular and trimolecular index tuples to react
+
+        The bimolecular and trimolecular flags are sets of sorted index tuples,
+        so only the pairs and triples that were newly flagged are stored and
+        reacted.
         """
         numCoreSpecies = len(self.reactionModel.core.species)
         prevNumCoreSpecies = len(self.unimolecularReact)
         new_core_species = numCoreSpecies > prevNumCoreSpecies
 
-        # Always reset the react arrays from prior iterations
+        # Always reset the react flags from prior iterations
         self.unimolecularReact = np.zeros((numCoreSpecies), bool)
-        self.bimolecularReact = np.zeros((numCoreSpecies, numCoreSpecies), bool)
+        self.bimolecularReact = set()
         if self.trimolecular:
-            self.trimolecularReact = np.zeros((numCoreSpecies, numCoreSpecies, numCoreSpecies), bool)
+            self.trimolecularReact = set()
 
         if self.filterReactions:
             if new_core_species:
-                # Expand the threshold arrays if there were new core species added
+                # Expand the threshold array if there were new core species added
                 unimolecularThreshold = np.zeros((numCoreSpecies), bool)
-                bimolecularThreshold = np.zeros((numCoreSpecies, numCoreSpecies), bool)
 
                 # Broadcast original thresholds
                 unimolecularThreshold[:prevNumCoreSpecies] = self.unimolecularThreshold
-                bimolecularThreshold[:prevNumCoreSpecies,:prevNumCoreSpecies] = self.bimolecularThreshold
                 self.unimolecularThreshold = unimolecularThreshold
-                self.bimolecularThreshold = bimolecularThreshold
-
-                if self.trimolecular:
-                    trimolecularThreshold = np.zeros((numCoreSpecies, numCoreSpecies, numCoreSpecies), bool)
-                    trimolecularThreshold[:prevNumCoreSpecies,
-                                          :prevNumCoreSpecies,
-                                          :prevNumCoreSpecies] = self.trimolecularThreshold
-                    self.trimolecularThreshold = trimolecularThreshold
                 
             if skipUpdate:
                 return
             
-            # Always update the react and threshold arrays
-            for i in xrange(numCoreSpecies):
-                if not self.unimolecularThreshold[i] and rxnSysUnimolecularThreshold[i]:
-                    # We've shifted from not reacting to reacting
-                    self.unimolecularReact[i] = True
-                    self.unimolecularThreshold[i] = True
-
-            for i in xrange(numCoreSpecies):
-                for j in xrange(i, numCoreSpecies):
-                    if not self.bimolecularThreshold[i,j] and rxnSysBimolecularThreshold[i,j]:
-                        # We've shifted from not reacting to reacting
-                        self.bimolecularReact[i,j] = True
-                        self.bimolecularThreshold[i,j] = True
+            # Always update the react and threshold flags
+            # Only react the species that shifted from not reacting to reacting
+            self.unimolecularReact = np.logical_and(rxnSysUnimolecularThreshold[:numCoreSpecies],
+                                                    np.logical_not(self.unimolecularThreshold))
+            self.unimolecularThreshold |= self.unimolecularReact
+
+            self.bimolecularReact = rxnSysBimolecularThreshold - self.bimolecularThreshold
+            self.bimolecularThreshold |= self.bimolecularReact
 
             if self.trimolecular:
-                for i in xrange(numCoreSpecies):
-                    for j in xrange(i, numCoreSpecies):
-                        for k in xrange(j, numCoreSpecies):
-                            if not self.trimolecularThreshold[i,j,k] and rxnSysTrimolecularThreshold[i,j,k]:
-                                # We've shifted from not reacting to reacting
-                                self.trimolecularReact[i,j,k] = True
-                                self.trimolecularThreshold[i,j,k] = True
+                self.trimolecularReact = rxnSysTrimolecularThreshold - self.trimolecularThreshold
+                self.trimolecularThreshold |= self.trimolecularReact
         else:
             # We are not filtering reactions
             if new_core_species:
                 # React all the new core species unimolecularly
-                for i in xrange(prevNumCoreSpecies, numCoreSpecies):
-                    self.unimolecularReact[i] = True
+                self.unimolecularReact[prevNumCoreSpecies:] = True
                 
                 # React all the new core species with all the core species bimolecularly
-                for i in xrange(numCoreSpecies):
-                    for j in xrange(prevNumCoreSpecies,numCoreSpecies):
-                        self.bimolecularReact[i,j] = True
+                self.bimolecularReact = getPairs(numCoreSpecies, xrange(prevNumCoreSpecies, numCoreSpecies))
 
                 # React all the new core species with all bimolecular combinations trimolecularly
                 if self.trimolecular:
-                    for i in xrange(numCoreSpecies):
-                        for j in xrange(numCoreSpecies):
-                            for k in xrange(prevNumCoreSpecies, numCoreSpecies):
-                                self.trimolecularReact[i,j,k] = True
+                    self.trimolecularReact = getTriples(numCoreSpecies, xrange(prevNumCoreSpecies, numCoreSpecies))
 
         
+    @timed('save')
     def saveEverything(self):
         """
         Saves the output HTML, the Chemkin file, and the Restart file (if appropriate).
@@ -1363,21 +1613,32 @@ class RMG(util.Subject):
         """
         Complete the model generation.
         """
+        # Stop the reaction generation workers
+        shutdownPool()
+
+        if self.database is not None:
+            self.database.logDescendCacheStatistics()
+
+        # Close the thermo cache
+        if thermoengine.thermoCache is not None:
+            logging.info('Thermo cache: {0:d} hits, {1:d} misses'.format(thermoengine.thermoCache.hits,
+                                                                         thermoengine.thermoCache.misses))
+            thermoengine.thermoCache.close()
+            setThermoCache(None)
+
+        if pdepnetwork.microcanonicalCache is not None:
+            cache = pdepnetwork.microcanonicalCache
+            logging.info('Microcanonical cache: {0:d} hits, {1:d} misses for densities of states; '
+                         '{2:d} hits, {3:d} misses for k(E)'.format(cache.densityHits, cache.densityMisses,
+                                                                     cache.rateHits, cache.rateMisses))
+            setMicrocanonicalCache(None)
+
         # Log end timestamp
         logging.info('')
         logging.info('RMG execution terminated at ' + time.asctime())
     
     def getGitCommit(self, modulePath):
-        import subprocess
-        if os.path.exists(os.path.join(modulePath,'..','.git')):
-            try:
-                return subprocess.check_output(['git', 'log',
-                                                '--format=%H%n%cd', '-1'],
-                                                cwd=modulePath).splitlines()
-            except:
-                return '', ''
-        else:
-            return '', ''
+        return util.getGitCommit(modulePath)
     
     def logHeader(self, level=logging.INFO):
         """
@@ -1425,8 +1686,11 @@ class RMG(util.Subject):
 
         from rmgpy.rmg.model import getFamilyLibraryObject
 
-        # read restart file
-        self.loadRestartFile(path)
+        # read checkpoint directory or restart file
+        if os.path.isdir(path):
+            self.loadCheckpoint(path)
+        else:
+            self.loadRestartFile(path)
 
         # A few things still point to the species in the input file, so update
         # those to point to the equivalent species loaded from the restart file
@@ -1488,6 +1752,15 @@ class RMG(util.Subject):
         
         self.reactionModel.reactionDict = reactionDict
     
+    def loadCheckpoint(self, path):
+        """
+        Load a checkpoint saved by :class:`CheckpointWriter` from the directory
+        `path` on disk. If checkpoints are saved in this job, they are appended
+        to the loaded checkpoint.
+        """
+        self.checkpointWriter = CheckpointWriter(path)
+        self.checkpointWriter.load(self)
+
     def loadRestartFile(self, path):
         """
         Load a restart file at `path` on disk.
@@ -38,6 +38,10 @@ from rmgpy import settings
 from rmgpy.data.rmg import RMGDatabase
 from rmgpy import getPath
 from rmgpy.rmg.model import CoreEdgeReactionModel
+from rmgpy.rmg.pdep import PDepNetwork
+from rmgpy.solver.simple import SimpleReactor
+from rmgpy.species import Species
+from rmgpy.exceptions import NetworkError
 ###################################################
 
 originalPath = getPath()
@@ -165,6 +169,33 @@ class TestMain(unittest.TestCase):
             Rmem.generate_cond()
             Rmem.get_cond()
         
+    def testRMGParallelSimulations(self):
+        """
+        Test that reaction systems simulated by forked workers give the same results as in the main process.
+        """
+        modelSettings = self.rmg.modelSettingsList[0]
+        simulatorSettings = self.rmg.simulatorSettingsList[0]
+        positions = self.rmg.getModelObjectPositions()
+        self.assertEqual(len(positions), sum(len(objects) for objects in self.rmg.getModelObjectLists().values()))
+
+        serial = self.rmg.simulateReactionSystems([0, 0], modelSettings, simulatorSettings, False)
+        maxProcesses = self.rmg.maxProcesses
+        self.rmg.parallelSimulations = True
+        self.rmg.maxProcesses = 2
+        try:
+            parallel = self.rmg.simulateReactionSystems([0, 0], modelSettings, simulatorSettings, False)
+        finally:
+            self.rmg.parallelSimulations = False
+            self.rmg.maxProcesses = maxProcesses
+
+        self.assertEqual(len(parallel), 2)
+        for result, expected in zip(parallel, serial):
+            terminated, resurrected, obj, surfaceSpecies, surfaceReactions, t, x = result
+            self.assertEqual((terminated, resurrected), expected[:2])
+            self.assertEqual([id(o) for o in obj], [id(o) for o in expected[2]])
+            self.assertEqual([id(o) for o in surfaceSpecies], [id(o) for o in expected[3]])
+            self.assertAlmostEqual(t, expected[5])
+
     def testMakeCanteraInputFile(self):
         """
         This tests to ensure that a usable Cantera input file is created.
@@ -181,6 +212,50 @@ class TestMain(unittest.TestCase):
                     self.fail('The output Cantera file is not loadable in Cantera.')
 
 
+class TestObjectsToEnlarge(unittest.TestCase):
+    """
+    Contains unit tests of merging the objects to enlarge the model with from several simulations.
+    """
+
+    def setUp(self):
+        self.rmg = RMG()
+        self.rmg.reactionModel = CoreEdgeReactionModel()
+        self.rmg.reactionSystem = SimpleReactor(1000.0, 1.0e5, initialMoleFractions={}, nSims=1, termination=[])
+        self.methane = Species(index=1, label='C').fromSMILES('C')
+        self.isomers = [Species(index=2, label='[CH2]CC').fromSMILES('[CH2]CC'),
+                        Species(index=3, label='C[CH]C').fromSMILES('C[CH]C')]
+        self.rmg.reactionModel.edge.species = [self.methane] + self.isomers
+
+        self.network = PDepNetwork(index=1)
+        unexplored = list(self.isomers)
+        def getMaximumLeakSpecies(T, P):
+            if not unexplored:
+                raise NetworkError('No unimolecular isomers left to explore!')
+            return unexplored.pop(0)
+        self.network.getMaximumLeakSpecies = getMaximumLeakSpecies
+
+    def testSameNetworkInBatch(self):
+        """
+        Test that a network flagged by two simulations of a batch is only enlarged once.
+        """
+        enlargedNetworks = set()
+        objectsToEnlarge = self.rmg.getObjectsToEnlarge([self.network, self.methane], enlargedNetworks)
+        self.assertEqual(len(objectsToEnlarge), 2)
+        self.assertIn(self.methane, objectsToEnlarge)
+        self.assertIn((self.network, self.isomers[0]), objectsToEnlarge)
+        self.assertEqual(enlargedNetworks, set([self.network]))
+
+        # Enlarging the model moves methane to the core
+        self.rmg.reactionModel.edge.species.remove(self.methane)
+
+        self.assertEqual(self.rmg.getObjectsToEnlarge(self.network, enlargedNetworks), [])
+        self.assertEqual(self.rmg.getObjectsToEnlarge([self.network, self.methane], enlargedNetworks), [])
+
+        # The next iteration explores the next isomer of the network
+        self.assertEqual(self.rmg.getObjectsToEnlarge(self.network), [(self.network, self.isomers[1])])
+        self.assertRaises(NetworkError, self.rmg.getObjectsToEnlarge, self.network)
+
+
 class TestCanteraOutput(unittest.TestCase):
     
     def setUp(self):
@@ -45,7 +45,8 @@ import rmgpy.constants as constants
 from rmgpy.constraints import failsSpeciesConstraints
 from rmgpy.quantity import Quantity
 from rmgpy.species import Species
-from rmgpy.thermo.thermoengine import submit
+from rmgpy.timing import timed
+from rmgpy.thermo.thermoengine import submit, submitBatch
 from rmgpy.reaction import Reaction
 from rmgpy.exceptions import ForbiddenStructureException
 from rmgpy.data.kinetics.depository import DepositoryReaction
@@ -57,7 +58,7 @@ from rmgpy.kinetics import KineticsData, Arrhenius
 from rmgpy.data.rmg import getDB
         
 import rmgpy.data.rmg
-from .react import reactAll
+from .react import reactAll, getPool
 
 from pdep import PDepReaction, PDepNetwork
 
@@ -177,6 +178,9 @@ class CoreEdgeReactionModel:
     `networkList`              A list of pressure-dependent reaction networks (:class:`Network` objects)
     `networkCount`             A counter for the number of pressure-dependent networks created
     `indexSpeciesDict`         A dictionary with a unique index pointing to the species objects
+    `speciesKeyDict`           A dictionary of canonical key indices of the species in `speciesDict`, indexed by formula
+    `edgeReactionIndex`        A dictionary of the sets of edge reactions each species takes part in, indexed by species
+    `reactionDictIndex`        A dictionary of the sets of `reactionDict` keys under which reactions involving each species are stored, indexed by species
     `solventName`              String describing solvent name for liquid reactions. Empty for non-liquid estimation
     =========================  ==============================================================
 
@@ -204,7 +208,10 @@ class CoreEdgeReactionModel:
         self.networkList = []
         self.networkCount = 0
         self.speciesDict = {}
+        self.speciesKeyDict = {}
         self.reactionDict = {}
+        self.edgeReactionIndex = {}
+        self.reactionDictIndex = {}
         self.speciesCache = [None for i in range(4)]
         self.speciesCounter = 0
         self.reactionCounter = 0
@@ -233,6 +240,22 @@ class CoreEdgeReactionModel:
         self.newSurfaceRxnsLoss = set()
         self.solventName = ''
 
+    def __setstate__(self, state):
+        """
+        Restore the model from the pickled `state`, e.g. from a restart file.
+        The species and reaction indices missing from the restart files of
+        older versions are rebuilt.
+        """
+        self.__dict__.update(state)
+        if 'speciesKeyDict' not in state:
+            # The canonical key index is filled in on demand
+            self.speciesKeyDict = {}
+        if 'edgeReactionIndex' not in state:
+            self.rebuildEdgeReactionIndex()
+        if 'reactionDictIndex' not in state:
+            self.rebuildReactionDictIndex()
+
+    @timed('checkForExistingSpecies')
     def checkForExistingSpecies(self, molecule):
         """
         Check to see if an existing species contains the same
@@ -276,24 +299,25 @@ class CoreEdgeReactionModel:
             speciesList = self.speciesDict[formula]
         except KeyError:
             return False, False, None
-        for spec in speciesList:
+
+        # Only species sharing a canonical key with one of the query structures
+        # (or species that could not be keyed) need a full isomorphism check
+        keyIndex = self.getSpeciesKeyIndex(formula)
+        mols = obj.molecule if isinstance(obj, Species) else [obj]
+        for spec in getCandidateSpecies(keyIndex, mols):
             if spec.isIsomorphic(obj):
                 self.speciesCache.pop()
                 self.speciesCache.insert(0, spec)
                 return True, True, spec
 
-        # As a last resort, check using molecule.fingerprint if the object matches any existing species,
-        # and if it does, generate resonance structures w/o filtration and check for isomorphism
-        candidates = []
-        for spec in speciesList:
-            if spec.molecule[0].fingerprint == molecule.fingerprint:
-                candidates.append(spec)
-        if len(candidates) > 0:
+        # As a last resort, generate resonance structures w/o filtration and check
+        # them for isomorphism against the species sharing their canonical keys
+        if speciesList:
             mol_copy = molecule.copy(deep=True)
             if not mol_copy.reactive:
                 mol_copy.reactive = True
             structures = mol_copy.generate_resonance_structures(keep_isomorphic=False, filter_structures=False)
-            for spec in candidates:
+            for spec in getCandidateSpecies(keyIndex, structures):
                 for mol in spec.molecule:
                     for structure in structures:
                         if mol.isIsomorphic(structure):
@@ -302,6 +326,55 @@ class CoreEdgeReactionModel:
         # At this point we can conclude that the structure does not exist
         return False, False, None
 
+    def getSpeciesKeyIndex(self, formula):
+        """
+        Return the canonical key index for the species in ``speciesDict[formula]``,
+        a dictionary mapping the canonical key of each molecule to the list of
+        species containing it. Species which have not been indexed yet (e.g.
+        species added directly to `speciesDict`) are indexed first.
+        """
+        try:
+            keyIndex, indexedSpecies = self.speciesKeyDict[formula]
+        except KeyError:
+            keyIndex, indexedSpecies = self.speciesKeyDict[formula] = ({}, set())
+        speciesList = self.speciesDict.get(formula, [])
+        if len(indexedSpecies) != len(speciesList):
+            for spec in speciesList:
+                if spec not in indexedSpecies:
+                    indexedSpecies.add(spec)
+                    for mol in spec.molecule:
+                        key = getCanonicalKey(mol)
+                        if spec not in keyIndex.get(key, []):
+                            keyIndex.setdefault(key, []).append(spec)
+        return keyIndex
+
+    def addSpeciesKey(self, spec, molecule):
+        """
+        Add the canonical key of `molecule`, a new structure of the already
+        indexed species `spec`, to the canonical key index.
+        """
+        keyIndex = self.getSpeciesKeyIndex(spec.molecule[0].getFormula())
+        key = getCanonicalKey(molecule)
+        if spec not in keyIndex.get(key, []):
+            keyIndex.setdefault(key, []).append(spec)
+
+    def removeSpeciesKeys(self, spec):
+        """
+        Remove species `spec` from the canonical key index.
+        """
+        formula = spec.molecule[0].getFormula()
+        try:
+            keyIndex, indexedSpecies = self.speciesKeyDict[formula]
+        except KeyError:
+            return
+        indexedSpecies.discard(spec)
+        for key in set([getCanonicalKey(mol) for mol in spec.molecule]):
+            speciesList = keyIndex.get(key, [])
+            if spec in speciesList:
+                speciesList.remove(spec)
+                if not speciesList:
+                    del keyIndex[key]
+
     def makeNewSpecies(self, object, label='', reactive=True, checkForExisting=True):
         """
         Formally create a new species from the specified `object`, which can be
@@ -341,6 +414,7 @@ class CoreEdgeReactionModel:
             if found and not reactive_structure:
                 molecule.reactive=False
                 spec.molecule.append(molecule)
+                self.addSpeciesKey(spec, molecule)
                 return spec, False
 
         # Check that the structure is not forbidden
@@ -391,6 +465,7 @@ class CoreEdgeReactionModel:
             self.speciesDict[formula].append(spec)
         else:
             self.speciesDict[formula] = [spec]
+        self.getSpeciesKeyIndex(formula)
 
 
         # Since the species is new, add it to the list of new species
@@ -576,6 +651,7 @@ class CoreEdgeReactionModel:
 
         return forward
 
+    @timed('enlarge')
     def enlarge(self, newObject=None, reactEdge=False,
                 unimolecularReact=None, bimolecularReact=None, trimolecularReact=None):
         """
@@ -678,6 +754,9 @@ class CoreEdgeReactionModel:
             rxns = reactAll(self.core.species, numOldCoreSpecies,
                             unimolecularReact, bimolecularReact, trimolecularReact=trimolecularReact)
             spcs = [self.retrieveNewSpecies(rxn) for rxn in rxns]
+
+            # Estimate the thermo of all new species at once before they are created
+            self.estimateNewSpeciesThermo(rxns)
             
             for rxn, spc in zip(rxns, spcs):
                 rxn = self.inflate(rxn) 
@@ -873,11 +952,12 @@ class CoreEdgeReactionModel:
                     if rxn in self.core.reactions:
                         self.core.reactions.remove(rxn)
                     if rxn in self.edge.reactions:
-                        self.edge.reactions.remove(rxn)
+                        self.removeReactionFromEdge(rxn)
             
             if not numpy.isinf(self.toleranceThermoKeepSpeciesInEdge) and spcs != []: #do thermodynamic filtering
                 self.thermoFilterSpecies(spcs)
                 
+    @timed('kinetics')
     def applyKineticsToReaction(self, reaction):
         """
         retrieve the best kinetics for the reaction and apply it towards the forward 
@@ -1067,13 +1147,11 @@ class CoreEdgeReactionModel:
                 logging.info("Species {0} was Forbidden and not added to Core...Removing from Edge.".format(spec))
                 self.edge.species.remove(spec)
                 # Search edge for reactions that contain forbidden species
-                for rxn in self.edge.reactions:
-                    if spec in rxn.reactants or spec in rxn.products:                        
-                        rxnList.append(rxn)
+                rxnList = list(self.edgeReactionIndex.get(spec, []))
                 
                 #Remove any reactions that are globally forbidden from Edge
                 for rxn in rxnList:
-                    self.edge.reactions.remove(rxn)
+                    self.removeReactionFromEdge(rxn)
                     logging.info("Removing Forbidden Reaction from Edge: {0}".format(rxn))
                 return []
         
@@ -1135,12 +1213,14 @@ class CoreEdgeReactionModel:
         maximum allowed Gibbs energy
         """
         Tmax = self.Tmax
+        removeSpcs = []
         for spc in spcs:
             G = spc.thermo.getFreeEnergy(Tmax)
             if G > self.Gfmax:
                 Gn = (G-self.Gmax)/(self.Gmax-self.Gmin)
                 logging.info('Removing species {0} with Gibbs energy {1} from edge because it\'s Gibbs number {2} is greater than the toleranceThermoKeepSpeciesInEdge of {3} '.format(spc,G,Gn,self.toleranceThermoKeepSpeciesInEdge))
-                self.removeSpeciesFromEdge(self.reactionSystems,spc)
+                removeSpcs.append(spc)
+        self.removeSpeciesListFromEdge(self.reactionSystems, removeSpcs)
                 
         # Delete any networks that became empty as a result of pruning
         if self.pressureDependence:
@@ -1186,7 +1266,7 @@ class CoreEdgeReactionModel:
             
             for i,spc in enumerate(removeSpcs):
                 logging.info('Removing species {0} from edge to meet maximum number of edge species, Gibbs number is {1}'.format(spc,Gns[rInds[i]]))
-                self.removeSpeciesFromEdge(self.reactionSystems,spc)
+            self.removeSpeciesListFromEdge(self.reactionSystems, removeSpcs)
             
             # Delete any networks that became empty as a result of pruning
             if self.pressureDependence:
@@ -1216,15 +1296,18 @@ class CoreEdgeReactionModel:
                     del(self.networkDict[source])
                 self.networkList.remove(network)
                     
+    @timed('prune')
     def prune(self, reactionSystems, toleranceKeepInEdge, toleranceMoveToCore, maximumEdgeSpecies, minSpeciesExistIterationsForPrune):
         """
         Remove species from the model edge based on the simulation results from
         the list of `reactionSystems`.
         """
 
-        ineligibleSpecies = []     # A list of the species which are not eligible for pruning, for any reason
+        ineligibleSpecies = set()  # The species which are not eligible for pruning, for any reason
         prunableSpecies = reactionSystems[0].prunableSpecies
         prunableNetworks = reactionSystems[0].prunableNetworks
+        prunableSpeciesIndex = dict([(spec, index) for index, spec in enumerate(prunableSpecies)])
+        edgeSpecies = set(self.edge.species)
         
         numPrunableSpecies = len(prunableSpecies)
         iteration = self.iterationNum
@@ -1232,7 +1315,7 @@ class CoreEdgeReactionModel:
         # iterations are ineligible for pruning
         for spec in prunableSpecies:
             if iteration - spec.creationIteration <= minSpeciesExistIterationsForPrune:
-                ineligibleSpecies.append(spec)
+                ineligibleSpecies.add(spec)
 
         # Get the maximum species rates (and network leak rates)
         # across all reaction systems
@@ -1250,13 +1333,11 @@ class CoreEdgeReactionModel:
                 # This is to ensure we have an overestimate of that species flux
                 ratios = network.getLeakBranchingRatios(reactionSystem.T.value_si,reactionSystem.P.value_si)
                 for spec, frac in ratios.iteritems():
-                    if spec in prunableSpecies:
-                        index = prunableSpecies.index(spec)
+                    index = prunableSpeciesIndex.get(spec)
+                    if index is not None:
                         maxEdgeSpeciesRateRatios[index] += frac * rateRatio
                 # Mark any species that is explored in any partial network as ineligible for pruning
-                for spec in network.explored:
-                    if spec not in ineligibleSpecies:
-                        ineligibleSpecies.append(spec)
+                ineligibleSpecies.update(network.explored)
 
         # Sort the edge species rates by index
         indices = numpy.argsort(maxEdgeSpeciesRateRatios)
@@ -1265,7 +1346,7 @@ class CoreEdgeReactionModel:
         pruneDueToRateCounter = 0
         for index in indices:
             spec = prunableSpecies[index]
-            if spec in ineligibleSpecies or not spec in self.edge.species:
+            if spec in ineligibleSpecies or spec not in edgeSpecies:
                 continue
             # Remove the species with rates below the pruning tolerance from the model edge
             if maxEdgeSpeciesRateRatios[index] < toleranceKeepInEdge:
@@ -1288,13 +1369,12 @@ class CoreEdgeReactionModel:
             for index, spec in speciesToPrune[0:pruneDueToRateCounter]:
                 logging.info('Pruning species {0:<56}'.format(spec))
                 logging.debug('    {0:<56}    {1:10.4e}'.format(spec, maxEdgeSpeciesRateRatios[index]))
-                self.removeSpeciesFromEdge(reactionSystems, spec)
         if len(speciesToPrune) - pruneDueToRateCounter > 0:
             logging.info('Pruning {0:d} species to obtain an edge size of {1:d} species'.format(len(speciesToPrune) - pruneDueToRateCounter, maximumEdgeSpecies))
             for index, spec in speciesToPrune[pruneDueToRateCounter:]:
                 logging.info('Pruning species {0:<56}'.format(spec))
                 logging.debug('    {0:<56}    {1:10.4e}'.format(spec, maxEdgeSpeciesRateRatios[index]))
-                self.removeSpeciesFromEdge(reactionSystems, spec)
+        self.removeSpeciesListFromEdge(reactionSystems, [spec for index, spec in speciesToPrune])
 
         # Delete any networks that became empty as a result of pruning
         if self.pressureDependence:
@@ -1307,81 +1387,78 @@ class CoreEdgeReactionModel:
         """
         Remove species `spec` from the reaction model edge.
         """
+        self.removeSpeciesListFromEdge(reactionSystems, [spec])
 
-        # remove the species
-        self.edge.species.remove(spec)
-        self.indexSpeciesDict.pop(spec.index)
+    def removeSpeciesListFromEdge(self, reactionSystems, speciesList):
+        """
+        Remove all species in `speciesList` from the reaction model edge, along
+        with the edge reactions, pressure-dependent network reactions and
+        stored template reactions they take part in. The reactions to remove
+        are found from the species incidence indices, so the work done scales
+        with the number of reactions removed rather than the size of the edge.
+        """
+        speciesSet = set(speciesList)
+        if not speciesSet:
+            return
 
-        # clean up species references in reactionSystems
+        # remove the species
+        self.edge.species = [spec for spec in self.edge.species if spec not in speciesSet]
+        for spec in speciesSet:
+            self.indexSpeciesDict.pop(spec.index)
+
+        # identify the edge reactions they are involved in and remove those reactions
+        rxnSet = set()
+        for spec in speciesSet:
+            rxnSet.update(self.edgeReactionIndex.pop(spec, ()))
+        if rxnSet:
+            self.edge.reactions = [rxn for rxn in self.edge.reactions if rxn not in rxnSet]
+            for rxn in rxnSet:
+                self.unindexEdgeReaction(rxn)
+
+        # clean up species and reaction references in reactionSystems
         for reactionSystem in reactionSystems:
-            try:
-                reactionSystem.speciesIndex.pop(spec)
-            except KeyError:
-                pass
-
-            # identify any reactions it's involved in
-            rxnList = []
-            for rxn in reactionSystem.reactionIndex:
-                if spec in rxn.reactants or spec in rxn.products:
-                    rxnList.append(rxn)
-
-            for rxn in rxnList:
-                reactionSystem.reactionIndex.pop(rxn)
+            for spec in speciesSet:
+                reactionSystem.speciesIndex.pop(spec, None)
+            for rxn in rxnSet:
+                reactionSystem.reactionIndex.pop(rxn, None)
 
-        # identify any reactions it's involved in
-        rxnList = []
-        for rxn in self.edge.reactions:
-            if spec in rxn.reactants or spec in rxn.products:
-                rxnList.append(rxn)
-        # remove those reactions
-        for rxn in rxnList:
-            self.edge.reactions.remove(rxn)
-        
         # Remove the species from any unirxn networks it is in
         if self.pressureDependence:
             for network in self.networkList:
                 # Delete all path reactions involving the species
-                rxnList = []
-                for rxn in network.pathReactions:
-                    if spec in rxn.reactants or spec in rxn.products:
-                        rxnList.append(rxn)
+                rxnList = [rxn for rxn in network.pathReactions if involvesSpecies(rxn, speciesSet)]
                 if len(rxnList) > 0:
-                    for rxn in rxnList:
-                        network.pathReactions.remove(rxn)
+                    network.pathReactions[:] = [rxn for rxn in network.pathReactions if not involvesSpecies(rxn, speciesSet)]
                     # Delete all net reactions involving the species
-                    rxnList = []
-                    for rxn in network.netReactions:
-                        if spec in rxn.reactants or spec in rxn.products:
-                            rxnList.append(rxn)
-                    for rxn in rxnList:
-                        network.netReactions.remove(rxn)
-                        
+                    network.netReactions[:] = [rxn for rxn in network.netReactions if not involvesSpecies(rxn, speciesSet)]
+
                     # Recompute the isomers, reactants, and products for this network
                     network.updateConfigurations(self)
 
         # Remove from the global list of reactions
-        # also remove it from the global list of reactions
-        for family in self.reactionDict:
-            if spec in self.reactionDict[family]:
-                del self.reactionDict[family][spec]
-            for reactant1 in self.reactionDict[family]:
-                if spec in self.reactionDict[family][reactant1]:
-                    del self.reactionDict[family][reactant1][spec]
-            for reactant1 in self.reactionDict[family]:
-                for reactant2 in self.reactionDict[family][reactant1]:
-                    tempRxnDeleteList = []
-                    for templateReaction in self.reactionDict[family][reactant1][reactant2]:
-                        if spec in templateReaction.reactants or spec in templateReaction.products:
-                            tempRxnDeleteList.append(templateReaction)
-                    for tempRxnToBeDeleted in tempRxnDeleteList:
-                        self.reactionDict[family][reactant1][reactant2].remove(tempRxnToBeDeleted)
+        keys = set()
+        for spec in speciesSet:
+            keys.update(self.reactionDictIndex.pop(spec, ()))
+        for family, key1, key2 in keys:
+            try:
+                templateReactions = self.reactionDict[family][key1][key2]
+            except KeyError:
+                continue
+            templateReactions[:] = [rxn for rxn in templateReactions if not involvesSpecies(rxn, speciesSet)]
 
         # remove from the global list of species, to free memory
-        formula = spec.molecule[0].getFormula()
-        self.speciesDict[formula].remove(spec)
-        if spec in self.speciesCache:
-            self.speciesCache.remove(spec)
-            self.speciesCache.append(None)
+        database = rmgpy.data.rmg.database
+        for spec in speciesSet:
+            formula = spec.molecule[0].getFormula()
+            self.speciesDict[formula].remove(spec)
+            self.removeSpeciesKeys(spec)
+            if spec in self.speciesCache:
+                self.speciesCache.remove(spec)
+                self.speciesCache.append(None)
+
+            # remove its cached template matches from the reaction families
+            if database is not None and database.kinetics is not None:
+                database.kinetics.clear_match_cache(spec)
 
     def addReactionToCore(self, rxn):
         """
@@ -1393,7 +1470,7 @@ class CoreEdgeReactionModel:
         if rxn not in self.core.reactions:
             self.core.reactions.append(rxn)
         if rxn in self.edge.reactions:
-            self.edge.reactions.remove(rxn)
+            self.removeReactionFromEdge(rxn)
         
     def addReactionToEdge(self, rxn):
         """
@@ -1404,6 +1481,63 @@ class CoreEdgeReactionModel:
         edge).
         """
         self.edge.reactions.append(rxn)
+        self.indexEdgeReaction(rxn)
+
+    def removeReactionFromEdge(self, rxn):
+        """
+        Remove a reaction `rxn` from the reaction model edge.
+        """
+        self.edge.reactions.remove(rxn)
+        self.unindexEdgeReaction(rxn)
+
+    def indexEdgeReaction(self, rxn):
+        """
+        Add the edge reaction `rxn` to the incidence index of each of its
+        reactant and product species.
+        """
+        for spec in itertools.chain(rxn.reactants, rxn.products):
+            try:
+                self.edgeReactionIndex[spec].add(rxn)
+            except KeyError:
+                self.edgeReactionIndex[spec] = set([rxn])
+
+    def unindexEdgeReaction(self, rxn):
+        """
+        Remove the edge reaction `rxn` from the incidence index of each of its
+        reactant and product species.
+        """
+        for spec in itertools.chain(rxn.reactants, rxn.products):
+            rxns = self.edgeReactionIndex.get(spec)
+            if rxns is not None:
+                rxns.discard(rxn)
+                if not rxns:
+                    del self.edgeReactionIndex[spec]
+
+    def rebuildEdgeReactionIndex(self):
+        """
+        Rebuild the species incidence index of the edge reactions, e.g. after
+        the list of edge reactions has been replaced.
+        """
+        self.edgeReactionIndex = {}
+        for rxn in self.edge.reactions:
+            self.indexEdgeReaction(rxn)
+
+    def rebuildReactionDictIndex(self):
+        """
+        Rebuild the index of the `reactionDict` keys under which the reactions
+        involving each species are stored.
+        """
+        self.reactionDictIndex = {}
+        for key_family, reactionDict in self.reactionDict.iteritems():
+            for key1, reactionDict1 in reactionDict.iteritems():
+                for key2, rxnList in reactionDict1.iteritems():
+                    key = (key_family, key1, key2)
+                    for rxn in rxnList:
+                        for spec in itertools.chain(rxn.reactants, rxn.products):
+                            try:
+                                self.reactionDictIndex[spec].add(key)
+                            except KeyError:
+                                self.reactionDictIndex[spec] = set([key])
 
     def getModelSize(self):
         """
@@ -1717,6 +1851,7 @@ class CoreEdgeReactionModel:
         # Add the path reaction to that network
         network.addPathReaction(newReaction)
 
+    @timed('pdep')
     def updateUnimolecularReactionNetworks(self):
         """
         Iterate through all of the currently-existing unimolecular reaction
@@ -1865,6 +2000,14 @@ class CoreEdgeReactionModel:
         # store this reaction at the top of the relevant short-list
         self.reactionDict[key_family][key1][key2].insert(0, rxn)
 
+        # remember where reactions involving each species are stored
+        key = (key_family, key1, key2)
+        for spec in itertools.chain(rxn.reactants, rxn.products):
+            try:
+                self.reactionDictIndex[spec].add(key)
+            except KeyError:
+                self.reactionDictIndex[spec] = set([key])
+
 
     def searchRetrieveReactions(self, rxn):
         """
@@ -1965,6 +2108,32 @@ class CoreEdgeReactionModel:
 
         return obj
 
+    def estimateNewSpeciesThermo(self, deflatedRxns):
+        """
+        Estimate the thermo of the newly-generated structures in the deflated
+        reactions `deflatedRxns`, using the worker processes of the reaction
+        generation. The estimates are stored in the thermo cache, where they
+        are found when the species are made. The structures are not looked up
+        in the model, which is done once when the species are made; those of
+        existing species are skipped as their thermo is already in the cache.
+        Does nothing if reactions are generated in a single process.
+        """
+        pool = getPool()
+        if pool is None:
+            return
+
+        newSpecies, seen = [], set()
+        for rxn in deflatedRxns:
+            for obj in itertools.chain(rxn.reactants, rxn.products):
+                if isinstance(obj, int) or id(obj) in seen or obj.thermo:
+                    continue
+                seen.add(id(obj))
+                molecule = obj.molecule[0].copy(deep=True)
+                molecule.clearLabeledAtoms()
+                newSpecies.append(Species(molecule=[molecule]))
+
+        submitBatch(newSpecies, self.solventName, pool)
+
     def retrieveNewSpecies(self, deflatedRxn):
         """
         Searches for the first reactant or product in the deflated reaction
@@ -2042,6 +2211,18 @@ def getFamilyLibraryObject(label):
 
     raise Exception('Could not retrieve the family/library: {}'.format(label))
 
+def involvesSpecies(rxn, speciesSet):
+    """
+    Return ``True`` if any reactant or product of `rxn` is in `speciesSet`.
+    """
+    for spec in rxn.reactants:
+        if spec in speciesSet:
+            return True
+    for spec in rxn.products:
+        if spec in speciesSet:
+            return True
+    return False
+
 def getKey(spc):
     """
     Returns a string of the species that can serve as a key in a dictionary.
@@ -2049,6 +2230,37 @@ def getKey(spc):
 
     return spc.label
 
+def getCanonicalKey(molecule):
+    """
+    Returns the canonical InChI of `molecule`, which is shared by isomorphic
+    molecules and by (almost all of) their resonance structures, or ``None`` if
+    no InChI could be generated (e.g. for surface species).
+    """
+    try:
+        return molecule.toInChI()
+    except Exception:
+        return None
+
+def getCandidateSpecies(keyIndex, molecules):
+    """
+    Returns the list of species in the canonical key index `keyIndex` which
+    share a canonical key with any of the given `molecules`, together with the
+    species which could not be keyed. Only these species can contain a
+    molecule isomorphic to one of `molecules`.
+    """
+    keys = set([getCanonicalKey(mol) for mol in molecules])
+    if None in keys:
+        # A query structure could not be keyed, so every species is a candidate
+        keys = keyIndex.keys()
+    else:
+        keys.add(None)
+    candidates = []
+    for key in sorted(keys):
+        for spec in keyIndex.get(key, []):
+            if spec not in candidates:
+                candidates.append(spec)
+    return candidates
+
 def areIdenticalSpeciesReferences(rxn1, rxn2):
     """
     Checks if the references of the reactants and products of the two reactions
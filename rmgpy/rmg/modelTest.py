@@ -213,6 +213,35 @@ class TestCoreEdgeReactionModel(unittest.TestCase):
         self.assertEquals(len(cerm.speciesDict), len(spcs) - 1)    
         self.assertEquals(len(cerm.indexSpeciesDict), len(spcs) - 1)
 
+    def testSpeciesKeyIndex(self):
+        """
+        Test that the canonical key index of CoreEdgeReactionModel is kept in sync with speciesDict.
+        """
+        cerm = CoreEdgeReactionModel()
+
+        spcs = [Species().fromSMILES('CCC'),
+                Species().fromSMILES('[CH2]CC'),
+                Species().fromSMILES('C[CH]C')]
+
+        for spc in spcs:
+            cerm.makeNewSpecies(spc)
+
+        spc1 = cerm.speciesDict['C3H7'][0]
+        spc2 = cerm.speciesDict['C3H7'][1]
+        keyIndex = cerm.getSpeciesKeyIndex('C3H7')
+        self.assertEquals(len(keyIndex), 2)
+        self.assertEquals(getCandidateSpecies(keyIndex, [Molecule().fromSMILES('C[CH]C')]), [spc2])
+
+        found, reactive, spec = cerm.checkForExistingSpecies(Molecule().fromSMILES('[CH2]CC'))
+        self.assertTrue(found)
+        self.assertTrue(spec is spc1)
+
+        cerm.edge.species.append(spc1)
+        cerm.removeSpeciesFromEdge([], spc1)
+        self.assertEquals(len(keyIndex), 1)
+        found, reactive, spec = cerm.checkForExistingSpecies(Molecule().fromSMILES('[CH2]CC'))
+        self.assertFalse(found)
+
     def test_append_unreactive_structure(self):
         """
         Test that the CoreEdgeReactionModel.makeNewSpecies method correctly appends a non-representative resonance
@@ -268,6 +297,87 @@ class TestCoreEdgeReactionModel(unittest.TestCase):
                     counter += len(rxnList)
 
         self.assertEquals(counter, 3)
+
+    def testRemoveSpeciesListFromEdge(self):
+        """
+        Test that CoreEdgeReactionModel.removeSpeciesListFromEdge removes the
+        species with all of their reactions and keeps the incidence indices current.
+        """
+
+        spcA = Species().fromSMILES('[OH]')
+        spcs = [Species().fromSMILES('CC'), Species().fromSMILES('[CH3]')]
+        spcTuples = [(spcA, spc) for spc in spcs]
+
+        rxns = list(react(*spcTuples))
+
+        cerm = CoreEdgeReactionModel()
+
+        for rxn in rxns:
+            rxn, isNew = cerm.makeNewReaction(rxn)
+            for spec in rxn.reactants + rxn.products:
+                if spec not in cerm.edge.species:
+                    cerm.addSpeciesToEdge(spec)
+            cerm.addReactionToEdge(rxn)
+
+        self.assertEquals(len(cerm.edge.reactions), 3)
+
+        found, reactive, ethane = cerm.checkForExistingSpecies(Molecule().fromSMILES('CC'))
+        found, reactive, ethyl = cerm.checkForExistingSpecies(Molecule().fromSMILES('C[CH2]'))
+        found, reactive, methyl = cerm.checkForExistingSpecies(Molecule().fromSMILES('[CH3]'))
+        self.assertEquals(len(cerm.edgeReactionIndex[methyl]), 2)
+
+        cerm.removeSpeciesListFromEdge([], [ethane, ethyl])
+        self.assertEquals(len(cerm.edge.reactions), 2)
+        self.assertNotIn(ethane, cerm.edge.species)
+        self.assertNotIn(ethyl, cerm.edgeReactionIndex)
+        self.assertNotIn(ethane, cerm.reactionDictIndex)
+
+        cerm.removeSpeciesListFromEdge([], [methyl])
+        self.assertEquals(cerm.edge.reactions, [])
+        self.assertEquals(cerm.edgeReactionIndex, {})
+
+        # count no. of entries in reactionDict:
+        counter = 0
+        for fam, v1 in cerm.reactionDict.iteritems():
+            for key2, v2 in v1.iteritems():
+                for key3, rxnList in v2.iteritems():
+                    counter += len(rxnList)
+
+        self.assertEquals(counter, 0)
+
+    def testUnpickleWithoutIndices(self):
+        """
+        Test that the species and reaction indices missing from a model pickled
+        by an older version are rebuilt when it is unpickled.
+        """
+        import cPickle
+
+        spcA = Species().fromSMILES('[OH]')
+        spcs = [Species().fromSMILES('CC'), Species().fromSMILES('[CH3]')]
+        rxns = list(react(*[(spcA, spc) for spc in spcs]))
+
+        cerm = CoreEdgeReactionModel()
+        for rxn in rxns:
+            rxn, isNew = cerm.makeNewReaction(rxn)
+            for spec in rxn.reactants + rxn.products:
+                if spec not in cerm.edge.species:
+                    cerm.addSpeciesToEdge(spec)
+            cerm.addReactionToEdge(rxn)
+        del cerm.speciesKeyDict
+        del cerm.edgeReactionIndex
+        del cerm.reactionDictIndex
+
+        cerm = cPickle.loads(cPickle.dumps(cerm, -1))
+        self.assertEquals(cerm.speciesKeyDict, {})
+        self.assertEquals(sum([len(rxns) for rxns in cerm.edgeReactionIndex.itervalues()]),
+                          sum([len(set(rxn.reactants + rxn.products)) for rxn in cerm.edge.reactions]))
+        self.assertEquals(set(cerm.edgeReactionIndex), set(cerm.reactionDictIndex))
+
+        found, reactive, methyl = cerm.checkForExistingSpecies(Molecule().fromSMILES('[CH3]'))
+        self.assertTrue(found)
+        cerm.removeSpeciesListFromEdge([], [methyl])
+        self.assertEquals(len(cerm.edge.reactions), 1)
+        self.assertNotIn(methyl, cerm.reactionDictIndex)
     
     def testThermoFilterSpecies(self):
         """
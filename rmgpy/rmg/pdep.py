@@ -761,7 +761,7 @@ class PDepNetwork(rmgpy.pdep.network.Network):
 
         # Calculate the rate coefficients
         self.initialize(Tmin, Tmax, Pmin, Pmax, maximumGrainSize, minimumGrainCount, activeJRotor, activeKRotor, rmgmode)
-        K = self.calculateRateCoefficients(Tlist, Plist, method)
+        K = self.calculateRateCoefficients(Tlist, Plist, method, processes=job.processes)
 
         # Generate PDepReaction objects
         configurations = []
@@ -32,11 +32,116 @@
 Contains functions for generating reactions.
 """
 import itertools
+import logging
+import multiprocessing
+
+import numpy
 
 from rmgpy.data.rmg import getDB
 from rmgpy.scoop_framework.util import map_
+import rmgpy.timing as timing
+from rmgpy.timing import timed
+
+# The number of worker processes used by react(), and the pool of workers
+_processCount = 1
+_pool = None
+
+# The number of chunks of species tuples sent to each worker per call to react()
+CHUNKS_PER_PROCESS = 4
+
+
+def setProcessCount(processCount):
+    """
+    Set the number of worker processes used to generate reactions. If
+    `processCount` is one, reactions are generated in the current process
+    (or distributed with SCOOP, if RMG was started under SCOOP).
+
+    The workers are forked the first time they are needed, so the kinetics
+    database should be loaded before reactions are generated; a running pool
+    is shut down when the number of processes changes.
+    """
+    global _processCount
+    processCount = max(int(processCount), 1)
+    if processCount != _processCount:
+        shutdownPool()
+        _processCount = processCount
+
+
+def shutdownPool():
+    """
+    Terminate the worker processes used to generate reactions, if any.
+    """
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+        _pool = None
+
+
+def getPool():
+    """
+    Return the pool of worker processes, forking the workers if necessary,
+    or ``None`` if only one process was requested. The workers inherit the
+    loaded database of the current process.
+    """
+    global _pool
+    if _processCount == 1:
+        return None
+    if _pool is None:
+        logging.info('Starting {0:d} processes for reaction generation'.format(_processCount))
+        _pool = multiprocessing.Pool(processes=_processCount)
+    return _pool
+
+
+def estimateCost(speciesTuple):
+    """
+    Return a rough relative measure of the cost of generating the reactions
+    of the species in `speciesTuple`. The number of template matches grows
+    with the number of atoms and resonance structures of each reactant, so
+    the cost is taken as the product of these over the reactants.
+    """
+    cost = 1
+    for spc in speciesTuple:
+        cost *= len(spc.molecule) * len(spc.molecule[0].atoms)
+    return cost
 
 
+def makeChunks(spcTuples, numChunks):
+    """
+    Split the indices of `spcTuples` into about `numChunks` lists of similar
+    estimated cost. The most expensive tuples come first, so that they are
+    started before the cheap ones; tuples that are more expensive than the
+    average chunk end up in a chunk of their own.
+    """
+    costs = [estimateCost(speciesTuple) for speciesTuple in spcTuples]
+    target = sum(costs) / float(max(numChunks, 1))
+    chunks, chunk, chunkCost = [], [], 0
+    for index in sorted(xrange(len(spcTuples)), key=lambda i: costs[i], reverse=True):
+        chunk.append(index)
+        chunkCost += costs[index]
+        if chunkCost >= target:
+            chunks.append(chunk)
+            chunk, chunkCost = [], 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _reactChunk(task):
+    """
+    Generate the deflated reactions of each (index, species tuple) pair in
+    the chunk of `task` in a worker process, with its phases nested in the
+    phase paths of `task` entered in the parent process. Return a list of
+    (index, reactions) pairs and the phase statistics and isomorphism counts
+    recorded, as returned by :func:`rmgpy.timing.stopWorkerRecording`.
+    """
+    stack, chunk = task
+    start = timing.startWorkerRecording(stack)
+    results = [(index, reactSpecies(speciesTuple)) for index, speciesTuple in chunk]
+    return results, timing.stopWorkerRecording(start)
+
+
+@timed('react')
 def react(*spcTuples):
     """
     Generate reactions between the species in the 
@@ -51,12 +156,27 @@ def react(*spcTuples):
     Possible combinations between the first spc in the tuple, and the second species in the tuple
     is obtained by taking the combinatorial product of the two generated [(Molecule, index)] lists.
 
+    If more than one process was requested with :func:`setProcessCount`, the
+    tuples are sent to the worker processes in chunks of similar estimated
+    cost. The reactions are returned in the order of `spcTuples` regardless.
+
     Returns a flat generator object containing the generated Reaction objects.
     """
 
-    results = map_(
-                reactSpecies,
-                spcTuples)
+    if _processCount > 1 and len(spcTuples) > 1:
+        chunks = makeChunks(spcTuples, _processCount * CHUNKS_PER_PROCESS)
+        results = [None] * len(spcTuples)
+        stack = list(timing.statistics.stack)
+        for chunkResults, records in getPool().imap_unordered(
+                _reactChunk,
+                [(stack, [(index, spcTuples[index]) for index in chunk]) for chunk in chunks]):
+            timing.mergeWorkerRecords(records)
+            for index, reactions in chunkResults:
+                results[index] = reactions
+    else:
+        results = map_(
+                    reactSpecies,
+                    spcTuples)
 
     reactions = itertools.chain.from_iterable(results)
 
@@ -117,33 +237,74 @@ def reactAll(coreSpcList, numOldCoreSpecies, unimolecularReact, bimolecularReact
     """
     Reacts the core species list via uni-, bi-, and trimolecular
     reactions.
+
+    `unimolecularReact` is an array of flags for the core species. The
+    bimolecular and trimolecular react flags are sets of the sorted index
+    pairs (i, j) and triples (i, j, k) of the core species that should react;
+    dense boolean arrays are accepted as well.
     """
 
     # Select reactive species that can undergo unimolecular reactions:
     spcTuples = [(coreSpcList[i],)
      for i in xrange(numOldCoreSpecies) if (unimolecularReact[i] and coreSpcList[i].reactive)]
 
-    for i in xrange(numOldCoreSpecies):
-        for j in xrange(i, numOldCoreSpecies):
-            # Find reactions involving the species that are bimolecular
-            # This includes a species reacting with itself (if its own concentration is high enough)
-            if bimolecularReact[i,j]:
-                if coreSpcList[i].reactive and coreSpcList[j].reactive:
-                    spcTuples.append((coreSpcList[i], coreSpcList[j]))
+    # Find reactions involving the species that are bimolecular
+    # This includes a species reacting with itself (if its own concentration is high enough)
+    for indices in getReactFlagIndices(bimolecularReact, numOldCoreSpecies):
+        spcs = tuple([coreSpcList[i] for i in indices])
+        if all([spc.reactive for spc in spcs]):
+            spcTuples.append(spcs)
 
     if trimolecularReact is not None:
-        for i in xrange(numOldCoreSpecies):
-            for j in xrange(i, numOldCoreSpecies):
-                for k in xrange(j, numOldCoreSpecies):
-                    # Find reactions involving the species that are trimolecular
-                    if trimolecularReact[i,j,k]:
-                        if coreSpcList[i].reactive and coreSpcList[j].reactive and coreSpcList[k].reactive:
-                            spcTuples.append((coreSpcList[i], coreSpcList[j], coreSpcList[k]))
+        # Find reactions involving the species that are trimolecular
+        for indices in getReactFlagIndices(trimolecularReact, numOldCoreSpecies):
+            spcs = tuple([coreSpcList[i] for i in indices])
+            if all([spc.reactive for spc in spcs]):
+                spcTuples.append(spcs)
 
     rxns = list(react(*spcTuples))
     return rxns
 
 
+def getReactFlagIndices(reactFlags, numSpecies):
+    """
+    Return a sorted list of the flagged index tuples in `reactFlags` whose
+    indices are all smaller than `numSpecies`. `reactFlags` is either a set of
+    sorted index tuples or a dense boolean array, of which only the entries
+    with non-decreasing indices are used.
+    """
+    if isinstance(reactFlags, numpy.ndarray):
+        flags = reactFlags[(slice(numSpecies),) * reactFlags.ndim]
+        return [tuple(indices) for indices in numpy.argwhere(flags).tolist()
+                if all([i <= j for i, j in zip(indices[:-1], indices[1:])])]
+    return sorted([indices for indices in reactFlags if indices[-1] < numSpecies])
+
+
+def getPairs(numSpecies, newSpecies):
+    """
+    Return the set of sorted index pairs (i, j) of `numSpecies` species that
+    contain at least one of the species indices in `newSpecies`.
+    """
+    pairs = set()
+    for k in newSpecies:
+        for i in xrange(numSpecies):
+            pairs.add((i, k) if i <= k else (k, i))
+    return pairs
+
+
+def getTriples(numSpecies, newSpecies):
+    """
+    Return the set of sorted index triples (i, j, k) of `numSpecies` species
+    that contain at least one of the species indices in `newSpecies`.
+    """
+    triples = set()
+    for k in newSpecies:
+        for i in xrange(numSpecies):
+            for j in xrange(i, numSpecies):
+                triples.add(tuple(sorted((i, j, k))))
+    return triples
+
+
 def deflateReaction(rxn, molDict):
     """
     This function deflates a single reaction holding species objects, and uses the provided
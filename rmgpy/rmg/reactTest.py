@@ -40,7 +40,8 @@ from rmgpy.reaction import Reaction
 from rmgpy.species import Species
 
 from rmgpy.rmg.main import RMG
-from rmgpy.rmg.react import react, reactAll, deflate, deflateReaction
+from rmgpy.rmg.react import react, reactAll, deflate, deflateReaction, makeChunks, setProcessCount, \
+    getPairs, getTriples, getReactFlagIndices
 
 ###################################################
 
@@ -79,6 +80,40 @@ class TestReact(unittest.TestCase):
         self.assertIsNotNone(reactionList)
         self.assertTrue(all([isinstance(rxn, TemplateReaction) for rxn in reactionList]))
 
+    def testReactParallel(self):
+        """
+        Test that reaction generation with worker processes gives the same
+        reactions in the same order as in the current process.
+        """
+        spcA = Species().fromSMILES('[OH]')
+        spcs = [Species().fromSMILES('CC'), Species().fromSMILES('[CH3]'), Species().fromSMILES('CCC')]
+        spcTuples = [(spcA, spc) for spc in spcs]
+
+        serialReactions = list(react(*spcTuples))
+        setProcessCount(2)
+        try:
+            parallelReactions = list(react(*spcTuples))
+        finally:
+            setProcessCount(1)
+
+        self.assertEqual(len(parallelReactions), len(serialReactions))
+        for rxn0, rxn in zip(serialReactions, parallelReactions):
+            self.assertTrue(isinstance(rxn, TemplateReaction))
+            self.assertEqual(rxn.family, rxn0.family)
+            self.assertEqual(rxn.template, rxn0.template)
+
+    def testMakeChunks(self):
+        """
+        Test that species tuples are split into chunks with the most expensive tuples first.
+        """
+        small = Species().fromSMILES('[OH]')
+        large = Species().fromSMILES('CCCCCC')
+        spcTuples = [(small,), (small, small), (large, large), (large,)]
+
+        chunks = makeChunks(spcTuples, 2)
+        self.assertEqual(sorted([index for chunk in chunks for index in chunk]), range(len(spcTuples)))
+        self.assertEqual(chunks[0], [2])
+
     def testDeflate(self):
         """
         Test that reaction deflate function works.
@@ -157,6 +192,29 @@ class TestReact(unittest.TestCase):
         self.assertIsNotNone(rxns)
         self.assertTrue(all([isinstance(rxn, TemplateReaction) for rxn in rxns]))
 
+        # The same reactions are found with the sparse react flags
+        rxns2 = reactAll(spcs, N, np.ones(N), getPairs(N, range(N)))
+        self.assertEqual(len(rxns2), len(rxns))
+
+    def testGetReactFlagIndices(self):
+        """
+        Test that sparse and dense react flags give the same index tuples.
+        """
+        N = 4
+        pairs = getPairs(N, [3])
+        self.assertEqual(sorted(pairs), [(0, 3), (1, 3), (2, 3), (3, 3)])
+        triples = getTriples(N, [3])
+        self.assertEqual(len(triples), 10)
+        self.assertTrue(all([3 in indices and list(indices) == sorted(indices) for indices in triples]))
+
+        dense = np.zeros((N, N), bool)
+        for i, j in pairs:
+            dense[i, j] = True
+        dense[3, 0] = True  # entries with decreasing indices are not used
+        self.assertEqual(getReactFlagIndices(dense, N), sorted(pairs))
+        self.assertEqual(getReactFlagIndices(pairs, N), sorted(pairs))
+        self.assertEqual(getReactFlagIndices(pairs, 3), [])
+
     def testDeflateReaction(self):
         """
         Test if the deflateReaction function works.
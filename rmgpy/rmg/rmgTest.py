@@ -255,6 +255,7 @@ class TestRMGScript(unittest.TestCase):
         self.assertEqual(args.debug, False)
         self.assertEqual(args.file, 'input.py')
         self.assertEqual(args.kineticsdatastore, False)
+        self.assertEqual(args.maxproc, 1)
         self.assertEqual(args.postprocess, False)
         self.assertEqual(args.profile, False)
         self.assertEqual(args.quiet, False)
@@ -268,7 +269,7 @@ class TestRMGScript(unittest.TestCase):
 
         # Acquire arguments
         args = parse_command_line_arguments(['other_name.py', '-d', '-o', '/test/output/dir/', '-r', '-P',
-                                            '-t', '01:20:33:45', '-k'])
+                                            '-t', '01:20:33:45', '-k', '-n', '4'])
 
         # Test expected values
         self.assertEqual(args.walltime, '01:20:33:45')
@@ -276,6 +277,7 @@ class TestRMGScript(unittest.TestCase):
         self.assertEqual(args.debug, True)
         self.assertEqual(args.file, 'other_name.py')
         self.assertEqual(args.kineticsdatastore, True)
+        self.assertEqual(args.maxproc, 4)
         self.assertEqual(args.postprocess, True)
         self.assertEqual(args.profile, True)
         self.assertEqual(args.restart, True)
@@ -118,8 +118,9 @@ class SimulatorSettings(object):
     """
     class for holding the parameters affecting the behavior of the solver
     """
-    def __init__(self,atol=1e-16, rtol=1e-8, sens_atol=1e-6, sens_rtol=1e-4):
+    def __init__(self,atol=1e-16, rtol=1e-8, sens_atol=1e-6, sens_rtol=1e-4, sens_sparse=False):
         self.atol = atol
         self.rtol = rtol
         self.sens_atol = sens_atol
-        self.sens_rtol = sens_rtol
\ No newline at end of file
+        self.sens_rtol = sens_rtol
+        self.sens_sparse = sens_sparse
\ No newline at end of file
@@ -58,6 +58,8 @@ cdef class ReactionSystem(DASx):
     cdef public numpy.ndarray reactantIndices
     cdef public numpy.ndarray productIndices
     cdef public numpy.ndarray networkIndices
+    cdef public numpy.ndarray speciesPermutation
+    cdef public numpy.ndarray reactionPermutation
 
     # matrices that cache kinetic and rate data
     cdef public numpy.ndarray kf # forward rate coefficients
@@ -98,6 +100,7 @@ cdef class ReactionSystem(DASx):
     cdef public numpy.ndarray sensitivityCoefficients
     cdef public list sensitiveSpecies
     cdef public double sensitivityThreshold
+    cdef public bint sparseSensitivity
     # cdef public numpy.ndarray senpar
 
     # tolerance settings
@@ -113,8 +116,8 @@ cdef class ReactionSystem(DASx):
 
     # reaction threshold settings
     cdef public numpy.ndarray unimolecularThreshold
-    cdef public numpy.ndarray bimolecularThreshold
-    cdef public numpy.ndarray trimolecularThreshold
+    cdef public set bimolecularThreshold
+    cdef public set trimolecularThreshold
 
     # methods
     cpdef initializeModel(self, list coreSpecies, list coreReactions, list edgeSpecies, list edgeReactions,
@@ -35,6 +35,7 @@ cdef extern from "math.h":
 
 import numpy
 cimport numpy
+import scipy.sparse
 import rmgpy.constants as constants
 cimport rmgpy.constants as constants
 
@@ -55,6 +56,7 @@ from rmgpy.quantity import Quantity
 from rmgpy.chemkin import getSpeciesIdentifier
 from rmgpy.reaction import Reaction
 from rmgpy.species import Species
+from rmgpy.timing import phase
 
 ################################################################################
 
@@ -100,6 +102,15 @@ cdef class ReactionSystem(DASx):
         """
         self.reactionIndex = {}
 
+        """
+        speciesPermutation and reactionPermutation are arrays with, for each
+        species and reaction index, the index of the same species or reaction
+        in the previous initialization of the model, or -1 if the species or
+        reaction is new. They are used to carry the index matrices and rate
+        coefficients over between enlarge iterations.
+        """
+        self.speciesPermutation = None
+        self.reactionPermutation = None
 
         """
         A matrix for the reactants and products.
@@ -159,6 +170,7 @@ cdef class ReactionSystem(DASx):
         self.sensitivityCoefficients = None    
         self.sensitiveSpecies = sensitiveSpecies
         self.sensitivityThreshold = sensitivityThreshold
+        self.sparseSensitivity = False
         self.senpar = None
 
         # tolerance settings
@@ -177,9 +189,10 @@ cdef class ReactionSystem(DASx):
         self.trimolecular = False
         
         # reaction filtration, unimolecularThreshold is a vector with length of number of core species
-        # bimolecularThreshold is a square matrix with length of number of core species
-        # trimolecularThreshold is a rank-3 tensor with length of number of core species
-        # A value of 1 in the matrix indicates the species is above the threshold to react or participate in those reactions
+        # A value of 1 in the vector indicates the species is above the threshold to react
+        # bimolecularThreshold is a set of the sorted index pairs (i, j) of core species
+        # trimolecularThreshold is a set of the sorted index triples (i, j, k) of core species
+        # that are above the threshold to participate in those reactions
         self.unimolecularThreshold = None
         self.bimolecularThreshold = None
         self.trimolecularThreshold = None
@@ -230,6 +243,7 @@ cdef class ReactionSystem(DASx):
         pdepNetworks = pdepNetworks or []
         self.numPdepNetworks = len(pdepNetworks)
 
+        kf, kb, Keq = self.kf, self.kb, self.Keq
         self.kf = numpy.zeros((self.numCoreReactions + self.numEdgeReactions), numpy.float64)
         self.kb = numpy.zeros_like(self.kf)
         self.Keq = numpy.zeros_like(self.kf)
@@ -238,6 +252,14 @@ cdef class ReactionSystem(DASx):
         self.generate_reaction_indices(coreReactions, edgeReactions)
         self.generate_reactant_product_indices(coreReactions, edgeReactions)
 
+        # Carry over the rate coefficients of the reactions that were already
+        # in the model; derived classes decide which of them are still valid
+        if kf is not None:
+            indices = numpy.flatnonzero(self.reactionPermutation >= 0)
+            self.kf[indices] = kf[self.reactionPermutation[indices]]
+            self.kb[indices] = kb[self.reactionPermutation[indices]]
+            self.Keq[indices] = Keq[self.reactionPermutation[indices]]
+
         self.coreSpeciesConcentrations = numpy.zeros((self.numCoreSpecies), numpy.float64)
         self.coreSpeciesProductionRates = numpy.zeros((self.numCoreSpecies), numpy.float64)
         self.coreSpeciesConsumptionRates = numpy.zeros((self.numCoreSpecies), numpy.float64)
@@ -249,10 +271,9 @@ cdef class ReactionSystem(DASx):
         self.maxNetworkLeakRateRatios = numpy.zeros((len(self.prunableNetworks)), numpy.float64)
         self.sensitivityCoefficients = numpy.zeros((self.numCoreSpecies, self.numCoreReactions), numpy.float64)
         self.unimolecularThreshold = numpy.zeros((self.numCoreSpecies), bool)
-        self.bimolecularThreshold = numpy.zeros((self.numCoreSpecies, self.numCoreSpecies), bool)
+        self.bimolecularThreshold = set()
         if self.trimolecular:
-            self.trimolecularThreshold = numpy.zeros((self.numCoreSpecies, self.numCoreSpecies, self.numCoreSpecies),
-                                                     bool)
+            self.trimolecularThreshold = set()
 
         surfaceSpecies,surfaceReactions = self.initialize_surface(coreSpecies,coreReactions,surfaceSpecies,surfaceReactions)
         
@@ -395,13 +416,44 @@ cdef class ReactionSystem(DASx):
     def generate_reactant_product_indices(self, coreReactions, edgeReactions):
         """
         Creates a matrix for the reactants and products.
+
+        The rows of reactions that were already in the model are taken from the
+        previous matrices, with their species indices permuted to the new
+        ones; only the rows of new reactions are built from the reactions
+        themselves. Reactions that can not be carried over this way are marked
+        as new in reactionPermutation.
         """
+        cdef numpy.ndarray[numpy.int_t, ndim=1] speciesMap, rows, oldRows
+        cdef numpy.ndarray oldReactantIndices, oldProductIndices, reactantIndices, productIndices, valid
+        cdef list reactions
+        cdef int size
 
+        oldReactantIndices = self.reactantIndices
+        oldProductIndices = self.productIndices
         self.reactantIndices = -numpy.ones((self.numCoreReactions + self.numEdgeReactions, 3), numpy.int )
         self.productIndices = -numpy.ones_like(self.reactantIndices)
 
-        for rxn in itertools.chain(coreReactions, edgeReactions):
-            j = self.reactionIndex[rxn]
+        reactions = list(itertools.chain(coreReactions, edgeReactions))
+        rows = numpy.flatnonzero(self.reactionPermutation >= 0)
+        if oldReactantIndices is not None and rows.shape[0] > 0:
+            oldRows = self.reactionPermutation[rows]
+            # Map the old species indices to the new ones; the extra last
+            # element maps -1 (no reactant or product) to itself
+            size = max(oldReactantIndices.max(), oldProductIndices.max(), self.speciesPermutation.max()) + 1
+            speciesMap = -numpy.ones(size + 1, numpy.int)
+            indices = numpy.flatnonzero(self.speciesPermutation >= 0)
+            speciesMap[self.speciesPermutation[indices]] = indices
+            reactantIndices = speciesMap[oldReactantIndices[oldRows]]
+            productIndices = speciesMap[oldProductIndices[oldRows]]
+            # Reactions with a species that is no longer in the model are rebuilt
+            valid = (((reactantIndices >= 0) | (oldReactantIndices[oldRows] < 0)).all(axis=1)
+                     & ((productIndices >= 0) | (oldProductIndices[oldRows] < 0)).all(axis=1))
+            self.reactantIndices[rows[valid]] = reactantIndices[valid]
+            self.productIndices[rows[valid]] = productIndices[valid]
+            self.reactionPermutation[rows[~valid]] = -1
+
+        for j in numpy.flatnonzero(self.reactionPermutation < 0):
+            rxn = reactions[j]
             for l, spec in enumerate(rxn.reactants):
                 i = self.get_species_index(spec)
                 self.reactantIndices[j,l] = i
@@ -412,20 +464,30 @@ cdef class ReactionSystem(DASx):
     def generate_species_indices(self, coreSpecies, edgeSpecies):
         """
         Assign an index to each species (core first, then edge) and 
-        store the (species, index) pair in a dictionary.
+        store the (species, index) pair in a dictionary. The index of each
+        species in the previous initialization is stored in speciesPermutation.
         """
-        
+        cdef dict speciesIndex = self.speciesIndex
+
+        self.speciesIndex = {}
+        self.speciesPermutation = -numpy.ones(self.numCoreSpecies + self.numEdgeSpecies, numpy.int)
         for index, spec in enumerate(itertools.chain(coreSpecies, edgeSpecies)):
             self.speciesIndex[spec] = index
+            self.speciesPermutation[index] = speciesIndex.get(spec, -1)
 
     def generate_reaction_indices(self, coreReactions, edgeReactions):
         """
         Assign an index to each reaction (core first, then edge) and 
-        store the (reaction, index) pair in a dictionary.
+        store the (reaction, index) pair in a dictionary. The index of each
+        reaction in the previous initialization is stored in reactionPermutation.
         """
-        
+        cdef dict reactionIndex = self.reactionIndex
+
+        self.reactionIndex = {}
+        self.reactionPermutation = -numpy.ones(self.numCoreReactions + self.numEdgeReactions, numpy.int)
         for index, rxn in enumerate(itertools.chain(coreReactions, edgeReactions)):
             self.reactionIndex[rxn] = index
+            self.reactionPermutation[index] = reactionIndex.get(rxn, -1)
 
     def set_initial_conditions(self):
         """
@@ -443,22 +505,56 @@ cdef class ReactionSystem(DASx):
     def set_initial_reaction_thresholds(self):
         
         # Set unimolecular and bimolecular thresholds as true for any concentrations greater than 0
-        numCoreSpecies = len(self.coreSpeciesConcentrations)
-        for i in xrange(numCoreSpecies):
-            if self.coreSpeciesConcentrations[i] > 0:
-                self.unimolecularThreshold[i] = True
-        for i in xrange(numCoreSpecies):
-            for j in xrange(i, numCoreSpecies):
-                if self.coreSpeciesConcentrations[i] > 0 and self.coreSpeciesConcentrations[j] > 0:
-                    self.bimolecularThreshold[i,j] = True
+        self.add_reaction_thresholds(self.coreSpeciesConcentrations, 0.0, 0.0, 0.0)
+
+    @cython.boundscheck(False)
+    def add_reaction_thresholds(self, numpy.ndarray[numpy.float64_t, ndim=1] concentrations,
+                                double unimolecularThresholdVal, double bimolecularThresholdVal,
+                                double trimolecularThresholdVal):
+        """
+        Flag the core species, and the pairs and triples of core species,
+        whose concentration (product) is above the given threshold values.
+
+        The pairs and triples are found by walking the species in order of
+        decreasing concentration and stopping as soon as the product drops
+        below the threshold, so the work done scales with the number of
+        flagged pairs and triples rather than with the number of possible ones.
+        """
+        cdef numpy.ndarray[numpy.int_t, ndim=1] order
+        cdef numpy.ndarray[numpy.float64_t, ndim=1] c
+        cdef set bimolecularThreshold, trimolecularThreshold
+        cdef int a, b, d, i, j, n
+
+        # Negative concentrations are numerical noise and never above a threshold
+        c = numpy.maximum(concentrations, 0.0)
+        self.unimolecularThreshold |= c > unimolecularThresholdVal
+
+        order = numpy.argsort(-c, kind='mergesort')
+        c = c[order]
+        n = c.shape[0]
+
+        bimolecularThreshold = self.bimolecularThreshold
+        for a in xrange(n):
+            if c[a] * c[a] <= bimolecularThresholdVal:
+                break
+            for b in xrange(a, n):
+                if c[a] * c[b] <= bimolecularThresholdVal:
+                    break
+                i = order[a]; j = order[b]
+                bimolecularThreshold.add((i, j) if i <= j else (j, i))
+
         if self.trimolecular:
-            for i in xrange(numCoreSpecies):
-                for j in xrange(i, numCoreSpecies):
-                    for k in xrange(j, numCoreSpecies):
-                        if (self.coreSpeciesConcentrations[i] > 0
-                                and self.coreSpeciesConcentrations[j] > 0
-                                and self.coreSpeciesConcentrations[k] > 0):
-                            self.trimolecularThreshold[i,j,k] = True
+            trimolecularThreshold = self.trimolecularThreshold
+            for a in xrange(n):
+                if c[a] * c[a] * c[a] <= trimolecularThresholdVal:
+                    break
+                for b in xrange(a, n):
+                    if c[a] * c[b] * c[b] <= trimolecularThresholdVal:
+                        break
+                    for d in xrange(b, n):
+                        if c[a] * c[b] * c[d] <= trimolecularThresholdVal:
+                            break
+                        trimolecularThreshold.add(tuple(sorted((order[a], order[b], order[d]))))
 
     def set_initial_derivative(self):
         """
@@ -637,6 +733,7 @@ cdef class ReactionSystem(DASx):
         relativeTolerance = simulatorSettings.rtol
         sensitivityAbsoluteTolerance = simulatorSettings.sens_atol
         sensitivityRelativeTolerance = simulatorSettings.sens_rtol
+        self.sparseSensitivity = getattr(simulatorSettings, 'sens_sparse', False)
         filterReactions = modelSettings.filterReactions
         maxNumObjsPerIter = modelSettings.maxNumObjsPerIter
         
@@ -659,10 +756,11 @@ cdef class ReactionSystem(DASx):
         for index, spec in enumerate(coreSpecies):
             speciesIndex[spec] = index
         
-        self.initializeModel(coreSpecies, coreReactions, edgeSpecies, edgeReactions, surfaceSpecies, surfaceReactions, 
-                             pdepNetworks, absoluteTolerance, relativeTolerance, sensitivity,
-                             sensitivityAbsoluteTolerance, sensitivityRelativeTolerance,
-                             filterReactions, conditions)
+        with phase('initializeModel'):
+            self.initializeModel(coreSpecies, coreReactions, edgeSpecies, edgeReactions, surfaceSpecies, surfaceReactions,
+                                 pdepNetworks, absoluteTolerance, relativeTolerance, sensitivity,
+                                 sensitivityAbsoluteTolerance, sensitivityRelativeTolerance,
+                                 filterReactions, conditions)
 
         prunableSpeciesIndices = self.prunableSpeciesIndices
         prunableNetworkIndices = self.prunableNetworkIndices
@@ -690,9 +788,6 @@ cdef class ReactionSystem(DASx):
         maxEdgeSpeciesRateRatios = self.maxEdgeSpeciesRateRatios
         maxNetworkLeakRateRatios = self.maxNetworkLeakRateRatios
         forwardRateCoefficients = self.kf
-        unimolecularThreshold = self.unimolecularThreshold
-        bimolecularThreshold = self.bimolecularThreshold
-        trimolecularThreshold = self.trimolecularThreshold
         
         # Copy the initial conditions to use in evaluating conversions
         y0 = self.y.copy()
@@ -978,26 +1073,9 @@ cdef class ReactionSystem(DASx):
                 unimolecularThresholdVal = toleranceMoveToCore * charRate / unimolecularThresholdRateConstant
                 bimolecularThresholdVal = toleranceMoveToCore * charRate / bimolecularThresholdRateConstant
                 trimolecularThresholdVal = toleranceMoveToCore * charRate / trimolecularThresholdRateConstant
-                for i in xrange(numCoreSpecies):
-                    if not unimolecularThreshold[i]:
-                        # Check if core species concentration has gone above threshold for unimolecular reaction
-                        if coreSpeciesConcentrations[i] > unimolecularThresholdVal:
-                            unimolecularThreshold[i] = True
-                for i in xrange(numCoreSpecies):
-                    for j in xrange(i, numCoreSpecies):
-                        if not bimolecularThreshold[i,j]:
-                            if coreSpeciesConcentrations[i]*coreSpeciesConcentrations[j] > bimolecularThresholdVal:
-                                bimolecularThreshold[i,j] = True
-                if self.trimolecular:
-                    for i in xrange(numCoreSpecies):
-                        for j in xrange(i, numCoreSpecies):
-                            for k in xrange(j, numCoreSpecies):
-                                if not trimolecularThreshold[i,j,k]:
-                                    if (coreSpeciesConcentrations[i]*
-                                        coreSpeciesConcentrations[j]*
-                                        coreSpeciesConcentrations[k]
-                                            > trimolecularThresholdVal):
-                                        trimolecularThreshold[i,j,k] = True
+                # Check if core species concentrations have gone above the thresholds for reaction
+                self.add_reaction_thresholds(coreSpeciesConcentrations, unimolecularThresholdVal,
+                                             bimolecularThresholdVal, trimolecularThresholdVal)
             
             
             ###############################################################################
@@ -1239,10 +1317,6 @@ cdef class ReactionSystem(DASx):
         
         self.maxEdgeSpeciesRateRatios = maxEdgeSpeciesRateRatios
         self.maxNetworkLeakRateRatios = maxNetworkLeakRateRatios
-        
-        self.unimolecularThreshold = unimolecularThreshold
-        self.bimolecularThreshold = bimolecularThreshold
-        self.trimolecularThreshold = trimolecularThreshold
 
         # Return the invalid object (if the simulation was invalid) or None
         # (if the simulation was valid)
@@ -1357,6 +1431,82 @@ cdef class ReactionSystem(DASx):
         rateDeriv = V * rateDeriv
 
         return rateDeriv
+
+    @cython.boundscheck(False)
+    def compute_rate_derivative_sparse(self):
+        """
+        Returns the derivative matrix df/dk computed by 
+        :meth:`computeRateDerivative` as a :class:`scipy.sparse.csr_matrix`.
+        Each column only has entries for the species participating in the
+        corresponding reaction, so the matrix is assembled in coordinate
+        format without ever forming the dense array.
+        """
+        cdef numpy.ndarray[numpy.int_t, ndim=2] ir, ip
+        cdef numpy.ndarray[numpy.float64_t, ndim=1] kf, kr, C, vals
+        cdef numpy.ndarray[numpy.int_t, ndim=1] rows, cols, species
+        cdef numpy.ndarray[numpy.float64_t, ndim=1] signs
+        cdef double fderiv, rderiv, flux, V, RT_inverse, gderiv
+        cdef int j, a, b, n, nnz, numCoreReactions, numCoreSpecies, numSpecies
+        
+        ir = self.reactantIndices
+        ip = self.productIndices
+        
+        kf = self.kf
+        kr = self.kb    
+        
+        numCoreReactions = len(self.coreReactionRates)
+        numCoreSpecies = len(self.coreSpeciesConcentrations)      
+        
+        # Use stored volume, since this function is only called from residual function. 
+        RT_inverse = 1/(constants.R * self.T.value_si)
+        V = self.V
+
+        C = self.coreSpeciesConcentrations
+
+        # At most 6 participants per reaction, each with one flux entry and
+        # one dG entry per participant
+        rows = numpy.zeros(42 * numCoreReactions, numpy.int)
+        cols = numpy.zeros(42 * numCoreReactions, numpy.int)
+        vals = numpy.zeros(42 * numCoreReactions, numpy.float64)
+        species = numpy.zeros(6, numpy.int)
+        signs = numpy.zeros(6, numpy.float64)
+        nnz = 0
+        
+        for j in xrange(numCoreReactions):
+            fderiv = 1.0
+            rderiv = kr[j] / kf[j]
+            n = 0
+            for a in xrange(3):
+                if ir[j,a] != -1:
+                    fderiv *= C[ir[j,a]]
+                    species[n] = ir[j,a]
+                    signs[n] = -1.0
+                    n += 1
+            for a in xrange(3):
+                if ip[j,a] != -1:
+                    rderiv *= C[ip[j,a]]
+                    species[n] = ip[j,a]
+                    signs[n] = 1.0
+                    n += 1
+            
+            flux = fderiv - rderiv
+            gderiv = rderiv * kf[j] * RT_inverse
+            
+            for a in xrange(n):
+                rows[nnz] = species[a]
+                cols[nnz] = j
+                vals[nnz] = signs[a] * flux * V
+                nnz += 1
+                for b in xrange(n):
+                    # derivative for reaction j with respect to dG_species b
+                    rows[nnz] = species[a]
+                    cols[nnz] = numCoreReactions + species[b]
+                    vals[nnz] = signs[a] * (-signs[b]) * gderiv * V
+                    nnz += 1
+        
+        # Duplicate entries (e.g. A + A) are summed by the conversion to CSR
+        return scipy.sparse.coo_matrix((vals[:nnz], (rows[:nnz], cols[:nnz])),
+            shape=(numCoreSpecies, numCoreReactions+numCoreSpecies)).tocsr()
         
 ################################################################################
 
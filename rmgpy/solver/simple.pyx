@@ -32,6 +32,7 @@ consisting of a homogeneous, isothermal, isobaric batch reactor.
 
 import numpy, logging
 cimport numpy
+import scipy.sparse
 
 import itertools
     
@@ -42,6 +43,7 @@ import rmgpy.constants as constants
 cimport rmgpy.constants as constants
 from rmgpy.quantity import Quantity
 from rmgpy.quantity cimport ScalarQuantity, ArrayQuantity
+from rmgpy.kinetics.batch import BatchKineticsEvaluator
 
 cdef class SimpleReactor(ReactionSystem):
     """
@@ -108,6 +110,27 @@ cdef class SimpleReactor(ReactionSystem):
     cdef public list Prange
     cdef public int nSims
 
+    """
+    batchKinetics:
+    the :class:`BatchKineticsEvaluator` used to compute the rate coefficients and
+    equilibrium constants of the core and edge reactions. It is kept between calls
+    to initializeModel and only rebuilt when the reactions or their kinetics change.
+    """
+    cdef public object batchKinetics
+
+    """
+    rateConditions, reactionKinetics and speciesThermo:
+    the temperature and pressure, the kinetics objects of the reactions and the
+    thermo objects of the species for which the rate coefficients were last
+    computed. Rate coefficients of reactions for which none of these changed
+    are carried over to the next initialization of the model. Only replaced
+    kinetics and thermo objects are noticed, so :meth:`resetRateCoefficients`
+    must be called after changing their parameters in place.
+    """
+    cdef public tuple rateConditions
+    cdef public list reactionKinetics
+    cdef public list speciesThermo
+
     def __init__(self, T, P, initialMoleFractions, nSims=1, termination=None, sensitiveSpecies=None, sensitivityThreshold=1e-3,sensConditions=None):
         ReactionSystem.__init__(self, termination, sensitiveSpecies, sensitivityThreshold)
         
@@ -132,6 +155,10 @@ cdef class SimpleReactor(ReactionSystem):
         self.colliderEfficiencies = None
         self.pdepSpecificColliderReactionIndices = None
         self.pdepSpecificColliderKinetics = None
+        self.batchKinetics = None
+        self.rateConditions = None
+        self.reactionKinetics = None
+        self.speciesThermo = None
         self.specificColliderSpecies = None
         self.sensConditions = sensConditions
         self.nSims = nSims
@@ -144,6 +171,19 @@ cdef class SimpleReactor(ReactionSystem):
             (self.T, self.P, self.initialMoleFractions, self.nSims, self.termination))
 
 
+    def resetRateCoefficients(self):
+        """
+        Forget the rate coefficients computed in the previous initializations of
+        the model, so that those of all reactions are computed in the next one.
+        This must be called after changing the parameters of the kinetics or
+        thermo objects of the model in place, e.g. with
+        :meth:`KineticsModel.changeRate`, as only replaced objects are noticed.
+        """
+        self.batchKinetics = None
+        self.rateConditions = None
+        self.reactionKinetics = None
+        self.speciesThermo = None
+
     def convertInitialKeysToSpeciesObjects(self, speciesDict):
         """
         Convert the initialMoleFractions dictionary from species names into species objects,
@@ -188,7 +228,7 @@ cdef class SimpleReactor(ReactionSystem):
         ReactionSystem.compute_network_variables(self, pdepNetworks)
 
         # Generate forward and reverse rate coefficients k(T,P)
-        self.generate_rate_coefficients(coreReactions, edgeReactions)
+        self.generate_rate_coefficients(coreReactions, edgeReactions, coreSpecies, edgeSpecies)
         
         ReactionSystem.set_initial_derivative(self)
         # Initialize the model
@@ -226,21 +266,111 @@ cdef class SimpleReactor(ReactionSystem):
                 return Peff
         return self.P.value_si
 
-    def generate_rate_coefficients(self, coreReactions, edgeReactions):
+    def generate_rate_coefficients(self, coreReactions, edgeReactions, coreSpecies=None, edgeSpecies=None):
         """
         Populates the forward rate coefficients (kf), reverse rate coefficients (kb)
         and equilibrium constants (Keq) arrays with the values computed at the temperature
         and (effective) pressure of the reaction system.
+
+        If the core and edge species are given and the temperature and pressure
+        are the same as in the previous initialization, only the rate
+        coefficients of the reactions that are new, have new kinetics, involve
+        a species with new thermo or have collider efficiencies are computed;
+        the others were carried over by the base class. Parameters changed in
+        place are not noticed (see :meth:`resetRateCoefficients`).
         """
 
-        for rxn in itertools.chain(coreReactions, edgeReactions):
-            j = self.reactionIndex[rxn]
-            Peff = self.calculate_effective_pressure(rxn)
-            self.kf[j] = rxn.getRateCoefficient(self.T.value_si, Peff)
+        cdef numpy.ndarray[numpy.float64_t, ndim=1] Peff, y0_coreSpecies
+        cdef numpy.ndarray[numpy.int_t, ndim=1] reversible, stale
+        cdef double T, P, sum_core_species
+        cdef int i, j
+
+        reactions = list(itertools.chain(coreReactions, edgeReactions))
+
+        T = self.T.value_si
+        P = self.P.value_si
+
+        # Effective pressure of each reaction, as in calculate_effective_pressure()
+        Peff = P * numpy.ones(len(reactions), numpy.float64)
+        if self.pdepColliderReactionIndices is not None and self.pdepColliderReactionIndices.shape[0] > 0:
+            y0_coreSpecies = self.y0[:self.numCoreSpecies]
+            sum_core_species = numpy.sum(y0_coreSpecies)
+            for i in xrange(self.pdepColliderReactionIndices.shape[0]):
+                j = self.pdepColliderReactionIndices[i]
+                rxn = reactions[j]
+                if rxn.specificCollider is None:
+                    Peff[j] = P * numpy.sum(self.colliderEfficiencies[i]*y0_coreSpecies / sum_core_species)
+                else:
+                    Peff[j] = P * self.y0[self.speciesIndex[rxn.specificCollider]] / sum_core_species
+
+        stale = None
+        if coreSpecies is not None and edgeSpecies is not None and self.rateConditions == (T, P):
+            stale = self.get_stale_reaction_indices(reactions, list(itertools.chain(coreSpecies, edgeSpecies)))
+
+        if stale is None:
+            # The reaction indices follow the order of the core and edge reactions
+            if self.batchKinetics is None or not self.batchKinetics.isValid(reactions):
+                self.batchKinetics = BatchKineticsEvaluator(reactions)
+            self.kf[:len(reactions)] = self.batchKinetics.getRateCoefficients(T, Peff)
+
+            reversible = numpy.array([j for j, rxn in enumerate(reactions) if rxn.reversible], numpy.int)
+            if reversible.shape[0] > 0:
+                self.Keq[reversible] = self.batchKinetics.getEquilibriumConstants(T, reversible)
+                self.kb[reversible] = self.kf[reversible] / self.Keq[reversible]
+        elif stale.shape[0] > 0:
+            batchKinetics = BatchKineticsEvaluator([reactions[j] for j in stale])
+            self.kf[stale] = batchKinetics.getRateCoefficients(T, Peff[stale])
+
+            reversible = numpy.array([i for i, j in enumerate(stale) if reactions[j].reversible], numpy.int)
+            if reversible.shape[0] > 0:
+                self.Keq[stale[reversible]] = batchKinetics.getEquilibriumConstants(T, reversible)
+                self.kb[stale[reversible]] = self.kf[stale[reversible]] / self.Keq[stale[reversible]]
+
+        if coreSpecies is not None and edgeSpecies is not None:
+            self.rateConditions = (T, P)
+            self.reactionKinetics = [rxn.kinetics for rxn in reactions]
+            self.speciesThermo = [spec.thermo for spec in itertools.chain(coreSpecies, edgeSpecies)]
+        else:
+            self.rateConditions = None
 
-            if rxn.reversible:
-                self.Keq[j] = rxn.getEquilibriumConstant(self.T.value_si)
-                self.kb[j] = self.kf[j] / self.Keq[j]
+    def get_stale_reaction_indices(self, list reactions, list species):
+        """
+        Return an array of the indices of the `reactions` whose rate
+        coefficients can not be carried over from the previous initialization
+        of the model, or ``None`` if none of them can.
+        """
+        cdef numpy.ndarray[numpy.int_t, ndim=1] reactionPermutation, speciesPermutation
+        cdef numpy.ndarray stale, changedSpecies
+        cdef list reactionKinetics, speciesThermo
+        cdef int i, j
+
+        reactionPermutation = self.reactionPermutation
+        speciesPermutation = self.speciesPermutation
+        reactionKinetics = self.reactionKinetics
+        speciesThermo = self.speciesThermo
+        if reactionPermutation is None or reactionKinetics is None or speciesThermo is None:
+            return None
+
+        stale = reactionPermutation < 0
+        for j in xrange(len(reactions)):
+            if not stale[j] and reactions[j].kinetics is not reactionKinetics[reactionPermutation[j]]:
+                stale[j] = True
+        # The effective pressure of reactions with collider efficiencies
+        # depends on the current core species
+        stale[self.pdepColliderReactionIndices] = True
+        stale[self.pdepSpecificColliderReactionIndices] = True
+
+        # Equilibrium constants depend on the thermo of the reactants and products
+        changedSpecies = numpy.zeros(len(species), bool)
+        for i in xrange(len(species)):
+            if speciesPermutation[i] >= 0 and species[i].thermo is not speciesThermo[speciesPermutation[i]]:
+                changedSpecies[i] = True
+        if changedSpecies.any():
+            changedSpecies = numpy.flatnonzero(changedSpecies)
+            stale |= numpy.in1d(self.reactantIndices, changedSpecies).reshape(-1, 3).any(axis=1)
+            stale |= numpy.in1d(self.productIndices, changedSpecies).reshape(-1, 3).any(axis=1)
+
+        return numpy.flatnonzero(stale)
                 
     def get_threshold_rate_constants(self, modelSettings):
         """
@@ -505,7 +635,11 @@ cdef class SimpleReactor(ReactionSystem):
         res = coreSpeciesRates * V 
         
         
-        if self.sensitivity:
+        if self.sensitivity and self.sparseSensitivity:
+            delta = numpy.zeros(len(y), numpy.float64)
+            delta[:numCoreSpecies] = res
+            delta[numCoreSpecies:] = self.sensitivity_residual_sparse(y)
+        elif self.sensitivity:
             delta = numpy.zeros(len(y), numpy.float64)
             delta[:numCoreSpecies] = res
             if self.jacobianMatrix is None:
@@ -1015,3 +1149,118 @@ cdef class SimpleReactor(ReactionSystem):
 
         self.jacobianMatrix = pd + cj * numpy.identity(numCoreSpecies, numpy.float64)
         return pd
+
+    @cython.boundscheck(False)
+    def jacobian_sparse(self, numpy.ndarray[numpy.float64_t, ndim=1] y):
+        """
+        Return the analytical Jacobian computed by :meth:`jacobian` (with
+        ``cj = 0``) in factored form ``(J, c)``, where `J` is a
+        :class:`scipy.sparse.csr_matrix` containing the derivatives with
+        respect to the reacting species and `c` is a dense vector such that
+        the full Jacobian is ``J + outer(c, ones)``. The rank-one term comes
+        from the dependence of the volume on the total number of moles at
+        constant pressure and would otherwise fill every column.
+        """
+        cdef numpy.ndarray[numpy.int_t, ndim=2] ir, ip, indices, others
+        cdef numpy.ndarray[numpy.float64_t, ndim=1] kf, kr, C, corr, vals, signs, rateCoefficients
+        cdef numpy.ndarray[numpy.int_t, ndim=1] rows, cols, species
+        cdef int numCoreReactions, numCoreSpecies, i, j, a, b, n, m, nnz, direction
+        cdef double k, V, Ctot, deriv, rate, corrTerm
+        
+        ir = self.reactantIndices
+        ip = self.productIndices
+
+        kf = self.kf
+        kr = self.kb
+        numCoreReactions = len(self.coreReactionRates)
+        numCoreSpecies = len(self.coreSpeciesConcentrations)
+        
+        V = constants.R * self.T.value_si * numpy.sum(y[:numCoreSpecies]) / self.P.value_si
+        
+        Ctot = self.P.value_si /(constants.R * self.T.value_si)
+
+        C = numpy.zeros_like(self.coreSpeciesConcentrations)
+        for j in xrange(numCoreSpecies):
+            C[j] = y[j] / V
+
+        corr = numpy.zeros(numCoreSpecies, numpy.float64)
+        # Each direction of a reaction has at most 3 reacting species, each
+        # with a derivative contributing to at most 6 rows
+        rows = numpy.zeros(36 * numCoreReactions, numpy.int)
+        cols = numpy.zeros(36 * numCoreReactions, numpy.int)
+        vals = numpy.zeros(36 * numCoreReactions, numpy.float64)
+        species = numpy.zeros(6, numpy.int)
+        signs = numpy.zeros(6, numpy.float64)
+        nnz = 0
+
+        for j in xrange(numCoreReactions):
+            for direction in xrange(2):
+                # The forward direction consumes the reactants and the reverse
+                # direction consumes the products
+                if direction == 0:
+                    k = kf[j]
+                    indices, others = ir, ip
+                else:
+                    k = kr[j]
+                    indices, others = ip, ir
+                n = 0
+                rate = k
+                for a in xrange(3):
+                    if indices[j,a] != -1:
+                        species[n] = indices[j,a]
+                        signs[n] = -1.0
+                        rate *= C[species[n]]
+                        n += 1
+                m = n
+                for a in xrange(3):
+                    if others[j,a] != -1:
+                        species[m] = others[j,a]
+                        signs[m] = 1.0
+                        m += 1
+                
+                for b in xrange(n):
+                    # Derivative with respect to the reacting species b
+                    deriv = k
+                    for a in xrange(n):
+                        if a != b:
+                            deriv *= C[species[a]]
+                    for i in xrange(m):
+                        rows[nnz] = species[i]
+                        cols[nnz] = species[b]
+                        vals[nnz] = signs[i] * deriv
+                        nnz += 1
+                
+                # Derivative with respect to the volume
+                corrTerm = - (n - 1) * rate / Ctot
+                for i in xrange(m):
+                    corr[species[i]] += signs[i] * corrTerm
+
+        return scipy.sparse.coo_matrix((vals[:nnz], (rows[:nnz], cols[:nnz])),
+            shape=(numCoreSpecies, numCoreSpecies)).tocsr(), corr
+
+    def sensitivity_residual_sparse(self, numpy.ndarray[numpy.float64_t, ndim=1] y):
+        """
+        Return the sensitivity part of the residual using the sparse
+        Jacobian from :meth:`jacobian_sparse` and the sparse rate derivatives
+        from :meth:`compute_rate_derivative_sparse`. This is equivalent to
+        the dense calculation in :meth:`residual`, but its cost scales with
+        the number of nonzero entries instead of the cube of the number of
+        core species. Unlike the dense calculation, the Jacobian is always
+        evaluated at the current state `y`. Must be called after the 
+        species concentrations are updated for `y`.
+        """
+        cdef numpy.ndarray[numpy.float64_t, ndim=2] S, sens
+        cdef int numCoreSpecies, numParameters
+        
+        numCoreSpecies = len(self.coreSpeciesConcentrations)
+        numParameters = len(self.coreReactionRates) + numCoreSpecies
+        
+        jacobian, corr = self.jacobian_sparse(y)
+        dgdk = self.compute_rate_derivative_sparse()
+        
+        # Row j of S holds the sensitivities of all species to parameter j
+        S = y[numCoreSpecies:].reshape((numParameters, numCoreSpecies))
+        sens = numpy.asarray(dgdk + jacobian.dot(S.T))
+        sens += numpy.outer(corr, S.sum(axis=1))
+        
+        return sens.T.ravel()
@@ -247,6 +247,145 @@ class SimpleReactorCheck(unittest.TestCase):
 #        pylab.show()
 
 
+    def testIncrementalInitialization(self):
+        """
+        Test that initializing the simple reactor again after the model was
+        enlarged gives the same indices and rate coefficients as initializing
+        a new reactor with the enlarged model.
+        """
+        CH4 = Species(
+            molecule=[Molecule().fromSMILES("C")],
+            thermo=ThermoData(Tdata=([300,400,500,600,800,1000,1500],"K"), Cpdata=([ 8.615, 9.687,10.963,12.301,14.841,16.976,20.528],"cal/(mol*K)"), H298=(-17.714,"kcal/mol"), S298=(44.472,"cal/(mol*K)"))
+            )
+        CH3 = Species(
+            molecule=[Molecule().fromSMILES("[CH3]")],
+            thermo=ThermoData(Tdata=([300,400,500,600,800,1000,1500],"K"), Cpdata=([ 9.397,10.123,10.856,11.571,12.899,14.055,16.195],"cal/(mol*K)"), H298=(  9.357,"kcal/mol"), S298=(45.174,"cal/(mol*K)"))
+            )
+        C2H6 = Species(
+            molecule=[Molecule().fromSMILES("CC")],
+            thermo=ThermoData(Tdata=([300,400,500,600,800,1000,1500],"K"), Cpdata=([12.684,15.506,18.326,20.971,25.500,29.016,34.595],"cal/(mol*K)"), H298=(-19.521,"kcal/mol"), S298=(54.799,"cal/(mol*K)"))
+            )
+        C2H5 = Species(
+            molecule=[Molecule().fromSMILES("C[CH2]")],
+            thermo=ThermoData(Tdata=([300,400,500,600,800,1000,1500],"K"), Cpdata=([11.635,13.744,16.085,18.246,21.885,24.676,29.107],"cal/(mol*K)"), H298=( 29.496,"kcal/mol"), S298=(56.687,"cal/(mol*K)"))
+            )
+        H2 = Species(
+            molecule=[Molecule().fromSMILES("[H][H]")],
+            thermo=ThermoData(Tdata=([300,400,500,600,800,1000,1500],"K"), Cpdata=([6.89,6.97,6.99,7.01,7.08,7.22,7.72],"cal/(mol*K)"), H298=( 0,"kcal/mol"), S298=(31.23,"cal/(mol*K)"))
+            )
+        H = Species(
+            molecule=[Molecule().fromSMILES("[H]")],
+            thermo=ThermoData(Tdata=([300,400,500,600,800,1000,1500],"K"), Cpdata=([4.97,4.97,4.97,4.97,4.97,4.97,4.97],"cal/(mol*K)"), H298=(52.1,"kcal/mol"), S298=(27.39,"cal/(mol*K)"))
+            )
+
+        rxn1 = Reaction(reactants=[CH3,CH3], products=[C2H6], kinetics=Arrhenius(A=(686.375*6,'m^3/(mol*s)'), n=4.40721, Ea=(7.82799,'kcal/mol'), T0=(298.15,'K')))
+        rxn2 = Reaction(reactants=[C2H6,CH3], products=[C2H5,CH4], kinetics=Arrhenius(A=(686.375*6,'m^3/(mol*s)'), n=4.40721, Ea=(7.82799,'kcal/mol'), T0=(298.15,'K')))
+        rxn3 = Reaction(reactants=[CH3,H2], products=[CH4,H], kinetics=Arrhenius(A=(1.0e3,'m^3/(mol*s)'), n=2.0, Ea=(10.0,'kcal/mol'), T0=(298.15,'K')))
+
+        T = 1000; P = 1.0e5
+        initialMoleFractions = {CH4: 0.4, CH3: 0.1, C2H6: 0.5}
+        rxnSystem = SimpleReactor(T, P, initialMoleFractions=initialMoleFractions, nSims=1, termination=[])
+        rxnSystem.initializeModel([CH4,CH3,C2H6], [rxn1], [C2H5,H2], [rxn2])
+
+        # Move C2H5 and its reaction to the core and add a new edge species and reaction
+        models = [([CH4,CH3,C2H6,C2H5], [rxn1,rxn2], [H,H2], [rxn3])]
+        # Change the kinetics of a reaction that is already in the model, then
+        # change the kinetics and thermo of existing objects in place, which
+        # requires the carried over rate coefficients to be reset
+        models.extend([models[0]] * 3)
+
+        for index, (coreSpecies, coreReactions, edgeSpecies, edgeReactions) in enumerate(models):
+            if index == 1:
+                rxn1.kinetics = Arrhenius(A=(1.0e6,'m^3/(mol*s)'), n=0.0, Ea=(0.0,'kcal/mol'), T0=(1,'K'))
+            elif index == 2:
+                rxn3.kinetics.changeRate(2.0)
+                rxnSystem.resetRateCoefficients()
+            elif index == 3:
+                H.thermo.H298.value_si += 4000.0
+                rxnSystem.resetRateCoefficients()
+            rxnSystem.initializeModel(coreSpecies, coreReactions, edgeSpecies, edgeReactions)
+            if index == 0:
+                self.assertEqual(list(rxnSystem.speciesPermutation), [0, 1, 2, 3, -1, 4])
+                self.assertEqual(list(rxnSystem.reactionPermutation), [0, 1, -1])
+
+            newSystem = SimpleReactor(T, P, initialMoleFractions=initialMoleFractions, nSims=1, termination=[])
+            newSystem.initializeModel(coreSpecies, coreReactions, edgeSpecies, edgeReactions)
+
+            for attribute in ['reactantIndices', 'productIndices', 'kf', 'kb', 'Keq']:
+                self.assertTrue(numpy.allclose(getattr(rxnSystem, attribute), getattr(newSystem, attribute), rtol=1e-12, atol=0))
+
+        self.assertEqual(list(rxnSystem.speciesPermutation), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(list(rxnSystem.reactionPermutation), [0, 1, 2])
+        self.assertEqual(rxnSystem.speciesIndex[H], 4)
+
+    def testAddReactionThresholds(self):
+        """
+        Test that the sets of species pairs and triples above the reaction
+        thresholds are the same as found by checking every combination.
+        """
+        numpy.random.seed(0)
+        concentrations = 10 ** numpy.random.uniform(-6, 1, 12)
+        concentrations[3] = 0.0
+        concentrations[7] = -1e-20
+        values = (1e-1, 1e-2, 1e-3)
+
+        rxnSystem = SimpleReactor(1000, 1e5, initialMoleFractions={}, nSims=1, termination=[])
+        rxnSystem.trimolecular = True
+        rxnSystem.unimolecularThreshold = numpy.zeros(len(concentrations), bool)
+        rxnSystem.bimolecularThreshold = set()
+        rxnSystem.trimolecularThreshold = set()
+        rxnSystem.add_reaction_thresholds(concentrations, *values)
+
+        n = len(concentrations)
+        c = numpy.maximum(concentrations, 0.0)
+        self.assertEqual(list(rxnSystem.unimolecularThreshold), list(c > values[0]))
+        self.assertEqual(rxnSystem.bimolecularThreshold,
+                         set([(i, j) for i in range(n) for j in range(i, n) if c[i] * c[j] > values[1]]))
+        self.assertEqual(rxnSystem.trimolecularThreshold,
+                         set([(i, j, k) for i in range(n) for j in range(i, n) for k in range(j, n)
+                              if c[i] * c[j] * c[k] > values[2]]))
+        self.assertTrue(0 < len(rxnSystem.trimolecularThreshold) < n * (n + 1) * (n + 2) / 6)
+
+    def testSparseSensitivityResidual(self):
+        """
+        Test that the sparse evaluation of the sensitivity residual matches
+        the dense evaluation for unimolecular, bimolecular and trimolecular
+        reactions, including reactions with identical reactants.
+        """
+        thermo = ThermoData(Tdata=([300,400,500,600,800,1000,1500],"K"), Cpdata=([ 8.615, 9.687,10.963,12.301,14.841,16.976,20.528],"cal/(mol*K)"), H298=(-17.714,"kcal/mol"), S298=(44.472,"cal/(mol*K)"))
+        CH4 = Species(molecule=[Molecule().fromSMILES("C")], thermo=thermo)
+        CH3 = Species(molecule=[Molecule().fromSMILES("[CH3]")], thermo=thermo)
+        C2H6 = Species(molecule=[Molecule().fromSMILES("CC")], thermo=thermo)
+        C2H5 = Species(molecule=[Molecule().fromSMILES("C[CH2]")], thermo=thermo)
+        H2 = Species(molecule=[Molecule().fromSMILES("[H][H]")], thermo=thermo)
+        
+        coreSpecies = [CH4,CH3,C2H6,C2H5,H2]
+        coreReactions = [
+            Reaction(reactants=[C2H6], products=[CH3,CH3], kinetics=Arrhenius(A=(686.375e6,'1/s'), n=4.40721, Ea=(7.82799,'kcal/mol'), T0=(298.15,'K'))),
+            Reaction(reactants=[C2H6,CH3], products=[C2H5,CH4], kinetics=Arrhenius(A=(46.375*6,'m^3/(mol*s)'), n=3.40721, Ea=(6.82799,'kcal/mol'), T0=(298.15,'K'))),
+            Reaction(reactants=[C2H6,CH3,CH3], products=[C2H5,C2H5,H2], kinetics=Arrhenius(A=(146.375*6,'m^6/(mol^2*s)'), n=2.40721, Ea=(8.82799,'kcal/mol'), T0=(298.15,'K'))),
+            Reaction(reactants=[C2H6,C2H6], products=[CH3,CH4,C2H5], kinetics=Arrhenius(A=(1246.375*6,'m^3/(mol*s)'), n=0.40721, Ea=(8.82799,'kcal/mol'), T0=(298.15,'K'))),
+        ]
+        
+        T = 1000; P = 1.0e5
+        rxnSystem = SimpleReactor(T, P, initialMoleFractions={CH4:0.2,CH3:0.1,C2H6:0.35,C2H5:0.15,H2:0.2}, nSims=1, termination=[])
+        rxnSystem.initializeModel(coreSpecies, coreReactions, [], [], sensitivity=True)
+        
+        numpy.random.seed(0)
+        y = rxnSystem.y.copy()
+        y[len(coreSpecies):] = numpy.random.rand(len(y) - len(coreSpecies))
+        dydt = numpy.zeros(y.shape)
+        
+        rxnSystem.jacobianMatrix = None
+        rxnSystem.sparseSensitivity = False
+        dense = rxnSystem.residual(0.0, y, dydt)[0]
+        rxnSystem.sparseSensitivity = True
+        sparse = rxnSystem.residual(0.0, y, dydt)[0]
+        
+        self.assertEqual(dense.shape, sparse.shape)
+        for i in range(len(dense)):
+            self.assertAlmostEqual(dense[i], sparse[i], delta=1e-10*max(abs(dense[i]), 1.0))
+
     def testColliderModel(self):
         """
         Test the solver's ability to simulate a model with collision efficiencies.
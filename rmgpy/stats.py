@@ -30,6 +30,7 @@
 
 import os.path
 import logging
+import json
 try:
     import xlwt
 except ImportError:
@@ -41,6 +42,45 @@ except ImportError:
 import matplotlib.pyplot as plt
 
 from rmgpy.util import makeOutputSubdirectory
+from rmgpy.molecule.vf2 import getIsomorphismCounts
+import rmgpy.timing as timing
+import rmgpy.thermo.thermoengine as thermoengine
+import rmgpy.pdep.network as pdepnetwork
+
+def getExecutionCounters(rmg):
+    """
+    Return a dict of the counters of the RMG job `rmg` recorded in this
+    process: those incremented with :func:`rmgpy.timing.count`, the number of
+    VF2 isomorphism evaluations and searches, and the hits and misses of the
+    thermo, tree descent and microcanonical caches in use.
+    """
+    counters = dict(timing.statistics.counters)
+
+    counters['isomorphism/calls'], counters['isomorphism/searches'] = getIsomorphismCounts()
+
+    cache = thermoengine.thermoCache
+    if cache is not None:
+        counters['thermo cache/hits'] = cache.hits
+        counters['thermo cache/misses'] = cache.misses
+
+    database = getattr(rmg, 'database', None)
+    if database is not None:
+        for groups in database.getGroupDatabases():
+            cache = groups.descendCache
+            if cache is not None:
+                counters['descent cache/{0}/hits'.format(groups.label)] = cache.hits
+                counters['descent cache/{0}/misses'.format(groups.label)] = cache.misses
+                counters['descent cache/{0}/skipped'.format(groups.label)] = cache.skipped
+
+    cache = pdepnetwork.microcanonicalCache
+    if cache is not None:
+        counters['microcanonical cache/density hits'] = cache.densityHits
+        counters['microcanonical cache/density misses'] = cache.densityMisses
+        counters['microcanonical cache/rate hits'] = cache.rateHits
+        counters['microcanonical cache/rate misses'] = cache.rateMisses
+
+    return counters
+
 
 class ExecutionStatsWriter(object):
     """
@@ -51,6 +91,11 @@ class ExecutionStatsWriter(object):
     It also generates a number of images with information on the core/edge
     species/reaction evolutions through the course of an RMG simulation.
 
+    The time spent in each phase of the job recorded by :mod:`rmgpy.timing`
+    and the counters returned by :func:`getExecutionCounters` are written
+    after each iteration to the file `statistics.json`, next to the
+    spreadsheet.
+
     Files are written to the 'plot' subfolder.
 
 
@@ -80,6 +125,7 @@ class ExecutionStatsWriter(object):
         self.edgeReactionCount = []
         self.restartSize = []
         self.memoryUse = []
+        self.records = []
     
     def update(self, rmg):
         self.update_execution(rmg)
@@ -114,12 +160,37 @@ class ExecutionStatsWriter(object):
             logging.info('    Restart file size: %.2f MB' % (self.restartSize[-1]))
         else:
             self.restartSize.append(0.0)
+        self.savePhaseStatistics(rmg)
         self.saveExecutionStatistics(rmg)
         if rmg.generatePlots:
             self.generateExecutionPlots(rmg)
 
         logging.info('')
 
+    def savePhaseStatistics(self, rmg):
+        """
+        Append a record of the current iteration to those of the previous ones
+        and save them to the file `statistics.json` in the output directory.
+        Each record holds the model size, the memory used, the execution time
+        and the total time and number of calls of each phase and the value of
+        each counter since the start of the job, so the cost of an iteration
+        is the difference between its record and the previous one.
+        """
+        self.records.append({
+            'iteration': len(self.records) + 1,
+            'executionTime': rmg.execTime[-1],
+            'coreSpecies': self.coreSpeciesCount[-1],
+            'coreReactions': self.coreReactionCount[-1],
+            'edgeSpecies': self.edgeSpeciesCount[-1],
+            'edgeReactions': self.edgeReactionCount[-1],
+            'memoryUse': self.memoryUse[-1],
+            'phases': timing.statistics.getPhases(),
+            'counters': getExecutionCounters(rmg),
+        })
+        path = os.path.join(rmg.outputDirectory, 'statistics.json')
+        with open(path, 'w') as f:
+            json.dump(self.records, f, indent=1, sort_keys=True)
+
     def saveExecutionStatistics(self, rmg):
         """
         Save the statistics of the RMG job to an Excel spreadsheet for easy viewing
@@ -36,6 +36,7 @@ import unittest
 import os
 import os.path
 import shutil
+import json
 
 from rmgpy.rmg.main import RMG, CoreEdgeReactionModel
 
@@ -76,5 +77,23 @@ class TestExecutionStatsWriter(unittest.TestCase):
 
         self.assertTrue(os.path.isfile(statsfile))
 
+    def test_save_phase_statistics(self):
+        """
+        Tests if a record of the phase statistics is saved for each update.
+        """
+        folder = self.rmg.outputDirectory
+
+        writer = ExecutionStatsWriter(folder)
+        writer.update(self.rmg)
+        writer.update(self.rmg)
+
+        with open(os.path.join(folder, 'statistics.json')) as f:
+            records = json.load(f)
+
+        self.assertEqual([record['iteration'] for record in records], [1, 2])
+        self.assertEqual(records[-1]['coreSpecies'], 0)
+        self.assertIn('save', records[-1]['phases'])
+        self.assertIn('isomorphism/calls', records[-1]['counters'])
+
     def tearDown(self):
         shutil.rmtree(self.rmg.outputDirectory)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG - Reaction Mechanism Generator                                          #
+#                                                                             #
+# Copyright (c) 2002-2019 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This module contains the :class:`BatchThermoEvaluator` class, which evaluates
+the thermodynamic properties of many species at once using numpy arrays.
+"""
+
+import numpy
+
+import rmgpy.constants as constants
+from rmgpy.thermo.nasa import NASA
+
+
+class BatchThermoEvaluator(object):
+    """
+    Evaluates the Gibbs free energies of a list of species in a single
+    vectorized pass. The coefficients of species with :class:`NASA` thermo
+    are packed into contiguous arrays when the evaluator is created, and the
+    free energies of all other species are computed with
+    :meth:`Species.getFreeEnergy`. The attributes are:
+
+    =================== ========================================================
+    Attribute           Description
+    =================== ========================================================
+    `speciesList`       The list of species to evaluate
+    `thermo`            The thermo object of each species when the evaluator was created
+    `nasaIndices`       The positions in `speciesList` of the species with NASA thermo
+    `coeffs`            An array of the nine NASA coefficients of up to three polynomials per species
+    `Tmin`              An array of the minimum temperature of each polynomial in K
+    `Tmax`              An array of the maximum temperature of each polynomial in K
+    `otherIndices`      The positions in `speciesList` of the remaining species
+    =================== ========================================================
+
+    Polynomials that are missing have an empty temperature range, so they are
+    never selected.
+    """
+
+    def __init__(self, speciesList):
+        self.speciesList = list(speciesList)
+        self.thermo = [spec.getThermoData() if spec.hasThermo() else None for spec in self.speciesList]
+
+        nasaIndices, otherIndices, polynomials = [], [], []
+        for i, thermo in enumerate(self.thermo):
+            if isinstance(thermo, NASA):
+                nasaIndices.append(i)
+                polynomials.append([thermo.poly1, thermo.poly2, thermo.poly3])
+            else:
+                otherIndices.append(i)
+
+        self.nasaIndices = numpy.array(nasaIndices, numpy.int)
+        self.otherIndices = numpy.array(otherIndices, numpy.int)
+        self.coeffs = numpy.zeros((len(nasaIndices), 3, 9), numpy.float64)
+        self.Tmin = numpy.inf * numpy.ones((len(nasaIndices), 3), numpy.float64)
+        self.Tmax = -numpy.inf * numpy.ones((len(nasaIndices), 3), numpy.float64)
+        for i, polys in enumerate(polynomials):
+            for j, poly in enumerate(polys):
+                if poly is None:
+                    continue
+                self.coeffs[i, j, :] = [poly.cm2, poly.cm1, poly.c0, poly.c1, poly.c2, poly.c3, poly.c4, poly.c5, poly.c6]
+                self.Tmin[i, j] = poly.Tmin.value_si if poly.Tmin is not None else -numpy.inf
+                self.Tmax[i, j] = poly.Tmax.value_si if poly.Tmax is not None else numpy.inf
+
+    def isValid(self):
+        """
+        Return ``True`` if the thermo of every species is still the object
+        that was packed when the evaluator was created, or ``False`` if not.
+        """
+        for spec, thermo in zip(self.speciesList, self.thermo):
+            if spec.thermo is not thermo:
+                return False
+        return True
+
+    def getFreeEnergies(self, T):
+        """
+        Return an array of the Gibbs free energies in J/mol of all species at
+        the temperature `T` in K. The free energy of a species is NaN if it
+        cannot be evaluated at `T`, e.g. if none of its NASA polynomials is
+        valid at that temperature.
+        """
+        G = numpy.zeros(len(self.speciesList), numpy.float64)
+
+        if self.nasaIndices.shape[0] > 0:
+            # Select the first valid polynomial of each species, as in NASA.selectPolynomial()
+            valid = (self.Tmin <= T) & (T <= self.Tmax)
+            select = numpy.argmax(valid, axis=1)
+            rows = numpy.arange(self.nasaIndices.shape[0])
+            cm2, cm1, c0, c1, c2, c3, c4, c5, c6 = self.coeffs[rows, select, :].T
+            T2 = T * T
+            T4 = T2 * T2
+            H = ((-cm2 / T + cm1 * numpy.log(T)) / T + c0 + c1*T/2. + c2*T2/3. + c3*T2*T/4. + c4*T4/5. + c5/T) * constants.R * T
+            S = ((-cm2 / T / 2. - cm1) / T + c0*numpy.log(T) + c1*T + c2*T2/2. + c3*T2*T/3. + c4*T4/4. + c6) * constants.R
+            G[self.nasaIndices] = numpy.where(valid[rows, select], H - T * S, numpy.nan)
+
+        for i in self.otherIndices:
+            try:
+                G[i] = self.speciesList[i].getFreeEnergy(T)
+            except Exception:
+                G[i] = numpy.nan
+
+        return G
@@ -30,6 +30,12 @@
 
 import numpy
 import math
+import os
+import copy
+import hashlib
+import itertools
+import sqlite3
+import cPickle
 
 import logging as logging
 from rmgpy.scoop_framework.util import submit_
@@ -39,6 +45,192 @@ from rmgpy.molecule import Molecule
 from rmgpy.statmech import Conformer
 from rmgpy.thermo import Wilhoit, NASA, ThermoData
 import rmgpy.data.rmg
+from rmgpy.timing import timed
+
+# The cache of estimated thermo used by evaluator(), if any
+thermoCache = None
+
+################################################################################
+
+class ThermoCache(object):
+    """
+    A cache of estimated thermo data, keyed by the augmented InChI of the
+    species and the solvent (see :func:`getThermoKey`). Entries are kept in
+    memory for the current job and, if a `path` is given, in an SQLite
+    database file that can be shared between jobs. Entries in the file are
+    stored together with a hash of the databases they were estimated with
+    (see :func:`getDatabaseHash`), so that entries made with other thermo
+    data are never returned. The attributes are:
+
+    =================== ========================================================
+    Attribute           Description
+    =================== ========================================================
+    `path`              The path of the SQLite database file, or ``None`` to only cache in memory
+    `databaseHash`      A string identifying the databases the entries were estimated with
+    `entries`           A dictionary of the entries that have been loaded or stored in memory
+    `hits`              The number of lookups that were found in the cache
+    `misses`            The number of lookups that were not found in the cache
+    =================== ========================================================
+
+    Each entry is a tuple of the thermo data, the ground-state energy `E0` set
+    on the species conformer, and the adjacency lists of the resonance
+    structures of the species in the order left by the estimation.
+    """
+
+    def __init__(self, path=None, databaseHash=''):
+        self.path = path
+        self.databaseHash = databaseHash
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+
+    def getConnection(self):
+        """
+        Return the connection to the SQLite database file, opening it if
+        necessary. Returns ``None`` if there is no file, or if called in a
+        process forked after the connection was opened, since an SQLite
+        connection cannot be shared with child processes.
+        """
+        if self.path is None:
+            return None
+        if self._connection is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute('CREATE TABLE IF NOT EXISTS thermo '
+                                     '(key TEXT, database TEXT, data BLOB, PRIMARY KEY (key, database))')
+            self._connection.commit()
+            self._pid = os.getpid()
+        elif self._pid != os.getpid():
+            return None
+        return self._connection
+
+    def __contains__(self, key):
+        """
+        Return ``True`` if there is an entry for `key` in memory or in the
+        database file, without counting it as a lookup.
+        """
+        if key in self.entries:
+            return True
+        connection = self.getConnection()
+        if connection is None:
+            return False
+        row = connection.execute('SELECT data FROM thermo WHERE key=? AND database=?',
+                                 (key, self.databaseHash)).fetchone()
+        if row is None:
+            return False
+        self.entries[key] = cPickle.loads(str(row[0]))
+        return True
+
+    def get(self, key):
+        """
+        Return a copy of the thermo data, the ground-state energy and the
+        resonance structure adjacency lists stored for `key`, or ``None`` if
+        there is no entry for `key`.
+        """
+        if key not in self:
+            self.misses += 1
+            return None
+        self.hits += 1
+        thermo, E0, structures = self.entries[key]
+        return copy.deepcopy(thermo), copy.deepcopy(E0), structures
+
+    def set(self, key, thermo, E0, structures, commit=True):
+        """
+        Store the `thermo` data, ground-state energy `E0` and resonance
+        structure adjacency lists `structures` for `key`. Set `commit` to
+        ``False`` to delay writing to the database file until :meth:`commit`
+        is called, which is much faster when storing many entries.
+        """
+        self.entries[key] = (copy.deepcopy(thermo), copy.deepcopy(E0), structures)
+        connection = self.getConnection()
+        if connection is not None:
+            data = cPickle.dumps(self.entries[key], cPickle.HIGHEST_PROTOCOL)
+            connection.execute('INSERT OR REPLACE INTO thermo VALUES (?, ?, ?)',
+                               (key, self.databaseHash, sqlite3.Binary(data)))
+            if commit:
+                connection.commit()
+
+    def commit(self):
+        """
+        Write the stored entries to the database file.
+        """
+        connection = self.getConnection()
+        if connection is not None:
+            connection.commit()
+
+    def close(self):
+        """
+        Write the stored entries to the database file and close it.
+        """
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.commit()
+            self._connection.close()
+        self._connection = None
+
+
+def setThermoCache(cache):
+    """
+    Set the :class:`ThermoCache` used by :func:`evaluator` and
+    :func:`submitBatch` to `cache`, or turn off caching if `cache` is ``None``.
+    """
+    global thermoCache
+    thermoCache = cache
+
+
+def getThermoKey(spc, solventName=''):
+    """
+    Return the key used to store the thermo of species `spc` in solvent
+    `solventName` in a :class:`ThermoCache`, or ``None`` if no canonical
+    identifier can be generated for the species.
+    """
+    try:
+        identifier = spc.molecule[0].toAugmentedInChI()
+    except Exception:
+        return None
+    if not identifier:
+        return None
+    return '{0} {1}'.format(identifier, solventName) if solventName else identifier
+
+
+def getDatabaseHash(*databases):
+    """
+    Return a hash of the entries of the libraries and groups of the given
+    thermo or solvation `databases`, together with the RMG version. The hash
+    changes whenever an entry, its structure, its position in a tree or the
+    order of the libraries changes.
+    """
+    from rmgpy import __version__
+    sha = hashlib.sha1(__version__)
+    for database in databases:
+        if database is None:
+            continue
+        libraries = getattr(database, 'libraries', {})
+        for label in getattr(database, 'libraryOrder', None) or sorted(libraries):
+            sha.update('library {0}\n'.format(label))
+            _updateDatabaseHash(sha, libraries[label])
+        groups = getattr(database, 'groups', {})
+        for label in sorted(groups):
+            sha.update('groups {0}\n'.format(label))
+            _updateDatabaseHash(sha, groups[label])
+    return sha.hexdigest()
+
+
+def _updateDatabaseHash(sha, database):
+    """
+    Add the entries of the library or group `database` to the hash `sha`.
+    """
+    for label in sorted(database.entries):
+        entry = database.entries[label]
+        try:
+            item = entry.item.toAdjacencyList()
+        except AttributeError:
+            item = repr(entry.item)
+        sha.update('{0}\n{1}\n{2!r}\n{3}\n'.format(label, item, entry.data,
+                                                   entry.parent.label if entry.parent is not None else ''))
 
 def processThermoData(spc, thermo0, thermoClass=NASA, solventName = ''):
     """
@@ -171,10 +363,96 @@ def evaluator(spc, solventName = ''):
     logging.debug("Evaluating spc %s ", spc)
 
     spc.generate_resonance_structures()
+
+    key = getThermoKey(spc, solventName) if thermoCache is not None else None
+    if key is not None:
+        entry = thermoCache.get(key)
+        if entry is not None:
+            thermo, E0, structures = entry
+            applyCachedThermo(spc, E0, structures)
+            return thermo
+
     thermo = generateThermoData(spc,solventName=solventName)
 
+    if key is not None and thermo is not None:
+        thermoCache.set(key, thermo, spc.conformer.E0 if spc.conformer is not None else None,
+                        [mol.toAdjacencyList() for mol in spc.molecule])
+
     return thermo
 
+def applyCachedThermo(spc, E0, structures):
+    """
+    Reproduce the side effects of estimating the thermo of `spc` for a cached
+    entry: set the ground-state energy `E0` of its conformer and reorder its
+    resonance structures to match the adjacency lists `structures`.
+    """
+    if E0 is not None:
+        if spc.conformer is None:
+            spc.conformer = Conformer()
+        spc.conformer.E0 = E0
+
+    ordered, remaining = [], list(spc.molecule)
+    for adjlist in structures:
+        reference = Molecule().fromAdjacencyList(adjlist)
+        for mol in remaining:
+            if mol.isIsomorphic(reference):
+                ordered.append(mol)
+                remaining.remove(mol)
+                break
+    spc.molecule = ordered + remaining
+
+def estimateThermo(args):
+    """
+    Module-level function passed to the worker processes of
+    :func:`submitBatch`.
+
+    Generates the thermo of the species in the (species, solventName) tuple
+    `args` and returns it together with the resulting ground-state energy
+    and the adjacency lists of the resonance structures.
+    """
+    spc, solventName = args
+    spc.generate_resonance_structures()
+    thermo = generateThermoData(spc, solventName=solventName)
+    E0 = spc.conformer.E0 if spc.conformer is not None else None
+    return thermo, E0, [mol.toAdjacencyList() for mol in spc.molecule]
+
+@timed('thermo')
+def submitBatch(speciesList, solventName='', pool=None):
+    """
+    Estimate the thermo of all species in `speciesList` ahead of time and
+    store it in the thermo cache, so that a later :func:`submit` for any of
+    these species only has to look it up. Species are identified by
+    :func:`getThermoKey`, so each distinct species is estimated once, and
+    species that are already cached are skipped. If a multiprocessing `pool`
+    is given, the estimates are made by its worker processes.
+
+    Does nothing if no thermo cache has been set.
+    """
+    if thermoCache is None:
+        return
+
+    keys, tasks, seen = [], [], set()
+    for spc in speciesList:
+        key = getThermoKey(spc, solventName)
+        if key is None or key in seen or key in thermoCache:
+            continue
+        seen.add(key)
+        keys.append(key)
+        tasks.append((spc, solventName))
+    if not tasks:
+        return
+
+    logging.debug('Estimating thermo of {0:d} new species'.format(len(tasks)))
+    if pool is None:
+        results = itertools.imap(estimateThermo, tasks)
+    else:
+        results = pool.imap(estimateThermo, tasks, chunksize=4)
+    for key, (thermo, E0, structures) in itertools.izip(keys, results):
+        if thermo is not None:
+            thermoCache.set(key, thermo, E0, structures, commit=False)
+    thermoCache.commit()
+
+@timed('thermo')
 def submit(spc, solventName = ''):
     """
     Submits a request to calculate chemical data for the Species object.
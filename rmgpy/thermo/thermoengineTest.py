@@ -34,6 +34,8 @@ This module contains unit tests of the rmgpy.parallel module.
 
 import os
 import sys
+import shutil
+import tempfile
 import unittest
 import random
 from external.wip import work_in_progress
@@ -44,7 +46,9 @@ from rmgpy.rmg.main import RMG
 from rmgpy.scoop_framework.framework import TestScoopCommon
 
 from rmgpy.species import Species
-from rmgpy.thermo.thermoengine import submit
+from rmgpy.thermo import ThermoData
+from rmgpy.thermo.thermoengine import submit, submitBatch, setThermoCache, ThermoCache, getThermoKey
+import rmgpy.thermo.thermoengine as thermoengine
 
 try:
     from scoop import futures, _control, shared
@@ -138,6 +142,82 @@ def funcSubmitGet():
 
     return True
 
+class ThermoCacheTest(unittest.TestCase):
+    """
+    Contains unit tests of the ThermoCache class and the batch thermo estimation.
+    """
+
+    def setUp(self):
+        """
+        A function run before each unit test in this class.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'thermo_cache.db')
+        self.thermo = ThermoData(Tdata=([300,400,500,600,800,1000,1500],'K'),
+                                 Cpdata=([3.0,4.0,5.0,6.0,8.0,10.0,15.0],'cal/(mol*K)'),
+                                 H298=(-2.0,'kcal/mol'), S298=(50.0,'cal/(mol*K)'))
+
+    def tearDown(self):
+        """
+        A function run after each unit test in this class.
+        """
+        setThermoCache(None)
+        shutil.rmtree(self.directory)
+
+    def testGetAndSet(self):
+        """
+        Test that entries are returned as copies and lookups are counted.
+        """
+        cache = ThermoCache()
+        self.assertIsNone(cache.get('InChI=1S/CH4/h1H4'))
+        cache.set('InChI=1S/CH4/h1H4', self.thermo, None, ['adjlist'])
+        thermo, E0, structures = cache.get('InChI=1S/CH4/h1H4')
+        self.assertIsNot(thermo, self.thermo)
+        self.assertAlmostEqual(thermo.H298.value_si, self.thermo.H298.value_si)
+        self.assertIsNone(E0)
+        self.assertEqual(structures, ['adjlist'])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def testPersistence(self):
+        """
+        Test that entries are shared between caches using the same file and database hash only.
+        """
+        cache = ThermoCache(self.path, 'hash1')
+        cache.set('InChI=1S/CH4/h1H4', self.thermo, None, [])
+        cache.close()
+
+        cache = ThermoCache(self.path, 'hash1')
+        self.assertIn('InChI=1S/CH4/h1H4', cache)
+        thermo = cache.get('InChI=1S/CH4/h1H4')[0]
+        self.assertAlmostEqual(thermo.S298.value_si, self.thermo.S298.value_si)
+        cache.close()
+
+        cache = ThermoCache(self.path, 'hash2')
+        self.assertNotIn('InChI=1S/CH4/h1H4', cache)
+        cache.close()
+
+    def testSubmitBatch(self):
+        """
+        Test that batch estimates are used when the thermo of a species is generated.
+        """
+        load()
+        setThermoCache(ThermoCache())
+        spcs = [Species().fromSMILES('CC'), Species().fromSMILES('CC'), Species().fromSMILES('[CH2]C=C')]
+        submitBatch(spcs)
+        self.assertEqual(len(thermoengine.thermoCache.entries), 2)
+
+        spc = Species().fromSMILES('[CH2]C=C')
+        submit(spc)
+        self.assertEqual(thermoengine.thermoCache.hits, 1)
+
+        setThermoCache(None)
+        reference = Species().fromSMILES('[CH2]C=C')
+        submit(reference)
+        self.assertAlmostEqual(spc.thermo.getFreeEnergy(1000), reference.thermo.getFreeEnergy(1000), 6)
+        self.assertAlmostEqual(spc.conformer.E0.value_si, reference.conformer.E0.value_si, 6)
+        self.assertEqual([mol.toSMILES() for mol in spc.molecule],
+                         [mol.toSMILES() for mol in reference.molecule])
+
 @work_in_progress
 class AsyncThermoTest(TestScoopCommon):
 
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG - Reaction Mechanism Generator                                          #
+#                                                                             #
+# Copyright (c) 2002-2019 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+
+"""
+This module contains a light-weight way of measuring where an RMG job spends
+its time. Code is divided into named phases using the :func:`phase` context
+manager or the :func:`timed` decorator. Phases may be nested, in which case
+they are recorded under the path of the enclosing phases joined by slashes,
+e.g. ``enlarge/react/H_Abstraction``. Named events are counted with
+:func:`count`.
+
+The totals are kept for the whole job in the module-level
+:class:`PhaseStatistics` object ``statistics``, which is written out after
+each iteration by :class:`rmgpy.stats.ExecutionStatsWriter`. Phases entered
+in worker processes are first recorded in the worker's copy of the
+statistics. A worker task wrapped in :func:`startWorkerRecording` and
+:func:`stopWorkerRecording` returns what it recorded, together with its VF2
+isomorphism counts, and the parent process adds these to its own totals with
+:func:`mergeWorkerRecords`. The times of phases run by several workers at
+once are summed, so they can add up to more than the time of the enclosing
+phase in the parent process.
+"""
+
+import time
+import functools
+
+################################################################################
+
+class PhaseStatistics(object):
+    """
+    The accumulated wall-clock time and number of calls of each phase, and
+    the value of each counter. The attributes are:
+
+    =================== ========================================================
+    Attribute           Description
+    =================== ========================================================
+    `times`             A dict of the total time in s spent in each phase, keyed by phase path
+    `calls`             A dict of the number of times each phase was entered, keyed by phase path
+    `counters`          A dict of the value of each counter, keyed by name
+    `stack`             The paths of the phases currently entered, innermost last
+    =================== ========================================================
+
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.calls = {}
+        self.counters = {}
+        self.stack = []
+
+    def reset(self):
+        """
+        Discard all recorded phase times and counters.
+        """
+        self.times = {}
+        self.calls = {}
+        self.counters = {}
+        self.stack = []
+
+    def add(self, path, elapsed):
+        """
+        Record one call of the phase at `path` that took `elapsed` seconds.
+        """
+        self.times[path] = self.times.get(path, 0.0) + elapsed
+        self.calls[path] = self.calls.get(path, 0) + 1
+
+    def count(self, name, n=1):
+        """
+        Increment the counter `name` by `n`.
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def copy(self):
+        """
+        Return a copy of the recorded phase times and counters.
+        """
+        other = PhaseStatistics()
+        other.times = dict(self.times)
+        other.calls = dict(self.calls)
+        other.counters = dict(self.counters)
+        other.stack = list(self.stack)
+        return other
+
+    def difference(self, previous):
+        """
+        Return a :class:`PhaseStatistics` of the phase times and counters
+        recorded since the copy `previous` of these statistics was made.
+        """
+        other = PhaseStatistics()
+        for path, calls in self.calls.iteritems():
+            calls -= previous.calls.get(path, 0)
+            if calls > 0:
+                other.calls[path] = calls
+                other.times[path] = self.times[path] - previous.times.get(path, 0.0)
+        for name, value in self.counters.iteritems():
+            value -= previous.counters.get(name, 0)
+            if value != 0:
+                other.counters[name] = value
+        return other
+
+    def merge(self, other):
+        """
+        Add the phase times and counters recorded in the :class:`PhaseStatistics`
+        `other` to these statistics.
+        """
+        for path, elapsed in other.times.iteritems():
+            self.times[path] = self.times.get(path, 0.0) + elapsed
+            self.calls[path] = self.calls.get(path, 0) + other.calls[path]
+        for name, value in other.counters.iteritems():
+            self.count(name, value)
+
+    def getPhases(self):
+        """
+        Return a dict of the total time and number of calls of each phase,
+        keyed by phase path, in a form that can be serialized as JSON.
+        """
+        return dict((path, {'time': self.times[path], 'calls': self.calls[path]}) for path in self.times)
+
+
+class Phase(object):
+    """
+    A context manager that records the time spent in its block as one call
+    of the phase `name`, nested in the phases entered when the block starts.
+    """
+
+    __slots__ = ('statistics', 'name', 'path', 'startTime')
+
+    def __init__(self, statistics, name):
+        self.statistics = statistics
+        self.name = name
+        self.path = None
+        self.startTime = 0.0
+
+    def __enter__(self):
+        stack = self.statistics.stack
+        self.path = stack[-1] + '/' + self.name if stack else self.name
+        stack.append(self.path)
+        self.startTime = time.time()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        elapsed = time.time() - self.startTime
+        stack = self.statistics.stack
+        # Remove this phase even if an inner one was left open by an exception
+        while stack and stack.pop() != self.path:
+            pass
+        self.statistics.add(self.path, elapsed)
+        return False
+
+################################################################################
+
+# The phase statistics of this process
+statistics = PhaseStatistics()
+
+def phase(name):
+    """
+    Return a context manager that times its block as the phase `name`::
+
+        with phase('react'):
+            reactions = react(...)
+
+    """
+    return Phase(statistics, name)
+
+def timed(name):
+    """
+    Return a decorator that times each call of the decorated function as the
+    phase `name`.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with Phase(statistics, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, n=1):
+    """
+    Increment the counter `name` by `n`.
+    """
+    statistics.count(name, n)
+
+def startWorkerRecording(stack=None):
+    """
+    Start recording a task in a worker process, and return the state to pass
+    to :func:`stopWorkerRecording` at its end. The phases of the task are
+    nested in the phase paths `stack` of the parent process, if given, since
+    those that were entered when the worker was forked may have been left.
+    """
+    from rmgpy.molecule.vf2 import getIsomorphismCounts
+    if stack is not None:
+        statistics.stack = list(stack)
+    return statistics.copy(), getIsomorphismCounts()
+
+def stopWorkerRecording(start):
+    """
+    Return the phase statistics and the numbers of VF2 isomorphism calls and
+    searches recorded in this worker process since :func:`startWorkerRecording`
+    returned `start`, to pass to :func:`mergeWorkerRecords` in the parent.
+    """
+    from rmgpy.molecule.vf2 import getIsomorphismCounts
+    previous, (calls, searches) = start
+    currentCalls, currentSearches = getIsomorphismCounts()
+    return statistics.difference(previous), currentCalls - calls, currentSearches - searches
+
+def mergeWorkerRecords(records):
+    """
+    Add the `records` of a worker task returned by :func:`stopWorkerRecording`
+    to the phase statistics and VF2 isomorphism counts of this process.
+    """
+    from rmgpy.molecule.vf2 import addIsomorphismCounts
+    workerStatistics, calls, searches = records
+    statistics.merge(workerStatistics)
+    addIsomorphismCounts(calls, searches)
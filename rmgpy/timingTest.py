@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG - Reaction Mechanism Generator                                          #
+#                                                                             #
+# Copyright (c) 2002-2019 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+
+"""
+This script contains unit tests of the :mod:`rmgpy.timing` module.
+"""
+
+import unittest
+
+from rmgpy.timing import PhaseStatistics, Phase
+
+################################################################################
+
+class TestPhaseStatistics(unittest.TestCase):
+    """
+    Contains unit tests of the PhaseStatistics and Phase classes.
+    """
+
+    def setUp(self):
+        self.statistics = PhaseStatistics()
+
+    def testNestedPhases(self):
+        """
+        Test that nested phases are recorded under the path of the enclosing phases.
+        """
+        with Phase(self.statistics, 'enlarge'):
+            for i in range(3):
+                with Phase(self.statistics, 'react'):
+                    pass
+        with Phase(self.statistics, 'react'):
+            pass
+
+        self.assertEqual(self.statistics.calls, {'enlarge': 1, 'enlarge/react': 3, 'react': 1})
+        self.assertGreaterEqual(self.statistics.times['enlarge'], self.statistics.times['enlarge/react'])
+        self.assertEqual(self.statistics.stack, [])
+
+    def testPhaseWithException(self):
+        """
+        Test that a phase left by an exception is recorded and closed.
+        """
+        with self.assertRaises(ValueError):
+            with Phase(self.statistics, 'enlarge'):
+                raise ValueError
+        self.assertEqual(self.statistics.calls, {'enlarge': 1})
+        self.assertEqual(self.statistics.stack, [])
+
+    def testCount(self):
+        """
+        Test that counters are incremented and reset.
+        """
+        self.statistics.count('reactions/H_Abstraction', 4)
+        self.statistics.count('reactions/H_Abstraction')
+        self.assertEqual(self.statistics.counters, {'reactions/H_Abstraction': 5})
+        self.assertEqual(self.statistics.getPhases(), {})
+        self.statistics.reset()
+        self.assertEqual(self.statistics.counters, {})
+
+    def testDifferenceAndMerge(self):
+        """
+        Test that the statistics recorded since a copy are merged into other statistics.
+        """
+        with Phase(self.statistics, 'react'):
+            pass
+        self.statistics.count('reactions/H_Abstraction', 2)
+        previous = self.statistics.copy()
+        self.statistics.stack = ['enlarge']
+        with Phase(self.statistics, 'react'):
+            pass
+        self.statistics.count('reactions/H_Abstraction', 3)
+        self.statistics.count('reactions/R_Recombination')
+        difference = self.statistics.difference(previous)
+        self.assertEqual(difference.calls, {'enlarge/react': 1})
+        self.assertEqual(difference.times, {'enlarge/react': self.statistics.times['enlarge/react']})
+        self.assertEqual(difference.counters, {'reactions/H_Abstraction': 3, 'reactions/R_Recombination': 1})
+
+        statistics = PhaseStatistics()
+        statistics.add('enlarge/react', 1.0)
+        statistics.count('reactions/H_Abstraction')
+        statistics.merge(difference)
+        statistics.merge(difference)
+        self.assertEqual(statistics.calls, {'enlarge/react': 3})
+        self.assertAlmostEqual(statistics.times['enlarge/react'],
+                               1.0 + 2 * self.statistics.times['enlarge/react'])
+        self.assertEqual(statistics.counters, {'reactions/H_Abstraction': 7, 'reactions/R_Recombination': 2})
+
+################################################################################
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -0,0 +1,492 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG - Reaction Mechanism Generator                                          #
+#                                                                             #
+# Copyright (c) 2002-2019 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+
+"""
+This module contains a suite of benchmarks of the performance critical parts
+of RMG, and the functions to run them and to compare their results between
+versions of RMG.
+
+Each benchmark is a subclass of :class:`Benchmark` whose methods with names
+starting with ``time_`` are timed on a fixed workload prepared by its
+:meth:`setup` method, in the same way as for airspeed velocity (asv). The
+benchmarks only use the RMG database and the files shipped with RMG, so they
+can be run offline. The results are saved as a JSON file, which can be
+compared to the results of a previous version to detect performance
+regressions. The syntax is as follows:
+
+.. code-block:: bash
+
+    python benchmark.py [-o results.json] [-b PATTERN] [-c baseline.json] [-f FACTOR]
+
+"""
+
+import os
+import os.path
+import re
+import sys
+import json
+import time
+import timeit
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+
+import numpy
+
+from rmgpy import settings, getPath
+from rmgpy.molecule import Molecule
+from rmgpy.molecule.group import Group
+from rmgpy.species import Species
+
+################################################################################
+
+# The RMG database shared by the benchmarks that need it
+_database = None
+
+def getBenchmarkDatabase():
+    """
+    Return the RMG database used by the benchmarks, loading it the first time
+    this function is called. The thermo libraries and groups, the forbidden
+    structures, and the default kinetics families with their training
+    depository are loaded.
+    """
+    global _database
+    if _database is None:
+        from rmgpy.data.rmg import RMGDatabase
+        database = RMGDatabase()
+        database.load(
+            path=settings['database.directory'],
+            thermoLibraries=['primaryThermoLibrary'],
+            reactionLibraries=[],
+            seedMechanisms=[],
+            kineticsFamilies='default',
+            kineticsDepositories=['training'],
+            testing=True,
+            solvation=False,
+        )
+        database.loadForbiddenStructures(os.path.join(settings['database.directory'], 'forbiddenStructures.py'))
+        _database = database
+    return _database
+
+################################################################################
+
+class Benchmark(object):
+    """
+    The base class of all benchmarks. Each method of a subclass whose name
+    starts with ``time_`` is timed as a separate benchmark, on a new instance
+    prepared by :meth:`setup`. The class attributes are:
+
+    =================== ========================================================
+    Attribute           Description
+    =================== ========================================================
+    `number`            The number of calls of the method timed in each sample
+    `repeat`            The number of samples taken
+    =================== ========================================================
+
+    """
+
+    number = 1
+    repeat = 5
+
+    def setup(self):
+        """
+        Prepare the workload of the benchmark. This is not timed.
+        """
+        pass
+
+    def teardown(self):
+        """
+        Clean up after the benchmark. This is not timed.
+        """
+        pass
+
+
+class IsomorphismBenchmark(Benchmark):
+    """
+    Graph isomorphism checks with VF2 on the linear alkanes C1 to C20.
+    """
+
+    number = 10
+
+    def setup(self):
+        self.molecules = [Molecule().fromSMILES('C' * n) for n in range(1, 21)]
+        self.copies = [Molecule().fromSMILES('C' * n) for n in range(1, 21)]
+        self.group = Group().fromAdjacencyList("""
+1 *1 C u0 {2,S} {3,S}
+2 *2 H u0 {1,S}
+3    C u0 {1,S}
+""")
+
+    def time_isIsomorphic(self):
+        for molecule, copy in zip(self.molecules, self.copies):
+            molecule.isIsomorphic(copy)
+
+    def time_findSubgraphIsomorphisms(self):
+        for molecule in self.molecules:
+            molecule.findSubgraphIsomorphisms(self.group)
+
+
+class ResonanceBenchmark(Benchmark):
+    """
+    Generation of the resonance structures of aromatic molecules and radicals.
+    """
+
+    smiles = [
+        'c1ccccc1',
+        'Cc1ccccc1',
+        '[CH2]c1ccccc1',
+        '[c]1ccccc1',
+        'c1ccc2ccccc2c1',
+        'c1ccc2cc3ccccc3cc2c1',
+        'c1ccc2c(c1)ccc1ccccc12',
+        'c1cc2ccc3cccc4ccc(c1)c2c34',
+        '[CH2]c1cccc2ccccc12',
+    ]
+
+    def setup(self):
+        self.molecules = [Molecule().fromSMILES(smiles) for smiles in self.smiles]
+
+    def time_generate_resonance_structures(self):
+        for molecule in self.molecules:
+            molecule.copy(deep=True).generate_resonance_structures()
+
+
+class ThermoBenchmark(Benchmark):
+    """
+    Thermo estimation with the RMG database for a fixed set of species.
+    """
+
+    smiles = [
+        'C', 'CC', 'CCC', 'CCCC', 'CC(C)C', 'CCCCCCC', 'C=C', 'C=CC=C', 'C#C',
+        'CO', 'CCO', 'C=O', 'CC=O', 'OO', 'CC(=O)O', 'C1CC1', 'C1CCCCC1',
+        'c1ccccc1', 'Cc1ccccc1', '[CH3]', '[CH2]C', 'C[CH]C', '[OH]', 'CC[O]',
+        'CCO[O]', '[CH2]C=C', 'C1=CCC=C1', 'c1ccc2ccccc2c1',
+    ]
+
+    def setup(self):
+        self.database = getBenchmarkDatabase()
+        self.species = []
+        for smiles in self.smiles:
+            species = Species().fromSMILES(smiles)
+            species.generate_resonance_structures()
+            self.species.append(species)
+
+    def time_getThermoData(self):
+        for species in self.species:
+            self.database.thermo.getThermoData(species)
+
+
+class ReactionGenerationBenchmark(Benchmark):
+    """
+    Reaction generation from the default kinetics families for representative
+    unimolecular and bimolecular reactants.
+    """
+
+    smiles = [
+        ('CCCC',),
+        ('C=CC=C',),
+        ('CCO[O]',),
+        ('[CH3]', 'CC'),
+        ('[H]', 'C=CC'),
+        ('[OH]', 'CCO'),
+        ('[O][O]', 'C=CC'),
+        ('C=C', 'C=CC=C'),
+        ('[CH2]c1ccccc1', 'CC'),
+    ]
+
+    def setup(self):
+        self.database = getBenchmarkDatabase()
+        self.reactants = []
+        for smiles in self.smiles:
+            species = [Species().fromSMILES(s) for s in smiles]
+            for spec in species:
+                spec.generate_resonance_structures()
+            self.reactants.append(species)
+
+    def time_generate_reactions_from_families(self):
+        for reactants in self.reactants:
+            self.database.kinetics.generate_reactions_from_families(reactants)
+
+
+class ChemkinBenchmark(Benchmark):
+    """
+    Loading and saving of a Chemkin model and its species dictionary. The
+    model used is given by the `chemkinFile` and `dictionaryFile` class
+    attributes.
+    """
+
+    chemkinFile = os.path.join(settings['test_data.directory'], 'chemkin', 'chemkin_py', 'NC', 'chem.inp')
+    dictionaryFile = os.path.join(settings['test_data.directory'], 'chemkin', 'chemkin_py', 'NC', 'species_dictionary.txt')
+
+    def setup(self):
+        from rmgpy.chemkin import loadChemkinFile
+        self.species, self.reactions = loadChemkinFile(self.chemkinFile, self.dictionaryFile)
+        self.directory = tempfile.mkdtemp()
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def time_loadChemkinFile(self):
+        from rmgpy.chemkin import loadChemkinFile
+        loadChemkinFile(self.chemkinFile, self.dictionaryFile)
+
+    def time_saveChemkinFile(self):
+        from rmgpy.chemkin import saveChemkinFile, saveSpeciesDictionary
+        saveChemkinFile(os.path.join(self.directory, 'chem.inp'), self.species, self.reactions)
+        saveSpeciesDictionary(os.path.join(self.directory, 'species_dictionary.txt'), self.species)
+
+
+class SimpleReactorBenchmark(Benchmark):
+    """
+    Evaluation of the residual and the Jacobian of a :class:`SimpleReactor`
+    for a Chemkin model, with all of the species and reactions of the model
+    in the core. The model used is given by the `chemkinFile` and
+    `dictionaryFile` class attributes.
+    """
+
+    number = 100
+    chemkinFile = ChemkinBenchmark.chemkinFile
+    dictionaryFile = ChemkinBenchmark.dictionaryFile
+
+    def setup(self):
+        from rmgpy.chemkin import loadChemkinFile
+        from rmgpy.solver.simple import SimpleReactor
+        species, reactions = loadChemkinFile(self.chemkinFile, self.dictionaryFile)
+        reactive = [spec for spec in species if spec.reactive]
+        initialMoleFractions = dict((spec, 1.0 / len(reactive[:5])) for spec in reactive[:5])
+        self.reactionSystem = SimpleReactor(1000.0, 1.0e5, initialMoleFractions=initialMoleFractions,
+                                            nSims=1, termination=[])
+        self.reactionSystem.initializeModel(species, reactions, [], [])
+        self.y = self.reactionSystem.y.copy()
+        self.dydt = self.reactionSystem.residual(0.0, self.y, numpy.zeros(self.y.shape))[0]
+
+    def time_residual(self):
+        self.reactionSystem.residual(0.0, self.y, numpy.zeros(self.y.shape))
+
+    def time_jacobian(self):
+        self.reactionSystem.jacobian(0.0, self.y, self.dydt, 0.0)
+
+
+class NetworkBenchmark(Benchmark):
+    """
+    Calculation of the phenomenological rate coefficients of a pressure
+    dependent network defined in an Arkane input file, with the temperatures,
+    pressures and method of its pressure dependence job. The input file used
+    is given by the `inputFile` class attribute.
+    """
+
+    repeat = 3
+    inputFile = os.path.join(settings['test_data.directory'], 'arkane', 'tst1', 'pdep_sa.py')
+
+    def setup(self):
+        from arkane.input import loadInputFile
+        from arkane.pdep import PressureDependenceJob
+        jobList = loadInputFile(self.inputFile)[0]
+        self.job = [job for job in jobList if isinstance(job, PressureDependenceJob)][0]
+        self.job.initialize()
+
+    def time_calculateRateCoefficients(self):
+        self.job.network.calculateRateCoefficients(self.job.Tlist.value_si, self.job.Plist.value_si, self.job.method)
+
+
+benchmarkClasses = [
+    IsomorphismBenchmark,
+    ResonanceBenchmark,
+    ThermoBenchmark,
+    ReactionGenerationBenchmark,
+    ChemkinBenchmark,
+    SimpleReactorBenchmark,
+    NetworkBenchmark,
+]
+
+################################################################################
+
+def runBenchmark(benchmarkClass, methodName):
+    """
+    Time the method `methodName` of the benchmark class `benchmarkClass` and
+    return a dict of the results. The method is called once before it is
+    timed, so one-time costs such as caches being filled are excluded. The
+    times per call of each sample are given in s. If the benchmark fails,
+    the error is returned instead of the times.
+    """
+    benchmark = benchmarkClass()
+    try:
+        benchmark.setup()
+        try:
+            method = getattr(benchmark, methodName)
+            method()
+            samples = []
+            for i in range(benchmark.repeat):
+                startTime = timeit.default_timer()
+                for j in range(benchmark.number):
+                    method()
+                samples.append((timeit.default_timer() - startTime) / benchmark.number)
+        finally:
+            benchmark.teardown()
+    except Exception as e:
+        logging.exception('Benchmark {0}.{1} failed.'.format(benchmarkClass.__name__, methodName))
+        return {'error': '{0}: {1}'.format(e.__class__.__name__, e)}
+
+    return {
+        'number': benchmark.number,
+        'repeat': benchmark.repeat,
+        'samples': samples,
+        'min': min(samples),
+        'median': float(numpy.median(samples)),
+    }
+
+def runBenchmarks(classes=None, pattern=None):
+    """
+    Run the benchmarks of the given benchmark `classes` (all of them by
+    default) whose names, formatted as ``ClassName.time_method``, match the
+    regular expression `pattern`, and return a dict of their results keyed
+    by name.
+    """
+    if classes is None:
+        classes = benchmarkClasses
+    results = {}
+    for benchmarkClass in classes:
+        for methodName in sorted(dir(benchmarkClass)):
+            if not methodName.startswith('time_'):
+                continue
+            name = '{0}.{1}'.format(benchmarkClass.__name__, methodName)
+            if pattern is not None and not re.search(pattern, name):
+                continue
+            logging.info('Running benchmark {0}...'.format(name))
+            results[name] = runBenchmark(benchmarkClass, methodName)
+            if 'error' not in results[name]:
+                logging.info('    {0:.4g} s per call'.format(results[name]['min']))
+    return results
+
+def getEnvironment():
+    """
+    Return a dict describing the version of RMG and of its database, and the
+    machine the benchmarks are run on.
+    """
+    from rmgpy import __version__
+    from rmgpy.rmg.main import RMG
+    rmg = RMG()
+    commit, date = rmg.getGitCommit(getPath())
+    databaseCommit, databaseDate = rmg.getGitCommit(settings['database.directory'])
+    return {
+        'version': __version__,
+        'commit': commit,
+        'databaseCommit': databaseCommit,
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+def saveResults(path, results, environment=None):
+    """
+    Save the benchmark `results` and the `environment` they were obtained in
+    to the JSON file at `path`.
+    """
+    with open(path, 'w') as f:
+        json.dump({'environment': environment or {}, 'benchmarks': results}, f, indent=1, sort_keys=True)
+
+def loadResults(path):
+    """
+    Return the benchmark results and the environment saved to the JSON file at
+    `path` by :func:`saveResults`.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return data['benchmarks'], data['environment']
+
+def compareResults(baseline, results, factor=1.2):
+    """
+    Compare the benchmark `results` to the `baseline` results, and return a
+    list of (name, baseline time, time) tuples for the benchmarks whose
+    minimum time per call increased by more than `factor` times. Benchmarks
+    that failed or are missing from either set of results are ignored.
+    """
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline or 'error' in baseline[name] or 'error' in results[name]:
+            continue
+        if results[name]['min'] > factor * baseline[name]['min']:
+            regressions.append((name, baseline[name]['min'], results[name]['min']))
+    return regressions
+
+################################################################################
+
+def parseArguments():
+
+    parser = argparse.ArgumentParser(description='Run the RMG benchmark suite.')
+    parser.add_argument('-o', '--output', metavar='OUTPUT', type=str, default='benchmarks.json',
+        help='JSON file to save the results to (default: benchmarks.json)')
+    parser.add_argument('-b', '--bench', metavar='PATTERN', type=str, default=None,
+        help='only run the benchmarks whose names match this regular expression')
+    parser.add_argument('-c', '--compare', metavar='BASELINE', type=str, default=None,
+        help='JSON file of previous results to check for regressions against')
+    parser.add_argument('-f', '--factor', metavar='FACTOR', type=float, default=1.2,
+        help='slowdown beyond which a benchmark is reported as a regression (default: 1.2)')
+    parser.add_argument('--model', metavar=('CHEMKIN', 'DICTIONARY'), type=str, nargs=2, default=None,
+        help='Chemkin file and species dictionary of the model used by the Chemkin and reactor benchmarks')
+    parser.add_argument('--network', metavar='INPUT', type=str, default=None,
+        help='Arkane input file of the network used by the network benchmark')
+
+    return parser.parse_args()
+
+def main():
+    args = parseArguments()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.model is not None:
+        chemkinFile, dictionaryFile = [os.path.abspath(path) for path in args.model]
+        for benchmarkClass in [ChemkinBenchmark, SimpleReactorBenchmark]:
+            benchmarkClass.chemkinFile = chemkinFile
+            benchmarkClass.dictionaryFile = dictionaryFile
+    if args.network is not None:
+        NetworkBenchmark.inputFile = os.path.abspath(args.network)
+
+    results = runBenchmarks(pattern=args.bench)
+    saveResults(args.output, results, getEnvironment())
+    logging.info('Saved benchmark results to {0}'.format(args.output))
+
+    if args.compare is not None:
+        baseline = loadResults(args.compare)[0]
+        regressions = compareResults(baseline, results, args.factor)
+        for name, baselineTime, newTime in regressions:
+            logging.warning('Regression in {0}: {1:.4g} s -> {2:.4g} s per call ({3:.2f}x)'.format(
+                name, baselineTime, newTime, newTime / baselineTime))
+        if regressions:
+            sys.exit(1)
+        logging.info('No regressions found compared to {0}'.format(args.compare))
+
+if __name__ == '__main__':
+    main()
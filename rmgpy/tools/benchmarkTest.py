@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG - Reaction Mechanism Generator                                          #
+#                                                                             #
+# Copyright (c) 2002-2019 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+
+"""
+This script contains unit tests of the :mod:`rmgpy.tools.benchmark` module.
+"""
+
+import unittest
+import os
+import os.path
+import shutil
+import tempfile
+from nose.plugins.attrib import attr
+
+from rmgpy.tools.benchmark import *
+
+################################################################################
+
+class CountingBenchmark(Benchmark):
+    """
+    A benchmark that counts the calls of its methods.
+    """
+
+    number = 3
+    repeat = 2
+    calls = 0
+
+    def time_count(self):
+        CountingBenchmark.calls += 1
+
+    def time_fail(self):
+        raise ValueError('failed on purpose')
+
+
+class TestBenchmark(unittest.TestCase):
+    """
+    Contains unit tests of running, saving and comparing benchmarks.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testRunBenchmarks(self):
+        """
+        Test that each time_ method is run as a benchmark, and that failures are recorded.
+        """
+        CountingBenchmark.calls = 0
+        results = runBenchmarks([CountingBenchmark])
+        self.assertEqual(sorted(results), ['CountingBenchmark.time_count', 'CountingBenchmark.time_fail'])
+        # One call before timing, then `repeat` samples of `number` calls
+        self.assertEqual(CountingBenchmark.calls, 7)
+        self.assertEqual(len(results['CountingBenchmark.time_count']['samples']), 2)
+        self.assertEqual(results['CountingBenchmark.time_fail'], {'error': 'ValueError: failed on purpose'})
+
+        results = runBenchmarks([CountingBenchmark], pattern='time_count')
+        self.assertEqual(list(results), ['CountingBenchmark.time_count'])
+
+    def testSaveAndCompareResults(self):
+        """
+        Test that results can be saved and loaded, and that regressions are found.
+        """
+        baseline = {
+            'A.time_a': {'min': 1.0},
+            'A.time_b': {'min': 1.0},
+            'A.time_c': {'error': 'ValueError: '},
+        }
+        results = {
+            'A.time_a': {'min': 1.1},
+            'A.time_b': {'min': 1.5},
+            'A.time_c': {'min': 5.0},
+            'A.time_d': {'min': 5.0},
+        }
+        path = os.path.join(self.directory, 'benchmarks.json')
+        saveResults(path, results, {'version': '1.0'})
+        loaded, environment = loadResults(path)
+        self.assertEqual(loaded, results)
+        self.assertEqual(environment, {'version': '1.0'})
+
+        self.assertEqual(compareResults(baseline, results), [('A.time_b', 1.0, 1.5)])
+        self.assertEqual(compareResults(baseline, results, factor=2.0), [])
+
+
+@attr('functional')
+class TestBenchmarkSuite(unittest.TestCase):
+    """
+    Contains functional tests of the benchmarks that do not need the RMG database.
+    """
+
+    def testBenchmarkSuite(self):
+        """
+        Test that the benchmarks run without errors.
+        """
+        classes = [IsomorphismBenchmark, ResonanceBenchmark, ChemkinBenchmark, SimpleReactorBenchmark, NetworkBenchmark]
+        results = runBenchmarks(classes)
+        self.assertEqual(len(results), 8)
+        for name, result in results.iteritems():
+            self.assertNotIn('error', result, name)
+            self.assertGreater(result['min'], 0.0)
+
+################################################################################
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -33,6 +33,10 @@ import shutil
 from functools import wraps
 import time
 import logging
+import traceback
+import cPickle
+
+from rmgpy.exceptions import WorkerError
 
 
 class Subject(object):
@@ -120,6 +124,50 @@ def makeOutputSubdirectory(outputDirectory, folder):
         shutil.rmtree(dir)
     os.mkdir(dir)
 
+def getGitCommit(modulePath):
+    """
+    Return the hash and date of the latest commit of the git repository that
+    `modulePath` is found in, or empty strings if it is not in a repository.
+    """
+    import subprocess
+    if os.path.exists(os.path.join(modulePath,'..','.git')):
+        try:
+            return subprocess.check_output(['git', 'log',
+                                            '--format=%H%n%cd', '-1'],
+                                            cwd=modulePath).splitlines()
+        except:
+            return '', ''
+    else:
+        return '', ''
+
+def getWorkerException(e):
+    """
+    Return a tuple of the exception `e` being handled in a worker process and
+    its formatted traceback, to be returned to the parent process and raised
+    there with :func:`raiseWorkerException`. If `e` cannot be pickled and
+    unpickled, ``None`` is returned in its place.
+    """
+    formatted = traceback.format_exc()
+    try:
+        cPickle.loads(cPickle.dumps(e, cPickle.HIGHEST_PROTOCOL))
+    except Exception:
+        e = None
+    return e, formatted
+
+def raiseWorkerException(error):
+    """
+    Raise the exception of a worker process returned by
+    :func:`getWorkerException` as `error`. The traceback from the worker is
+    logged at the debug level, since the raised exception does not carry it.
+    If the exception could not be passed back, a :class:`WorkerError` with the
+    traceback as its message is raised instead.
+    """
+    e, formatted = error
+    if e is None:
+        raise WorkerError('Error in a worker process:\n{0}'.format(formatted))
+    logging.debug('Traceback of the error in a worker process:\n{0}'.format(formatted))
+    raise e
+
 def timefn(fn):
     @wraps(fn)
     def measure_time(*args, **kwargs):
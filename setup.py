@@ -199,6 +199,7 @@ ext_modules = list(OrderedDict.fromkeys(ext_modules))
 
 scripts=['Arkane.py',
          'rmg.py',
+         'scripts/benchmark.py',
          'scripts/checkModels.py',
          'scripts/convertFAME.py',
          'scripts/diffModels.py',